@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+import json
+
+from apps.analytics.services.parquet_export import ParquetExporter, EXPORT_TABLES
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporte en Parquet (zstd) les lignes des tables analytics arrivées "
+        "depuis le dernier export (watermarks dans manifest.json)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', action='append', choices=sorted(EXPORT_TABLES),
+                            help='Table à exporter (répétable, toutes par défaut)')
+        parser.add_argument('--output', default=None,
+                            help='Répertoire de destination (PARQUET_EXPORT_DIR)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Lignes par lot / row group (PARQUET_EXPORT_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        exporter = ParquetExporter(
+            export_dir=options['output'],
+            batch_size=options['batch_size']
+        )
+
+        try:
+            report = exporter.run(tables=options['table'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(report, indent=2, default=str))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from shared.shared.utils.prisma_client import worker_async_to_sync
+import json
+
+from apps.analytics.services import PartitionMaintenance
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée les partitions mensuelles à venir, détache/supprime celles hors "
+        "rétention et vérifie le partition pruning"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--premake', type=int, default=None,
+                            help='Nombre de mois futurs à créer (PARTITION_PREMAKE_MONTHS)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Afficher les actions sans les exécuter')
+        parser.add_argument('--verify', action='store_true',
+                            help='Vérifier le pruning avec EXPLAIN')
+        parser.add_argument('--keep-detached', action='store_true',
+                            help='Détacher sans supprimer les partitions expirées')
+
+    def handle(self, *args, **options):
+        maintenance = PartitionMaintenance(
+            premake_months=options['premake'],
+            drop_expired=False if options['keep_detached'] else None
+        )
+
+        report = worker_async_to_sync(maintenance.run)(
+            dry_run=options['dry_run'],
+            verify=options['verify']
+        )
+
+        self.stdout.write(json.dumps(report, indent=2, default=str))
+
+        if options['verify']:
+            unpruned = [
+                table for table, result in report.items()
+                if 'pruning' in result and not result['pruning']['pruned']
+            ]
+            if unpruned:
+                self.stderr.write(self.style.WARNING(f"No partition pruning on: {', '.join(unpruned)}"))
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from datetime import date, datetime
+from django.conf import settings
+from datetime import date, datetime, timedelta
 
 
 # ============ Course Views Serializers ============
@@ -12,6 +13,9 @@ class CourseViewSerializer(serializers.Serializer):
     user_agent = serializers.CharField(source='userAgent', required=False, allow_null=True)
     country = serializers.CharField(required=False, allow_null=True)
     city = serializers.CharField(required=False, allow_null=True)
+    device = serializers.CharField(read_only=True, allow_null=True)
+    browser = serializers.CharField(read_only=True, allow_null=True)
+    os = serializers.CharField(read_only=True, allow_null=True)
     referrer = serializers.URLField(required=False, allow_null=True)
     source = serializers.CharField(required=False, allow_null=True)
     viewed_at = serializers.DateTimeField(source='viewedAt', read_only=True)
@@ -63,6 +67,43 @@ class VideoEventSerializer(serializers.Serializer):
     quality = serializers.CharField(required=False, allow_null=True)
 
 
+class VideoEventBatchItemSerializer(serializers.Serializer):
+    lesson_id = serializers.UUIDField()
+    student_id = serializers.UUIDField()
+    event_type = serializers.ChoiceField(
+        choices=['pause', 'rewind', 'speed_change', 'quality', 'watch_time', 'completion']
+    )
+    quality = serializers.CharField(required=False, allow_null=True)
+    watch_time = serializers.IntegerField(required=False, min_value=0)
+    position = serializers.IntegerField(required=False, min_value=0)
+    completion_rate = serializers.FloatField(required=False, min_value=0.0, max_value=100.0)
+    
+    REQUIRED_FIELDS = {
+        'quality': ['quality'],
+        'watch_time': ['watch_time', 'position'],
+        'completion': ['completion_rate'],
+    }
+    
+    def validate(self, attrs):
+        missing = [
+            field for field in self.REQUIRED_FIELDS.get(attrs['event_type'], [])
+            if attrs.get(field) is None
+        ]
+        if missing:
+            raise serializers.ValidationError({
+                field: f"required for {attrs['event_type']} event" for field in missing
+            })
+        return attrs
+
+
+class VideoEventBatchSerializer(serializers.Serializer):
+    events = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        max_length=1000
+    )
+
+
 # ============ Search Log Serializers ============
 
 class SearchLogSerializer(serializers.Serializer):
@@ -124,9 +165,55 @@ class CourseAnalyticsSerializer(serializers.Serializer):
     enrollments = serializers.IntegerField()
     completions = serializers.IntegerField()
     avg_rating = serializers.FloatField(source='avgRating', allow_null=True)
+    rating_count = serializers.IntegerField(source='ratingCount', read_only=True)
     created_at = serializers.DateTimeField(source='createdAt', read_only=True)
 
 
+class CourseBatchStatsSerializer(serializers.Serializer):
+    course_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        min_length=1,
+        max_length=settings.COURSE_BATCH_STATS_MAX_COURSES
+    )
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        end_date = data.get('end_date') or date.today()
+        start_date = data.get('start_date') or end_date - timedelta(days=29)
+        
+        if start_date > end_date:
+            raise serializers.ValidationError('start_date must not be after end_date')
+        if (end_date - start_date).days >= settings.COURSE_BATCH_STATS_MAX_DAYS:
+            raise serializers.ValidationError(
+                f'Date range is limited to {settings.COURSE_BATCH_STATS_MAX_DAYS} days'
+            )
+        
+        return {**data, 'start_date': start_date, 'end_date': end_date}
+
+
+class CourseFunnelQuerySerializer(serializers.Serializer):
+    dimension = serializers.ChoiceField(
+        choices=['none', 'source', 'country', 'referrer'],
+        default='none'
+    )
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        end_date = data.get('end_date') or date.today()
+        start_date = data.get('start_date') or end_date - timedelta(days=29)
+        
+        if start_date > end_date:
+            raise serializers.ValidationError('start_date must not be after end_date')
+        if (end_date - start_date).days >= settings.COURSE_FUNNEL_MAX_DAYS:
+            raise serializers.ValidationError(
+                f'Date range is limited to {settings.COURSE_FUNNEL_MAX_DAYS} days'
+            )
+        
+        return {**data, 'start_date': start_date, 'end_date': end_date}
+
+
 class UpdateCourseAnalyticsSerializer(serializers.Serializer):
     course_id = serializers.UUIDField()
     date = serializers.DateField(required=False)
@@ -4,6 +4,19 @@ from .search_log_service import SearchLogService
 from .user_activity_service import UserActivityService
 from .revenue_report_service import RevenueReportService
 from .course_analytics_service import CourseAnalyticsService
+from .course_funnel_service import CourseFunnelService
+from .video_event_buffer import VideoEventBuffer, video_event_buffer
+from .course_view_queue import CourseViewQueue, course_view_queue
+from .course_viewers import CourseViewerCounter, course_viewer_counter, viewer_fingerprint
+from .analytics_cache import AnalyticsCache, analytics_cache
+from .top_courses_ranking import TopCoursesRanking, top_courses_ranking
+from .partition_maintenance import PartitionMaintenance
+from .trending_searches import SpaceSaving, TrendingSearchTracker, trending_searches
+from .engagement_sketch import EngagementSketch
+from .active_users import ActiveUserBitmaps, active_user_bitmaps
+
+# ParquetExporter (parquet_export) n'est pas réexporté : pyarrow n'est
+# chargé que par la commande export_parquet et la tâche celery
 
 __all__ = [
     'CourseViewService',
@@ -12,4 +25,23 @@ __all__ = [
     'UserActivityService',
     'RevenueReportService',
     'CourseAnalyticsService',
+    'CourseFunnelService',
+    'VideoEventBuffer',
+    'video_event_buffer',
+    'CourseViewQueue',
+    'course_view_queue',
+    'CourseViewerCounter',
+    'course_viewer_counter',
+    'viewer_fingerprint',
+    'AnalyticsCache',
+    'analytics_cache',
+    'TopCoursesRanking',
+    'top_courses_ranking',
+    'PartitionMaintenance',
+    'SpaceSaving',
+    'TrendingSearchTracker',
+    'trending_searches',
+    'EngagementSketch',
+    'ActiveUserBitmaps',
+    'active_user_bitmaps',
 ]
\ No newline at end of file
@@ -0,0 +1,301 @@
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+from datetime import date, datetime, timedelta
+from django.conf import settings
+from shared.shared.utils.prisma_client import get_prisma_client
+import json
+import logging
+import time
+import uuid
+
+import redis.asyncio as aioredis
+
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+PERIOD_DAYS = {'day': 1, 'week': 7, 'month': 30}
+
+# Marqueur (rollup_watermarks) posé par backfill_active_users : tant qu'il
+# est absent, le suivi en direct n'attribue pas d'identifiants
+ACTIVE_USER_BACKFILL_JOB = 'active_user_bitmaps'
+
+DENSE_IDS_SQL = """
+SELECT "userId", "denseId"
+FROM "active_user_ids"
+WHERE "userId" IN (SELECT jsonb_array_elements_text($1::jsonb))
+"""
+
+# Les lignes en conflit ne sont pas retournées : attribuées par un autre
+# worker entre notre lecture et l'INSERT (relues ensuite)
+ASSIGN_DENSE_IDS_SQL = """
+INSERT INTO "active_user_ids" ("userId")
+SELECT jsonb_array_elements_text($1::jsonb)
+ON CONFLICT ("userId") DO NOTHING
+RETURNING "userId", "denseId"
+"""
+
+
+def period_start(day: date, period: str) -> date:
+    """Début de la période contenant `day` (lundi pour une semaine, 1er du mois)"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start: date, period: str) -> date:
+    if period == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=PERIOD_DAYS[period])
+
+
+class ActiveUserBitmaps:
+    """
+    Utilisateurs actifs par jour dans des bitmaps Redis.
+
+    Chaque userId reçoit un identifiant entier dense (séquence Postgres de la
+    table active_user_ids, dans l'ordre de première activité) : la
+    correspondance survit à une perte de Redis. Le bitmap d'un jour est compact
+    (125 Ko pour un million d'utilisateurs, bien moins en pratique car Redis
+    n'alloue que jusqu'au plus grand identifiant actif). Les unions (WAU,
+    MAU, cohortes) et intersections (rétention) sont faites par BITOP côté
+    Redis, le comptage par BITCOUNT : aucune lecture de user_activity.
+
+    Le bitmap `new:<jour>` marque les utilisateurs dont c'est la première
+    activité (cohortes d'acquisition). Il n'est juste que si l'historique a
+    été rejoué avant le suivi en direct : backfill_active_users pose le
+    marqueur ACTIVE_USER_BACKFILL_JOB, sans lequel is_ready() reste faux.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        retention_days: Optional[int] = None,
+        prefix: str = 'analytics:active_users'
+    ):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.retention_days = retention_days or getattr(
+            settings, 'ACTIVE_USER_BITMAP_RETENTION_DAYS', 400
+        )
+        self.prefix = prefix
+        self.max_cached_ids = 100000
+        self.ready_check_seconds = 60.0
+        self._client: Optional[aioredis.Redis] = None
+        self._db = None
+        # Les identifiants denses ne changent jamais : cache local sans expiration
+        self._ids: Dict[str, int] = {}
+        # Marqueur de backfill : vrai une fois pour toutes, faux relu toutes
+        # les `ready_check_seconds`
+        self._ready = False
+        self._ready_checked_at = float('-inf')
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self._client or get_async_redis(self.redis_url)
+
+    async def get_db(self):
+        return self._db or await get_prisma_client()
+
+    async def is_ready(self) -> bool:
+        """Backfill effectué : le suivi en direct peut attribuer des identifiants"""
+        now = time.monotonic()
+        if not self._ready and now - self._ready_checked_at >= self.ready_check_seconds:
+            self._ready_checked_at = now
+            db = await self.get_db()
+            self._ready = await db.rollupwatermark.find_unique(
+                where={'name': ACTIVE_USER_BACKFILL_JOB}
+            ) is not None
+        return self._ready
+
+    async def mark_ready(self):
+        """Poser le marqueur de backfill (fin de backfill_active_users)"""
+        db = await self.get_db()
+        now = datetime.now()
+        await db.rollupwatermark.upsert(
+            where={'name': ACTIVE_USER_BACKFILL_JOB},
+            data={
+                'create': {'name': ACTIVE_USER_BACKFILL_JOB, 'watermark': now},
+                'update': {'watermark': now},
+            }
+        )
+        self._ready = True
+
+    async def clear_days(self, start: date, end: date):
+        """Supprimer les bitmaps des jours [start, end] (reconstruction)"""
+        keys = self._day_keys('day', start, end) + self._day_keys('new', start, end)
+        pipeline = self.client.pipeline(transaction=False)
+        for i in range(0, len(keys), 1000):
+            pipeline.delete(*keys[i:i + 1000])
+        await pipeline.execute()
+
+    async def add(self, user_id: str, day: date):
+        """Marquer un utilisateur actif ce jour-là"""
+        await self.add_many([(user_id, day)])
+
+    async def add_many(self, activities: Iterable[Tuple[str, date]]) -> int:
+        """Marquer un lot de couples (userId, jour) ; retourne le nombre de couples"""
+        by_day: Dict[date, set] = {}
+        for user_id, day in activities:
+            by_day.setdefault(day, set()).add(user_id)
+        if not by_day:
+            return 0
+
+        # Jours dans l'ordre : un nouvel utilisateur est daté de son premier jour
+        first_day = {}
+        for day in sorted(by_day):
+            for user_id in by_day[day]:
+                first_day.setdefault(user_id, day)
+
+        ids, new_users = await self.dense_ids(list(first_day))
+
+        ttl = self.retention_days * 86400
+        pipeline = self.client.pipeline(transaction=False)
+        for day, user_ids in by_day.items():
+            key = self._key('day', day)
+            for user_id in user_ids:
+                pipeline.setbit(key, ids[user_id], 1)
+            pipeline.expire(key, ttl)
+        for user_id in new_users:
+            key = self._key('new', first_day[user_id])
+            pipeline.setbit(key, ids[user_id], 1)
+            pipeline.expire(key, ttl)
+        await pipeline.execute()
+
+        return sum(len(user_ids) for user_ids in by_day.values())
+
+    async def dense_ids(self, user_ids: List[str]) -> Tuple[Dict[str, int], List[str]]:
+        """
+        Identifiants denses des utilisateurs, attribués s'ils n'existent pas.
+        Retourne (userId -> identifiant, utilisateurs nouvellement attribués).
+
+        Seuls les utilisateurs absents de active_user_ids sont insérés (un
+        INSERT en conflit consommerait quand même une valeur de séquence).
+        En cas de course entre deux workers, le perdant relit l'identifiant
+        du gagnant.
+        """
+        ids = {user_id: self._ids[user_id] for user_id in user_ids if user_id in self._ids}
+        missing = [user_id for user_id in user_ids if user_id not in ids]
+        new_users: List[str] = []
+
+        if missing:
+            db = await self.get_db()
+            for row in await db.query_raw(DENSE_IDS_SQL, json.dumps(missing)):
+                ids[row['userId']] = row['denseId']
+
+            unassigned = [user_id for user_id in missing if user_id not in ids]
+            if unassigned:
+                for row in await db.query_raw(ASSIGN_DENSE_IDS_SQL, json.dumps(unassigned)):
+                    ids[row['userId']] = row['denseId']
+                    new_users.append(row['userId'])
+
+                lost = [user_id for user_id in unassigned if user_id not in ids]
+                if lost:
+                    for row in await db.query_raw(DENSE_IDS_SQL, json.dumps(lost)):
+                        ids[row['userId']] = row['denseId']
+
+            if len(self._ids) + len(missing) > self.max_cached_ids:
+                self._ids.clear()
+            self._ids.update((user_id, ids[user_id]) for user_id in missing)
+
+        return ids, new_users
+
+    async def active_counts(self, day: date, days: int = 30) -> List[Dict[str, Any]]:
+        """DAU, WAU et MAU de chacun des `days` jours finissant à `day`"""
+        start = day - timedelta(days=days - 1)
+        tmp = self._tmp_key()
+
+        pipeline = self.client.pipeline(transaction=False)
+        for i in range(days):
+            current = start + timedelta(days=i)
+            pipeline.bitcount(self._key('day', current))
+            for window in (7, 30):
+                pipeline.bitop('OR', tmp, *self._day_keys('day', current - timedelta(days=window - 1), current))
+                pipeline.bitcount(tmp)
+        pipeline.delete(tmp)
+        results = await pipeline.execute()
+
+        series = []
+        for i in range(days):
+            dau, _, wau, _, mau = results[i * 5:i * 5 + 5]
+            series.append({
+                'date': (start + timedelta(days=i)).isoformat(),
+                'dau': dau,
+                'wau': wau,
+                'mau': mau,
+                'stickiness': round(dau / mau, 4) if mau else 0.0,
+            })
+        return series
+
+    async def retention(
+        self,
+        start: date,
+        periods: int,
+        period: str = 'week',
+        cohort: str = 'active'
+    ) -> Dict[str, Any]:
+        """
+        Matrice de rétention : pour la cohorte de chaque période (utilisateurs
+        actifs, ou nouveaux si cohort='new'), nombre d'entre eux actifs k
+        périodes plus tard.
+        """
+        if period not in PERIOD_DAYS:
+            raise ValueError(f"Unknown period: {period}")
+        if cohort not in ('active', 'new'):
+            raise ValueError(f"Unknown cohort: {cohort}")
+
+        bounds = [period_start(start, period)]
+        for _ in range(periods):
+            bounds.append(next_period(bounds[-1], period))
+
+        tmp = self._tmp_key()
+        active = [f"{tmp}:active:{i}" for i in range(periods)]
+        cohorts = active if cohort == 'active' else [f"{tmp}:new:{i}" for i in range(periods)]
+
+        pipeline = self.client.pipeline(transaction=False)
+        for i in range(periods):
+            last_day = bounds[i + 1] - timedelta(days=1)
+            pipeline.bitop('OR', active[i], *self._day_keys('day', bounds[i], last_day))
+            if cohort == 'new':
+                pipeline.bitop('OR', cohorts[i], *self._day_keys('new', bounds[i], last_day))
+        for i in range(periods):
+            pipeline.bitcount(cohorts[i])
+            for k in range(1, periods - i):
+                pipeline.bitop('AND', f"{tmp}:and", cohorts[i], active[i + k])
+                pipeline.bitcount(f"{tmp}:and")
+        pipeline.delete(*set(active + cohorts), f"{tmp}:and")
+        results = await pipeline.execute()
+
+        # Résultats des BITCOUNT (les BITOP retournent une longueur)
+        position = periods * (2 if cohort == 'new' else 1)
+        rows = []
+        for i in range(periods):
+            size = results[position]
+            position += 1
+            retained = [size]
+            for _ in range(1, periods - i):
+                retained.append(results[position + 1])
+                position += 2
+            rows.append({
+                'start': bounds[i].isoformat(),
+                'size': size,
+                'retained': retained,
+                'retention': [round(count / size, 4) if size else 0.0 for count in retained],
+            })
+
+        return {'period': period, 'cohort': cohort, 'cohorts': rows}
+
+    def _day_keys(self, kind: str, start: date, end: date) -> List[str]:
+        return [
+            self._key(kind, start + timedelta(days=i))
+            for i in range((end - start).days + 1)
+        ]
+
+    def _tmp_key(self) -> str:
+        return f"{self.prefix}:tmp:{uuid.uuid4().hex}"
+
+    def _key(self, kind: str, day: Optional[date] = None) -> str:
+        return f"{self.prefix}:{kind}:{day.isoformat()}" if day else f"{self.prefix}:{kind}"
+
+
+active_user_bitmaps = ActiveUserBitmaps()
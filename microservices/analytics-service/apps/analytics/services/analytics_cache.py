@@ -0,0 +1,379 @@
+from typing import Optional, Dict, Any, Iterable, Callable, Awaitable, Set, Tuple
+from django.conf import settings
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import redis
+import redis.asyncio as aioredis
+
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# TTL par défaut (secondes) des endpoints mis en cache, surchargés par ANALYTICS_CACHE_TTLS
+DEFAULT_TTLS = {
+    'course_stats': 30,
+    'top_courses': 60,
+    'daily_revenue': 300,
+    'monthly_revenue': 300,
+    'popular_searches': 60,
+    'lesson_engagement': 30,
+    'lesson_heatmap': 300,
+    'active_users': 60,
+    'retention': 300,
+    'course_funnel': 300,
+}
+
+MISSING = object()
+
+
+class AnalyticsCache:
+    """
+    Cache de lecture des endpoints analytics.
+
+    Deux niveaux : un L1 en mémoire par worker (durée courte, au plus
+    `l1_seconds`) et un L2 Redis partagé (TTL propre à chaque endpoint).
+    Les requêtes concurrentes sur une même clé ne déclenchent qu'un calcul :
+    dans le worker elles attendent la même tâche asyncio, entre workers un
+    verrou Redis (SET NX) désigne celui qui calcule, les autres attendent
+    que la valeur apparaisse dans Redis.
+
+    Chaque entrée porte des tags (ex. `course:<id>`). Les services d'écriture
+    appellent invalidate(tag) : les clés Redis du tag sont supprimées et
+    l'invalidation est publiée (pub/sub) pour vider le L1 de chaque worker.
+    Les accès Redis passent par redis.asyncio ; seul l'abonnement pub/sub
+    garde un client synchrone, dans son thread dédié.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        l1_seconds: Optional[float] = None,
+        l1_max_keys: Optional[int] = None,
+        enabled: Optional[bool] = None,
+        prefix: str = 'analytics:cache'
+    ):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.ttls = {
+            **DEFAULT_TTLS,
+            **getattr(settings, 'ANALYTICS_CACHE_TTLS', {}),
+            **(ttls or {}),
+        }
+        self.l1_seconds = l1_seconds if l1_seconds is not None else getattr(
+            settings, 'ANALYTICS_CACHE_L1_SECONDS', 5.0
+        )
+        self.l1_max_keys = l1_max_keys or getattr(settings, 'ANALYTICS_CACHE_L1_MAX_KEYS', 1000)
+        self.enabled = enabled if enabled is not None else getattr(
+            settings, 'ANALYTICS_CACHE_ENABLED', True
+        )
+        self.debounce_seconds = getattr(settings, 'ANALYTICS_CACHE_INVALIDATION_DEBOUNCE', 5.0)
+        self.prefix = prefix
+        self.channel = f"{prefix}:invalidations"
+        self.lock_seconds = 10
+        self.wait_seconds = 2.0
+
+        self._client: Optional[aioredis.Redis] = None
+        self._pubsub_client: Optional[redis.Redis] = None
+        self._listener = None
+        self._lock = threading.Lock()
+        self._l1: Dict[str, Tuple[float, Any, Tuple[str, ...]]] = {}
+        self._l1_tags: Dict[str, Set[str]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._last_invalidation: Dict[str, float] = {}
+        # Tag -> (échéance, minuterie) de l'invalidation finale d'une rafale
+        self._trailing: Dict[str, Tuple[float, asyncio.TimerHandle]] = {}
+        self._background: Set[asyncio.Task] = set()
+        # Génération par tag, incrémentée à chaque invalidation reçue : une
+        # valeur calculée pendant l'invalidation d'un de ses tags n'est pas
+        # mise en cache
+        self._generations: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self._client or get_async_redis(self.redis_url)
+
+    @property
+    def pubsub_client(self) -> redis.Redis:
+        if self._pubsub_client is None:
+            self._pubsub_client = redis.Redis.from_url(self.redis_url)
+        return self._pubsub_client
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]],
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """Valeur en cache (L1, puis Redis), sinon calculée une seule fois par `compute()`"""
+        if not self.enabled:
+            return await compute()
+
+        self._ensure_listener()
+        key = self._key(namespace, params)
+
+        value = self._get_l1(key)
+        if value is not MISSING:
+            self._count(namespace, 'l1_hits')
+            return value
+
+        task = self._pending.get(key)
+        if task is not None:
+            self._count(namespace, 'coalesced')
+        else:
+            task = asyncio.ensure_future(self._load(namespace, key, compute, tuple(tags)))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+        # shield : l'annulation d'un appelant n'annule pas le calcul partagé
+        return await asyncio.shield(task)
+
+    async def invalidate(self, *tags: str, debounce: bool = False):
+        """
+        Invalider les entrées portant un de ces tags dans tous les workers.
+        Avec `debounce`, un tag déjà invalidé par ce worker depuis moins de
+        `debounce_seconds` n'est invalidé qu'une fois, à la fin de la
+        fenêtre (écritures à haut débit) : les dernières écritures d'une
+        rafale ne restent pas en cache jusqu'au TTL.
+        """
+        if not self.enabled or not tags:
+            return
+
+        now = time.monotonic()
+        if debounce:
+            ready = []
+            for tag in tags:
+                remaining = self._last_invalidation.get(tag, 0.0) + self.debounce_seconds - now
+                if remaining <= 0:
+                    ready.append(tag)
+                else:
+                    self._schedule_trailing(tag, remaining)
+            tags = tuple(ready)
+            if not tags:
+                return
+        for tag in tags:
+            self._last_invalidation[tag] = now
+            trailing = self._trailing.pop(tag, None)
+            if trailing is not None:
+                trailing[1].cancel()
+
+        self._evict_local(tags)
+
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for tag in tags:
+                pipeline.smembers(self._tag_key(tag))
+            members = await pipeline.execute()
+
+            keys = [key for keys in members for key in keys]
+            pipeline = self.client.pipeline(transaction=False)
+            if keys:
+                pipeline.delete(*keys)
+            pipeline.delete(*[self._tag_key(tag) for tag in tags])
+            pipeline.publish(self.channel, json.dumps(list(tags)))
+            await pipeline.execute()
+        except Exception as e:
+            # Les entrées Redis expireront d'elles-mêmes (TTL de l'endpoint)
+            logger.warning(f"Error invalidating analytics cache {tags}: {str(e)}")
+
+    def _schedule_trailing(self, tag: str, delay: float):
+        """Programmer (une fois par fenêtre) l'invalidation finale d'un tag"""
+        deadline = time.monotonic() + delay
+        trailing = self._trailing.get(tag)
+        # Échéance dépassée sans exécution : boucle fermée entre-temps
+        if trailing is not None and trailing[0] >= time.monotonic():
+            return
+
+        def fire():
+            self._trailing.pop(tag, None)
+            task = asyncio.ensure_future(self.invalidate(tag))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+        self._trailing[tag] = (deadline, asyncio.get_running_loop().call_later(delay, fire))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Compteurs par endpoint (l1_hits, l2_hits, misses, coalesced)"""
+        namespaces = {}
+        for namespace, stats in self._stats.items():
+            lookups = stats.get('l1_hits', 0) + stats.get('l2_hits', 0) + stats.get('misses', 0)
+            hits = stats.get('l1_hits', 0) + stats.get('l2_hits', 0)
+            namespaces[namespace] = {
+                **stats,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'ttl': self.ttls.get(namespace),
+            }
+
+        return {
+            'enabled': self.enabled,
+            'l1_keys': len(self._l1),
+            'l1_seconds': self.l1_seconds,
+            'in_flight': len(self._pending),
+            'listening': bool(self._listener),
+            'namespaces': namespaces,
+        }
+
+    async def _load(
+        self,
+        namespace: str,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        tags: Tuple[str, ...]
+    ) -> Any:
+        ttl = self.ttls.get(namespace, 60)
+        generations = self._tag_generations(tags)
+
+        value = await self._get_l2(key)
+        if value is not MISSING:
+            self._count(namespace, 'l2_hits')
+            self._set_l1(key, value, ttl, tags)
+            return value
+
+        locked = await self._acquire(key)
+        if not locked:
+            # Un autre worker calcule déjà cette clé
+            value = await self._wait_for(key)
+            if value is not MISSING:
+                self._count(namespace, 'coalesced')
+                self._set_l1(key, value, ttl, tags)
+                return value
+
+        self._count(namespace, 'misses')
+        try:
+            value = await compute()
+            if generations == self._tag_generations(tags):
+                await self._set_l2(key, value, ttl, tags)
+                self._set_l1(key, value, ttl, tags)
+        finally:
+            if locked:
+                await self._release(key)
+
+        return value
+
+    def _get_l1(self, key: str) -> Any:
+        entry = self._l1.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return MISSING
+        return entry[1]
+
+    def _set_l1(self, key: str, value: Any, ttl: int, tags: Tuple[str, ...]):
+        with self._lock:
+            if len(self._l1) >= self.l1_max_keys:
+                self._prune_l1()
+            self._l1[key] = (time.monotonic() + min(ttl, self.l1_seconds), value, tags)
+            for tag in tags:
+                self._l1_tags.setdefault(tag, set()).add(key)
+
+    def _prune_l1(self):
+        """Retirer les entrées expirées, puis les plus anciennes si le L1 est plein"""
+        now = time.monotonic()
+        for key in [key for key, entry in self._l1.items() if entry[0] <= now]:
+            self._drop_l1(key)
+        while len(self._l1) >= self.l1_max_keys:
+            self._drop_l1(next(iter(self._l1)))
+
+    def _drop_l1(self, key: str):
+        entry = self._l1.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._l1_tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._l1_tags[tag]
+
+    def _tag_generations(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _evict_local(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._l1_tags.get(tag, ())):
+                    self._drop_l1(key)
+
+    async def _get_l2(self, key: str) -> Any:
+        try:
+            raw = await self.client.get(key)
+        except Exception as e:
+            logger.warning(f"Error reading analytics cache: {str(e)}")
+            return MISSING
+        return json.loads(raw) if raw is not None else MISSING
+
+    async def _set_l2(self, key: str, value: Any, ttl: int, tags: Tuple[str, ...]):
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.set(key, json.dumps(value, default=str), ex=ttl)
+            for tag in tags:
+                # L'index du tag vit au moins aussi longtemps que ses clés
+                pipeline.sadd(self._tag_key(tag), key)
+                pipeline.expire(self._tag_key(tag), max(ttl, 300))
+            await pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Error writing analytics cache: {str(e)}")
+
+    async def _acquire(self, key: str) -> bool:
+        """Verrou de calcul inter-workers ; True aussi si Redis est indisponible"""
+        try:
+            return bool(await self.client.set(f"{key}:lock", 1, nx=True, ex=self.lock_seconds))
+        except Exception:
+            return True
+
+    async def _release(self, key: str):
+        try:
+            await self.client.delete(f"{key}:lock")
+        except Exception as e:
+            logger.warning(f"Error releasing analytics cache lock: {str(e)}")
+
+    async def _wait_for(self, key: str) -> Any:
+        """Attendre la valeur calculée par un autre worker (MISSING après wait_seconds)"""
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            value = await self._get_l2(key)
+            if value is not MISSING:
+                return value
+        return MISSING
+
+    def _ensure_listener(self):
+        """Abonnement aux invalidations publiées par les autres workers (thread dédié)"""
+        if self._listener is not None:
+            return
+
+        with self._lock:
+            if self._listener is not None:
+                return
+            try:
+                pubsub = self.pubsub_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: self._on_invalidation})
+                self._listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+            except Exception as e:
+                # Sans abonnement, le L1 reste borné par l1_seconds
+                self._listener = False
+                logger.warning(f"Error subscribing to analytics cache invalidations: {str(e)}")
+
+    def _on_invalidation(self, message: Dict[str, Any]):
+        try:
+            self._evict_local(json.loads(message['data']))
+        except Exception as e:
+            logger.warning(f"Invalid analytics cache invalidation: {str(e)}")
+
+    def _count(self, namespace: str, name: str):
+        stats = self._stats.setdefault(namespace, {})
+        stats[name] = stats.get(name, 0) + 1
+
+    def _key(self, namespace: str, params: Dict[str, Any]) -> str:
+        parts = ':'.join(f"{name}={params[name]}" for name in sorted(params))
+        return f"{self.prefix}:{namespace}:{parts}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+
+analytics_cache = AnalyticsCache()
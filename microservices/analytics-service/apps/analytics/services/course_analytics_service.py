@@ -1,25 +1,172 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime, date, timedelta
-from collections import defaultdict
-from prisma import Prisma
+from prisma.models import CourseAnalytics
+from shared.shared.utils.prisma_client import get_prisma_client
+import json
 import logging
 
+import numpy as np
+
+from .analytics_cache import analytics_cache
+
 logger = logging.getLogger(__name__)
 
 
+UPSERT_ANALYTICS_SQL = """
+INSERT INTO "course_analytics"
+    ("id", "courseId", "date", "views", "enrollments", "completions",
+     "avgRating", "ratingSum", "ratingCount")
+VALUES
+    (gen_random_uuid()::text, $1, $2::date, $3::int, $4::int, $5::int,
+     $6::double precision,
+     COALESCE($6::double precision, 0),
+     CASE WHEN $6::double precision IS NULL THEN 0 ELSE 1 END)
+ON CONFLICT ("courseId", "date") DO UPDATE SET
+    "views" = "course_analytics"."views" + EXCLUDED."views",
+    "enrollments" = "course_analytics"."enrollments" + EXCLUDED."enrollments",
+    "completions" = "course_analytics"."completions" + EXCLUDED."completions",
+    "ratingSum" = "course_analytics"."ratingSum" + EXCLUDED."ratingSum",
+    "ratingCount" = "course_analytics"."ratingCount" + EXCLUDED."ratingCount",
+    "avgRating" = ("course_analytics"."ratingSum" + EXCLUDED."ratingSum")
+        / NULLIF("course_analytics"."ratingCount" + EXCLUDED."ratingCount", 0)
+RETURNING *
+"""
+
+TOP_COURSE_METRICS = ('views', 'enrollments', 'completions')
+
+COURSE_TOTALS_SQL = """
+SELECT
+    "courseId" AS "course_id",
+    SUM("views")::int AS "views",
+    SUM("enrollments")::int AS "enrollments",
+    SUM("completions")::int AS "completions"
+FROM "course_analytics"
+WHERE "date" >= $1::date AND "date" <= $2::date
+GROUP BY "courseId"
+"""
+
+# Totaux par cours pour plusieurs fenêtres glissantes finissant le $2 inclus
+# ($1 = liste JSON des durées en jours), en un seul passage sur la table
+WINDOW_TOTALS_SQL = """
+SELECT
+    w."days"::int AS "days",
+    a."courseId" AS "course_id",
+    SUM(a."views")::int AS "views",
+    SUM(a."enrollments")::int AS "enrollments",
+    SUM(a."completions")::int AS "completions"
+FROM "course_analytics" AS a
+JOIN jsonb_array_elements_text($1::jsonb) AS w("days")
+    ON a."date" > $2::date - w."days"::int
+WHERE a."date" >= $2::date - $3::int + 1 AND a."date" <= $2::date
+GROUP BY 1, 2
+"""
+
+# {metric} provient toujours de TOP_COURSE_METRICS
+TOP_COURSES_SQL = COURSE_TOTALS_SQL + """
+ORDER BY "{metric}" DESC, "courseId" ASC
+LIMIT $3
+"""
+
+
+# Lignes journalières de plusieurs cours ; "day" = rang du jour dans la période
+COURSES_DAILY_SQL = """
+SELECT
+    "courseId" AS "course_id",
+    ("date" - $2::date)::int AS "day",
+    "views",
+    "enrollments",
+    "completions",
+    "ratingSum" AS "rating_sum",
+    "ratingCount" AS "rating_count"
+FROM "course_analytics"
+WHERE "courseId" IN (SELECT jsonb_array_elements_text($1::jsonb))
+  AND "date" >= $2::date AND "date" <= $3::date
+"""
+
+
+def course_stats_matrix(
+    course_ids: List[str],
+    start_date: date,
+    end_date: date,
+    rows: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Matrice dense (métrique × cours × jour) remplie de zéros puis des lignes
+    présentes ; totaux, taux et séries sont calculés sur les axes, sans
+    boucle par jour.
+    """
+    days = (end_date - start_date).days + 1
+    index = {course_id: i for i, course_id in enumerate(course_ids)}
+
+    # views, enrollments, completions, ratingCount | ratingSum
+    counts = np.zeros((4, len(course_ids), days), dtype=np.int64)
+    rating_sums = np.zeros((len(course_ids), days), dtype=np.float64)
+
+    if rows:
+        courses = np.fromiter((index[row['course_id']] for row in rows), dtype=np.intp, count=len(rows))
+        offsets = np.fromiter((row['day'] for row in rows), dtype=np.intp, count=len(rows))
+        counts[:, courses, offsets] = np.array(
+            [[row['views'], row['enrollments'], row['completions'], row['rating_count']] for row in rows],
+            dtype=np.int64
+        ).T
+        rating_sums[courses, offsets] = [row['rating_sum'] for row in rows]
+
+    views, enrollments, completions, rating_counts = counts.sum(axis=2)
+    total_rating_sums = rating_sums.sum(axis=1)
+
+    conversion = np.divide(enrollments * 100.0, views, out=np.zeros(len(course_ids)), where=views > 0)
+    completion = np.divide(completions * 100.0, enrollments, out=np.zeros(len(course_ids)), where=enrollments > 0)
+    avg_rating = np.divide(total_rating_sums, rating_counts, out=np.full(len(course_ids), np.nan), where=rating_counts > 0)
+    daily_rating = np.round(
+        np.divide(rating_sums, counts[3], out=np.full(rating_sums.shape, np.nan), where=counts[3] > 0),
+        2
+    )
+
+    dates = np.arange(
+        np.datetime64(start_date), np.datetime64(end_date) + 1, dtype='datetime64[D]'
+    ).astype(str).tolist()
+
+    result = {}
+    for i, course_id in enumerate(course_ids):
+        result[course_id] = {
+            'total_stats': {
+                'total_views': int(views[i]),
+                'total_enrollments': int(enrollments[i]),
+                'total_completions': int(completions[i]),
+                'avg_rating': None if np.isnan(avg_rating[i]) else round(float(avg_rating[i]), 2),
+                'rating_count': int(rating_counts[i]),
+                'conversion_rate': round(float(conversion[i]), 2),
+                'completion_rate': round(float(completion[i]), 2)
+            },
+            'daily': {
+                'views': counts[0, i].tolist(),
+                'enrollments': counts[1, i].tolist(),
+                'completions': counts[2, i].tolist(),
+                'avg_rating': [None if np.isnan(r) else r for r in daily_rating[i].tolist()]
+            }
+        }
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'dates': dates,
+        'courses': result
+    }
+
+
 class CourseAnalyticsService:
     """Service pour gérer les analytics de cours"""
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def create_or_update_analytics(
         self,
@@ -34,48 +181,20 @@ class CourseAnalyticsService:
         try:
             await self.connect()
             
-            # Essayer de récupérer les analytics existantes
-            existing = await self.db.courseanalytics.find_unique(
-                where={
-                    'courseId_date': {
-                        'courseId': course_id,
-                        'date': analytics_date
-                    }
-                }
+            # Un seul aller-retour : INSERT ... ON CONFLICT DO UPDATE,
+            # les compteurs sont incrémentés côté base (pas de lost update)
+            analytics = await self.db.query_first(
+                UPSERT_ANALYTICS_SQL,
+                course_id,
+                analytics_date.isoformat(),
+                views,
+                enrollments,
+                completions,
+                rating,
+                model=CourseAnalytics
             )
             
-            if existing:
-                # Mettre à jour
-                update_data = {
-                    'views': existing.views + views,
-                    'enrollments': existing.enrollments + enrollments,
-                    'completions': existing.completions + completions
-                }
-                
-                # Mettre à jour la note moyenne si fournie
-                if rating is not None:
-                    if existing.avgRating is not None:
-                        # Calculer la nouvelle moyenne (approximation simple)
-                        update_data['avgRating'] = (existing.avgRating + rating) / 2
-                    else:
-                        update_data['avgRating'] = rating
-                
-                analytics = await self.db.courseanalytics.update(
-                    where={'id': existing.id},
-                    data=update_data
-                )
-            else:
-                # Créer
-                analytics = await self.db.courseanalytics.create(
-                    data={
-                        'courseId': course_id,
-                        'date': analytics_date,
-                        'views': views,
-                        'enrollments': enrollments,
-                        'completions': completions,
-                        'avgRating': rating
-                    }
-                )
+            await analytics_cache.invalidate(f'course:{course_id}')
             
             logger.info(f"Course analytics updated: {course_id} - {analytics_date}")
             return analytics
@@ -208,29 +327,37 @@ class CourseAnalyticsService:
     ) -> Dict[str, Any]:
         """Récupérer les statistiques totales d'un cours"""
         try:
-            analytics_list = await self.get_analytics_range(
-                course_id,
-                start_date,
-                end_date
-            )
+            await self.connect()
             
-            if not analytics_list:
-                return {
-                    'total_views': 0,
-                    'total_enrollments': 0,
-                    'total_completions': 0,
-                    'avg_rating': None,
-                    'conversion_rate': 0.0,
-                    'completion_rate': 0.0
+            # Agrégat unique côté base ; la note est la moyenne pondérée
+            # (somme des notes / nombre de notes) sur toute la période
+            groups = await self.db.courseanalytics.group_by(
+                by=['courseId'],
+                where={
+                    'courseId': course_id,
+                    'date': {
+                        'gte': start_date,
+                        'lte': end_date
+                    }
+                },
+                sum={
+                    'views': True,
+                    'enrollments': True,
+                    'completions': True,
+                    'ratingSum': True,
+                    'ratingCount': True
                 }
+            )
+            
+            totals = groups[0]['_sum'] if groups else {}
             
-            total_views = sum(a.views for a in analytics_list)
-            total_enrollments = sum(a.enrollments for a in analytics_list)
-            total_completions = sum(a.completions for a in analytics_list)
+            total_views = totals.get('views') or 0
+            total_enrollments = totals.get('enrollments') or 0
+            total_completions = totals.get('completions') or 0
+            rating_sum = totals.get('ratingSum') or 0.0
+            rating_count = totals.get('ratingCount') or 0
             
-            # Calculer la note moyenne
-            ratings = [a.avgRating for a in analytics_list if a.avgRating is not None]
-            avg_rating = sum(ratings) / len(ratings) if ratings else None
+            avg_rating = rating_sum / rating_count if rating_count > 0 else None
             
             # Calculer les taux
             conversion_rate = (total_enrollments / total_views * 100) if total_views > 0 else 0.0
@@ -240,7 +367,8 @@ class CourseAnalyticsService:
                 'total_views': total_views,
                 'total_enrollments': total_enrollments,
                 'total_completions': total_completions,
-                'avg_rating': round(avg_rating, 2) if avg_rating else None,
+                'avg_rating': round(avg_rating, 2) if avg_rating is not None else None,
+                'rating_count': rating_count,
                 'conversion_rate': round(conversion_rate, 2),
                 'completion_rate': round(completion_rate, 2)
             }
@@ -248,6 +376,8 @@ class CourseAnalyticsService:
         except Exception as e:
             logger.error(f"Error getting total stats: {str(e)}")
             raise
+        finally:
+            await self.disconnect()
     
     async def get_daily_analytics(
         self,
@@ -259,40 +389,59 @@ class CourseAnalyticsService:
             end_date = date.today()
             start_date = end_date - timedelta(days=days-1)
             
-            analytics_list = await self.get_analytics_range(
-                course_id,
-                start_date,
-                end_date
-            )
+            stats = await self.get_courses_stats([course_id], start_date, end_date)
+            daily = stats['courses'][course_id]['daily']
             
-            # Créer un dictionnaire pour un accès rapide
-            analytics_dict = {
-                a.date.strftime('%Y-%m-%d'): a
-                for a in analytics_list
-            }
+            return [
+                {
+                    'date': day,
+                    'views': views,
+                    'enrollments': enrollments,
+                    'completions': completions,
+                    'avg_rating': avg_rating
+                }
+                for day, views, enrollments, completions, avg_rating in zip(
+                    stats['dates'],
+                    daily['views'],
+                    daily['enrollments'],
+                    daily['completions'],
+                    daily['avg_rating']
+                )
+            ]
             
-            # Créer une liste pour tous les jours
-            result = []
-            current_date = start_date
-            while current_date <= end_date:
-                date_key = current_date.strftime('%Y-%m-%d')
-                analytics = analytics_dict.get(date_key)
-                
-                result.append({
-                    'date': date_key,
-                    'views': analytics.views if analytics else 0,
-                    'enrollments': analytics.enrollments if analytics else 0,
-                    'completions': analytics.completions if analytics else 0,
-                    'avg_rating': analytics.avgRating if analytics else None
-                })
-                
-                current_date += timedelta(days=1)
+        except Exception as e:
+            logger.error(f"Error getting daily analytics: {str(e)}")
+            raise
+    
+    async def get_courses_stats(
+        self,
+        course_ids: List[str],
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, Any]:
+        """Totaux, taux et séries quotidiennes de plusieurs cours en une requête"""
+        if end_date < start_date:
+            raise ValueError("end_date must not be before start_date")
+        
+        course_ids = list(dict.fromkeys(course_ids))
+        
+        try:
+            await self.connect()
             
-            return result
+            rows = await self.db.query_raw(
+                COURSES_DAILY_SQL,
+                json.dumps(course_ids),
+                start_date.isoformat(),
+                end_date.isoformat()
+            )
+            
+            return course_stats_matrix(course_ids, start_date, end_date, rows)
             
         except Exception as e:
-            logger.error(f"Error getting daily analytics: {str(e)}")
+            logger.error(f"Error getting courses stats: {str(e)}")
             raise
+        finally:
+            await self.disconnect()
     
     async def get_top_courses(
         self,
@@ -301,50 +450,79 @@ class CourseAnalyticsService:
         days: int = 30
     ) -> List[Dict[str, Any]]:
         """Récupérer les meilleurs cours selon une métrique"""
+        if metric not in TOP_COURSE_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        
         try:
             await self.connect()
             
             end_date = date.today()
             start_date = end_date - timedelta(days=days-1)
             
-            analytics_list = await self.db.courseanalytics.find_many(
-                where={
-                    'date': {
-                        'gte': start_date,
-                        'lte': end_date
-                    }
-                }
+            return await self.db.query_raw(
+                TOP_COURSES_SQL.format(metric=metric),
+                start_date.isoformat(),
+                end_date.isoformat(),
+                limit
+            )
+            
+        except Exception as e:
+            logger.error(f"Error getting top courses: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
+    
+    async def get_course_totals(
+        self,
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, Dict[str, int]]:
+        """Totaux par cours sur une période (un GROUP BY courseId)"""
+        try:
+            await self.connect()
+            
+            rows = await self.db.query_raw(
+                COURSE_TOTALS_SQL,
+                start_date.isoformat(),
+                end_date.isoformat()
             )
             
-            # Grouper par cours
-            course_stats = defaultdict(lambda: {
-                'views': 0,
-                'enrollments': 0,
-                'completions': 0
-            })
+            return {
+                row['course_id']: {metric: row[metric] or 0 for metric in TOP_COURSE_METRICS}
+                for row in rows
+            }
             
-            for analytics in analytics_list:
-                course_stats[analytics.courseId]['views'] += analytics.views
-                course_stats[analytics.courseId]['enrollments'] += analytics.enrollments
-                course_stats[analytics.courseId]['completions'] += analytics.completions
+        except Exception as e:
+            logger.error(f"Error getting course totals: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
+    
+    async def get_window_totals(
+        self,
+        windows: List[int],
+        end_date: date
+    ) -> Dict[int, Dict[str, Dict[str, int]]]:
+        """Totaux par cours de chaque fenêtre de `windows` jours finissant le `end_date`"""
+        try:
+            await self.connect()
             
-            # Trier selon la métrique
-            sorted_courses = sorted(
-                course_stats.items(),
-                key=lambda x: x[1][metric],
-                reverse=True
-            )[:limit]
+            rows = await self.db.query_raw(
+                WINDOW_TOTALS_SQL,
+                json.dumps([str(days) for days in windows]),
+                end_date.isoformat(),
+                max(windows)
+            )
             
-            return [
-                {
-                    'course_id': course_id,
-                    **stats
+            totals: Dict[int, Dict[str, Dict[str, int]]] = {days: {} for days in windows}
+            for row in rows:
+                totals[row['days']][row['course_id']] = {
+                    metric: row[metric] or 0 for metric in TOP_COURSE_METRICS
                 }
-                for course_id, stats in sorted_courses
-            ]
+            return totals
             
         except Exception as e:
-            logger.error(f"Error getting top courses: {str(e)}")
+            logger.error(f"Error getting window totals: {str(e)}")
             raise
         finally:
-            await self.disconnect()
\ No newline at end of file
+            await self.disconnect()
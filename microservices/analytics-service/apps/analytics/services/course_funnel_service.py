@@ -0,0 +1,161 @@
+from typing import Dict, Any, List
+from datetime import date, datetime, time, timedelta
+from shared.shared.utils.prisma_client import get_prisma_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Étapes du tunnel après la vue : événements user_activity portant
+# metadata.course_id (envoyés par les services inscriptions / avis)
+FUNNEL_EVENTS = {
+    'enrolled': 'course_enroll',
+    'completed': 'course_complete',
+    'reviewed': 'course_review',
+}
+FUNNEL_STEPS = ('viewed',) + tuple(FUNNEL_EVENTS)
+
+# Axe de ventilation -> expression sur course_views (première vue de l'utilisateur)
+FUNNEL_DIMENSIONS = {
+    'none': "'all'",
+    'source': '"source"',
+    'country': '"country"',
+    'referrer': """substring("referrer" from '^(?:[a-z]+://)?([^/?#]+)')""",
+}
+
+# Un seul passage : vues identifiées et événements du cours sont réunis,
+# réduits à une ligne par utilisateur (premier instant de chaque étape,
+# dimension de sa première vue) puis comptés par valeur de la dimension.
+# Une étape n'est comptée que si elle suit la précédente.
+COURSE_FUNNEL_SQL = """
+WITH touches AS (
+    SELECT "userId", "viewedAt" AS "at", 'view' AS "step", {dimension} AS "dimension"
+    FROM "course_views"
+    WHERE "courseId" = $1 AND "userId" IS NOT NULL
+      AND "viewedAt" >= $2::timestamp AND "viewedAt" < $3::timestamp
+    UNION ALL
+    SELECT "userId", "createdAt", "eventType", NULL
+    FROM "user_activity"
+    WHERE "metadata"->>'course_id' = $1
+      AND "eventType" IN ('course_enroll', 'course_complete', 'course_review')
+      AND "createdAt" >= $2::timestamp AND "createdAt" < $3::timestamp
+), users AS (
+    SELECT
+        "userId",
+        MIN("at") FILTER (WHERE "step" = 'view') AS "viewed",
+        MIN("at") FILTER (WHERE "step" = 'course_enroll') AS "enrolled",
+        MIN("at") FILTER (WHERE "step" = 'course_complete') AS "completed",
+        MIN("at") FILTER (WHERE "step" = 'course_review') AS "reviewed",
+        (array_agg("dimension" ORDER BY "at") FILTER (WHERE "step" = 'view'))[1] AS "dimension"
+    FROM touches
+    GROUP BY "userId"
+), steps AS (
+    SELECT
+        "dimension",
+        "enrolled" >= "viewed" AS "did_enroll",
+        "enrolled" >= "viewed" AND "completed" >= "enrolled" AS "did_complete",
+        "enrolled" >= "viewed" AND "completed" >= "enrolled" AND "reviewed" >= "completed" AS "did_review"
+    FROM users
+    WHERE "viewed" IS NOT NULL
+)
+SELECT
+    COALESCE("dimension", 'unknown') AS "value",
+    COUNT(*)::int AS "viewed",
+    (COUNT(*) FILTER (WHERE "did_enroll"))::int AS "enrolled",
+    (COUNT(*) FILTER (WHERE "did_complete"))::int AS "completed",
+    (COUNT(*) FILTER (WHERE "did_review"))::int AS "reviewed"
+FROM steps
+GROUP BY 1
+ORDER BY "viewed" DESC, "value"
+"""
+
+ANONYMOUS_VIEWS_SQL = """
+SELECT COUNT(*)::int AS "count"
+FROM "course_views"
+WHERE "courseId" = $1 AND "userId" IS NULL
+  AND "viewedAt" >= $2::timestamp AND "viewedAt" < $3::timestamp
+"""
+
+
+def funnel_rates(counts: Dict[str, int]) -> Dict[str, Any]:
+    """Comptes par étape, taux d'une étape à la suivante et depuis la vue"""
+    viewed = counts.get('viewed', 0)
+    steps = []
+    previous = viewed
+    for step in FUNNEL_STEPS:
+        count = counts.get(step, 0)
+        steps.append({
+            'step': step,
+            'users': count,
+            'from_previous': round(count / previous * 100, 2) if previous else 0.0,
+            'from_start': round(count / viewed * 100, 2) if viewed else 0.0,
+        })
+        previous = count
+    return {'steps': steps}
+
+
+def build_funnel(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Tunnel global (somme des valeurs : un utilisateur n'a qu'une valeur) et ventilation"""
+    totals = {step: sum(row[step] for row in rows) for step in FUNNEL_STEPS}
+
+    return {
+        'total': funnel_rates(totals),
+        'breakdown': [
+            {'value': row['value'], **funnel_rates(row)}
+            for row in rows
+        ],
+    }
+
+
+class CourseFunnelService:
+    """Service pour les tunnels de conversion des cours (vue -> inscription -> complétion -> avis)"""
+
+    def __init__(self):
+        self.db = None
+
+    async def connect(self):
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
+
+    async def disconnect(self):
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
+
+    async def get_funnel(
+        self,
+        course_id: str,
+        start_date: date,
+        end_date: date,
+        dimension: str = 'none'
+    ) -> Dict[str, Any]:
+        """Tunnel d'un cours entre deux dates incluses, ventilé par `dimension`"""
+        if dimension not in FUNNEL_DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        if start_date > end_date:
+            raise ValueError('start_date must not be after end_date')
+
+        try:
+            await self.connect()
+
+            start = datetime.combine(start_date, time.min).isoformat()
+            end = datetime.combine(end_date + timedelta(days=1), time.min).isoformat()
+
+            rows = await self.db.query_raw(
+                COURSE_FUNNEL_SQL.format(dimension=FUNNEL_DIMENSIONS[dimension]),
+                course_id, start, end
+            )
+            anonymous = await self.db.query_first(ANONYMOUS_VIEWS_SQL, course_id, start, end)
+
+            return {
+                'course_id': course_id,
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'dimension': dimension,
+                'anonymous_views': anonymous['count'],
+                **build_funnel(rows),
+            }
+
+        except Exception as e:
+            logger.error(f"Error getting course funnel: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
@@ -0,0 +1,180 @@
+from typing import Optional, Dict, Any
+from datetime import datetime
+from django.conf import settings
+import json
+import logging
+import time
+import uuid
+
+import redis.asyncio as aioredis
+
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+class CourseViewQueue:
+    """
+    File Redis des vues de cours à insérer.
+
+    La vue HTTP ne fait qu'un RPUSH ; la tâche Celery flush_course_views
+    réserve les enregistrements par lots (LMOVE vers une liste de traitement
+    propre au lot, inscrite dans `<key>:inflight`) et les insère avec
+    create_many. Un lot inséré est acquitté ; un lot en échec retourne en fin
+    de file, et ses enregistrements partent dans `<key>:dead` après
+    `max_attempts` échecs. Un lot resté en traitement plus de
+    `visibility_timeout` secondes (worker tué) est remis en file. Chaque
+    enregistrement reçoit son id à l'enqueue : un lot rejoué ne crée pas de
+    doublons (skip_duplicates). Les appels passent par redis.asyncio : la
+    vue HTTP ne bloque pas la boucle du worker.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        key: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        visibility_timeout: Optional[float] = None
+    ):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.key = key or getattr(settings, 'COURSE_VIEW_QUEUE_KEY', 'analytics:course_views:queue')
+        self.batch_size = batch_size or getattr(settings, 'COURSE_VIEW_BATCH_SIZE', 500)
+        self.max_attempts = max_attempts or getattr(settings, 'COURSE_VIEW_MAX_ATTEMPTS', 10)
+        self.visibility_timeout = visibility_timeout or getattr(
+            settings, 'COURSE_VIEW_QUEUE_VISIBILITY_TIMEOUT', 300.0
+        )
+        self.inflight_key = f'{self.key}:inflight'
+        self.dead_letter_key = f'{self.key}:dead'
+        self._client: Optional[aioredis.Redis] = None
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self._client or get_async_redis(self.redis_url)
+
+    async def enqueue(
+        self,
+        course_id: str,
+        user_id: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        country: Optional[str] = None,
+        city: Optional[str] = None,
+        referrer: Optional[str] = None,
+        source: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Mettre une vue en file ; retourne l'enregistrement et la taille de la file"""
+        record = {
+            'id': str(uuid.uuid4()),
+            'courseId': course_id,
+            'userId': user_id,
+            'ipAddress': ip_address,
+            'userAgent': user_agent,
+            'country': country,
+            'city': city,
+            'referrer': referrer,
+            'source': source,
+            'viewedAt': datetime.now().isoformat()
+        }
+
+        depth = await self.client.rpush(self.key, json.dumps(record))
+        return {'record': record, 'depth': depth}
+
+    async def claim_batch(self, size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Réserver atomiquement jusqu'à `size` enregistrements : ils passent
+        dans la liste de traitement du lot jusqu'à ack() ou fail()
+        """
+        size = size or self.batch_size
+        batch_id = str(uuid.uuid4())
+        processing_key = self.processing_key(batch_id)
+
+        pipeline = self.client.pipeline(transaction=True)
+        for _ in range(size):
+            pipeline.lmove(self.key, processing_key, 'LEFT', 'RIGHT')
+        pipeline.zadd(self.inflight_key, {batch_id: time.time()})
+        raw_records = [raw for raw in (await pipeline.execute())[:-1] if raw is not None]
+
+        if not raw_records:
+            await self.client.zrem(self.inflight_key, batch_id)
+            return None
+
+        records, attempts = [], []
+        for raw in raw_records:
+            record = json.loads(raw)
+            record['viewedAt'] = datetime.fromisoformat(record['viewedAt'])
+            attempts.append(record.pop('attempts', 0))
+            records.append(record)
+        return {'id': batch_id, 'records': records, 'attempts': attempts}
+
+    async def ack(self, batch: Dict[str, Any]):
+        """Lot inséré : libérer sa liste de traitement"""
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.delete(self.processing_key(batch['id']))
+        pipeline.zrem(self.inflight_key, batch['id'])
+        await pipeline.execute()
+
+    async def fail(self, batch: Dict[str, Any]) -> int:
+        """
+        Lot en échec : retour en fin de file (la tête n'est pas bloquée), ou
+        en dead letter après max_attempts ; retourne le nombre d'enregistrements
+        écartés
+        """
+        retry, dead = [], []
+        for record, attempts in zip(batch['records'], batch['attempts']):
+            attempts += 1
+            payload = json.dumps({**record, 'attempts': attempts, 'viewedAt': record['viewedAt'].isoformat()})
+            (dead if attempts >= self.max_attempts else retry).append(payload)
+
+        pipeline = self.client.pipeline(transaction=True)
+        if retry:
+            pipeline.rpush(self.key, *retry)
+        if dead:
+            pipeline.rpush(self.dead_letter_key, *dead)
+        pipeline.delete(self.processing_key(batch['id']))
+        pipeline.zrem(self.inflight_key, batch['id'])
+        await pipeline.execute()
+
+        if dead:
+            logger.error(f"Course view records moved to {self.dead_letter_key}: {len(dead)}")
+        return len(dead)
+
+    async def recover_stale(self) -> int:
+        """Remettre en file les lots réservés depuis plus de visibility_timeout"""
+        deadline = time.time() - self.visibility_timeout
+        recovered = 0
+
+        for raw_id in await self.client.zrangebyscore(self.inflight_key, '-inf', deadline):
+            batch_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+            processing_key = self.processing_key(batch_id)
+            size = await self.client.llen(processing_key)
+
+            # La liste d'un lot réservé ne grandit plus : `size` LMOVE la vident
+            pipeline = self.client.pipeline(transaction=True)
+            for _ in range(size):
+                pipeline.lmove(processing_key, self.key, 'LEFT', 'RIGHT')
+            pipeline.zrem(self.inflight_key, batch_id)
+            recovered += sum(1 for raw in (await pipeline.execute())[:-1] if raw is not None)
+
+        if recovered:
+            logger.warning(f"Course view records recovered from stale batches: {recovered}")
+        return recovered
+
+    async def replay_dead_letters(self) -> int:
+        """Remettre en file les enregistrements écartés (après correction de la cause)"""
+        replayed = 0
+        while await self.client.lmove(self.dead_letter_key, self.key, 'LEFT', 'RIGHT') is not None:
+            replayed += 1
+        return replayed
+
+    def processing_key(self, batch_id: str) -> str:
+        return f'{self.key}:processing:{batch_id}'
+
+    async def depth(self) -> int:
+        return await self.client.llen(self.key)
+
+    async def dead_letter_depth(self) -> int:
+        return await self.client.llen(self.dead_letter_key)
+
+
+course_view_queue = CourseViewQueue()
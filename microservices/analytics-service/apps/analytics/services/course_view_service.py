@@ -1,25 +1,87 @@
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
-from prisma import Prisma
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from prisma.models import CourseView
+from shared.shared.utils.prisma_client import get_prisma_client
+from shared.shared.utils.enrichment import enrich_client
+import base64
 import logging
 from collections import defaultdict
 
+from .course_viewers import course_viewer_counter
+from .rollups import naive
+
 logger = logging.getLogger(__name__)
 
+# Page de vues par keyset sur (viewedAt, id) décroissants : chaque page
+# reprend strictement après la dernière ligne de la précédente via l'index
+# (courseId, viewedAt, id), sans OFFSET. Bornes absentes = ±infinity.
+COURSE_VIEWS_PAGE_SQL = """
+SELECT *
+FROM "course_views"
+WHERE "courseId" = $1
+  AND "viewedAt" >= $2::timestamp
+  AND "viewedAt" <= $3::timestamp
+  AND ("viewedAt", "id") < ($4::timestamp, $5)
+ORDER BY "viewedAt" DESC, "id" DESC
+LIMIT $6
+"""
+
+# Repli SQL des viewers uniques : même identité que viewer_fingerprint
+# (userId, sinon empreinte ip + user-agent) et jours entiers, comme les HLL.
+# Seul le caractère distinct compte : md5 ici, sha1 côté Redis.
+UNIQUE_VIEWERS_SQL = """
+SELECT COUNT(DISTINCT CASE
+    WHEN "userId" IS NOT NULL THEN 'u:' || "userId"
+    WHEN "ipAddress" IS NOT NULL OR "userAgent" IS NOT NULL
+        THEN 'a:' || md5(COALESCE("ipAddress", '') || '|' || COALESCE("userAgent", ''))
+END)::int AS "viewers"
+FROM "course_views"
+WHERE "courseId" = $1
+  AND "viewedAt" >= $2::timestamp
+  AND "viewedAt" < $3::timestamp
+"""
+
+
+def encode_view_cursor(viewed_at: datetime, view_id: str) -> str:
+    """Curseur opaque désignant la dernière vue d'une page"""
+    raw = f"{naive(viewed_at).isoformat()}|{view_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_view_cursor(cursor: str) -> Tuple[datetime, str]:
+    """(viewedAt, id) d'un curseur ; ValueError s'il est invalide"""
+    try:
+        viewed_at, view_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(viewed_at), view_id
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def enrich_view(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Vue complétée des colonnes device/browser/os et de la localisation GeoIP"""
+    client = enrich_client(
+        record.get('ipAddress'),
+        record.get('userAgent'),
+        record.get('country'),
+        record.get('city')
+    )
+    return {**record, **client}
+
 
 class CourseViewService:
     """Service pour gérer les vues de cours"""
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def track_view(
         self,
@@ -36,8 +98,9 @@ class CourseViewService:
         try:
             await self.connect()
             
+            viewed_at = datetime.now()
             view = await self.db.courseview.create(
-                data={
+                data=enrich_view({
                     'courseId': course_id,
                     'userId': user_id,
                     'ipAddress': ip_address,
@@ -46,10 +109,18 @@ class CourseViewService:
                     'city': city,
                     'referrer': referrer,
                     'source': source,
-                    'viewedAt': datetime.now()
-                }
+                    'viewedAt': viewed_at
+                })
             )
             
+            await self._count_viewers([{
+                'courseId': course_id,
+                'viewedAt': viewed_at,
+                'userId': user_id,
+                'ipAddress': ip_address,
+                'userAgent': user_agent
+            }])
+            
             logger.info(f"Course view tracked: {course_id}")
             return view
             
@@ -59,31 +130,74 @@ class CourseViewService:
         finally:
             await self.disconnect()
     
+    async def create_views_bulk(
+        self,
+        records: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Insérer un lot de vues en une requête (ids fournis, doublons ignorés).
+        L'enrichissement est fait ici, dans le worker qui vide la file, et
+        non dans la requête HTTP.
+        """
+        if not records:
+            return 0
+        
+        try:
+            await self.connect()
+            
+            records = [enrich_view(record) for record in records]
+            count = await self.db.courseview.create_many(
+                data=records,
+                skip_duplicates=True
+            )
+            
+            # PFADD idempotent : sans risque si le lot est rejoué
+            await self._count_viewers(records)
+            
+            logger.info(f"Course views inserted: {count}")
+            return count
+            
+        except Exception as e:
+            logger.error(f"Error inserting course views: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
+    
     async def get_course_views(
         self,
         course_id: str,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> List[Dict[str, Any]]:
-        """Récupérer les vues d'un cours"""
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Récupérer une page de vues d'un cours, des plus récentes aux plus
+        anciennes. `next_cursor` vaut None sur la dernière page.
+        """
+        after = decode_view_cursor(cursor) if cursor else None
+        
         try:
             await self.connect()
             
-            where_clause = {'courseId': course_id}
-            
-            if start_date or end_date:
-                where_clause['viewedAt'] = {}
-                if start_date:
-                    where_clause['viewedAt']['gte'] = start_date
-                if end_date:
-                    where_clause['viewedAt']['lte'] = end_date
-            
-            views = await self.db.courseview.find_many(
-                where=where_clause,
-                order={'viewedAt': 'desc'}
+            views = await self.db.query_raw(
+                COURSE_VIEWS_PAGE_SQL,
+                course_id,
+                naive(start_date).isoformat() if start_date else '-infinity',
+                naive(end_date).isoformat() if end_date else 'infinity',
+                after[0].isoformat() if after else 'infinity',
+                after[1] if after else '',
+                limit + 1,
+                model=CourseView
             )
             
-            return views
+            # Une ligne de plus que demandé : indique s'il reste une page
+            next_cursor = None
+            if len(views) > limit:
+                views = views[:limit]
+                next_cursor = encode_view_cursor(views[-1].viewedAt, views[-1].id)
+            
+            return {'views': views, 'next_cursor': next_cursor}
             
         except Exception as e:
             logger.error(f"Error fetching course views: {str(e)}")
@@ -125,25 +239,32 @@ class CourseViewService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
     ) -> int:
-        """Compter le nombre de viewers uniques"""
+        """
+        Compter le nombre de viewers uniques (connectés et anonymes).
+
+        Estimé par fusion des HyperLogLog journaliers quand la période est
+        bornée ; sinon, ou si Redis est indisponible, compté exactement sur
+        course_views avec la même empreinte et les mêmes jours entiers.
+        """
+        end = (end_date or datetime.now()).date()
+        
+        if start_date and getattr(settings, 'COURSE_VIEWER_HLL_ENABLED', True):
+            try:
+                return await course_viewer_counter.count(course_id, start_date.date(), end)
+            except Exception as e:
+                logger.error(f"Error reading unique viewer counters, falling back to course_views: {str(e)}")
+        
         try:
             await self.connect()
             
-            where_clause = {'courseId': course_id, 'userId': {'not': None}}
-            
-            if start_date or end_date:
-                where_clause['viewedAt'] = {}
-                if start_date:
-                    where_clause['viewedAt']['gte'] = start_date
-                if end_date:
-                    where_clause['viewedAt']['lte'] = end_date
-            
-            views = await self.db.courseview.find_many(
-                where=where_clause,
-                distinct=['userId']
+            row = await self.db.query_first(
+                UNIQUE_VIEWERS_SQL,
+                course_id,
+                datetime.combine(start_date.date(), time.min).isoformat() if start_date else '-infinity',
+                datetime.combine(end + timedelta(days=1), time.min).isoformat()
             )
             
-            return len(views)
+            return row['viewers'] if row else 0
             
         except Exception as e:
             logger.error(f"Error counting unique viewers: {str(e)}")
@@ -151,6 +272,64 @@ class CourseViewService:
         finally:
             await self.disconnect()
     
+    async def backfill_unique_viewers(
+        self,
+        days: int = 90,
+        batch_size: int = 5000
+    ) -> int:
+        """Reconstruire les HyperLogLog à partir de course_views (par lots de `batch_size`)"""
+        try:
+            await self.connect()
+            
+            start_date = datetime.now() - timedelta(days=days)
+            cursor = None
+            total = 0
+            
+            while True:
+                page = {
+                    'where': {'viewedAt': {'gte': start_date}},
+                    'order': {'id': 'asc'},
+                    'take': batch_size
+                }
+                if cursor:
+                    page.update(cursor={'id': cursor}, skip=1)
+                
+                views = await self.db.courseview.find_many(**page)
+                if not views:
+                    break
+                
+                await course_viewer_counter.add_many([
+                    {
+                        'courseId': view.courseId,
+                        'viewedAt': view.viewedAt,
+                        'userId': view.userId,
+                        'ipAddress': view.ipAddress,
+                        'userAgent': view.userAgent
+                    }
+                    for view in views
+                ])
+                total += len(views)
+                cursor = views[-1].id
+            
+            logger.info(f"Unique viewer counters backfilled: {total} views")
+            return total
+            
+        except Exception as e:
+            logger.error(f"Error backfilling unique viewers: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
+    
+    async def _count_viewers(self, views: List[Dict[str, Any]]):
+        """Alimenter les HyperLogLog de viewers uniques (erreur non bloquante)"""
+        if not getattr(settings, 'COURSE_VIEWER_HLL_ENABLED', True):
+            return
+        
+        try:
+            await course_viewer_counter.add_many(views)
+        except Exception as e:
+            logger.warning(f"Error updating unique viewer counters: {str(e)}")
+    
     async def get_views_by_country(
         self,
         course_id: str,
@@ -0,0 +1,165 @@
+from typing import Optional, Dict, Any, List
+import json
+import math
+
+# Précision relative des quantiles de temps de visionnage (2 %) : le bucket
+# i couvre ]GAMMA^(i-1), GAMMA^i] secondes, comme un DDSketch
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+# Histogramme du taux de complétion : 10 tranches de 10 %
+COMPLETION_BUCKETS = 10
+
+WATCH_TIME_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def watch_time_bucket(seconds: float) -> Optional[int]:
+    """Bucket logarithmique d'un temps de visionnage (None pour 0)"""
+    if seconds <= 0:
+        return None
+    return math.ceil(math.log(seconds) / math.log(GAMMA))
+
+
+def completion_bucket(rate: float) -> int:
+    """Tranche de 10 % d'un taux de complétion (100 % tombe dans la dernière)"""
+    return min(int(rate // (100 / COMPLETION_BUCKETS)), COMPLETION_BUCKETS - 1)
+
+
+def _load(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, str) else value
+
+
+class EngagementSketch:
+    """
+    Résumé fusionnable de l'engagement d'une leçon.
+
+    Compteurs et sommes (moyennes exactes), histogramme logarithmique des
+    temps de visionnage (quantiles à RELATIVE_ACCURACY près) et histogramme
+    des taux de complétion. Deux résumés se fusionnent en additionnant leurs
+    compteurs bucket par bucket ; la taille ne dépend pas du nombre
+    d'étudiants (quelques centaines de buckets au plus).
+    """
+
+    def __init__(
+        self,
+        students: int = 0,
+        zero_watch_time: int = 0,
+        watch_time_sum: int = 0,
+        completion_sum: float = 0.0,
+        pause_sum: int = 0,
+        rewind_sum: int = 0,
+        speed_change_sum: int = 0,
+        watch_time_buckets: Optional[Dict[int, int]] = None,
+        completion_histogram: Optional[List[int]] = None
+    ):
+        self.students = students
+        self.zero_watch_time = zero_watch_time
+        self.watch_time_sum = watch_time_sum
+        self.completion_sum = completion_sum
+        self.pause_sum = pause_sum
+        self.rewind_sum = rewind_sum
+        self.speed_change_sum = speed_change_sum
+        self.watch_time_buckets: Dict[int, int] = dict(watch_time_buckets or {})
+        self.completion_histogram = list(completion_histogram or [0] * COMPLETION_BUCKETS)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'EngagementSketch':
+        """Ligne de lesson_engagement_sketches (ou de l'agrégat SQL équivalent)"""
+        histogram = [0] * COMPLETION_BUCKETS
+        for bucket, count in (_load(row['completionHistogram']) or {}).items():
+            histogram[int(bucket)] = int(count)
+
+        return cls(
+            students=int(row['students']),
+            zero_watch_time=int(row['zeroWatchTime']),
+            watch_time_sum=int(row['watchTimeSum']),
+            completion_sum=float(row['completionSum']),
+            pause_sum=int(row['pauseSum']),
+            rewind_sum=int(row['rewindSum']),
+            speed_change_sum=int(row['speedChangeSum']),
+            watch_time_buckets={
+                int(bucket): int(count)
+                for bucket, count in (_load(row['watchTimeBuckets']) or {}).items()
+            },
+            completion_histogram=histogram
+        )
+
+    def add(
+        self,
+        watch_time: int,
+        completion_rate: float,
+        pauses: int = 0,
+        rewinds: int = 0,
+        speed_changes: int = 0
+    ):
+        """Ajouter les compteurs d'un étudiant"""
+        self.students += 1
+        self.watch_time_sum += watch_time
+        self.completion_sum += completion_rate
+        self.pause_sum += pauses
+        self.rewind_sum += rewinds
+        self.speed_change_sum += speed_changes
+
+        bucket = watch_time_bucket(watch_time)
+        if bucket is None:
+            self.zero_watch_time += 1
+        else:
+            self.watch_time_buckets[bucket] = self.watch_time_buckets.get(bucket, 0) + 1
+        self.completion_histogram[completion_bucket(completion_rate)] += 1
+
+    def merge(self, other: 'EngagementSketch') -> 'EngagementSketch':
+        """Fusionner un autre résumé (ex. leçons d'un même cours)"""
+        self.students += other.students
+        self.zero_watch_time += other.zero_watch_time
+        self.watch_time_sum += other.watch_time_sum
+        self.completion_sum += other.completion_sum
+        self.pause_sum += other.pause_sum
+        self.rewind_sum += other.rewind_sum
+        self.speed_change_sum += other.speed_change_sum
+        for bucket, count in other.watch_time_buckets.items():
+            self.watch_time_buckets[bucket] = self.watch_time_buckets.get(bucket, 0) + count
+        self.completion_histogram = [
+            a + b for a, b in zip(self.completion_histogram, other.completion_histogram)
+        ]
+        return self
+
+    def watch_time_quantile(self, q: float) -> float:
+        """Temps de visionnage au quantile q (rang le plus proche, à RELATIVE_ACCURACY près)"""
+        if self.students == 0:
+            return 0.0
+
+        # Rang le plus proche : plus petite valeur dont au moins q des étudiants sont en dessous
+        rank = max(math.ceil(q * self.students) - 1, 0)
+        seen = self.zero_watch_time
+        if rank < seen:
+            return 0.0
+
+        for bucket in sorted(self.watch_time_buckets):
+            seen += self.watch_time_buckets[bucket]
+            if rank < seen:
+                # Milieu relatif du bucket : erreur relative <= RELATIVE_ACCURACY
+                return 2 * GAMMA ** bucket / (GAMMA + 1)
+
+        return 2 * GAMMA ** max(self.watch_time_buckets) / (GAMMA + 1)
+
+    def summary(self) -> Dict[str, Any]:
+        """Statistiques d'engagement (format de get_engagement_stats)"""
+        total = self.students
+        step = 100 // COMPLETION_BUCKETS
+
+        return {
+            'total_students': total,
+            'avg_watch_time': self.watch_time_sum // total if total else 0,
+            'avg_completion_rate': round(self.completion_sum / total, 2) if total else 0.0,
+            'avg_pauses': self.pause_sum // total if total else 0,
+            'avg_rewinds': self.rewind_sum // total if total else 0,
+            'avg_speed_changes': self.speed_change_sum // total if total else 0,
+            'watch_time_percentiles': {
+                f"p{round(q * 100)}": round(self.watch_time_quantile(q))
+                for q in WATCH_TIME_QUANTILES
+            },
+            'completion_histogram': [
+                {'range': f"{i * step}-{(i + 1) * step}", 'students': count}
+                for i, count in enumerate(self.completion_histogram)
+            ]
+        }
@@ -0,0 +1,311 @@
+from typing import Optional, Dict, Any, List, Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import connection, transaction
+import json
+import logging
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP = pa.timestamp('ms', tz='UTC')
+
+# Tables exportées : colonne d'incrément et schéma Arrow (noms des colonnes
+# Postgres). Les tables indexées par jour (`date`) ne sont exportées que
+# pour les jours clos : leurs compteurs du jour courant bougent encore.
+EXPORT_TABLES = {
+    'course_analytics': {
+        'column': 'date',
+        'schema': pa.schema([
+            ('id', pa.string()),
+            ('courseId', pa.string()),
+            ('date', pa.date32()),
+            ('views', pa.int32()),
+            ('enrollments', pa.int32()),
+            ('completions', pa.int32()),
+            ('avgRating', pa.float64()),
+            ('ratingSum', pa.float64()),
+            ('ratingCount', pa.int32()),
+            ('createdAt', TIMESTAMP),
+        ]),
+    },
+    # viewedAt est horodaté à la mise en file, l'insertion vient plus tard :
+    # la borne recule d'au moins le délai maximal de la file (voir _lag_seconds)
+    'course_views': {
+        'column': 'viewedAt',
+        'queued': True,
+        'schema': pa.schema([
+            ('id', pa.string()),
+            ('courseId', pa.string()),
+            ('userId', pa.string()),
+            ('ipAddress', pa.string()),
+            ('userAgent', pa.string()),
+            ('country', pa.string()),
+            ('city', pa.string()),
+            ('device', pa.string()),
+            ('browser', pa.string()),
+            ('os', pa.string()),
+            ('referrer', pa.string()),
+            ('source', pa.string()),
+            ('viewedAt', TIMESTAMP),
+        ]),
+    },
+    # Lignes mises à jour sur place : chaque export contient les lignes
+    # modifiées depuis le précédent, à dédoublonner sur `id` (dernier updatedAt)
+    'video_analytics': {
+        'column': 'updatedAt',
+        'schema': pa.schema([
+            ('id', pa.string()),
+            ('lessonId', pa.string()),
+            ('studentId', pa.string()),
+            ('totalWatchTime', pa.int32()),
+            ('completionRate', pa.float64()),
+            ('pauseCount', pa.int32()),
+            ('rewindCount', pa.int32()),
+            ('speedChanges', pa.int32()),
+            ('avgQuality', pa.string()),
+            ('lastPosition', pa.int32()),
+            ('createdAt', TIMESTAMP),
+            ('updatedAt', TIMESTAMP),
+        ]),
+    },
+    'search_logs': {
+        'column': 'searchedAt',
+        'schema': pa.schema([
+            ('id', pa.string()),
+            ('query', pa.string()),
+            ('userId', pa.string()),
+            ('ipAddress', pa.string()),
+            ('resultsCount', pa.int32()),
+            ('clickedResult', pa.string()),
+            ('searchedAt', TIMESTAMP),
+        ]),
+    },
+    'revenue_reports': {
+        'column': 'date',
+        'schema': pa.schema([
+            ('id', pa.string()),
+            ('date', pa.date32()),
+            ('totalRevenue', pa.float64()),
+            ('totalOrders', pa.int32()),
+            ('createdAt', TIMESTAMP),
+        ]),
+    },
+}
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class ParquetExporter:
+    """
+    Export incrémental des tables analytics en Parquet (zstd) pour la BI.
+
+    Chaque passage exporte, table par table, les lignes de
+    [watermark, borne) dans un nouveau fichier `<table>/<table>-<début>.parquet`.
+    Les lignes sont lues par un curseur serveur psycopg2 (Prisma charge tout
+    le résultat en mémoire) et écrites par lots de `batch_size` lignes, un
+    row group par lot : la mémoire ne dépend pas du volume exporté.
+    Le manifeste `manifest.json` garde le watermark et les fichiers de
+    chaque table ; il n'est mis à jour qu'une fois le fichier complet.
+    La borne est calculée avec l'horloge des writers (datetime.now(), heure
+    locale naïve comme les colonnes Postgres) moins `lag_seconds`.
+    """
+
+    def __init__(
+        self,
+        export_dir: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        lag_seconds: Optional[int] = None,
+        compression_level: Optional[int] = None
+    ):
+        self.export_dir = Path(export_dir or settings.PARQUET_EXPORT_DIR)
+        self.batch_size = batch_size or getattr(settings, 'PARQUET_EXPORT_BATCH_SIZE', 50000)
+        self.lag_seconds = lag_seconds if lag_seconds is not None else getattr(
+            settings, 'PARQUET_EXPORT_LAG_SECONDS', 300
+        )
+        self.compression_level = compression_level or getattr(
+            settings, 'PARQUET_EXPORT_ZSTD_LEVEL', 3
+        )
+
+    def run(
+        self,
+        tables: Optional[List[str]] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Exporter les nouvelles lignes de chaque table et mettre à jour le manifeste"""
+        now = now or datetime.now()
+        manifest = self.load_manifest()
+        report = {}
+
+        for table in tables or EXPORT_TABLES:
+            if table not in EXPORT_TABLES:
+                raise ValueError(f"Unknown table: {table}")
+
+            try:
+                report[table] = self.export_table(table, manifest, now)
+            except Exception as e:
+                logger.error(f"Error exporting {table} to parquet: {str(e)}")
+                raise
+
+            # Manifeste réécrit après chaque table : une erreur sur la
+            # suivante ne fait pas réexporter celles déjà terminées
+            self.save_manifest(manifest)
+
+        logger.info(f"Parquet export done: {json.dumps(report, default=str)}")
+        return report
+
+    def export_table(
+        self,
+        table: str,
+        manifest: Dict[str, Any],
+        now: datetime
+    ) -> Dict[str, Any]:
+        """Exporter [watermark, borne) d'une table dans un nouveau fichier"""
+        spec = EXPORT_TABLES[table]
+        column = spec['column']
+        by_day = spec['schema'].field(column).type == pa.date32()
+
+        entry = manifest['tables'].setdefault(table, {'column': column, 'watermark': None, 'files': []})
+        until = now.date() if by_day else now - timedelta(seconds=self._lag_seconds(spec))
+
+        since = self._parse_watermark(entry['watermark'], by_day)
+        if since is None:
+            since = self._first_value(table, column)
+            if since is None:
+                return {'rows': 0, 'file': None, 'watermark': None}
+
+        if since >= until:
+            return {'rows': 0, 'file': None, 'watermark': entry['watermark']}
+
+        path = self.export_dir / table / f"{table}-{since.strftime('%Y%m%dT%H%M%S')}.parquet"
+        rows = self._write_range(table, spec, since, until, path)
+
+        if rows:
+            entry['files'].append({
+                'path': str(path.relative_to(self.export_dir)),
+                'from': since.isoformat(),
+                'until': until.isoformat(),
+                'rows': rows,
+                'exported_at': now.isoformat(),
+            })
+        entry['watermark'] = until.isoformat()
+
+        return {'rows': rows, 'file': str(path) if rows else None, 'watermark': entry['watermark']}
+
+    def _lag_seconds(self, spec: Dict[str, Any]) -> float:
+        """
+        Recul de la borne : `lag_seconds`, porté pour les tables alimentées
+        par une file au délai maximal d'un enregistrement avant insertion
+        (COURSE_VIEW_MAX_ATTEMPTS reprises espacées au plus de
+        COURSE_VIEW_QUEUE_VISIBILITY_TIMEOUT). Les lignes rejouées depuis la
+        dead letter après ce délai ne sont pas exportées.
+        """
+        if not spec.get('queued'):
+            return self.lag_seconds
+        queue_delay = getattr(settings, 'COURSE_VIEW_MAX_ATTEMPTS', 10) * getattr(
+            settings, 'COURSE_VIEW_QUEUE_VISIBILITY_TIMEOUT', 300.0
+        )
+        return max(self.lag_seconds, queue_delay)
+
+    def load_manifest(self) -> Dict[str, Any]:
+        path = self.export_dir / MANIFEST_NAME
+        if not path.exists():
+            return {'version': 1, 'tables': {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest: Dict[str, Any]):
+        """Écriture atomique (fichier temporaire puis rename)"""
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        path = self.export_dir / MANIFEST_NAME
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _write_range(
+        self,
+        table: str,
+        spec: Dict[str, Any],
+        since,
+        until,
+        path: Path
+    ) -> int:
+        """Écrire les lignes de [since, until) lot par lot ; 0 si aucune (pas de fichier)"""
+        schema = spec['schema']
+        columns = ', '.join(f'"{name}"' for name in schema.names)
+        sql = (
+            f'SELECT {columns} FROM "{table}" '
+            f'WHERE "{spec["column"]}" >= %s AND "{spec["column"]}" < %s'
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.parquet.tmp')
+        writer = None
+        rows = 0
+
+        try:
+            for batch in self._fetch_batches(sql, [since, until]):
+                record_batch = pa.RecordBatch.from_arrays(
+                    [
+                        pa.array(values, type=field.type)
+                        for values, field in zip(zip(*batch), schema)
+                    ],
+                    schema=schema
+                )
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        str(tmp_path),
+                        schema,
+                        compression='zstd',
+                        compression_level=self.compression_level
+                    )
+                writer.write_batch(record_batch)
+                rows += len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if writer is not None:
+            # Fichier visible seulement une fois complet ; un passage
+            # interrompu repart du même watermark et le réécrit
+            os.replace(tmp_path, path)
+
+        return rows
+
+    def _fetch_batches(self, sql: str, params: List[Any]) -> Iterator[List[tuple]]:
+        with self._server_cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                batch = cursor.fetchmany(self.batch_size)
+                if not batch:
+                    return
+                yield batch
+
+    @contextmanager
+    def _server_cursor(self):
+        """Curseur nommé psycopg2 (côté serveur), valable le temps de la transaction"""
+        with transaction.atomic():
+            connection.ensure_connection()
+            cursor = connection.connection.cursor(name='analytics_parquet_export')
+            cursor.itersize = self.batch_size
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def _first_value(self, table: str, column: str):
+        """Plus petite valeur de la colonne d'incrément (point de départ du premier export)"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MIN("{column}") FROM "{table}"')
+            return cursor.fetchone()[0]
+
+    def _parse_watermark(self, value: Optional[str], by_day: bool):
+        if value is None:
+            return None
+        return date.fromisoformat(value) if by_day else datetime.fromisoformat(value)
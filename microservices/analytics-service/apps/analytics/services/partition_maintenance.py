@@ -0,0 +1,330 @@
+from typing import Optional, Dict, Any, List
+from datetime import date, datetime, timedelta
+from django.conf import settings
+from shared.shared.utils.prisma_client import get_prisma_client
+import json
+import logging
+import re
+
+from .video_analytics_service import (
+    DELETE_EMPTY_LESSON_SKETCHES_SQL,
+    RECOMPUTE_LESSON_SKETCHES_SQL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tables partitionnées par mois -> colonne de partitionnement
+PARTITIONED_TABLES = {
+    'course_views': 'viewedAt',
+    'search_logs': 'searchedAt',
+    'user_activity': 'createdAt',
+}
+
+# Durées de rétention par défaut (mois), surchargées par ANALYTICS_RETENTION_MONTHS.
+# video_analytics (progression des étudiants) n'est purgée que si sa
+# rétention est explicitement positive
+DEFAULT_RETENTION_MONTHS = {
+    'course_views': 13,
+    'search_logs': 6,
+    'user_activity': 13,
+    'video_analytics': 0,
+}
+
+LIST_PARTITIONS_SQL = """
+SELECT child.relname AS "name"
+FROM pg_inherits
+JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+WHERE parent.relname = $1
+ORDER BY child.relname
+"""
+
+# Mois des lignes tombées dans la partition DEFAULT (aucune partition mensuelle
+# ne les couvrait au moment de l'INSERT)
+DEFAULT_PARTITION_MONTHS_SQL = """
+SELECT DISTINCT date_trunc('month', "{column}")::date AS "month"
+FROM "{default}"
+ORDER BY 1
+"""
+
+# Une partition ne peut pas être créée tant que la partition DEFAULT contient
+# des lignes de sa plage : création détachée, déplacement des lignes puis
+# ATTACH, dans un seul bloc (donc une seule transaction)
+MOVE_FROM_DEFAULT_SQL = """
+DO $$
+BEGIN
+    CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+    INSERT INTO "{name}" SELECT * FROM "{default}"
+    WHERE "{column}" >= '{start}' AND "{column}" < '{end}';
+    DELETE FROM "{default}"
+    WHERE "{column}" >= '{start}' AND "{column}" < '{end}';
+    ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM ('{start}') TO ('{end}');
+END $$
+"""
+
+# video_analytics n'est pas append-only (upsert par leçon/étudiant) : pas de
+# partitionnement, purge optionnelle par lots des lignes inactives depuis la
+# rétention. Les leçons touchées sont renvoyées pour recalculer leurs résumés
+# d'engagement (RECOMPUTE_LESSON_SKETCHES_SQL)
+PURGE_VIDEO_ANALYTICS_SQL = """
+WITH expired AS (
+    SELECT "id" FROM "video_analytics"
+    WHERE "updatedAt" < $1::timestamp
+    LIMIT $2
+)
+DELETE FROM "video_analytics"
+WHERE "id" IN (SELECT "id" FROM expired)
+RETURNING "lessonId"
+"""
+
+PARTITION_NAME = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def add_months(month: date, months: int) -> date:
+    """Premier jour du mois décalé de `months` mois"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.strftime('%Y_%m')}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+class PartitionMaintenance:
+    """
+    Maintenance des tables d'événements partitionnées par mois.
+
+    Crée les partitions des `premake_months` prochains mois, détache puis
+    supprime celles qui sont entièrement plus anciennes que la rétention de
+    leur table (DROP TABLE en O(1) au lieu d'un DELETE massif), et vérifie
+    que les requêtes bornées dans le temps n'examinent que les partitions utiles.
+    Les lignes arrivées dans la partition DEFAULT sont déplacées dans la
+    partition de leur mois, créée au passage.
+    """
+
+    def __init__(
+        self,
+        premake_months: Optional[int] = None,
+        retention_months: Optional[Dict[str, int]] = None,
+        drop_expired: Optional[bool] = None
+    ):
+        self.db = None
+        self.premake_months = premake_months if premake_months is not None else getattr(
+            settings, 'PARTITION_PREMAKE_MONTHS', 3
+        )
+        self.retention_months = {
+            **DEFAULT_RETENTION_MONTHS,
+            **getattr(settings, 'ANALYTICS_RETENTION_MONTHS', {}),
+            **(retention_months or {}),
+        }
+        self.drop_expired = drop_expired if drop_expired is not None else getattr(
+            settings, 'PARTITION_DROP_EXPIRED', True
+        )
+
+    async def connect(self):
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
+
+    async def disconnect(self):
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
+
+    async def run(
+        self,
+        dry_run: bool = False,
+        verify: bool = False,
+        today: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """Créer les partitions à venir, appliquer la rétention, vérifier le pruning"""
+        try:
+            await self.connect()
+
+            today = today or date.today()
+            report: Dict[str, Any] = {}
+
+            for table in PARTITIONED_TABLES:
+                report[table] = {
+                    'created': await self.ensure_partitions(table, today, dry_run),
+                    'expired': await self.expire_partitions(table, today, dry_run),
+                }
+                if verify:
+                    report[table]['pruning'] = await self.verify_pruning(table)
+
+            if self.retention_months['video_analytics'] > 0:
+                report['video_analytics'] = {
+                    'purged': await self.purge_video_analytics(today, dry_run)
+                }
+
+            logger.info(f"Partition maintenance done: {json.dumps(report, default=str)}")
+            return report
+
+        except Exception as e:
+            logger.error(f"Error during partition maintenance: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
+
+    async def list_partitions(self, table: str) -> Dict[date, str]:
+        """Partitions attachées : mois -> nom"""
+        rows = await self.db.query_raw(LIST_PARTITIONS_SQL, table)
+
+        partitions = {}
+        for row in rows:
+            match = PARTITION_NAME.search(row['name'])
+            if match:
+                partitions[date(int(match.group(1)), int(match.group(2)), 1)] = row['name']
+        return partitions
+
+    async def default_partition_months(self, table: str) -> List[date]:
+        """Mois des lignes présentes dans la partition DEFAULT"""
+        rows = await self.db.query_raw(DEFAULT_PARTITION_MONTHS_SQL.format(
+            column=PARTITIONED_TABLES[table],
+            default=default_partition_name(table)
+        ))
+        return [
+            row['month'] if isinstance(row['month'], date) else date.fromisoformat(str(row['month'])[:10])
+            for row in rows
+        ]
+
+    async def ensure_partitions(
+        self,
+        table: str,
+        today: date,
+        dry_run: bool = False
+    ) -> List[str]:
+        """
+        Créer les partitions du mois courant et des `premake_months` suivants,
+        ainsi que celles des mois dont des lignes attendent dans la partition DEFAULT
+        """
+        existing = await self.list_partitions(table)
+        current = today.replace(day=1)
+        in_default = set(await self.default_partition_months(table))
+        months = {add_months(current, offset) for offset in range(self.premake_months + 1)}
+        created = []
+
+        for month in sorted(months | in_default):
+            if month in existing:
+                continue
+
+            name = partition_name(table, month)
+            if not dry_run:
+                if month in in_default:
+                    await self.db.execute_raw(MOVE_FROM_DEFAULT_SQL.format(
+                        name=name,
+                        table=table,
+                        default=default_partition_name(table),
+                        column=PARTITIONED_TABLES[table],
+                        start=month.isoformat(),
+                        end=add_months(month, 1).isoformat()
+                    ))
+                else:
+                    await self.db.execute_raw(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                    )
+            created.append(name)
+
+        return created
+
+    async def expire_partitions(
+        self,
+        table: str,
+        today: date,
+        dry_run: bool = False
+    ) -> List[str]:
+        """Détacher (et supprimer) les partitions entièrement hors rétention"""
+        cutoff = add_months(today.replace(day=1), -self.retention_months[table])
+        expired = []
+
+        for month, name in sorted((await self.list_partitions(table)).items()):
+            if add_months(month, 1) > cutoff:
+                break
+
+            if not dry_run:
+                await self.db.execute_raw(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+                if self.drop_expired:
+                    await self.db.execute_raw(f'DROP TABLE "{name}"')
+            expired.append(name)
+
+        return expired
+
+    async def purge_video_analytics(
+        self,
+        today: date,
+        dry_run: bool = False,
+        batch_size: int = 10000
+    ) -> int:
+        """
+        Supprimer par lots les analytics vidéo inactives depuis la rétention
+        (désactivé si elle n'est pas positive) et recalculer les résumés
+        d'engagement des leçons touchées
+        """
+        months = self.retention_months['video_analytics']
+        if months <= 0:
+            return 0
+
+        cutoff = datetime.combine(
+            add_months(today.replace(day=1), -months),
+            datetime.min.time()
+        )
+
+        if dry_run:
+            return await self.db.videoanalytics.count(where={'updatedAt': {'lt': cutoff}})
+
+        purged = 0
+        while True:
+            rows = await self.db.query_raw(
+                PURGE_VIDEO_ANALYTICS_SQL,
+                cutoff.isoformat(),
+                batch_size
+            )
+            if rows:
+                lessons = json.dumps(sorted({row['lessonId'] for row in rows}))
+                await self.db.execute_raw(RECOMPUTE_LESSON_SKETCHES_SQL, lessons)
+                await self.db.execute_raw(DELETE_EMPTY_LESSON_SKETCHES_SQL, lessons)
+            purged += len(rows)
+            if len(rows) < batch_size:
+                break
+
+        return purged
+
+    async def verify_pruning(self, table: str, days: int = 7) -> Dict[str, Any]:
+        """EXPLAIN d'une requête sur les `days` derniers jours : partitions examinées"""
+        column = PARTITIONED_TABLES[table]
+        since = (datetime.now() - timedelta(days=days)).replace(microsecond=0)
+
+        rows = await self.db.query_raw(
+            f'EXPLAIN (FORMAT JSON) SELECT COUNT(*) FROM "{table}" '
+            f"WHERE \"{column}\" >= '{since.isoformat()}'"
+        )
+        plan = rows[0]['QUERY PLAN']
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        scanned = sorted(set(_relation_names(plan)))
+        total = len(await self.list_partitions(table))
+
+        return {
+            'partitions_total': total,
+            'partitions_scanned': len(scanned),
+            'scanned': scanned,
+            'pruned': len(scanned) < total,
+        }
+
+
+def _relation_names(node: Any) -> List[str]:
+    """Tables lues dans un plan EXPLAIN (FORMAT JSON)"""
+    names = []
+    if isinstance(node, dict):
+        if 'Relation Name' in node:
+            names.append(node['Relation Name'])
+        for value in node.values():
+            names.extend(_relation_names(value))
+    elif isinstance(node, list):
+        for item in node:
+            names.extend(_relation_names(item))
+    return names
@@ -0,0 +1,26 @@
+from typing import Dict
+import asyncio
+import weakref
+
+import redis.asyncio as aioredis
+
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, aioredis.Redis]]' = weakref.WeakKeyDictionary()
+
+
+def get_async_redis(url: str) -> aioredis.Redis:
+    """
+    Client redis.asyncio de la boucle courante.
+
+    Les connexions d'un client asyncio sont liées à la boucle qui les a
+    ouvertes : un pool par boucle et par URL (boucle uvicorn du worker,
+    boucle persistante de worker_async_to_sync côté Celery).
+    """
+    loop = asyncio.get_running_loop()
+    clients = _clients.get(loop)
+    if clients is None:
+        clients = _clients[loop] = {}
+
+    client = clients.get(url)
+    if client is None:
+        client = clients[url] = aioredis.Redis.from_url(url)
+    return client
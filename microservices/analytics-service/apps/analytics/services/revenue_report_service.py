@@ -1,24 +1,89 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, date, timedelta
-from prisma import Prisma
+from prisma.models import RevenueReport
+from shared.shared.utils.prisma_client import get_prisma_client
 import logging
 
+from .analytics_cache import analytics_cache
+from .partition_maintenance import add_months
+
 logger = logging.getLogger(__name__)
 
+# Upsert du rapport quotidien et du total mensuel en une seule requête
+# (atomique) : les montants sont additionnés côté base, sans lecture
+# préalable. daysWithSales n'augmente qu'à la création du rapport du jour.
+UPSERT_REPORT_SQL = """
+WITH daily AS (
+    INSERT INTO "revenue_reports" ("id", "date", "totalRevenue", "totalOrders")
+    VALUES (gen_random_uuid()::text, $1::date, $2::double precision, $3::int)
+    ON CONFLICT ("date") DO UPDATE SET
+        "totalRevenue" = "revenue_reports"."totalRevenue" + EXCLUDED."totalRevenue",
+        "totalOrders" = "revenue_reports"."totalOrders" + EXCLUDED."totalOrders"
+    RETURNING *, (xmax = 0) AS "inserted"
+),
+monthly AS (
+    INSERT INTO "revenue_monthly"
+        ("id", "month", "totalRevenue", "totalOrders", "daysWithSales", "updatedAt")
+    SELECT
+        gen_random_uuid()::text,
+        date_trunc('month', $1::date)::date,
+        $2::double precision,
+        $3::int,
+        CASE WHEN "inserted" THEN 1 ELSE 0 END,
+        CURRENT_TIMESTAMP
+    FROM daily
+    ON CONFLICT ("month") DO UPDATE SET
+        "totalRevenue" = "revenue_monthly"."totalRevenue" + EXCLUDED."totalRevenue",
+        "totalOrders" = "revenue_monthly"."totalOrders" + EXCLUDED."totalOrders",
+        "daysWithSales" = "revenue_monthly"."daysWithSales" + EXCLUDED."daysWithSales",
+        "updatedAt" = CURRENT_TIMESTAMP
+)
+SELECT "id", "date", "totalRevenue", "totalOrders", "createdAt"
+FROM daily
+"""
+
+# Totaux d'une période : mois complets [$3, $4) depuis revenue_monthly (une
+# ligne par mois), jours des mois incomplets depuis revenue_reports
+RANGE_TOTALS_SQL = """
+SELECT
+    COALESCE(SUM("revenue"), 0)::double precision AS "revenue",
+    COALESCE(SUM("orders"), 0)::int AS "orders",
+    COALESCE(SUM("days"), 0)::int AS "days"
+FROM (
+    SELECT "totalRevenue" AS "revenue", "totalOrders" AS "orders", "daysWithSales" AS "days"
+    FROM "revenue_monthly"
+    WHERE "month" >= $3::date AND "month" < $4::date
+    UNION ALL
+    SELECT "totalRevenue", "totalOrders", 1
+    FROM "revenue_reports"
+    WHERE "date" >= $1::date AND "date" <= $2::date
+      AND NOT ("date" >= $3::date AND "date" < $4::date)
+) AS "totals"
+"""
+
+
+def full_months(start_date: date, end_date: date) -> Tuple[date, date]:
+    """[premier, dernier) mois entièrement compris dans [start_date, end_date]"""
+    first = start_date if start_date.day == 1 else add_months(start_date.replace(day=1), 1)
+    last = add_months(end_date.replace(day=1), 1)
+    if end_date + timedelta(days=1) != last:
+        last = end_date.replace(day=1)
+    return first, max(first, last)
+
 
 class RevenueReportService:
     """Service pour gérer les rapports de revenus"""
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def create_or_update_report(
         self,
@@ -26,33 +91,19 @@ class RevenueReportService:
         revenue: float,
         orders: int
     ):
-        """Créer ou mettre à jour un rapport de revenus"""
+        """Ajouter des revenus au rapport du jour (créé au besoin) et au total du mois"""
         try:
             await self.connect()
             
-            # Essayer de récupérer le rapport existant
-            existing = await self.db.revenuereport.find_unique(
-                where={'date': report_date}
+            report = await self.db.query_first(
+                UPSERT_REPORT_SQL,
+                report_date.isoformat(),
+                revenue,
+                orders,
+                model=RevenueReport
             )
             
-            if existing:
-                # Mettre à jour
-                report = await self.db.revenuereport.update(
-                    where={'date': report_date},
-                    data={
-                        'totalRevenue': existing.totalRevenue + revenue,
-                        'totalOrders': existing.totalOrders + orders
-                    }
-                )
-            else:
-                # Créer
-                report = await self.db.revenuereport.create(
-                    data={
-                        'date': report_date,
-                        'totalRevenue': revenue,
-                        'totalOrders': orders
-                    }
-                )
+            await analytics_cache.invalidate('revenue:daily', f"revenue:{report_date.strftime('%Y-%m')}")
             
             logger.info(f"Revenue report updated for {report_date}")
             return report
@@ -108,71 +159,61 @@ class RevenueReportService:
         finally:
             await self.disconnect()
     
-    async def get_total_revenue(
+    async def get_range_totals(
         self,
         start_date: date,
         end_date: date
-    ) -> float:
-        """Calculer le revenu total sur une période"""
+    ) -> Dict[str, Any]:
+        """Revenu, commandes et jours avec ventes sur une période (au plus une ligne par mois complet)"""
         try:
             await self.connect()
             
-            reports = await self.get_reports_range(start_date, end_date)
-            total = sum(report.totalRevenue for report in reports)
+            first_month, last_month = full_months(start_date, end_date)
             
-            return round(total, 2)
+            return await self.db.query_first(
+                RANGE_TOTALS_SQL,
+                start_date.isoformat(),
+                end_date.isoformat(),
+                first_month.isoformat(),
+                last_month.isoformat()
+            )
             
         except Exception as e:
-            logger.error(f"Error calculating total revenue: {str(e)}")
+            logger.error(f"Error calculating revenue totals: {str(e)}")
             raise
         finally:
             await self.disconnect()
     
+    async def get_total_revenue(
+        self,
+        start_date: date,
+        end_date: date
+    ) -> float:
+        """Calculer le revenu total sur une période"""
+        totals = await self.get_range_totals(start_date, end_date)
+        return round(totals['revenue'], 2)
+    
     async def get_total_orders(
         self,
         start_date: date,
         end_date: date
     ) -> int:
         """Compter le nombre total de commandes sur une période"""
-        try:
-            await self.connect()
-            
-            reports = await self.get_reports_range(start_date, end_date)
-            total = sum(report.totalOrders for report in reports)
-            
-            return total
-            
-        except Exception as e:
-            logger.error(f"Error calculating total orders: {str(e)}")
-            raise
-        finally:
-            await self.disconnect()
+        totals = await self.get_range_totals(start_date, end_date)
+        return totals['orders']
     
     async def get_average_order_value(
         self,
         start_date: date,
         end_date: date
     ) -> float:
-        """Calculer la valeur moyenne d'une commande"""
-        try:
-            await self.connect()
-            
-            reports = await self.get_reports_range(start_date, end_date)
-            
-            total_revenue = sum(report.totalRevenue for report in reports)
-            total_orders = sum(report.totalOrders for report in reports)
-            
-            if total_orders == 0:
-                return 0.0
-            
-            avg = total_revenue / total_orders
-            return round(avg, 2)
-            
-        except Exception as e:
-            logger.error(f"Error calculating average order value: {str(e)}")
-            raise
-        finally:
-            await self.disconnect()
+        """Calculer la valeur moyenne d'une commande (à partir des sommes stockées)"""
+        totals = await self.get_range_totals(start_date, end_date)
+        
+        if totals['orders'] == 0:
+            return 0.0
+        
+        return round(totals['revenue'] / totals['orders'], 2)
     
     async def get_daily_reports(
         self,
@@ -217,30 +258,30 @@ class RevenueReportService:
         year: int,
         month: int
     ) -> Dict[str, Any]:
-        """Récupérer le résumé mensuel"""
+        """Récupérer le résumé mensuel (une ligne de revenue_monthly)"""
         try:
-            # Calculer les dates de début et fin du mois
-            start_date = date(year, month, 1)
-            if month == 12:
-                end_date = date(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                end_date = date(year, month + 1, 1) - timedelta(days=1)
+            await self.connect()
             
-            reports = await self.get_reports_range(start_date, end_date)
+            summary = await self.db.revenuemonthly.find_unique(
+                where={'month': date(year, month, 1)}
+            )
             
-            total_revenue = sum(report.totalRevenue for report in reports)
-            total_orders = sum(report.totalOrders for report in reports)
+            total_revenue = summary.totalRevenue if summary else 0.0
+            total_orders = summary.totalOrders if summary else 0
+            days_with_sales = summary.daysWithSales if summary else 0
             
             return {
                 'year': year,
                 'month': month,
                 'total_revenue': round(total_revenue, 2),
                 'total_orders': total_orders,
-                'average_daily_revenue': round(total_revenue / len(reports), 2) if reports else 0.0,
+                'average_daily_revenue': round(total_revenue / days_with_sales, 2) if days_with_sales else 0.0,
                 'average_order_value': round(total_revenue / total_orders, 2) if total_orders > 0 else 0.0,
-                'days_with_sales': len(reports)
+                'days_with_sales': days_with_sales
             }
             
         except Exception as e:
             logger.error(f"Error getting monthly summary: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            await self.disconnect()
@@ -0,0 +1,112 @@
+from typing import Optional, Dict, Any, Tuple, Callable, Awaitable
+from datetime import datetime, time, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Début des requêtes d'agrégation incrémentale ($1 = job, $2 = watermark
+# courant, $3 = nouveau watermark). Le watermark n'avance que s'il vaut
+# encore $2 : deux jobs concurrents ne peuvent pas compter deux fois la même
+# fenêtre. La suite de la requête filtre ses lignes sur EXISTS (claim).
+CLAIM_WATERMARK_CTE = """
+WITH claim AS (
+    INSERT INTO "rollup_watermarks" ("name", "watermark", "updatedAt")
+    VALUES ($1, $3::timestamp, CURRENT_TIMESTAMP)
+    ON CONFLICT ("name") DO UPDATE SET
+        "watermark" = EXCLUDED."watermark",
+        "updatedAt" = CURRENT_TIMESTAMP
+    WHERE "rollup_watermarks"."watermark" = $2::timestamp
+    RETURNING "name"
+)"""
+
+# Verrou sur la ligne d'un job : FOR UPDATE pendant l'agrégation, FOR SHARE
+# pour les écritures tardives qui doivent voir un watermark stable
+LOCK_WATERMARK_SQL = """
+SELECT "watermark" FROM "rollup_watermarks" WHERE "name" = $1 FOR {mode}
+"""
+
+
+def naive(value: datetime) -> datetime:
+    """Heure murale sans fuseau, tronquée à la milliseconde (TIMESTAMP(3))"""
+    return value.replace(
+        tzinfo=None,
+        microsecond=value.microsecond // 1000 * 1000
+    )
+
+
+async def get_watermark(db, job: str) -> Optional[datetime]:
+    """Position courante d'un job d'agrégation (None s'il n'a jamais tourné)"""
+    mark = await db.rollupwatermark.find_unique(where={'name': job})
+    return naive(mark.watermark) if mark else None
+
+
+async def lock_watermark(tx, job: str, share: bool = False) -> Optional[datetime]:
+    """
+    Lire le watermark d'un job en le verrouillant jusqu'à la fin de la
+    transaction `tx` (partagé pour les lecteurs, exclusif pour l'agrégation)
+    """
+    row = await tx.query_first(LOCK_WATERMARK_SQL.format(mode='SHARE' if share else 'UPDATE'), job)
+    if not row:
+        return None
+    watermark = row['watermark']
+    return naive(watermark if isinstance(watermark, datetime) else datetime.fromisoformat(str(watermark)))
+
+
+async def rollup_window(
+    db,
+    job: str,
+    start_date: datetime,
+    use_rollup: bool = True
+) -> Tuple[str, str, str]:
+    """
+    Découper une fenêtre : [début, jour du watermark) depuis la table de
+    rollup, le reste depuis la table brute. Sans rollup exploitable, tout
+    est lu dans la table brute à partir de `start_date`.
+
+    Retourne ($1 date de début, $2 date de fin exclue, $3 début brut).
+    """
+    rollup_from = start_date.date()
+    watermark = await get_watermark(db, job) if use_rollup else None
+
+    if watermark is None or watermark.date() <= rollup_from:
+        return rollup_from.isoformat(), rollup_from.isoformat(), start_date.isoformat()
+
+    rollup_until = watermark.date()
+    raw_from = datetime.combine(rollup_until, time.min)
+    return rollup_from.isoformat(), rollup_until.isoformat(), raw_from.isoformat()
+
+
+async def advance_rollup(
+    db,
+    job: str,
+    sql: str,
+    first_event: Callable[[], Awaitable[Optional[datetime]]],
+    lag_seconds: int,
+    max_span_hours: int
+) -> Dict[str, Any]:
+    """
+    Agréger [watermark, until) avec `sql` (CLAIM_WATERMARK_CTE + agrégat).
+    Les `lag_seconds` dernières secondes sont laissées de côté (transactions
+    encore en cours) et une passe couvre au plus `max_span_hours` heures.
+    `first_event()` donne le point de départ du premier passage.
+    """
+    since = await get_watermark(db, job)
+    if since is None:
+        first = await first_event()
+        if first is None:
+            return {'rows': 0, 'watermark': None, 'caught_up': True}
+        since = naive(first)
+
+    horizon = naive(datetime.now() - timedelta(seconds=lag_seconds))
+    until = min(horizon, since + timedelta(hours=max_span_hours))
+    if until <= since:
+        return {'rows': 0, 'watermark': since, 'caught_up': True}
+
+    # Verrou posé avant l'agrégat : son instantané voit tout ce qu'ont écrit
+    # les transactions qui tenaient le watermark (clics tardifs, FOR SHARE)
+    async with db.tx() as tx:
+        await lock_watermark(tx, job)
+        rows = await tx.execute_raw(sql, job, since.isoformat(), until.isoformat())
+
+    logger.info(f"Rollup {job} refreshed: {since} -> {until} ({rows} rows)")
+    return {'rows': rows, 'watermark': until, 'caught_up': until >= horizon}
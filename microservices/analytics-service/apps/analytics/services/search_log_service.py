@@ -1,25 +1,170 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
-from prisma import Prisma
+from django.conf import settings
+from prisma.models import SearchLog
+from shared.shared.utils.prisma_client import get_prisma_client
 import logging
-from collections import defaultdict
+
+from .analytics_cache import analytics_cache
+from .rollups import CLAIM_WATERMARK_CTE, advance_rollup, lock_watermark, rollup_window
+from .trending_searches import trending_searches
 
 logger = logging.getLogger(__name__)
 
+# Nom du job d'agrégation dans rollup_watermarks
+SEARCH_ROLLUP_JOB = 'search_daily_rollup'
+
+# Les jours antérieurs au watermark sont lus dans search_daily_rollups,
+# le reste (journée en cours) directement dans search_logs.
+# Seules les `limit` lignes agrégées remontent en Python.
+TOP_SEARCHES_SQL = """
+SELECT "query", SUM("count")::int AS "count"
+FROM (
+    SELECT "query", "count"
+    FROM "search_daily_rollups"
+    WHERE "date" >= $1::date AND "date" < $2::date
+    UNION ALL
+    SELECT "query", COUNT(*)::int
+    FROM "search_logs"
+    WHERE "searchedAt" >= $3::timestamp
+    GROUP BY "query"
+) AS searches
+GROUP BY "query"
+ORDER BY "count" DESC, "query" ASC
+LIMIT $4
+"""
+
+TOP_ZERO_RESULT_SEARCHES_SQL = """
+SELECT "query", SUM("count")::int AS "count"
+FROM (
+    SELECT "query", "zeroResultCount" AS "count"
+    FROM "search_daily_rollups"
+    WHERE "date" >= $1::date AND "date" < $2::date
+      AND "zeroResultCount" > 0
+    UNION ALL
+    SELECT "query", COUNT(*)::int
+    FROM "search_logs"
+    WHERE "searchedAt" >= $3::timestamp
+      AND "resultsCount" = 0
+    GROUP BY "query"
+) AS searches
+GROUP BY "query"
+ORDER BY "count" DESC, "query" ASC
+LIMIT $4
+"""
+
+SEARCH_TRENDS_SQL = """
+WITH daily AS (
+    SELECT "date", "query", "count"
+    FROM "search_daily_rollups"
+    WHERE "date" >= $1::date AND "date" < $2::date
+    UNION ALL
+    SELECT "searchedAt"::date, "query", COUNT(*)::int
+    FROM "search_logs"
+    WHERE "searchedAt" >= $3::timestamp
+    GROUP BY 1, 2
+), ranked AS (
+    SELECT
+        "date",
+        "query",
+        "count",
+        SUM("count") OVER (PARTITION BY "date")::int AS "total",
+        ROW_NUMBER() OVER (PARTITION BY "date" ORDER BY "count" DESC, "query" ASC) AS "rank"
+    FROM daily
+)
+SELECT to_char("date", 'YYYY-MM-DD') AS "date", "query", "count", "total"
+FROM ranked
+WHERE "rank" <= 5
+ORDER BY "date", "rank"
+"""
+
+CLICK_THROUGH_SQL = """
+SELECT
+    COALESCE(SUM("searches"), 0)::int AS "searches",
+    COALESCE(SUM("clicks"), 0)::int AS "clicks"
+FROM (
+    SELECT SUM("count") AS "searches", SUM("clickCount") AS "clicks"
+    FROM "search_daily_rollups"
+    WHERE "date" >= $1::date AND "date" < $2::date
+      AND ($4::text IS NULL OR "query" = $4::text)
+    UNION ALL
+    SELECT COUNT(*), COUNT("clickedResult")
+    FROM "search_logs"
+    WHERE "searchedAt" >= $3::timestamp
+      AND ($4::text IS NULL OR "query" = $4::text)
+) AS totals
+"""
+
+# Agrège [watermark, until) et avance le watermark dans la même instruction
+ROLLUP_SEARCHES_SQL = CLAIM_WATERMARK_CTE + """, agg AS (
+    SELECT
+        "searchedAt"::date AS "date",
+        "query",
+        COUNT(*)::int AS "count",
+        (COUNT(*) FILTER (WHERE "resultsCount" = 0))::int AS "zeroResultCount",
+        COUNT("clickedResult")::int AS "clickCount"
+    FROM "search_logs"
+    WHERE "searchedAt" >= $2::timestamp
+      AND "searchedAt" < $3::timestamp
+      AND EXISTS (SELECT 1 FROM claim)
+    GROUP BY 1, 2
+)
+INSERT INTO "search_daily_rollups" AS r
+    ("id", "date", "query", "count", "zeroResultCount", "clickCount", "updatedAt")
+SELECT
+    gen_random_uuid()::text, "date", "query", "count", "zeroResultCount", "clickCount",
+    CURRENT_TIMESTAMP
+FROM agg
+ON CONFLICT ("date", "query") DO UPDATE SET
+    "count" = r."count" + EXCLUDED."count",
+    "zeroResultCount" = r."zeroResultCount" + EXCLUDED."zeroResultCount",
+    "clickCount" = r."clickCount" + EXCLUDED."clickCount",
+    "updatedAt" = CURRENT_TIMESTAMP
+"""
+
+# Premier clic sur une recherche déjà agrégée : reporté sur le rollup dans
+# la même instruction que la mise à jour du log. Le verrou FOR UPDATE sur le
+# log sérialise les clics concurrents (un seul voit "firstClick") ; $3 est le
+# watermark lu FOR SHARE dans la même transaction (SHARE_WATERMARK_SQL).
+CLICK_SQL = """
+WITH previous AS (
+    SELECT "id", "searchedAt", "clickedResult" IS NULL AS "firstClick"
+    FROM "search_logs"
+    WHERE "id" = $1
+    FOR UPDATE
+), clicked AS (
+    UPDATE "search_logs" AS s
+    SET "clickedResult" = $2
+    FROM previous
+    WHERE s."id" = previous."id"
+      AND s."searchedAt" = previous."searchedAt"
+    RETURNING s.*, previous."firstClick"
+), late AS (
+    UPDATE "search_daily_rollups" AS r
+    SET "clickCount" = r."clickCount" + 1, "updatedAt" = CURRENT_TIMESTAMP
+    FROM clicked
+    WHERE clicked."firstClick"
+      AND r."date" = clicked."searchedAt"::date
+      AND r."query" = clicked."query"
+      AND clicked."searchedAt" < $3::timestamp
+)
+SELECT "id", "query", "userId", "ipAddress", "resultsCount", "clickedResult", "searchedAt"
+FROM clicked
+"""
 
 class SearchLogService:
     """Service pour gérer les logs de recherche"""
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def log_search(
         self,
@@ -44,6 +189,13 @@ class SearchLogService:
                 }
             )
             
+            if getattr(settings, 'TRENDING_SEARCH_ENABLED', True):
+                # Publication Redis asynchrone, au plus une fois par publish_interval
+                if trending_searches.record(log.query):
+                    await trending_searches.publish()
+            
+            await analytics_cache.invalidate('searches', debounce=True)
+            
             logger.info(f"Search logged: {query}")
             return log
             
@@ -62,10 +214,18 @@ class SearchLogService:
         try:
             await self.connect()
             
-            log = await self.db.searchlog.update(
-                where={'id': search_id},
-                data={'clickedResult': clicked_result}
-            )
+            # Le job d'agrégation verrouille son watermark (FOR UPDATE) :
+            # le clic attend la fin d'une agrégation en cours, puis lit le
+            # watermark et les rollups qu'elle a écrits.
+            async with self.db.tx() as tx:
+                watermark = await lock_watermark(tx, SEARCH_ROLLUP_JOB, share=True)
+                log = await tx.query_first(
+                    CLICK_SQL,
+                    search_id,
+                    clicked_result,
+                    watermark.isoformat() if watermark else None,
+                    model=SearchLog
+                )
             
             return log
             
@@ -86,25 +246,15 @@ class SearchLogService:
             
             start_date = datetime.now() - timedelta(days=days)
             
-            logs = await self.db.searchlog.find_many(
-                where={'searchedAt': {'gte': start_date}}
+            rows = await self.db.query_raw(
+                TOP_SEARCHES_SQL,
+                *await rollup_window(self.db, SEARCH_ROLLUP_JOB, start_date),
+                limit
             )
             
-            # Grouper par query
-            query_counts = defaultdict(int)
-            for log in logs:
-                query_counts[log.query] += 1
-            
-            # Trier et limiter
-            sorted_queries = sorted(
-                query_counts.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:limit]
-            
             return [
-                {'query': query, 'count': count}
-                for query, count in sorted_queries
+                {'query': row['query'], 'count': row['count']}
+                for row in rows
             ]
             
         except Exception as e:
@@ -124,28 +274,15 @@ class SearchLogService:
             
             start_date = datetime.now() - timedelta(days=days)
             
-            logs = await self.db.searchlog.find_many(
-                where={
-                    'resultsCount': 0,
-                    'searchedAt': {'gte': start_date}
-                }
+            rows = await self.db.query_raw(
+                TOP_ZERO_RESULT_SEARCHES_SQL,
+                *await rollup_window(self.db, SEARCH_ROLLUP_JOB, start_date),
+                limit
             )
             
-            # Grouper par query
-            query_counts = defaultdict(int)
-            for log in logs:
-                query_counts[log.query] += 1
-            
-            # Trier et limiter
-            sorted_queries = sorted(
-                query_counts.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:limit]
-            
             return [
-                {'query': query, 'count': count}
-                for query, count in sorted_queries
+                {'query': row['query'], 'count': row['count']}
+                for row in rows
             ]
             
         except Exception as e:
@@ -187,37 +324,32 @@ class SearchLogService:
             
             start_date = datetime.now() - timedelta(days=days)
             
-            logs = await self.db.searchlog.find_many(
-                where={'searchedAt': {'gte': start_date}},
-                order={'searchedAt': 'asc'}
+            rows = await self.db.query_raw(
+                SEARCH_TRENDS_SQL,
+                *await rollup_window(self.db, SEARCH_ROLLUP_JOB, start_date)
             )
             
-            # Grouper par jour et query
-            daily_queries = defaultdict(lambda: defaultdict(int))
-            for log in logs:
-                date_key = log.searchedAt.strftime('%Y-%m-%d')
-                daily_queries[date_key][log.query] += 1
+            # Grouper par jour (top 5 déjà calculé par la base)
+            daily_queries = {}
+            for row in rows:
+                day = daily_queries.setdefault(
+                    row['date'],
+                    {'total_searches': row['total'], 'top_queries': []}
+                )
+                day['top_queries'].append(
+                    {'query': row['query'], 'count': row['count']}
+                )
             
             # Formater les résultats
             result = []
             for i in range(days):
-                date = start_date + timedelta(days=i)
-                date_key = date.strftime('%Y-%m-%d')
-                
-                queries = daily_queries.get(date_key, {})
-                top_queries = sorted(
-                    queries.items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )[:5]
+                date_key = (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
+                day = daily_queries.get(date_key, {'total_searches': 0, 'top_queries': []})
                 
                 result.append({
                     'date': date_key,
-                    'total_searches': sum(queries.values()),
-                    'top_queries': [
-                        {'query': q, 'count': c}
-                        for q, c in top_queries
-                    ]
+                    'total_searches': day['total_searches'],
+                    'top_queries': day['top_queries']
                 })
             
             return result
@@ -239,17 +371,17 @@ class SearchLogService:
             
             start_date = datetime.now() - timedelta(days=days)
             
-            where_clause = {'searchedAt': {'gte': start_date}}
-            if query:
-                where_clause['query'] = query.lower().strip()
-            
-            total_searches = await self.db.searchlog.count(where=where_clause)
+            totals = await self.db.query_first(
+                CLICK_THROUGH_SQL,
+                *await rollup_window(self.db, SEARCH_ROLLUP_JOB, start_date),
+                query.lower().strip() if query else None
+            )
             
+            total_searches = totals['searches'] if totals else 0
             if total_searches == 0:
                 return 0.0
             
-            where_clause['clickedResult'] = {'not': None}
-            searches_with_clicks = await self.db.searchlog.count(where=where_clause)
+            searches_with_clicks = totals['clicks']
             
             ctr = (searches_with_clicks / total_searches) * 100
             return round(ctr, 2)
@@ -258,4 +390,44 @@ class SearchLogService:
             logger.error(f"Error calculating CTR: {str(e)}")
             raise
         finally:
-            await self.disconnect()
\ No newline at end of file
+            await self.disconnect()
+    
+    async def refresh_daily_rollup(
+        self,
+        lag_seconds: Optional[int] = None,
+        max_span_hours: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Agréger dans search_daily_rollups les logs arrivés depuis le dernier
+        watermark. Les `lag_seconds` dernières secondes sont laissées de côté
+        (transactions encore en cours) et une exécution couvre au plus
+        `max_span_hours` heures pour borner le rattrapage.
+        """
+        try:
+            await self.connect()
+            
+            lag_seconds = lag_seconds if lag_seconds is not None else getattr(
+                settings, 'SEARCH_ROLLUP_LAG_SECONDS', 60
+            )
+            max_span_hours = max_span_hours or getattr(
+                settings, 'SEARCH_ROLLUP_MAX_SPAN_HOURS', 24
+            )
+            
+            async def first_search():
+                first = await self.db.searchlog.find_first(order={'searchedAt': 'asc'})
+                return first.searchedAt if first else None
+            
+            return await advance_rollup(
+                self.db,
+                SEARCH_ROLLUP_JOB,
+                ROLLUP_SEARCHES_SQL,
+                first_search,
+                lag_seconds,
+                max_span_hours
+            )
+            
+        except Exception as e:
+            logger.error(f"Error refreshing search rollup: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
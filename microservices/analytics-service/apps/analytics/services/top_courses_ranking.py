@@ -0,0 +1,115 @@
+from typing import Optional, Dict, Any, List
+from datetime import date
+from django.conf import settings
+import json
+import logging
+
+import redis.asyncio as aioredis
+
+from .analytics_cache import analytics_cache
+from .course_analytics_service import CourseAnalyticsService, TOP_COURSE_METRICS
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TopCoursesRanking:
+    """
+    Classements précalculés des meilleurs cours.
+
+    Pour chaque fenêtre (7/30/90 jours) et chaque métrique, le job
+    refresh() publie dans Redis les `ranking_size` premiers cours. Chaque
+    passage recalcule les totaux des trois fenêtres en une requête sur
+    course_analytics (une ligne par cours et par jour) : les écritures
+    tardives sur des jours clos sont prises en compte au passage suivant.
+    Les lectures sont mises en cache par analytics_cache (namespace
+    `top_courses`), invalidé à chaque publication.
+    """
+
+    WINDOWS = (7, 30, 90)
+
+    def __init__(
+        self,
+        service: Optional[CourseAnalyticsService] = None,
+        redis_url: Optional[str] = None,
+        ranking_size: Optional[int] = None,
+        prefix: str = 'analytics:top_courses'
+    ):
+        self.service = service or CourseAnalyticsService()
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.ranking_size = ranking_size or getattr(settings, 'TOP_COURSES_RANKING_SIZE', 100)
+        self.prefix = prefix
+
+        self._client: Optional[aioredis.Redis] = None
+        self._stats = {'ranking_reads': 0, 'fallbacks': 0}
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self._client or get_async_redis(self.redis_url)
+
+    async def get(
+        self,
+        metric: str = 'views',
+        limit: int = 10,
+        days: int = 30
+    ) -> List[Dict[str, Any]]:
+        """Meilleurs cours : classement Redis, sinon SQL"""
+        if metric not in TOP_COURSE_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        courses = None
+        if days in self.WINDOWS and limit <= self.ranking_size:
+            courses = await self._read_ranking(metric, days, limit)
+
+        if courses is None:
+            self._stats['fallbacks'] += 1
+            courses = await self.service.get_top_courses(metric=metric, limit=limit, days=days)
+        else:
+            self._stats['ranking_reads'] += 1
+
+        return courses
+
+    async def refresh(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Recalculer et publier les classements de toutes les fenêtres"""
+        today = today or date.today()
+
+        window_totals = await self.service.get_window_totals(list(self.WINDOWS), today)
+
+        pipeline = self.client.pipeline(transaction=False)
+        for days in self.WINDOWS:
+            totals = window_totals[days]
+            for metric in TOP_COURSE_METRICS:
+                ranked = sorted(
+                    totals.items(),
+                    key=lambda x: (-x[1][metric], x[0])
+                )[:self.ranking_size]
+                ranking = [{'course_id': course_id, **stats} for course_id, stats in ranked]
+                # Expire si le job s'arrête : la lecture repasse alors par SQL
+                pipeline.set(self._ranking_key(metric, days), json.dumps(ranking), ex=3600)
+        await pipeline.execute()
+        await analytics_cache.invalidate('top_courses')
+
+        courses = {days: len(totals) for days, totals in window_totals.items()}
+        logger.info(f"Top courses rankings refreshed ({courses} courses per window)")
+        return {'date': today.isoformat(), 'courses': courses}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Lectures servies par le classement et replis SQL"""
+        return {
+            **self._stats,
+            'ranking_size': self.ranking_size,
+        }
+
+    async def _read_ranking(self, metric: str, days: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        try:
+            raw = await self.client.get(self._ranking_key(metric, days))
+        except Exception as e:
+            logger.warning(f"Error reading top courses ranking: {str(e)}")
+            return None
+        return json.loads(raw)[:limit] if raw else None
+
+    def _ranking_key(self, metric: str, days: int) -> str:
+        return f"{self.prefix}:{metric}:{days}"
+
+
+top_courses_ranking = TopCoursesRanking()
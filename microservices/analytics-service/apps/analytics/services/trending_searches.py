@@ -0,0 +1,303 @@
+from typing import Optional, Dict, Any, List, Tuple
+from django.conf import settings
+import atexit
+import heapq
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+import redis
+import redis.asyncio as aioredis
+
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+class SpaceSaving:
+    """
+    Résumé Space-Saving des requêtes les plus fréquentes.
+
+    Au plus `capacity` compteurs ; à saturation, la requête la moins comptée
+    est remplacée et son compteur hérité devient l'erreur maximale du nouvel
+    entrant. Les comptes sont donc des majorants (count - error <= réel <= count).
+    Deux résumés se fusionnent en additionnant les compteurs, un absent valant
+    le plus petit compteur de son résumé, puis en gardant les `capacity` plus forts.
+
+    Le plus petit compteur est trouvé par un tas (count, requête) à une entrée
+    par requête, mis à jour paresseusement : un compteur qui a augmenté depuis
+    son entrée est réinséré quand il remonte au sommet. Une éviction coûte
+    O(log capacity) amorti au lieu d'un parcours de tous les compteurs.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 500,
+        counts: Optional[Dict[str, int]] = None,
+        errors: Optional[Dict[str, int]] = None,
+        total: int = 0
+    ):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = counts or {}
+        self.errors: Dict[str, int] = errors or {}
+        self.total = total
+        self._heap: List[Tuple[int, str]] = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def offer(self, item: str, count: int = 1):
+        """Compter une occurrence de `item`"""
+        self.total += count
+
+        if item in self.counts:
+            self.counts[item] += count
+            return
+
+        if len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (count, item))
+            return
+
+        floor, victim = self._min_entry()
+        del self.counts[victim]
+        self.errors.pop(victim, None)
+        self.counts[item] = floor + count
+        self.errors[item] = floor
+        heapq.heapreplace(self._heap, (floor + count, item))
+
+    def min_count(self) -> int:
+        """Compteur minimal (0 tant que le résumé n'est pas plein)"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return self._min_entry()[0]
+
+    def _min_entry(self) -> Tuple[int, str]:
+        """Sommet du tas, après réinsertion des entrées périmées"""
+        while True:
+            count, item = self._heap[0]
+            current = self.counts[item]
+            if current == count:
+                return count, item
+            heapq.heapreplace(self._heap, (current, item))
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Fusionner deux résumés (autre worker ou autre tranche de temps)"""
+        capacity = max(self.capacity, other.capacity)
+        self_floor, other_floor = self.min_count(), other.min_count()
+
+        counts, errors = {}, {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, self_floor) + other.counts.get(item, other_floor)
+            errors[item] = self.errors.get(item, self_floor) + other.errors.get(item, other_floor)
+
+        if len(counts) > capacity:
+            kept = sorted(counts, key=lambda item: (-counts[item], item))[:capacity]
+            counts = {item: counts[item] for item in kept}
+            errors = {item: errors[item] for item in kept}
+
+        return SpaceSaving(capacity, counts, errors, self.total + other.total)
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """Les `k` requêtes les plus comptées"""
+        ranked = sorted(self.counts.items(), key=lambda x: (-x[1], x[0]))[:k]
+        return [
+            {'query': item, 'count': count, 'error': self.errors.get(item, 0)}
+            for item, count in ranked
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'capacity': self.capacity,
+            'counts': self.counts,
+            'errors': self.errors,
+            'total': self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SpaceSaving':
+        return cls(
+            data.get('capacity', 500),
+            data.get('counts', {}),
+            data.get('errors', {}),
+            data.get('total', 0)
+        )
+
+
+class TrendingSearchTracker:
+    """
+    Recherches tendance en temps réel.
+
+    Chaque worker alimente en mémoire un résumé Space-Saving par minute et
+    par heure. Les résumés modifiés sont publiés dans Redis toutes les
+    `publish_interval` secondes (un champ par worker dans le hash de la
+    tranche) ; la lecture fusionne les tranches de la fenêtre et met le
+    résultat en cache local quelques secondes. Publication et lecture passent
+    par redis.asyncio ; seule la dernière publication (atexit) est synchrone.
+    """
+
+    # fenêtre -> (granularité, durée d'une tranche en secondes, nombre de tranches)
+    WINDOWS: Dict[str, Tuple[str, int, int]] = {
+        '5m': ('m', 60, 5),
+        '1h': ('m', 60, 60),
+        '1d': ('h', 3600, 24),
+    }
+    BUCKETS: Dict[str, Tuple[int, int]] = {
+        # granularité -> (durée d'une tranche, TTL Redis)
+        'm': (60, 2 * 3600),
+        'h': (3600, 26 * 3600),
+    }
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        capacity: Optional[int] = None,
+        publish_interval: Optional[float] = None,
+        cache_seconds: Optional[float] = None,
+        prefix: str = 'analytics:trending_searches'
+    ):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.capacity = capacity or getattr(settings, 'TRENDING_SEARCH_CAPACITY', 500)
+        self.publish_interval = publish_interval or getattr(
+            settings, 'TRENDING_SEARCH_PUBLISH_INTERVAL', 10.0
+        )
+        self.cache_seconds = cache_seconds if cache_seconds is not None else getattr(
+            settings, 'TRENDING_SEARCH_CACHE_SECONDS', 2.0
+        )
+        self.prefix = prefix
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._client: Optional[aioredis.Redis] = None
+        self._sketches: Dict[Tuple[str, int], SpaceSaving] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self._last_publish = time.monotonic()
+        # fenêtre -> (expiration, total, top `capacity` fusionné)
+        self._cache: Dict[str, Tuple[float, int, List[Dict[str, Any]]]] = {}
+
+        atexit.register(self._publish_at_exit)
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self._client or get_async_redis(self.redis_url)
+
+    def record(self, query: str, now: Optional[float] = None) -> bool:
+        """Compter une recherche ; retourne True si une publication est due"""
+        now = now or time.time()
+
+        with self._lock:
+            for granularity, (size, _) in self.BUCKETS.items():
+                key = (granularity, int(now // size))
+                sketch = self._sketches.get(key)
+                if sketch is None:
+                    sketch = SpaceSaving(self.capacity)
+                    self._sketches[key] = sketch
+                sketch.offer(query)
+                self._dirty.add(key)
+
+        return time.monotonic() - self._last_publish >= self.publish_interval
+
+    async def publish(self, now: Optional[float] = None):
+        """Écrire dans Redis les résumés modifiés depuis la dernière publication"""
+        payload = self._take_dirty(now or time.time())
+        if not payload:
+            return
+
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            self._queue_payload(pipeline, payload)
+            await pipeline.execute()
+        except Exception as e:
+            self._restore_dirty(payload)
+            logger.error(f"Error publishing trending searches: {str(e)}")
+
+    def _publish_at_exit(self):
+        """Dernière publication à l'arrêt du worker (plus de boucle : client synchrone)"""
+        payload = self._take_dirty(time.time())
+        if not payload:
+            return
+
+        try:
+            pipeline = redis.Redis.from_url(self.redis_url).pipeline(transaction=False)
+            self._queue_payload(pipeline, payload)
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"Error publishing trending searches: {str(e)}")
+
+    def _take_dirty(self, now: float) -> Dict[Tuple[str, int], str]:
+        """Résumés à publier (sérialisés) ; oublie les tranches closes déjà publiées"""
+        with self._lock:
+            self._last_publish = time.monotonic()
+            dirty, self._dirty = self._dirty, set()
+            payload = {key: json.dumps(self._sketches[key].to_dict()) for key in dirty}
+
+            # Seules les tranches courantes peuvent encore évoluer
+            for key in list(self._sketches):
+                granularity, bucket = key
+                if bucket < int(now // self.BUCKETS[granularity][0]) and key not in dirty:
+                    del self._sketches[key]
+
+        return payload
+
+    def _restore_dirty(self, payload: Dict[Tuple[str, int], str]):
+        with self._lock:
+            self._dirty |= set(payload)
+
+    def _queue_payload(self, pipeline, payload: Dict[Tuple[str, int], str]):
+        for (granularity, bucket), data in payload.items():
+            redis_key = self._bucket_key(granularity, bucket)
+            pipeline.hset(redis_key, self.worker_id, data)
+            pipeline.expire(redis_key, self.BUCKETS[granularity][1])
+
+    async def top(
+        self,
+        window: str = '1h',
+        limit: int = 10,
+        now: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Top `limit` des recherches sur la fenêtre (5m, 1h ou 1d), tous workers confondus"""
+        if window not in self.WINDOWS:
+            raise ValueError(f"Unknown window: {window}")
+
+        # Au-delà de la capacité des résumés, le classement n'a plus de sens
+        limit = max(1, min(limit, self.capacity))
+
+        cached = self._cache.get(window)
+        if cached is None or cached[0] <= time.monotonic():
+            cached = await self._merge_window(window, now or time.time())
+            self._cache[window] = cached
+
+        return {
+            'window': window,
+            'total_searches': cached[1],
+            'searches': cached[2][:limit],
+        }
+
+    async def _merge_window(
+        self,
+        window: str,
+        now: float
+    ) -> Tuple[float, int, List[Dict[str, Any]]]:
+        """Fusionner les résumés de tous les workers sur la fenêtre (une entrée de cache)"""
+        granularity, size, count = self.WINDOWS[window]
+        current = int(now // size)
+        buckets = range(current - count + 1, current + 1)
+
+        pipeline = self.client.pipeline(transaction=False)
+        for bucket in buckets:
+            pipeline.hgetall(self._bucket_key(granularity, bucket))
+
+        merged = SpaceSaving(self.capacity)
+        for worker_sketches in await pipeline.execute():
+            for raw in worker_sketches.values():
+                merged = merged.merge(SpaceSaving.from_dict(json.loads(raw)))
+
+        return time.monotonic() + self.cache_seconds, merged.total, merged.top(self.capacity)
+
+    def _bucket_key(self, granularity: str, bucket: int) -> str:
+        return f"{self.prefix}:{granularity}:{bucket}"
+
+
+trending_searches = TrendingSearchTracker()
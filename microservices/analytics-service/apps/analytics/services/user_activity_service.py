@@ -1,26 +1,113 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
-from prisma import Prisma
+from django.conf import settings
+from shared.shared.utils.prisma_client import get_prisma_client
 import logging
-from collections import defaultdict
 import json
 
+from .active_users import active_user_bitmaps
+from .rollups import CLAIM_WATERMARK_CTE, advance_rollup, rollup_window
+
 logger = logging.getLogger(__name__)
 
+# Nom du job d'agrégation dans rollup_watermarks
+USER_ACTIVITY_ROLLUP_JOB = 'user_activity_daily'
+
+# Jours clos lus dans user_activity_daily (index couvrants), journée en
+# cours lue dans user_activity ; $1/$2/$3 viennent de rollup_window()
+DAILY_ACTIVITY_SQL = """
+SELECT to_char("day", 'YYYY-MM-DD') AS "date", SUM("count")::int AS "count"
+FROM (
+    SELECT "date" AS "day", "count"
+    FROM "user_activity_daily"
+    WHERE "userId" = $4 AND "date" >= $1::date AND "date" < $2::date
+    UNION ALL
+    SELECT "createdAt"::date, COUNT(*)::int
+    FROM "user_activity"
+    WHERE "userId" = $4 AND "createdAt" >= $3::timestamp
+    GROUP BY 1
+) AS activity
+GROUP BY "day"
+ORDER BY "day"
+"""
+
+ACTIVITY_BY_TYPE_SQL = """
+SELECT "eventType" AS "event_type", SUM("count")::int AS "count"
+FROM (
+    SELECT "eventType", "count"
+    FROM "user_activity_daily"
+    WHERE "userId" = $4 AND "date" >= $1::date AND "date" < $2::date
+    UNION ALL
+    SELECT "eventType", COUNT(*)::int
+    FROM "user_activity"
+    WHERE "userId" = $4 AND "createdAt" >= $3::timestamp
+    GROUP BY "eventType"
+) AS activity
+GROUP BY "eventType"
+ORDER BY "count" DESC, "eventType" ASC
+"""
+
+MOST_ACTIVE_USERS_SQL = """
+SELECT "userId" AS "user_id", SUM("count")::int AS "activity_count"
+FROM (
+    SELECT "userId", "count"
+    FROM "user_activity_daily"
+    WHERE "date" >= $1::date AND "date" < $2::date
+    UNION ALL
+    SELECT "userId", COUNT(*)::int
+    FROM "user_activity"
+    WHERE "createdAt" >= $3::timestamp
+    GROUP BY "userId"
+) AS activity
+GROUP BY "userId"
+ORDER BY "activity_count" DESC, "userId" ASC
+LIMIT $4
+"""
+
+# Agrège [watermark, until) et avance le watermark dans la même instruction
+ROLLUP_USER_ACTIVITY_SQL = CLAIM_WATERMARK_CTE + """, agg AS (
+    SELECT
+        "userId",
+        "eventType",
+        "createdAt"::date AS "date",
+        COUNT(*)::int AS "count"
+    FROM "user_activity"
+    WHERE "createdAt" >= $2::timestamp
+      AND "createdAt" < $3::timestamp
+      AND EXISTS (SELECT 1 FROM claim)
+    GROUP BY 1, 2, 3
+)
+INSERT INTO "user_activity_daily" AS r
+    ("id", "userId", "eventType", "date", "count", "updatedAt")
+SELECT gen_random_uuid()::text, "userId", "eventType", "date", "count", CURRENT_TIMESTAMP
+FROM agg
+ON CONFLICT ("userId", "eventType", "date") DO UPDATE SET
+    "count" = r."count" + EXCLUDED."count",
+    "updatedAt" = CURRENT_TIMESTAMP
+"""
+
+
+# Utilisateurs actifs d'une journée (reconstruction des bitmaps)
+ACTIVE_USERS_OF_DAY_SQL = """
+SELECT DISTINCT "userId"
+FROM "user_activity"
+WHERE "createdAt" >= $1::timestamp AND "createdAt" < $2::timestamp
+"""
+
 
 class UserActivityService:
     """Service pour gérer l'activité des utilisateurs"""
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def track_activity(
         self,
@@ -41,6 +128,8 @@ class UserActivityService:
                 }
             )
             
+            await self._mark_active(user_id, activity.createdAt.date())
+            
             logger.info(f"User activity tracked: {user_id} - {event_type}")
             return activity
             
@@ -128,19 +217,12 @@ class UserActivityService:
             
             start_date = datetime.now() - timedelta(days=days)
             
-            activities = await self.db.useractivity.find_many(
-                where={
-                    'userId': user_id,
-                    'createdAt': {'gte': start_date}
-                },
-                order={'createdAt': 'asc'}
+            rows = await self.db.query_raw(
+                DAILY_ACTIVITY_SQL,
+                *await self._window(start_date),
+                user_id
             )
-            
-            # Grouper par jour
-            daily_counts = defaultdict(int)
-            for activity in activities:
-                date_key = activity.createdAt.strftime('%Y-%m-%d')
-                daily_counts[date_key] += 1
+            daily_counts = {row['date']: row['count'] for row in rows}
             
             # Créer une liste pour tous les jours
             result = []
@@ -171,27 +253,12 @@ class UserActivityService:
             
             start_date = datetime.now() - timedelta(days=days)
             
-            activities = await self.db.useractivity.find_many(
-                where={
-                    'userId': user_id,
-                    'createdAt': {'gte': start_date}
-                }
+            return await self.db.query_raw(
+                ACTIVITY_BY_TYPE_SQL,
+                *await self._window(start_date),
+                user_id
             )
             
-            # Grouper par type
-            type_counts = defaultdict(int)
-            for activity in activities:
-                type_counts[activity.eventType] += 1
-            
-            return [
-                {'event_type': event_type, 'count': count}
-                for event_type, count in sorted(
-                    type_counts.items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )
-            ]
-            
         except Exception as e:
             logger.error(f"Error getting activity by type: {str(e)}")
             raise
@@ -209,29 +276,115 @@ class UserActivityService:
             
             start_date = datetime.now() - timedelta(days=days)
             
-            activities = await self.db.useractivity.find_many(
-                where={'createdAt': {'gte': start_date}}
+            return await self.db.query_raw(
+                MOST_ACTIVE_USERS_SQL,
+                *await self._window(start_date),
+                limit
             )
             
-            # Grouper par utilisateur
-            user_counts = defaultdict(int)
-            for activity in activities:
-                user_counts[activity.userId] += 1
+        except Exception as e:
+            logger.error(f"Error getting most active users: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
+    
+    async def refresh_daily_rollup(
+        self,
+        lag_seconds: Optional[int] = None,
+        max_span_hours: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Agréger dans user_activity_daily les activités arrivées depuis le dernier watermark"""
+        try:
+            await self.connect()
             
-            # Trier et limiter
-            sorted_users = sorted(
-                user_counts.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:limit]
+            lag_seconds = lag_seconds if lag_seconds is not None else getattr(
+                settings, 'USER_ACTIVITY_ROLLUP_LAG_SECONDS', 60
+            )
+            max_span_hours = max_span_hours or getattr(
+                settings, 'USER_ACTIVITY_ROLLUP_MAX_SPAN_HOURS', 24
+            )
             
-            return [
-                {'user_id': user_id, 'activity_count': count}
-                for user_id, count in sorted_users
-            ]
+            async def first_activity():
+                first = await self.db.useractivity.find_first(order={'createdAt': 'asc'})
+                return first.createdAt if first else None
+            
+            return await advance_rollup(
+                self.db,
+                USER_ACTIVITY_ROLLUP_JOB,
+                ROLLUP_USER_ACTIVITY_SQL,
+                first_activity,
+                lag_seconds,
+                max_span_hours
+            )
             
         except Exception as e:
-            logger.error(f"Error getting most active users: {str(e)}")
+            logger.error(f"Error refreshing user activity rollup: {str(e)}")
             raise
         finally:
-            await self.disconnect()
\ No newline at end of file
+            await self.disconnect()
+    
+    async def backfill_active_users(self, days: int = 400) -> int:
+        """
+        Reconstruire les bitmaps d'utilisateurs actifs depuis user_activity,
+        du jour le plus ancien au plus récent (ordre des identifiants denses).
+
+        Au premier passage (suivi en direct encore inactif), les bitmaps de la
+        période sont vidés puis reconstruits jusqu'à la veille ; le marqueur
+        qui active le suivi en direct est ensuite posé et le jour courant
+        rejoué : aucune activité n'est perdue entre les deux. Relancé une fois
+        le suivi actif, le backfill ne fait que compléter (SETBIT idempotent).
+        """
+        try:
+            await self.connect()
+            
+            today = datetime.now().date()
+            total = 0
+            
+            rebuild = not await active_user_bitmaps.is_ready()
+            if rebuild:
+                await active_user_bitmaps.clear_days(today - timedelta(days=days), today)
+            
+            for i in range(days, -1, -1):
+                day = today - timedelta(days=i)
+                if day == today and rebuild:
+                    await active_user_bitmaps.mark_ready()
+                start = datetime.combine(day, datetime.min.time())
+                rows = await self.db.query_raw(
+                    ACTIVE_USERS_OF_DAY_SQL,
+                    start.isoformat(),
+                    (start + timedelta(days=1)).isoformat()
+                )
+                total += await active_user_bitmaps.add_many((row['userId'], day) for row in rows)
+            
+            logger.info(f"Active user bitmaps backfilled: {total} user-days")
+            return total
+            
+        except Exception as e:
+            logger.error(f"Error backfilling active user bitmaps: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
+    
+    async def _mark_active(self, user_id: str, day):
+        """
+        Bitmap du jour ; une erreur Redis ne fait pas échouer l'enregistrement.
+        Ignoré tant que backfill_active_users n'a pas tourné (un utilisateur
+        ancien serait sinon compté comme nouveau)
+        """
+        if not getattr(settings, 'ACTIVE_USER_BITMAP_ENABLED', True):
+            return
+        
+        try:
+            if await active_user_bitmaps.is_ready():
+                await active_user_bitmaps.add(user_id, day)
+        except Exception as e:
+            logger.warning(f"Error updating active user bitmaps: {str(e)}")
+    
+    async def _window(self, start_date: datetime):
+        """Fenêtre rollup/brut ; tout en brut si le rollup est désactivé"""
+        return await rollup_window(
+            self.db,
+            USER_ACTIVITY_ROLLUP_JOB,
+            start_date,
+            use_rollup=getattr(settings, 'USER_ACTIVITY_ROLLUP_ENABLED', True)
+        )
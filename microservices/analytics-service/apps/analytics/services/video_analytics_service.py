@@ -1,24 +1,274 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from prisma import Prisma
+from django.conf import settings
+from prisma.models import VideoAnalytics
+from shared.shared.utils.prisma_client import get_prisma_client
+import json
 import logging
 
+from .analytics_cache import analytics_cache
+from .engagement_sketch import EngagementSketch, GAMMA, COMPLETION_BUCKETS
+from .rollups import CLAIM_WATERMARK_CTE, advance_rollup
+from .watch_coverage import segment_bitmap, merge_bitmaps, coverage_counts, drop_off_curve
+
 logger = logging.getLogger(__name__)
 
 
+# Applique un lot de deltas (au plus un par couple lessonId/studentId) en une
+# seule requête : compteurs additionnés, completionRate au maximum, dernière
+# position et qualité conservées seulement si elles sont fournies, bitmap des
+# secondes regardées (hexadécimal) fusionné par OU (bytea_or)
+UPSERT_VIDEO_DELTAS_SQL = """
+WITH deltas AS (
+    SELECT * FROM jsonb_to_recordset($1::jsonb) AS d(
+        "lessonId" text,
+        "studentId" text,
+        "totalWatchTime" int,
+        "completionRate" double precision,
+        "pauseCount" int,
+        "rewindCount" int,
+        "speedChanges" int,
+        "avgQuality" text,
+        "lastPosition" int,
+        "watchedSeconds" text
+    )
+)
+INSERT INTO "video_analytics" AS va
+    ("id", "lessonId", "studentId", "totalWatchTime", "completionRate",
+     "pauseCount", "rewindCount", "speedChanges", "avgQuality", "lastPosition",
+     "watchedSeconds", "updatedAt")
+SELECT
+    gen_random_uuid()::text, d."lessonId", d."studentId",
+    COALESCE(d."totalWatchTime", 0), COALESCE(d."completionRate", 0),
+    COALESCE(d."pauseCount", 0), COALESCE(d."rewindCount", 0),
+    COALESCE(d."speedChanges", 0), d."avgQuality", COALESCE(d."lastPosition", 0),
+    decode(d."watchedSeconds", 'hex'), CURRENT_TIMESTAMP
+FROM deltas d
+ON CONFLICT ("lessonId", "studentId") DO UPDATE SET
+    "totalWatchTime" = va."totalWatchTime" + EXCLUDED."totalWatchTime",
+    "completionRate" = GREATEST(va."completionRate", EXCLUDED."completionRate"),
+    "pauseCount" = va."pauseCount" + EXCLUDED."pauseCount",
+    "rewindCount" = va."rewindCount" + EXCLUDED."rewindCount",
+    "speedChanges" = va."speedChanges" + EXCLUDED."speedChanges",
+    "avgQuality" = COALESCE(EXCLUDED."avgQuality", va."avgQuality"),
+    "lastPosition" = COALESCE(
+        (SELECT d."lastPosition" FROM deltas d
+         WHERE d."lessonId" = va."lessonId" AND d."studentId" = va."studentId"),
+        va."lastPosition"
+    ),
+    "watchedSeconds" = bytea_or(va."watchedSeconds", EXCLUDED."watchedSeconds"),
+    "updatedAt" = CURRENT_TIMESTAMP
+RETURNING *
+"""
+
+
+ENGAGEMENT_SKETCH_JOB = 'lesson_engagement_sketch'
+
+# Résumé d'engagement (voir EngagementSketch) des leçons sélectionnées par
+# {lessons}, écrit dans lesson_engagement_sketches. Les buckets de temps de
+# visionnage sont ceux de watch_time_bucket(), les tranches de complétion
+# ceux de completion_bucket(). Les lignes étant modifiées sur place, une
+# leçon est toujours recalculée entière à partir de video_analytics.
+STORE_ENGAGEMENT_SKETCHES_SQL = """
+lesson_rows AS (
+    SELECT
+        va.*,
+        CASE WHEN va."totalWatchTime" > 0
+             THEN CEIL(LN(va."totalWatchTime") / LN({gamma}::double precision))::int
+        END AS "bucket",
+        LEAST(FLOOR(va."completionRate" / {step})::int, {last_bucket}) AS "decile"
+    FROM "video_analytics" va
+    {lessons}
+), watch AS (
+    SELECT "lessonId", jsonb_object_agg("bucket", "students") AS "buckets"
+    FROM (
+        SELECT "lessonId", "bucket", COUNT(*)::int AS "students"
+        FROM lesson_rows WHERE "bucket" IS NOT NULL
+        GROUP BY "lessonId", "bucket"
+    ) b
+    GROUP BY "lessonId"
+), completion AS (
+    SELECT "lessonId", jsonb_object_agg("decile", "students") AS "histogram"
+    FROM (
+        SELECT "lessonId", "decile", COUNT(*)::int AS "students"
+        FROM lesson_rows
+        GROUP BY "lessonId", "decile"
+    ) d
+    GROUP BY "lessonId"
+), totals AS (
+    SELECT
+        "lessonId",
+        COUNT(*)::int AS "students",
+        (COUNT(*) FILTER (WHERE "bucket" IS NULL))::int AS "zeroWatchTime",
+        SUM("totalWatchTime")::bigint AS "watchTimeSum",
+        SUM("completionRate") AS "completionSum",
+        SUM("pauseCount")::bigint AS "pauseSum",
+        SUM("rewindCount")::bigint AS "rewindSum",
+        SUM("speedChanges")::bigint AS "speedChangeSum"
+    FROM lesson_rows
+    GROUP BY "lessonId"
+)
+INSERT INTO "lesson_engagement_sketches" AS s
+    ("lessonId", "students", "zeroWatchTime", "watchTimeSum", "completionSum",
+     "pauseSum", "rewindSum", "speedChangeSum", "watchTimeBuckets",
+     "completionHistogram", "updatedAt")
+SELECT
+    t."lessonId", t."students", t."zeroWatchTime", t."watchTimeSum", t."completionSum",
+    t."pauseSum", t."rewindSum", t."speedChangeSum", COALESCE(w."buckets", '{{}}'::jsonb),
+    c."histogram", CURRENT_TIMESTAMP
+FROM totals t
+JOIN completion c USING ("lessonId")
+LEFT JOIN watch w USING ("lessonId")
+ON CONFLICT ("lessonId") DO UPDATE SET
+    "students" = EXCLUDED."students",
+    "zeroWatchTime" = EXCLUDED."zeroWatchTime",
+    "watchTimeSum" = EXCLUDED."watchTimeSum",
+    "completionSum" = EXCLUDED."completionSum",
+    "pauseSum" = EXCLUDED."pauseSum",
+    "rewindSum" = EXCLUDED."rewindSum",
+    "speedChangeSum" = EXCLUDED."speedChangeSum",
+    "watchTimeBuckets" = EXCLUDED."watchTimeBuckets",
+    "completionHistogram" = EXCLUDED."completionHistogram",
+    "updatedAt" = CURRENT_TIMESTAMP
+"""
+
+
+def engagement_sketches_sql(lessons: str) -> str:
+    return STORE_ENGAGEMENT_SKETCHES_SQL.format(
+        gamma=repr(GAMMA),
+        step=100 // COMPLETION_BUCKETS,
+        last_bucket=COMPLETION_BUCKETS - 1,
+        lessons=lessons
+    )
+
+
+# Résumé d'une leçon calculé à la demande (absent de la table)
+STORE_LESSON_SKETCH_SQL = 'WITH ' + engagement_sketches_sql(
+    'WHERE va."lessonId" = $1'
+) + 'RETURNING s.*'
+
+# Recalcul des résumés d'une liste de leçons ($1 = liste JSON), après une
+# purge de video_analytics ; les leçons sans ligne restante sont supprimées
+# par DELETE_EMPTY_LESSON_SKETCHES_SQL
+RECOMPUTE_LESSON_SKETCHES_SQL = 'WITH ' + engagement_sketches_sql(
+    'WHERE va."lessonId" IN (SELECT jsonb_array_elements_text($1::jsonb))'
+)
+
+DELETE_EMPTY_LESSON_SKETCHES_SQL = """
+DELETE FROM "lesson_engagement_sketches" AS s
+WHERE s."lessonId" IN (SELECT jsonb_array_elements_text($1::jsonb))
+  AND NOT EXISTS (
+      SELECT 1 FROM "video_analytics" va WHERE va."lessonId" = s."lessonId"
+  )
+"""
+
+# Passe incrémentale ($1 job, $2/$3 fenêtre de updatedAt) : seules les
+# leçons modifiées dans la fenêtre sont recalculées
+REFRESH_ENGAGEMENT_SKETCHES_SQL = CLAIM_WATERMARK_CTE + """, changed AS (
+    SELECT DISTINCT "lessonId" FROM "video_analytics"
+    WHERE "updatedAt" >= $2::timestamp AND "updatedAt" < $3::timestamp
+      AND EXISTS (SELECT 1 FROM claim)
+),""" + engagement_sketches_sql('JOIN changed USING ("lessonId")')
+
+# Bitmaps d'une leçon page par page (index unique lessonId, studentId)
+WATCH_BITMAPS_PAGE_SQL = """
+SELECT "studentId", encode("watchedSeconds", 'hex') AS "bitmap"
+FROM "video_analytics"
+WHERE "lessonId" = $1 AND "studentId" > $2 AND "watchedSeconds" IS NOT NULL
+ORDER BY "studentId"
+LIMIT $3
+"""
+
+AVG_COMPLETION_RATE_SQL = """
+SELECT COALESCE(AVG("completionRate"), 0) AS "avg"
+FROM "video_analytics"
+WHERE "lessonId" = $1
+"""
+
+
+COUNTER_FIELDS = ('totalWatchTime', 'pauseCount', 'rewindCount', 'speedChanges')
+
+
+def merge_video_delta(target: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fusionner un delta dans un autre : compteurs additionnés, completionRate
+    au maximum, lastPosition et avgQuality remplacées par la valeur la plus
+    récente, bitmaps des secondes regardées fusionnés par OU
+    """
+    for field in COUNTER_FIELDS:
+        if delta.get(field):
+            target[field] = target.get(field, 0) + delta[field]
+    
+    if delta.get('completionRate') is not None:
+        target['completionRate'] = max(
+            target.get('completionRate') or 0.0,
+            delta['completionRate']
+        )
+    
+    for field in ('lastPosition', 'avgQuality'):
+        if delta.get(field) is not None:
+            target[field] = delta[field]
+    
+    if delta.get('watchedSeconds'):
+        target['watchedSeconds'] = merge_bitmaps(target.get('watchedSeconds'), delta['watchedSeconds'])
+    
+    return target
+
+
+def watch_time_delta(watch_time: int, position: int) -> Dict[str, Any]:
+    """
+    Delta d'un rapport de visionnage : `watch_time` secondes regardées
+    jusqu'à `position`, soit le segment [position - watch_time, position)
+    """
+    delta = {'totalWatchTime': watch_time, 'lastPosition': position}
+    bitmap = segment_bitmap(position - watch_time, position)
+    if bitmap:
+        delta['watchedSeconds'] = bitmap
+    return delta
+
+
+def serialize_deltas(deltas: List[Dict[str, Any]]) -> str:
+    """Deltas en JSON pour jsonb_to_recordset (bitmaps en hexadécimal)"""
+    return json.dumps([
+        {**delta, 'watchedSeconds': delta['watchedSeconds'].hex()}
+        if delta.get('watchedSeconds') else delta
+        for delta in deltas
+    ])
+
+
+def event_to_delta(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Convertir un événement du lecteur vidéo en delta VideoAnalytics"""
+    event_type = event['event_type']
+    
+    if event_type == 'pause':
+        return {'pauseCount': 1}
+    if event_type == 'rewind':
+        return {'rewindCount': 1}
+    if event_type == 'speed_change':
+        return {'speedChanges': 1}
+    if event_type == 'quality':
+        return {'avgQuality': event['quality']}
+    if event_type == 'watch_time':
+        return watch_time_delta(event['watch_time'], event['position'])
+    if event_type == 'completion':
+        return {'completionRate': event['completion_rate']}
+    
+    raise ValueError(f"Unknown video event type: {event_type}")
+
+
 class VideoAnalyticsService:
     """Service pour gérer les analytics vidéo"""
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def create_or_get_analytics(
         self,
@@ -64,87 +314,118 @@ class VideoAnalyticsService:
         finally:
             await self.disconnect()
     
-    async def update_watch_time(
+    async def apply_delta(
         self,
         lesson_id: str,
         student_id: str,
-        watch_time: int,
-        position: int
+        **delta: Any
     ):
-        """Mettre à jour le temps de visionnage"""
+        """Appliquer atomiquement un delta à une ligne et la retourner"""
         try:
             await self.connect()
             
-            analytics = await self.create_or_get_analytics(lesson_id, student_id)
-            
-            updated = await self.db.videoanalytics.update(
-                where={'id': analytics.id},
-                data={
-                    'totalWatchTime': analytics.totalWatchTime + watch_time,
-                    'lastPosition': position
-                }
+            analytics = await self.db.query_first(
+                UPSERT_VIDEO_DELTAS_SQL,
+                serialize_deltas([{'lessonId': lesson_id, 'studentId': student_id, **delta}]),
+                model=VideoAnalytics
             )
             
-            logger.info(f"Watch time updated: {lesson_id} - {student_id}")
-            return updated
+            await analytics_cache.invalidate(f'lesson:{lesson_id}', debounce=True)
+            return analytics
             
         except Exception as e:
-            logger.error(f"Error updating watch time: {str(e)}")
+            logger.error(f"Error applying video analytics delta: {str(e)}")
             raise
         finally:
             await self.disconnect()
     
-    async def update_completion_rate(
+    async def apply_deltas(
         self,
-        lesson_id: str,
-        student_id: str,
-        completion_rate: float
-    ):
-        """Mettre à jour le taux de complétion"""
+        deltas: List[Dict[str, Any]]
+    ) -> int:
+        """Appliquer un lot de deltas (un seul par couple leçon/étudiant) en une requête"""
+        if not deltas:
+            return 0
+        
         try:
             await self.connect()
             
-            analytics = await self.create_or_get_analytics(lesson_id, student_id)
-            
-            # Prendre le maximum entre l'ancien et le nouveau taux
-            new_rate = max(analytics.completionRate, completion_rate)
+            count = await self.db.execute_raw(
+                UPSERT_VIDEO_DELTAS_SQL,
+                serialize_deltas(deltas)
+            )
             
-            updated = await self.db.videoanalytics.update(
-                where={'id': analytics.id},
-                data={'completionRate': new_rate}
+            await analytics_cache.invalidate(
+                *{f"lesson:{delta['lessonId']}" for delta in deltas},
+                debounce=True
             )
             
-            return updated
+            logger.info(f"Video analytics deltas applied: {count}")
+            return count
             
         except Exception as e:
-            logger.error(f"Error updating completion rate: {str(e)}")
+            logger.error(f"Error applying video analytics deltas: {str(e)}")
             raise
         finally:
             await self.disconnect()
     
+    async def apply_events(
+        self,
+        events: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """Grouper des événements par (leçon, étudiant) et les appliquer en une requête"""
+        grouped: Dict[tuple, Dict[str, Any]] = {}
+        
+        for event in events:
+            lesson_id = str(event['lesson_id'])
+            student_id = str(event['student_id'])
+            entry = grouped.setdefault(
+                (lesson_id, student_id),
+                {'lessonId': lesson_id, 'studentId': student_id}
+            )
+            merge_video_delta(entry, event_to_delta(event))
+        
+        rows = await self.apply_deltas(list(grouped.values()))
+        
+        return {'events': len(events), 'groups': len(grouped), 'rows': rows}
+    
+    async def update_watch_time(
+        self,
+        lesson_id: str,
+        student_id: str,
+        watch_time: int,
+        position: int
+    ):
+        """Mettre à jour le temps de visionnage"""
+        updated = await self.apply_delta(
+            lesson_id,
+            student_id,
+            **watch_time_delta(watch_time, position)
+        )
+        
+        logger.info(f"Watch time updated: {lesson_id} - {student_id}")
+        return updated
+    
+    async def update_completion_rate(
+        self,
+        lesson_id: str,
+        student_id: str,
+        completion_rate: float
+    ):
+        """Mettre à jour le taux de complétion (le maximum est conservé)"""
+        return await self.apply_delta(
+            lesson_id,
+            student_id,
+            completionRate=completion_rate
+        )
+    
     async def increment_pause_count(
         self,
         lesson_id: str,
         student_id: str
     ):
         """Incrémenter le compteur de pauses"""
-        try:
-            await self.connect()
-            
-            analytics = await self.create_or_get_analytics(lesson_id, student_id)
-            
-            updated = await self.db.videoanalytics.update(
-                where={'id': analytics.id},
-                data={'pauseCount': analytics.pauseCount + 1}
-            )
-            
-            return updated
-            
-        except Exception as e:
-            logger.error(f"Error incrementing pause count: {str(e)}")
-            raise
-        finally:
-            await self.disconnect()
+        return await self.apply_delta(lesson_id, student_id, pauseCount=1)
     
     async def increment_rewind_count(
         self,
@@ -152,23 +433,7 @@ class VideoAnalyticsService:
         student_id: str
     ):
         """Incrémenter le compteur de retours arrière"""
-        try:
-            await self.connect()
-            
-            analytics = await self.create_or_get_analytics(lesson_id, student_id)
-            
-            updated = await self.db.videoanalytics.update(
-                where={'id': analytics.id},
-                data={'rewindCount': analytics.rewindCount + 1}
-            )
-            
-            return updated
-            
-        except Exception as e:
-            logger.error(f"Error incrementing rewind count: {str(e)}")
-            raise
-        finally:
-            await self.disconnect()
+        return await self.apply_delta(lesson_id, student_id, rewindCount=1)
     
     async def increment_speed_changes(
         self,
@@ -176,23 +441,7 @@ class VideoAnalyticsService:
         student_id: str
     ):
         """Incrémenter le compteur de changements de vitesse"""
-        try:
-            await self.connect()
-            
-            analytics = await self.create_or_get_analytics(lesson_id, student_id)
-            
-            updated = await self.db.videoanalytics.update(
-                where={'id': analytics.id},
-                data={'speedChanges': analytics.speedChanges + 1}
-            )
-            
-            return updated
-            
-        except Exception as e:
-            logger.error(f"Error incrementing speed changes: {str(e)}")
-            raise
-        finally:
-            await self.disconnect()
+        return await self.apply_delta(lesson_id, student_id, speedChanges=1)
     
     async def update_quality(
         self,
@@ -201,23 +450,7 @@ class VideoAnalyticsService:
         quality: str
     ):
         """Mettre à jour la qualité moyenne"""
-        try:
-            await self.connect()
-            
-            analytics = await self.create_or_get_analytics(lesson_id, student_id)
-            
-            updated = await self.db.videoanalytics.update(
-                where={'id': analytics.id},
-                data={'avgQuality': quality}
-            )
-            
-            return updated
-            
-        except Exception as e:
-            logger.error(f"Error updating quality: {str(e)}")
-            raise
-        finally:
-            await self.disconnect()
+        return await self.apply_delta(lesson_id, student_id, avgQuality=quality)
     
     async def get_analytics(
         self,
@@ -288,13 +521,8 @@ class VideoAnalyticsService:
         try:
             await self.connect()
             
-            analytics_list = await self.get_lesson_analytics(lesson_id)
-            
-            if not analytics_list:
-                return 0.0
-            
-            total = sum(a.completionRate for a in analytics_list)
-            return round(total / len(analytics_list), 2)
+            row = await self.db.query_first(AVG_COMPLETION_RATE_SQL, lesson_id)
+            return round(float(row['avg']), 2)
             
         except Exception as e:
             logger.error(f"Error calculating avg completion rate: {str(e)}")
@@ -306,35 +534,107 @@ class VideoAnalyticsService:
         self,
         lesson_id: str
     ) -> Dict[str, Any]:
-        """Récupérer les statistiques d'engagement d'une leçon"""
+        """
+        Statistiques d'engagement d'une leçon (moyennes, percentiles du temps
+        de visionnage, histogramme des taux de complétion).
+        
+        Lues dans le résumé précalculé de la leçon (une ligne, quel que soit
+        le nombre d'étudiants), tenu à jour par refresh_engagement_sketches ;
+        un résumé absent est calculé et enregistré à la première lecture.
+        """
         try:
             await self.connect()
             
-            analytics_list = await self.get_lesson_analytics(lesson_id)
+            row = await self.db.query_first(
+                'SELECT * FROM "lesson_engagement_sketches" WHERE "lessonId" = $1',
+                lesson_id
+            )
+            if row is None:
+                row = await self.db.query_first(STORE_LESSON_SKETCH_SQL, lesson_id)
             
-            if not analytics_list:
-                return {
-                    'total_students': 0,
-                    'avg_watch_time': 0,
-                    'avg_completion_rate': 0.0,
-                    'avg_pauses': 0,
-                    'avg_rewinds': 0,
-                    'avg_speed_changes': 0
-                }
+            sketch = EngagementSketch.from_row(row) if row else EngagementSketch()
+            return sketch.summary()
             
-            total = len(analytics_list)
+        except Exception as e:
+            logger.error(f"Error getting engagement stats: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
+    
+    async def get_watch_heatmap(
+        self,
+        lesson_id: str,
+        resolution: int = 5,
+        page_size: int = 5000
+    ) -> Dict[str, Any]:
+        """
+        Carte de chaleur d'une leçon : spectateurs par seconde (somme des
+        bitmaps), courbe de rétention par tranche de `resolution` secondes
+        et principaux points d'abandon.
+        """
+        try:
+            await self.connect()
             
-            return {
-                'total_students': total,
-                'avg_watch_time': sum(a.totalWatchTime for a in analytics_list) // total,
-                'avg_completion_rate': round(sum(a.completionRate for a in analytics_list) / total, 2),
-                'avg_pauses': sum(a.pauseCount for a in analytics_list) // total,
-                'avg_rewinds': sum(a.rewindCount for a in analytics_list) // total,
-                'avg_speed_changes': sum(a.speedChanges for a in analytics_list) // total
-            }
+            counts = coverage_counts([])
+            students = 0
+            after = ''
+            
+            while True:
+                rows = await self.db.query_raw(
+                    WATCH_BITMAPS_PAGE_SQL, lesson_id, after, page_size
+                )
+                if not rows:
+                    break
+                
+                counts = coverage_counts(
+                    (bytes.fromhex(row['bitmap']) for row in rows),
+                    counts
+                )
+                students += len(rows)
+                after = rows[-1]['studentId']
+                if len(rows) < page_size:
+                    break
+            
+            curve = drop_off_curve(counts, students, resolution)
+            return {'lesson_id': lesson_id, 'students': students, **curve}
             
         except Exception as e:
-            logger.error(f"Error getting engagement stats: {str(e)}")
+            logger.error(f"Error getting watch heatmap: {str(e)}")
             raise
         finally:
-            await self.disconnect()
\ No newline at end of file
+            await self.disconnect()
+    
+    async def refresh_engagement_sketches(
+        self,
+        lag_seconds: Optional[int] = None,
+        max_span_hours: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Recalculer les résumés d'engagement des leçons modifiées depuis le dernier watermark"""
+        try:
+            await self.connect()
+            
+            lag_seconds = lag_seconds if lag_seconds is not None else getattr(
+                settings, 'ENGAGEMENT_SKETCH_LAG_SECONDS', 5
+            )
+            max_span_hours = max_span_hours or getattr(
+                settings, 'ENGAGEMENT_SKETCH_MAX_SPAN_HOURS', 24
+            )
+            
+            async def first_update():
+                first = await self.db.videoanalytics.find_first(order={'updatedAt': 'asc'})
+                return first.updatedAt if first else None
+            
+            return await advance_rollup(
+                self.db,
+                ENGAGEMENT_SKETCH_JOB,
+                REFRESH_ENGAGEMENT_SKETCHES_SQL,
+                first_update,
+                lag_seconds,
+                max_span_hours
+            )
+            
+        except Exception as e:
+            logger.error(f"Error refreshing engagement sketches: {str(e)}")
+            raise
+        finally:
+            await self.disconnect()
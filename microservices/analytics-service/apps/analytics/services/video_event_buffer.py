@@ -0,0 +1,163 @@
+from typing import Optional, Dict, Any, Tuple
+from django.conf import settings
+from shared.shared.utils.prisma_client import worker_async_to_sync
+import asyncio
+import atexit
+import logging
+import time
+
+from .video_analytics_service import VideoAnalyticsService, merge_video_delta
+
+logger = logging.getLogger(__name__)
+
+
+class VideoEventBuffer:
+    """
+    Buffer write-behind des événements vidéo.
+
+    Les deltas sont agrégés en mémoire par (lessonId, studentId) puis écrits
+    en une seule requête par VideoAnalyticsService.apply_deltas, toutes les
+    `flush_interval` secondes ou dès que `max_keys` couples sont en attente.
+    Le buffer vit sur la boucle d'événements du worker : add() et flush()
+    doivent y être exécutés (vues async, lifespan ASGI, worker_async_to_sync).
+    """
+
+    def __init__(
+        self,
+        service: Optional[VideoAnalyticsService] = None,
+        flush_interval: Optional[float] = None,
+        max_keys: Optional[int] = None
+    ):
+        self.service = service or VideoAnalyticsService()
+        self.flush_interval = flush_interval or getattr(
+            settings, 'VIDEO_EVENT_BUFFER_FLUSH_INTERVAL', 5.0
+        )
+        self.max_keys = max_keys or getattr(
+            settings, 'VIDEO_EVENT_BUFFER_MAX_KEYS', 500
+        )
+
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._pending_events = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._drain_registered = False
+
+        self._stats = {
+            'events_received': 0,
+            'flushes': 0,
+            'flush_failures': 0,
+            'rows_flushed': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    async def add(
+        self,
+        lesson_id: str,
+        student_id: str,
+        **delta: Any
+    ):
+        """Ajouter un delta au buffer (flush déclenché si le seuil est atteint)"""
+        key = (lesson_id, student_id)
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = {'lessonId': lesson_id, 'studentId': student_id}
+            self._pending[key] = entry
+
+        merge_video_delta(entry, delta)
+        self._pending_events += 1
+        self._stats['events_received'] += 1
+
+        self._ensure_flusher()
+
+        if len(self._pending) >= self.max_keys:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Écrire en base tous les deltas en attente"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            events, self._pending_events = self._pending_events, 0
+
+            start = time.perf_counter()
+            try:
+                await self.service.apply_deltas(list(batch.values()))
+            except Exception as e:
+                # Réinjecter les deltas pour le prochain flush : les événements
+                # arrivés pendant l'écriture sont plus récents, ils passent par-dessus
+                for key, delta in batch.items():
+                    newer = self._pending.get(key)
+                    if newer is not None:
+                        merge_video_delta(delta, newer)
+                    self._pending[key] = delta
+                self._pending_events += events
+                self._stats['flush_failures'] += 1
+                logger.error(f"Error flushing video event buffer: {str(e)}")
+                return 0
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._stats['flushes'] += 1
+            self._stats['rows_flushed'] += len(batch)
+            self._stats['last_flush_ms'] = round(elapsed_ms, 3)
+            self._stats['max_flush_ms'] = round(max(self._stats['max_flush_ms'], elapsed_ms), 3)
+            self._stats['total_flush_ms'] += elapsed_ms
+
+            logger.info(f"Video event buffer flushed: {len(batch)} rows, {events} events")
+            return len(batch)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Profondeur du buffer et latence des flush"""
+        flushes = self._stats['flushes']
+        return {
+            'buffer_depth': len(self._pending),
+            'pending_events': self._pending_events,
+            'events_received': self._stats['events_received'],
+            'flushes': flushes,
+            'flush_failures': self._stats['flush_failures'],
+            'rows_flushed': self._stats['rows_flushed'],
+            'last_flush_ms': self._stats['last_flush_ms'],
+            'max_flush_ms': self._stats['max_flush_ms'],
+            'avg_flush_ms': round(self._stats['total_flush_ms'] / flushes, 3) if flushes else 0.0,
+            'flush_interval_seconds': self.flush_interval,
+            'max_keys': self.max_keys,
+        }
+
+    async def close(self):
+        """Arrêter le flush périodique puis écrire les deltas en attente (arrêt du worker)"""
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None and not flusher.done():
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def drain(self):
+        """Vider le buffer à l'arrêt du processus"""
+        if self._pending:
+            worker_async_to_sync(self.flush)()
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run_periodic_flush())
+
+        if not self._drain_registered:
+            # Enregistré après prisma_client : exécuté avant sa fermeture
+            atexit.register(self.drain)
+            self._drain_registered = True
+
+    async def _run_periodic_flush(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+video_event_buffer = VideoEventBuffer()
@@ -0,0 +1,114 @@
+from typing import Optional, Dict, Any, Iterable, List
+from django.conf import settings
+
+import numpy as np
+
+# Bitmap des secondes regardées d'une leçon : le bit i (octet i // 8, bit
+# de poids faible d'abord) vaut 1 si la seconde i a été vue. Une leçon de
+# 30 minutes tient en 225 octets ; au-delà de WATCH_COVERAGE_MAX_SECONDS
+# les positions sont ignorées.
+
+
+def max_seconds() -> int:
+    return getattr(settings, 'WATCH_COVERAGE_MAX_SECONDS', 4 * 3600)
+
+
+def segment_bitmap(start: int, end: int) -> Optional[bytes]:
+    """Bitmap des secondes [start, end) ; None si le segment est vide"""
+    start = max(start, 0)
+    end = min(end, max_seconds())
+    if end <= start:
+        return None
+
+    bits = ((1 << (end - start)) - 1) << start
+    return bits.to_bytes((end + 7) // 8, 'little')
+
+
+def merge_bitmaps(*bitmaps: Optional[bytes]) -> Optional[bytes]:
+    """OU bit à bit de bitmaps de longueurs différentes"""
+    present = [bitmap for bitmap in bitmaps if bitmap]
+    if not present:
+        return None
+
+    merged = 0
+    for bitmap in present:
+        merged |= int.from_bytes(bitmap, 'little')
+    return merged.to_bytes(max(len(bitmap) for bitmap in present), 'little')
+
+
+def watched_seconds(bitmap: Optional[bytes]) -> int:
+    """Nombre de secondes distinctes regardées"""
+    return bin(int.from_bytes(bitmap, 'little')).count('1') if bitmap else 0
+
+
+def coverage_counts(
+    bitmaps: Iterable[bytes],
+    counts: Optional[np.ndarray] = None,
+    chunk_size: int = 4096
+) -> np.ndarray:
+    """
+    Nombre de spectateurs de chaque seconde, ajoutés à `counts` (lecture
+    page par page). Les bitmaps sont empilés par paquets de `chunk_size`
+    dans une matrice d'octets, dépaquetés en bits puis sommés par colonne.
+    """
+    counts = np.zeros(0, dtype=np.int64) if counts is None else counts
+    chunk: List[bytes] = []
+
+    def add_chunk():
+        nonlocal counts
+        width = max(len(bitmap) for bitmap in chunk)
+        matrix = np.zeros((len(chunk), width), dtype=np.uint8)
+        for row, bitmap in enumerate(chunk):
+            matrix[row, :len(bitmap)] = np.frombuffer(bitmap, dtype=np.uint8)
+
+        chunk_counts = np.unpackbits(matrix, axis=1, bitorder='little').sum(axis=0, dtype=np.int64)
+        if len(chunk_counts) > len(counts):
+            counts = np.pad(counts, (0, len(chunk_counts) - len(counts)))
+        counts[:len(chunk_counts)] += chunk_counts
+
+    for bitmap in bitmaps:
+        if bitmap:
+            chunk.append(bitmap)
+        if len(chunk) >= chunk_size:
+            add_chunk()
+            chunk = []
+    if chunk:
+        add_chunk()
+
+    # Dernière seconde vue par au moins un étudiant
+    watched = np.flatnonzero(counts)
+    return counts[:watched[-1] + 1] if len(watched) else counts[:0]
+
+
+def drop_off_curve(
+    counts: np.ndarray,
+    students: int,
+    resolution: int = 5,
+    top: int = 5
+) -> Dict[str, Any]:
+    """
+    Courbe de rétention par tranche de `resolution` secondes (spectateurs
+    moyens / étudiants) et les `top` tranches où elle baisse le plus.
+    """
+    if not students or not len(counts):
+        return {'duration': 0, 'resolution': resolution, 'viewers': [], 'retention': [], 'drop_offs': []}
+
+    bins = -(-len(counts) // resolution)
+    padded = np.pad(counts, (0, bins * resolution - len(counts)))
+    viewers = padded.reshape(bins, resolution).mean(axis=1)
+    retention = viewers / students
+
+    # Baisse entre une tranche et la précédente (la première part de 100 %)
+    drops = -np.diff(retention, prepend=1.0)
+    order = np.argsort(-drops, kind='stable')[:top]
+
+    return {
+        'duration': int(len(counts)),
+        'resolution': resolution,
+        'viewers': [round(float(value), 2) for value in viewers],
+        'retention': [round(float(value), 4) for value in retention],
+        'drop_offs': [
+            {'second': int(i) * resolution, 'drop': round(float(drops[i]), 4)}
+            for i in order if drops[i] > 0
+        ],
+    }
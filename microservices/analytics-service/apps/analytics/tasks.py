@@ -1,4 +1,5 @@
 from celery import shared_task
+from shared.shared.utils.prisma_client import worker_async_to_sync
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,3 +8,138 @@ logger = logging.getLogger(__name__)
 def example_task():
     logger.info("Example task executed")
     return "Task completed"
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=5)
+def flush_course_views(self, max_batches: int = 20):
+    """Dépiler la file des vues de cours et les insérer par lots (create_many)"""
+    try:
+        inserted = worker_async_to_sync(_drain_course_view_queue)(max_batches)
+    except Exception as e:
+        raise self.retry(exc=e)
+    
+    if inserted:
+        logger.info(f"Course views flushed: {inserted}")
+    return inserted
+
+
+async def _drain_course_view_queue(max_batches: int) -> int:
+    """Réserver, insérer et acquitter jusqu'à `max_batches` lots ; un lot en échec interrompt"""
+    from apps.analytics.services import CourseViewService, course_view_queue
+    
+    service = CourseViewService()
+    inserted = 0
+    
+    # Lots d'un worker tué entre la réservation et l'insertion
+    await course_view_queue.recover_stale()
+    
+    for _ in range(max_batches):
+        batch = await course_view_queue.claim_batch()
+        if batch is None:
+            break
+        
+        try:
+            inserted += await service.create_views_bulk(batch['records'])
+        except Exception as e:
+            # Lot remis en fin de file (dead letter après COURSE_VIEW_MAX_ATTEMPTS échecs)
+            dead = await course_view_queue.fail(batch)
+            logger.warning(
+                f"Course view batch failed ({len(batch['records'])} records, {dead} dead-lettered): {str(e)}"
+            )
+            raise
+        
+        await course_view_queue.ack(batch)
+    
+    return inserted
+
+
+@shared_task
+def refresh_search_rollup(max_runs: int = 30):
+    """Agréger les nouveaux logs de recherche dans search_daily_rollups"""
+    from apps.analytics.services import SearchLogService
+    
+    service = SearchLogService()
+    rows = 0
+    
+    # Plusieurs passes bornées si le job a pris du retard
+    for _ in range(max_runs):
+        result = worker_async_to_sync(service.refresh_daily_rollup)()
+        rows += result['rows']
+        if result['caught_up']:
+            break
+    
+    return rows
+
+
+@shared_task
+def refresh_user_activity_rollup(max_runs: int = 30):
+    """Agréger les nouvelles activités utilisateur dans user_activity_daily"""
+    from apps.analytics.services import UserActivityService
+    
+    service = UserActivityService()
+    rows = 0
+    
+    for _ in range(max_runs):
+        result = worker_async_to_sync(service.refresh_daily_rollup)()
+        rows += result['rows']
+        if result['caught_up']:
+            break
+    
+    return rows
+
+
+@shared_task
+def refresh_engagement_sketches(max_runs: int = 30):
+    """Recalculer les résumés d'engagement des leçons modifiées"""
+    from apps.analytics.services import VideoAnalyticsService
+    
+    service = VideoAnalyticsService()
+    rows = 0
+    
+    for _ in range(max_runs):
+        result = worker_async_to_sync(service.refresh_engagement_sketches)()
+        rows += result['rows']
+        if result['caught_up']:
+            break
+    
+    return rows
+
+
+@shared_task
+def backfill_course_viewers(days: int = 90):
+    """Reconstruire les HyperLogLog de viewers uniques depuis course_views"""
+    from apps.analytics.services import CourseViewService
+    
+    return worker_async_to_sync(CourseViewService().backfill_unique_viewers)(days=days)
+
+
+@shared_task
+def backfill_active_users(days: int = 400):
+    """Reconstruire les bitmaps d'utilisateurs actifs depuis user_activity"""
+    from apps.analytics.services import UserActivityService
+    
+    return worker_async_to_sync(UserActivityService().backfill_active_users)(days=days)
+
+
+@shared_task
+def refresh_top_courses():
+    """Recalculer les classements des meilleurs cours (7/30/90 jours)"""
+    from apps.analytics.services import top_courses_ranking
+    
+    return worker_async_to_sync(top_courses_ranking.refresh)()
+
+
+@shared_task
+def maintain_partitions():
+    """Partitions mensuelles à venir et rétention des tables d'événements"""
+    from apps.analytics.services import PartitionMaintenance
+    
+    return worker_async_to_sync(PartitionMaintenance().run)()
+
+
+@shared_task
+def export_parquet():
+    """Export incrémental des tables analytics en Parquet"""
+    from apps.analytics.services.parquet_export import ParquetExporter
+    
+    return ParquetExporter().run()
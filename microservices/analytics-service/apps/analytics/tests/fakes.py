@@ -0,0 +1,122 @@
+"""Faux Redis en mémoire partagé par les tests des services adossés à Redis"""
+
+
+class FakeRedis:
+    """Sous-ensemble de l'API redis.asyncio utilisé par les services d'analytics.
+
+    Chaînes et bitmaps (entiers Python) dans ``values``, ensembles et HyperLogLog
+    (ensembles exacts) dans ``sets``, ainsi que hashes, listes et ensembles triés.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.hashes = {}
+        self.lists = {}
+        self.zsets = {}
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self, **kwargs):
+        raise ConnectionError('pub/sub disabled in tests')
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            for store in (self.values, self.sets, self.hashes, self.lists, self.zsets):
+                if store.pop(key, None) is not None:
+                    deleted += 1
+        return deleted
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    async def pfadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def pfcount(self, *keys):
+        return len(set().union(*(self.sets.get(key, set()) for key in keys)))
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    async def lmove(self, source, destination, src='LEFT', dest='RIGHT'):
+        items = self.lists.get(source)
+        if not items:
+            return None
+        value = items.pop(0)
+        self.lists.setdefault(destination, []).append(value)
+        return value
+
+    async def llen(self, key):
+        return len(self.lists.get(key, ()))
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    async def zrangebyscore(self, key, low, high):
+        return [member for member, score in self.zsets.get(key, {}).items() if score <= high]
+
+    async def setbit(self, key, offset, value):
+        self.values[key] = self.values.get(key, 0) | (1 << offset)
+
+    async def bitcount(self, key):
+        return bin(self.values.get(key, 0)).count('1')
+
+    async def bitop(self, operation, dest, *keys):
+        bitmaps = [self.values.get(key, 0) for key in keys]
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result | bitmap if operation == 'OR' else result & bitmap
+        self.values[dest] = result
+        return result.bit_length() // 8
+
+
+class FakePipeline:
+    """Empile les commandes et les rejoue sur le FakeRedis à l'execute()"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+    async def execute(self):
+        calls, self.calls = self.calls, []
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
@@ -0,0 +1,139 @@
+import pytest
+import json
+from datetime import date, timedelta
+
+from apps.analytics.services.active_users import (
+    ActiveUserBitmaps,
+    ASSIGN_DENSE_IDS_SQL,
+    DENSE_IDS_SQL,
+)
+from apps.analytics.tests.fakes import FakeRedis
+
+
+class FakeWatermarks:
+    def __init__(self):
+        self.rows = {}
+
+    async def find_unique(self, where):
+        return self.rows.get(where['name'])
+
+    async def upsert(self, where, data):
+        self.rows[where['name']] = data['create']
+
+
+class FakeDb:
+    """Table active_user_ids en mémoire (séquence comprise)"""
+
+    def __init__(self):
+        self.ids = {}
+        self.next_id = 1
+        self.rollupwatermark = FakeWatermarks()
+
+    async def query_raw(self, sql, user_ids):
+        user_ids = json.loads(user_ids)
+        if sql == DENSE_IDS_SQL:
+            return [{'userId': u, 'denseId': self.ids[u]} for u in user_ids if u in self.ids]
+        assert sql == ASSIGN_DENSE_IDS_SQL
+        inserted = []
+        for user_id in user_ids:
+            if user_id not in self.ids:
+                self.ids[user_id] = self.next_id
+                inserted.append({'userId': user_id, 'denseId': self.next_id})
+            self.next_id += 1
+        return inserted
+
+
+def make_bitmaps():
+    bitmaps = ActiveUserBitmaps(redis_url='redis://unused', retention_days=30)
+    bitmaps._client = FakeRedis()
+    bitmaps._db = FakeDb()
+    return bitmaps
+
+
+MONDAY = date(2025, 11, 3)
+
+
+@pytest.mark.asyncio
+class TestActiveUserBitmaps:
+    """Tests des bitmaps d'utilisateurs actifs"""
+
+    async def test_dense_ids_are_stable(self):
+        bitmaps = make_bitmaps()
+
+        ids, new_users = await bitmaps.dense_ids(['a', 'b'])
+        bitmaps._ids.clear()
+        again, none_new = await bitmaps.dense_ids(['b', 'c'])
+
+        assert ids == {'a': 1, 'b': 2}
+        assert sorted(new_users) == ['a', 'b']
+        # Les utilisateurs connus ne consomment pas de valeur de séquence
+        assert again == {'b': 2, 'c': 3}
+        assert none_new == ['c']
+
+    async def test_lost_race_reads_winner_id(self):
+        bitmaps = make_bitmaps()
+        db = bitmaps._db
+        query_raw = db.query_raw
+
+        async def racing_query_raw(sql, user_ids):
+            if sql == ASSIGN_DENSE_IDS_SQL:
+                # Un autre worker attribue 'a' entre notre lecture et notre INSERT
+                db.ids['a'] = 7
+            return await query_raw(sql, user_ids)
+
+        db.query_raw = racing_query_raw
+        ids, new_users = await bitmaps.dense_ids(['a'])
+
+        assert ids == {'a': 7}
+        assert new_users == []
+
+    async def test_ready_once_backfilled(self):
+        bitmaps = make_bitmaps()
+        other_worker = make_bitmaps()
+        other_worker._db = bitmaps._db
+        other_worker.ready_check_seconds = 0
+
+        assert not await bitmaps.is_ready()
+        assert not await other_worker.is_ready()
+        await bitmaps.mark_ready()
+
+        assert await bitmaps.is_ready()
+        assert await other_worker.is_ready()
+
+    async def test_active_counts(self):
+        bitmaps = make_bitmaps()
+        for i in range(10):
+            await bitmaps.add_many([('daily', MONDAY + timedelta(days=i)), (f'once-{i}', MONDAY + timedelta(days=i))])
+
+        last = (await bitmaps.active_counts(MONDAY + timedelta(days=9), days=3))[-1]
+
+        assert last['date'] == '2025-11-12'
+        assert last['dau'] == 2
+        assert last['wau'] == 8
+        assert last['mau'] == 11
+        assert last['stickiness'] == round(2 / 11, 4)
+
+    async def test_weekly_retention(self):
+        bitmaps = make_bitmaps()
+        await bitmaps.add_many([(user, MONDAY) for user in ('a', 'b', 'c', 'd')])
+        await bitmaps.add_many([(user, MONDAY + timedelta(days=8)) for user in ('a', 'b', 'e')])
+        await bitmaps.add_many([(user, MONDAY + timedelta(days=16)) for user in ('a', 'e')])
+
+        matrix = await bitmaps.retention(MONDAY + timedelta(days=2), periods=3)
+
+        assert [row['start'] for row in matrix['cohorts']] == ['2025-11-03', '2025-11-10', '2025-11-17']
+        assert matrix['cohorts'][0]['retained'] == [4, 2, 1]
+        assert matrix['cohorts'][0]['retention'] == [1.0, 0.5, 0.25]
+        assert matrix['cohorts'][1]['retained'] == [3, 2]
+        assert matrix['cohorts'][2]['retained'] == [2]
+
+    async def test_new_user_cohorts(self):
+        bitmaps = make_bitmaps()
+        await bitmaps.add_many([('a', MONDAY), ('b', MONDAY)])
+        await bitmaps.add_many([('a', MONDAY + timedelta(days=7)), ('c', MONDAY + timedelta(days=7))])
+        await bitmaps.add_many([('c', MONDAY + timedelta(days=14))])
+
+        matrix = await bitmaps.retention(MONDAY, periods=3, cohort='new')
+
+        assert [row['retained'] for row in matrix['cohorts']] == [[2, 1, 0], [1, 1], [0]]
+        assert not any(key.startswith(f'{bitmaps.prefix}:tmp') for key in bitmaps._client.values)
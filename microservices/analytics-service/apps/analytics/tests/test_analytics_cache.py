@@ -0,0 +1,132 @@
+import pytest
+import asyncio
+
+from apps.analytics.services.analytics_cache import AnalyticsCache
+from apps.analytics.tests.fakes import FakeRedis
+
+
+def make_cache(**kwargs):
+    cache = AnalyticsCache(redis_url='redis://unused', l1_seconds=60, enabled=True, **kwargs)
+    cache._client = cache._pubsub_client = FakeRedis()
+    return cache
+
+
+class Counter:
+    """Calcul simulé qui compte ses appels"""
+
+    def __init__(self, value='result', delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+@pytest.mark.asyncio
+class TestAnalyticsCache:
+    """Tests du cache de lecture"""
+
+    async def test_second_read_is_served_from_l1(self):
+        cache = make_cache()
+        compute = Counter()
+
+        first = await cache.get_or_compute('course_stats', {'course_id': 'c1', 'days': 30}, compute)
+        second = await cache.get_or_compute('course_stats', {'course_id': 'c1', 'days': 30}, compute)
+
+        stats = cache.metrics()['namespaces']['course_stats']
+        assert first == second == 'result'
+        assert compute.calls == 1
+        assert stats['misses'] == 1
+        assert stats['l1_hits'] == 1
+
+    async def test_other_worker_reads_redis(self):
+        cache = make_cache()
+        other = make_cache()
+        other._client = cache._client
+        compute = Counter({'total': 3})
+
+        await cache.get_or_compute('daily_revenue', {'days': 30}, compute)
+        value = await other.get_or_compute('daily_revenue', {'days': 30}, compute)
+
+        assert value == {'total': 3}
+        assert compute.calls == 1
+        assert other.metrics()['namespaces']['daily_revenue']['l2_hits'] == 1
+
+    async def test_concurrent_misses_compute_once(self):
+        cache = make_cache()
+        compute = Counter(delay=0.01)
+
+        values = await asyncio.gather(*[
+            cache.get_or_compute('popular_searches', {'limit': 10, 'days': 30}, compute)
+            for _ in range(20)
+        ])
+
+        assert values == ['result'] * 20
+        assert compute.calls == 1
+        assert cache.metrics()['namespaces']['popular_searches']['coalesced'] == 19
+
+    async def test_invalidation_is_targeted(self):
+        cache = make_cache()
+        course_a, course_b = Counter('a'), Counter('b')
+
+        await cache.get_or_compute('course_stats', {'course_id': 'a'}, course_a, tags=['course:a'])
+        await cache.get_or_compute('course_stats', {'course_id': 'b'}, course_b, tags=['course:b'])
+
+        await cache.invalidate('course:a')
+
+        await cache.get_or_compute('course_stats', {'course_id': 'a'}, course_a, tags=['course:a'])
+        await cache.get_or_compute('course_stats', {'course_id': 'b'}, course_b, tags=['course:b'])
+
+        assert course_a.calls == 2
+        assert course_b.calls == 1
+        assert cache._client.published == [(cache.channel, '["course:a"]')]
+
+    async def test_invalidation_during_compute_only_skips_its_tags(self):
+        cache = make_cache()
+        compute_a, compute_b = Counter('a', delay=0.01), Counter('b', delay=0.01)
+
+        pending = asyncio.gather(
+            cache.get_or_compute('course_stats', {'course_id': 'a'}, compute_a, tags=['course:a']),
+            cache.get_or_compute('course_stats', {'course_id': 'b'}, compute_b, tags=['course:b']),
+        )
+        await asyncio.sleep(0.005)
+        await cache.invalidate('course:a')
+        await pending
+
+        await cache.get_or_compute('course_stats', {'course_id': 'a'}, compute_a, tags=['course:a'])
+        await cache.get_or_compute('course_stats', {'course_id': 'b'}, compute_b, tags=['course:b'])
+
+        assert compute_a.calls == 2
+        assert compute_b.calls == 1
+
+    async def test_debounced_invalidations_are_published_once(self):
+        cache = make_cache()
+
+        for _ in range(5):
+            await cache.invalidate('searches', debounce=True)
+
+        assert len(cache._client.published) == 1
+
+    async def test_debounced_burst_gets_a_trailing_invalidation(self):
+        cache = make_cache()
+        cache.debounce_seconds = 0.05
+
+        for _ in range(3):
+            await cache.invalidate('searches', debounce=True)
+        await asyncio.sleep(0.1)
+
+        assert len(cache._client.published) == 2
+        assert cache._trailing == {}
+
+    async def test_disabled_cache_always_computes(self):
+        cache = make_cache()
+        cache.enabled = False
+        compute = Counter()
+
+        for _ in range(3):
+            await cache.get_or_compute('lesson_engagement', {'lesson_id': 'l1'}, compute)
+
+        assert compute.calls == 3
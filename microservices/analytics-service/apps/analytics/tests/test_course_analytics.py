@@ -1,7 +1,7 @@
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
-from datetime import date
+from datetime import date, timedelta
 import uuid
 
 
@@ -43,3 +43,40 @@ class CourseAnalyticsTestCase(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['views'], 150)
+    
+    def test_batch_stats_zero_fill_every_course(self):
+        """Une requête pour plusieurs cours : séries denses, cours sans données inclus"""
+        other_course = str(uuid.uuid4())
+        today = date.today()
+        
+        data = {'course_id': self.course_id, 'date': str(today), 'views': 40, 'enrollments': 10, 'completions': 5}
+        self.client.post('/api/analytics/course/analytics/', data, format='json')
+        
+        response = self.client.post('/api/analytics/course/stats/batch/', {
+            'course_ids': [self.course_id, other_course],
+            'start_date': str(today - timedelta(days=6)),
+            'end_date': str(today)
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['dates']), 7)
+        
+        course = response.data['courses'][self.course_id]
+        self.assertEqual(course['daily']['views'], [0] * 6 + [40])
+        self.assertEqual(course['total_stats']['conversion_rate'], 25.0)
+        self.assertEqual(course['total_stats']['completion_rate'], 50.0)
+        self.assertEqual(response.data['courses'][other_course]['total_stats']['total_views'], 0)
+    
+    def test_batch_stats_rejects_invalid_range(self):
+        """Période inversée ou liste vide : 400"""
+        today = date.today()
+        
+        response = self.client.post('/api/analytics/course/stats/batch/', {
+            'course_ids': [self.course_id],
+            'start_date': str(today),
+            'end_date': str(today - timedelta(days=1))
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post('/api/analytics/course/stats/batch/', {'course_ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,32 @@
+from apps.analytics.services.course_funnel_service import build_funnel, funnel_rates
+
+
+class TestCourseFunnel:
+    """Tests du calcul des taux du tunnel"""
+
+    def test_rates_from_previous_and_start(self):
+        steps = funnel_rates({'viewed': 200, 'enrolled': 50, 'completed': 10, 'reviewed': 5})['steps']
+
+        assert [step['step'] for step in steps] == ['viewed', 'enrolled', 'completed', 'reviewed']
+        assert [step['from_previous'] for step in steps] == [100.0, 25.0, 20.0, 50.0]
+        assert [step['from_start'] for step in steps] == [100.0, 25.0, 5.0, 2.5]
+
+    def test_empty_steps_have_zero_rates(self):
+        steps = funnel_rates({'viewed': 10, 'enrolled': 0, 'completed': 0, 'reviewed': 0})['steps']
+
+        assert steps[2]['from_previous'] == 0.0
+        assert funnel_rates({})['steps'][0] == {
+            'step': 'viewed', 'users': 0, 'from_previous': 0.0, 'from_start': 0.0
+        }
+
+    def test_total_sums_breakdown(self):
+        rows = [
+            {'value': 'ads', 'viewed': 30, 'enrolled': 6, 'completed': 2, 'reviewed': 1},
+            {'value': 'email', 'viewed': 10, 'enrolled': 4, 'completed': 2, 'reviewed': 0},
+        ]
+
+        funnel = build_funnel(rows)
+
+        assert [step['users'] for step in funnel['total']['steps']] == [40, 10, 4, 1]
+        assert [row['value'] for row in funnel['breakdown']] == ['ads', 'email']
+        assert funnel['breakdown'][1]['steps'][1]['from_previous'] == 40.0
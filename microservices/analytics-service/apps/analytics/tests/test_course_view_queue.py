@@ -0,0 +1,58 @@
+import pytest
+
+from apps.analytics.services.course_view_queue import CourseViewQueue
+from apps.analytics.tests.fakes import FakeRedis
+
+
+def make_queue(**kwargs):
+    queue = CourseViewQueue(redis_url='redis://unused', key='views', **kwargs)
+    queue._client = FakeRedis()
+    return queue
+
+
+@pytest.mark.asyncio
+class TestCourseViewQueue:
+    """Tests de la file des vues de cours"""
+
+    async def test_acked_batch_leaves_nothing_behind(self):
+        queue = make_queue(batch_size=2)
+        for course in ('c1', 'c2', 'c3'):
+            await queue.enqueue(course)
+
+        batch = await queue.claim_batch()
+        assert [record['courseId'] for record in batch['records']] == ['c1', 'c2']
+        assert 'attempts' not in batch['records'][0]
+
+        await queue.ack(batch)
+        assert await queue.depth() == 1
+        assert queue.client.lists.get(queue.processing_key(batch['id'])) is None
+        assert queue.client.zsets[queue.inflight_key] == {}
+
+    async def test_failing_batch_goes_to_tail_then_dead_letter(self):
+        queue = make_queue(batch_size=1, max_attempts=2)
+        await queue.enqueue('poison')
+        await queue.enqueue('ok')
+
+        assert await queue.fail(await queue.claim_batch()) == 0
+        assert (await queue.claim_batch())['records'][0]['courseId'] == 'ok'
+
+        poison = await queue.claim_batch()
+        assert poison['attempts'] == [1]
+        assert await queue.fail(poison) == 1
+        assert await queue.depth() == 0
+        assert await queue.dead_letter_depth() == 1
+
+        assert await queue.replay_dead_letters() == 1
+        assert await queue.depth() == 1
+
+    async def test_stale_batch_is_recovered(self):
+        queue = make_queue(batch_size=5, visibility_timeout=0.001)
+        await queue.enqueue('c1')
+        await queue.enqueue('c2')
+
+        batch = await queue.claim_batch()
+        queue.client.zsets[queue.inflight_key][batch['id']] -= 60
+
+        assert await queue.recover_stale() == 2
+        assert await queue.depth() == 2
+        assert queue.client.zsets[queue.inflight_key] == {}
@@ -0,0 +1,58 @@
+import pytest
+from datetime import date, datetime
+
+from apps.analytics.services.course_viewers import CourseViewerCounter, viewer_fingerprint
+from apps.analytics.tests.fakes import FakeRedis
+
+
+def make_counter():
+    counter = CourseViewerCounter(redis_url='redis://unused', retention_days=30)
+    counter._client = FakeRedis()
+    return counter
+
+
+class TestViewerFingerprint:
+    """Tests de l'identifiant de viewer"""
+
+    def test_user_id_wins_over_fingerprint(self):
+        assert viewer_fingerprint('user-1', '1.2.3.4', 'Firefox') == 'u:user-1'
+
+    def test_anonymous_viewers_use_ip_and_user_agent(self):
+        first = viewer_fingerprint(None, '1.2.3.4', 'Firefox')
+        same = viewer_fingerprint(None, '1.2.3.4', 'Firefox')
+        other = viewer_fingerprint(None, '1.2.3.4', 'Chrome')
+
+        assert first.startswith('a:')
+        assert first == same
+        assert first != other
+        assert viewer_fingerprint() is None
+
+
+@pytest.mark.asyncio
+class TestCourseViewerCounter:
+    """Tests du comptage par jour et de la fusion sur une plage"""
+
+    async def test_range_merges_daily_counters(self):
+        counter = make_counter()
+        course_id = 'course-1'
+
+        await counter.add(course_id, datetime(2025, 11, 1, 10), user_id='alice')
+        await counter.add(course_id, datetime(2025, 11, 1, 11), user_id='alice')
+        await counter.add(course_id, datetime(2025, 11, 2, 9), user_id='alice')
+        await counter.add(course_id, datetime(2025, 11, 2, 9), user_id='bob')
+        await counter.add(course_id, datetime(2025, 11, 3, 9), ip_address='1.2.3.4', user_agent='Firefox')
+
+        assert await counter.count(course_id, date(2025, 11, 1), date(2025, 11, 1)) == 1
+        assert await counter.count(course_id, date(2025, 11, 1), date(2025, 11, 2)) == 2
+        assert await counter.count(course_id, date(2025, 11, 1), date(2025, 11, 3)) == 3
+        assert await counter.count(course_id, date(2025, 11, 3), date(2025, 11, 1)) == 0
+
+    async def test_views_without_identity_are_ignored(self):
+        counter = make_counter()
+
+        added = await counter.add_many([
+            {'courseId': 'course-1', 'viewedAt': datetime(2025, 11, 1)},
+            {'courseId': 'course-1', 'viewedAt': datetime(2025, 11, 1), 'userId': 'alice'},
+        ])
+
+        assert added == 1
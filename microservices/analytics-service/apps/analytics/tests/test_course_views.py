@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
 import uuid
@@ -11,6 +11,7 @@ class CourseViewTestCase(TestCase):
         self.client = APIClient()
         self.course_id = str(uuid.uuid4())
     
+    @override_settings(COURSE_VIEW_QUEUE_ENABLED=False)
     def test_track_course_view(self):
         """Test de tracking d'une vue de cours"""
         data = {
@@ -38,4 +39,127 @@ class CourseViewTestCase(TestCase):
         response = self.client.get(f'/api/analytics/course-views/stats/{self.course_id}/')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('total_views', response.data)
\ No newline at end of file
+        self.assertIn('total_views', response.data)
+    
+    def test_unique_viewers_fall_back_to_course_views(self):
+        """Redis indisponible : viewers comptés sur course_views au lieu d'une erreur"""
+        from datetime import datetime, timedelta
+        from shared.shared.utils.prisma_client import worker_async_to_sync
+        from apps.analytics.services import CourseViewService, course_viewer_counter
+        
+        class RedisDown:
+            def pipeline(self, transaction=True):
+                raise ConnectionError('redis down')
+            
+            async def pfcount(self, *keys):
+                raise ConnectionError('redis down')
+        
+        service = CourseViewService()
+        course_viewer_counter._client = RedisDown()
+        try:
+            worker_async_to_sync(service.track_view)(self.course_id, user_id=str(uuid.uuid4()))
+            viewers = worker_async_to_sync(service.get_unique_viewers)(
+                self.course_id, datetime.now() - timedelta(days=1)
+            )
+        finally:
+            course_viewer_counter._client = None
+        
+        self.assertEqual(viewers, 1)
+    
+    def test_track_course_view_is_queued(self):
+        """La vue est mise en file (202) puis insérée par la tâche de flush"""
+        from shared.shared.utils.prisma_client import worker_async_to_sync
+        from apps.analytics.services import CourseViewService
+        from apps.analytics.tasks import flush_course_views
+        
+        data = {'course_id': self.course_id, 'country': 'France', 'source': 'organic'}
+        
+        for _ in range(3):
+            response = self.client.post('/api/analytics/course-views/track/', data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response.data['status'], 'queued')
+        
+        self.assertGreaterEqual(flush_course_views.apply().get(), 3)
+        
+        total = worker_async_to_sync(CourseViewService().get_total_views)(self.course_id)
+        self.assertEqual(total, 3)
+    
+    @override_settings(COURSE_VIEW_QUEUE_ENABLED=False)
+    def test_list_course_views_is_keyset_paginated(self):
+        """Les pages se suivent sans doublon ni trou, des plus récentes aux plus anciennes"""
+        for _ in range(5):
+            self.test_track_course_view()
+        
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(f'/api/analytics/course-views/list/{self.course_id}/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            
+            seen.extend(response.data['results'])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len({view['id'] for view in seen}), 5)
+        viewed_at = [view['viewed_at'] for view in seen]
+        self.assertEqual(viewed_at, sorted(viewed_at, reverse=True))
+    
+    def test_list_course_views_rejects_invalid_cursor(self):
+        """Un curseur illisible renvoie 400"""
+        response = self.client.get(
+            f'/api/analytics/course-views/list/{self.course_id}/', {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @override_settings(COURSE_VIEW_QUEUE_ENABLED=False, COURSE_VIEWS_EXPORT_BATCH_SIZE=2)
+    def test_export_course_views(self):
+        """L'export est produit en flux, par lots, en NDJSON comme en CSV"""
+        import csv
+        import json
+        
+        for _ in range(5):
+            self.test_track_course_view()
+        
+        url = f'/api/analytics/course-views/export/{self.course_id}/'
+        
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(row['course_id'] == self.course_id for row in rows))
+        
+        response = self.client.get(url, {'output': 'csv'})
+        lines = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(lines[0][:2], ['id', 'course_id'])
+        self.assertEqual(len(lines), 6)
+        
+        response = self.client.get(url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @override_settings(COURSE_VIEW_QUEUE_ENABLED=False, COURSE_VIEWS_EXPORT_BATCH_SIZE=2)
+    def test_export_course_views_aborts_on_error(self):
+        """Une erreur en cours d'export interrompt le flux au lieu de le terminer proprement"""
+        from unittest import mock
+        from apps.analytics.services import CourseViewService
+        
+        for _ in range(3):
+            self.test_track_course_view()
+        
+        get_course_views = CourseViewService.get_course_views
+        
+        async def failing_second_page(service, course_id, **kwargs):
+            if kwargs.get('cursor'):
+                raise ConnectionError('database down')
+            return await get_course_views(service, course_id, **kwargs)
+        
+        with mock.patch.object(CourseViewService, 'get_course_views', failing_second_page):
+            response = self.client.get(f'/api/analytics/course-views/export/{self.course_id}/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            with self.assertRaises(ConnectionError):
+                b''.join(response.streaming_content)
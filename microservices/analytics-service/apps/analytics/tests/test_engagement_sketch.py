@@ -0,0 +1,89 @@
+import math
+import random
+
+from apps.analytics.services.engagement_sketch import (
+    EngagementSketch,
+    RELATIVE_ACCURACY,
+    watch_time_bucket,
+)
+
+
+def exact_quantile(values, q):
+    values = sorted(values)
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+class TestEngagementSketch:
+    """Tests du résumé d'engagement"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(42)
+        watch_times = [int(rng.lognormvariate(6, 1.2)) + 1 for _ in range(20000)]
+        sketch = EngagementSketch()
+        for watch_time in watch_times:
+            sketch.add(watch_time, rng.uniform(0, 100))
+
+        for q in (0.5, 0.9, 0.99):
+            expected = exact_quantile(watch_times, q)
+            assert abs(sketch.watch_time_quantile(q) - expected) <= expected * RELATIVE_ACCURACY
+
+    def test_merge_equals_single_sketch(self):
+        rows = [(i * 7 % 900, i % 101, i % 3, i % 2, i % 5) for i in range(1000)]
+        whole, left, right = EngagementSketch(), EngagementSketch(), EngagementSketch()
+        for i, row in enumerate(rows):
+            whole.add(*row)
+            (left if i % 2 else right).add(*row)
+
+        assert left.merge(right).summary() == whole.summary()
+
+    def test_row_round_trip(self):
+        sketch = EngagementSketch()
+        for watch_time, completion in ((0, 0.0), (45, 12.5), (45, 100.0), (3600, 99.9)):
+            sketch.add(watch_time, completion, pauses=2)
+
+        # Forme renvoyée par Postgres : clés JSON textuelles, sommes bigint
+        row = {
+            'students': 4,
+            'zeroWatchTime': 1,
+            'watchTimeSum': '3690',
+            'completionSum': 212.4,
+            'pauseSum': 8,
+            'rewindSum': 0,
+            'speedChangeSum': 0,
+            'watchTimeBuckets': {str(k): v for k, v in sketch.watch_time_buckets.items()},
+            'completionHistogram': '{"0": 1, "1": 1, "9": 2}',
+        }
+
+        assert EngagementSketch.from_row(row).summary() == sketch.summary()
+
+    def test_summary(self):
+        sketch = EngagementSketch()
+        sketch.add(120, 100.0, pauses=3)
+        sketch.add(0, 0.0)
+
+        summary = sketch.summary()
+
+        assert summary['total_students'] == 2
+        assert summary['avg_watch_time'] == 60
+        assert summary['avg_completion_rate'] == 50.0
+        assert summary['avg_pauses'] == 1
+        assert summary['watch_time_percentiles']['p50'] == 0
+        assert abs(sketch.watch_time_quantile(1.0) - 120) <= 120 * RELATIVE_ACCURACY
+        assert [b['students'] for b in summary['completion_histogram']] == [1] + [0] * 8 + [1]
+        assert summary['completion_histogram'][9]['range'] == '90-100'
+
+    def test_small_sample_quantiles_use_nearest_rank(self):
+        sketch = EngagementSketch()
+        sketch.add(0, 0.0)
+        sketch.add(120, 100.0)
+
+        assert sketch.watch_time_quantile(0.5) == 0.0
+        for q in (0.9, 0.99):
+            assert abs(sketch.watch_time_quantile(q) - 120) <= 120 * RELATIVE_ACCURACY
+
+    def test_empty_sketch(self):
+        summary = EngagementSketch().summary()
+
+        assert summary['total_students'] == 0
+        assert summary['watch_time_percentiles'] == {'p50': 0, 'p90': 0, 'p99': 0}
+        assert watch_time_bucket(0) is None
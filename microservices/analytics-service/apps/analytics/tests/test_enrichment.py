@@ -0,0 +1,54 @@
+from shared.shared.utils import geoip
+from shared.shared.utils.geoip import GeoIPTable
+from shared.shared.utils.ip_utils import parse_user_agent, _parse_cached
+from apps.analytics.services.course_view_service import enrich_view
+
+CHROME_UA = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+
+class TestEnrichment:
+    """Tests de l'enrichissement à l'ingestion"""
+
+    def test_geoip_lookup_uses_sorted_ranges(self, tmp_path):
+        path = tmp_path / 'ranges.csv'
+        path.write_text(
+            'start,end,country,city\n'
+            '10.0.0.0,10.0.0.255,FR,Paris\n'
+            '1.0.0.0,1.0.0.255,SN,Dakar\n'
+            '2001:db8::,2001:db8::ffff,CM,\n'
+        )
+        table = GeoIPTable.from_csv(str(path))
+
+        assert len(table) == 3
+        assert table.lookup('1.0.0.42') == ('SN', 'Dakar')
+        assert table.lookup('10.0.0.255') == ('FR', 'Paris')
+        assert table.lookup('10.0.1.0') is None
+        assert table.lookup('0.0.0.1') is None
+        assert table.lookup('2001:db8::12') == ('CM', None)
+        assert table.lookup('not-an-ip') is None
+
+    def test_user_agents_are_cached(self):
+        _parse_cached.cache_clear()
+
+        first = parse_user_agent(CHROME_UA)
+        first['device'] = 'changed'
+        second = parse_user_agent(CHROME_UA)
+
+        assert second['device'] != 'changed'
+        assert 'Chrome' in second['browser']
+        assert _parse_cached.cache_info().hits == 1
+
+    def test_enrich_view_keeps_client_location(self, monkeypatch):
+        monkeypatch.setattr(geoip, '_table', GeoIPTable([('1.0.0.0', '1.0.0.255', 'SN', 'Dakar')]))
+
+        located = enrich_view({'courseId': 'c1', 'ipAddress': '1.0.0.7', 'userAgent': CHROME_UA})
+        provided = enrich_view({'courseId': 'c1', 'ipAddress': '1.0.0.7', 'country': 'FR', 'city': None})
+
+        assert (located['country'], located['city']) == ('SN', 'Dakar')
+        assert located['courseId'] == 'c1'
+        assert 'Windows' in located['os']
+        assert (provided['country'], provided['city']) == ('FR', None)
+        assert provided['device'] == 'Unknown'
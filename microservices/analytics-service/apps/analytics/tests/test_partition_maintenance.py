@@ -0,0 +1,128 @@
+import pytest
+from datetime import date
+
+from apps.analytics.services.partition_maintenance import (
+    PURGE_VIDEO_ANALYTICS_SQL,
+    PartitionMaintenance,
+    add_months,
+    partition_name,
+)
+from apps.analytics.services.video_analytics_service import (
+    DELETE_EMPTY_LESSON_SKETCHES_SQL,
+    RECOMPUTE_LESSON_SKETCHES_SQL,
+)
+
+
+class FakeDb:
+    """Catalogue de partitions en mémoire ; enregistre les DDL exécutés"""
+
+    def __init__(self, partitions, default_months=(), expired=()):
+        self.partitions = partitions
+        self.default_months = default_months
+        self.expired = [{'lessonId': lesson_id} for lesson_id in expired]
+        self.statements = []
+
+    async def query_raw(self, sql, *args):
+        if sql == PURGE_VIDEO_ANALYTICS_SQL:
+            self.statements.append(sql)
+            rows, self.expired = self.expired, []
+            return rows
+        if not args:
+            return [{'month': month} for month in self.default_months]
+        return [{'name': name} for name in self.partitions.get(args[0], [])]
+
+    async def execute_raw(self, sql, *args):
+        self.statements.append(sql)
+        return 0
+
+
+def make_maintenance(partitions, default_months=(), expired=(), video_retention=0):
+    maintenance = PartitionMaintenance(
+        premake_months=2,
+        retention_months={'search_logs': 3, 'video_analytics': video_retention},
+        drop_expired=True
+    )
+    maintenance.db = FakeDb(partitions, default_months, expired)
+    return maintenance
+
+
+class TestMonths:
+    """Tests du calcul des mois"""
+
+    def test_add_months_crosses_years(self):
+        assert add_months(date(2025, 11, 1), 2) == date(2026, 1, 1)
+        assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+    def test_partition_name(self):
+        assert partition_name('course_views', date(2025, 3, 1)) == 'course_views_p2025_03'
+
+
+@pytest.mark.asyncio
+class TestPartitionMaintenance:
+    """Tests de création et d'expiration des partitions"""
+
+    async def test_missing_future_partitions_are_created(self):
+        maintenance = make_maintenance({'search_logs': ['search_logs_p2025_11']})
+
+        created = await maintenance.ensure_partitions('search_logs', date(2025, 11, 20))
+
+        assert created == ['search_logs_p2025_12', 'search_logs_p2026_01']
+        assert "FOR VALUES FROM ('2026-01-01') TO ('2026-02-01')" in maintenance.db.statements[-1]
+
+    async def test_rows_in_default_partition_are_moved(self):
+        maintenance = make_maintenance(
+            {'search_logs': ['search_logs_p2025_11', 'search_logs_p2025_12', 'search_logs_p2026_01']},
+            default_months=[date(2025, 9, 1)]
+        )
+
+        created = await maintenance.ensure_partitions('search_logs', date(2025, 11, 20))
+
+        assert created == ['search_logs_p2025_09']
+        [statement] = maintenance.db.statements
+        assert 'CREATE TABLE "search_logs_p2025_09" (LIKE "search_logs"' in statement
+        assert 'DELETE FROM "search_logs_default"' in statement
+        assert "ATTACH PARTITION \"search_logs_p2025_09\" FOR VALUES FROM ('2025-09-01') TO ('2025-10-01')" in statement
+
+    async def test_partitions_older_than_retention_are_dropped(self):
+        maintenance = make_maintenance({'search_logs': [
+            'search_logs_p2025_07',
+            'search_logs_p2025_08',
+            'search_logs_p2025_09',
+            'search_logs_p2025_11',
+        ]})
+
+        expired = await maintenance.expire_partitions('search_logs', date(2025, 11, 20))
+
+        assert expired == ['search_logs_p2025_07']
+        assert maintenance.db.statements == [
+            'ALTER TABLE "search_logs" DETACH PARTITION "search_logs_p2025_07"',
+            'DROP TABLE "search_logs_p2025_07"',
+        ]
+
+    async def test_dry_run_changes_nothing(self):
+        maintenance = make_maintenance({'search_logs': ['search_logs_p2025_01']})
+
+        expired = await maintenance.expire_partitions('search_logs', date(2025, 11, 20), dry_run=True)
+
+        assert expired == ['search_logs_p2025_01']
+        assert maintenance.db.statements == []
+
+    async def test_video_analytics_purge_is_opt_in(self):
+        maintenance = make_maintenance({}, expired=['lesson-a'])
+
+        purged = await maintenance.purge_video_analytics(date(2025, 11, 20))
+
+        assert purged == 0
+        assert maintenance.db.statements == []
+
+    async def test_purged_lessons_have_their_sketches_recomputed(self):
+        maintenance = make_maintenance({}, expired=['lesson-b', 'lesson-a', 'lesson-b'], video_retention=24)
+
+        purged = await maintenance.purge_video_analytics(date(2025, 11, 20))
+
+        assert purged == 3
+        assert maintenance.db.statements == [
+            PURGE_VIDEO_ANALYTICS_SQL,
+            RECOMPUTE_LESSON_SKETCHES_SQL,
+            DELETE_EMPTY_LESSON_SKETCHES_SQL,
+        ]
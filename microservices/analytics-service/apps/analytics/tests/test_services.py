@@ -76,6 +76,50 @@ class TestVideoAnalyticsService:
         # Deuxième mise à jour
         analytics = await service.update_watch_time(lesson_id, student_id, 30, 90)
         assert analytics.totalWatchTime >= 90
+    
+    async def test_engagement_stats_follow_updates(self):
+        """Le résumé d'engagement est créé à la lecture puis suit les mises à jour"""
+        from apps.analytics.services import VideoAnalyticsService
+        
+        service = VideoAnalyticsService()
+        lesson_id = str(uuid.uuid4())
+        
+        for watch_time, completion in ((60, 20.0), (600, 95.0), (0, 0.0)):
+            student_id = str(uuid.uuid4())
+            await service.update_watch_time(lesson_id, student_id, watch_time, watch_time)
+            await service.update_completion_rate(lesson_id, student_id, completion)
+        
+        stats = await service.get_engagement_stats(lesson_id)
+        assert stats['total_students'] == 3
+        assert stats['avg_watch_time'] == 220
+        assert stats['avg_completion_rate'] == 38.33
+        assert stats['completion_histogram'][9]['students'] == 1
+        assert abs(stats['watch_time_percentiles']['p50'] - 60) <= 2
+        
+        await service.update_watch_time(lesson_id, str(uuid.uuid4()), 300, 300)
+        await service.refresh_engagement_sketches(lag_seconds=0)
+        
+        stats = await service.get_engagement_stats(lesson_id)
+        assert stats['total_students'] == 4
+        assert stats['avg_watch_time'] == 240
+    
+    async def test_watch_heatmap_merges_segments(self):
+        """Les segments regardés sont fusionnés et agrégés par seconde"""
+        from apps.analytics.services import VideoAnalyticsService
+        
+        service = VideoAnalyticsService()
+        lesson_id = str(uuid.uuid4())
+        first, second = str(uuid.uuid4()), str(uuid.uuid4())
+        
+        await service.update_watch_time(lesson_id, first, 60, 60)
+        await service.update_watch_time(lesson_id, first, 30, 45)
+        await service.update_watch_time(lesson_id, second, 20, 20)
+        
+        heatmap = await service.get_watch_heatmap(lesson_id, resolution=10)
+        
+        assert heatmap['students'] == 2
+        assert heatmap['duration'] == 60
+        assert heatmap['retention'] == [1.0, 1.0, 0.5, 0.5, 0.5, 0.5]
 
 
 @pytest.mark.asyncio
@@ -114,3 +158,227 @@ class TestSearchLogService:
         assert len(popular) > 0
         assert popular[0]['query'] == 'popular query'
 
+    async def test_get_zero_result_searches(self):
+        """Seules les recherches sans résultats sont comptées, par ordre décroissant"""
+        from apps.analytics.services import SearchLogService
+
+        service = SearchLogService()
+
+        for _ in range(4):
+            await service.log_search('missing topic', 0)
+        for _ in range(2):
+            await service.log_search('rare missing topic', 0)
+        await service.log_search('missing topic', 12)
+
+        zero_results = await service.get_zero_result_searches(limit=2)
+        counts = {row['query']: row['count'] for row in zero_results}
+
+        assert len(zero_results) <= 2
+        assert zero_results[0]['count'] >= zero_results[-1]['count']
+        assert counts.get('missing topic', 0) >= 4
+
+    async def test_daily_rollup_is_incremental(self):
+        """Le rollup ne compte chaque log qu'une fois et ne change pas les résultats"""
+        from apps.analytics.services import SearchLogService
+
+        service = SearchLogService()
+        query = f'rollup {uuid.uuid4()}'
+
+        for results_count in (3, 0, 0):
+            await service.log_search(query, results_count)
+
+        before = await service.get_click_through_rate(query=query)
+        first = await service.refresh_daily_rollup(lag_seconds=0)
+        second = await service.refresh_daily_rollup(lag_seconds=0)
+
+        rollup = await service.db.searchdailyrollup.find_first(where={'query': query})
+
+        assert first['rows'] >= 1
+        assert second['rows'] == 0
+        assert rollup.count == 3
+        assert rollup.zeroResultCount == 2
+        assert await service.get_click_through_rate(query=query) == before
+
+
+
+@pytest.mark.asyncio
+class TestUserActivityService:
+    """Tests unitaires pour UserActivityService"""
+    
+    async def test_aggregates_match_before_and_after_rollup(self):
+        """Les agrégats sont identiques avant et après le rollup journalier"""
+        from apps.analytics.services import UserActivityService
+        
+        service = UserActivityService()
+        user_id = str(uuid.uuid4())
+        
+        for event_type in ('login', 'login', 'lesson_view'):
+            await service.track_activity(user_id, event_type)
+        
+        by_type = await service.get_activity_by_type(user_id)
+        daily = await service.get_daily_activity(user_id, days=7)
+        
+        await service.refresh_daily_rollup(lag_seconds=0)
+        
+        assert by_type == [
+            {'event_type': 'login', 'count': 2},
+            {'event_type': 'lesson_view', 'count': 1},
+        ]
+        assert sum(day['count'] for day in daily) == 3
+        assert await service.get_activity_by_type(user_id) == by_type
+        assert await service.get_daily_activity(user_id, days=7) == daily
+    
+    async def test_most_active_users(self):
+        """Les utilisateurs sont classés par nombre d'activités"""
+        from apps.analytics.services import UserActivityService
+        
+        service = UserActivityService()
+        busy_user = str(uuid.uuid4())
+        
+        for _ in range(50):
+            await service.track_activity(busy_user, 'lesson_view')
+        
+        most_active = await service.get_most_active_users(limit=1)
+        
+        assert most_active[0]['user_id'] == busy_user
+        assert most_active[0]['activity_count'] >= 50
+
+
+@pytest.mark.asyncio
+class TestCourseAnalyticsService:
+    """Tests unitaires pour CourseAnalyticsService"""
+    
+    async def test_concurrent_increments_are_not_lost(self):
+        """Les incréments concurrents ne doivent perdre aucun compteur"""
+        import asyncio
+        from apps.analytics.services import CourseAnalyticsService
+        
+        service = CourseAnalyticsService()
+        course_id = str(uuid.uuid4())
+        today = date.today()
+        
+        await asyncio.gather(
+            *[service.increment_views(course_id, today) for _ in range(50)],
+            *[service.increment_enrollments(course_id, today) for _ in range(20)],
+            *[service.increment_completions(course_id, today) for _ in range(5)]
+        )
+        
+        analytics = await service.get_analytics(course_id, today)
+        
+        assert analytics.views == 50
+        assert analytics.enrollments == 20
+        assert analytics.completions == 5
+    
+    async def test_upsert_creates_then_increments(self):
+        """Le premier appel crée la ligne, les suivants l'incrémentent"""
+        from apps.analytics.services import CourseAnalyticsService
+        
+        service = CourseAnalyticsService()
+        course_id = str(uuid.uuid4())
+        today = date.today()
+        
+        created = await service.create_or_update_analytics(course_id, today, views=100)
+        assert created.views == 100
+        
+        updated = await service.create_or_update_analytics(course_id, today, views=50, enrollments=3)
+        assert updated.id == created.id
+        assert updated.views == 150
+        assert updated.enrollments == 3
+    
+    async def test_rating_is_weighted_mean(self):
+        """La note moyenne est la moyenne de toutes les notes, pas une moyenne par paires"""
+        from datetime import timedelta
+        from apps.analytics.services import CourseAnalyticsService
+        
+        service = CourseAnalyticsService()
+        course_id = str(uuid.uuid4())
+        today = date.today()
+        yesterday = today - timedelta(days=1)
+        
+        for rating in (5.0, 4.0, 3.0):
+            await service.update_rating(course_id, rating, today)
+        await service.update_rating(course_id, 1.0, yesterday)
+        
+        analytics = await service.get_analytics(course_id, today)
+        assert analytics.ratingCount == 3
+        assert analytics.avgRating == pytest.approx(4.0)
+        
+        stats = await service.get_total_stats(course_id, yesterday, today)
+        assert stats['rating_count'] == 4
+        assert stats['avg_rating'] == 3.25
+
+
+@pytest.mark.asyncio
+class TestRevenueReportService:
+    """Tests unitaires pour RevenueReportService"""
+    
+    async def test_concurrent_upserts_update_daily_and_monthly_totals(self):
+        """Les ajouts concurrents ne perdent rien, le total mensuel suit le quotidien"""
+        import asyncio
+        from apps.analytics.services import RevenueReportService
+        
+        service = RevenueReportService()
+        day = date(2091, 3, 10)
+        
+        await asyncio.gather(*[service.create_or_update_report(day, 10.0, 1) for _ in range(20)])
+        await service.create_or_update_report(date(2091, 3, 11), 50.0, 2)
+        
+        report = await service.get_report(day)
+        summary = await service.get_monthly_summary(2091, 3)
+        
+        assert report.totalRevenue == pytest.approx(200.0)
+        assert report.totalOrders == 20
+        assert summary['total_revenue'] == 250.0
+        assert summary['total_orders'] == 22
+        assert summary['days_with_sales'] == 2
+        assert summary['average_order_value'] == round(250.0 / 22, 2)
+    
+    async def test_range_totals_combine_full_and_partial_months(self):
+        """Mois complets lus dans revenue_monthly, bords de période dans revenue_reports"""
+        from apps.analytics.services import RevenueReportService
+        
+        service = RevenueReportService()
+        
+        for day, revenue in ((date(2092, 1, 5), 10.0), (date(2092, 2, 14), 20.0), (date(2092, 3, 20), 40.0)):
+            await service.create_or_update_report(day, revenue, 1)
+        
+        assert await service.get_total_revenue(date(2092, 1, 10), date(2092, 3, 25)) == 60.0
+        assert await service.get_total_revenue(date(2092, 1, 1), date(2092, 3, 31)) == 70.0
+        assert await service.get_total_orders(date(2092, 2, 1), date(2092, 2, 29)) == 1
+        assert await service.get_average_order_value(date(2092, 1, 1), date(2092, 2, 29)) == 15.0
+
+
+@pytest.mark.asyncio
+class TestCourseFunnelService:
+    """Tests unitaires pour CourseFunnelService"""
+    
+    async def test_funnel_by_source_keeps_step_order(self):
+        """Chaque étape suit la précédente ; dimension de la première vue"""
+        from apps.analytics.services import CourseViewService, UserActivityService, CourseFunnelService
+        
+        views, activity = CourseViewService(), UserActivityService()
+        course_id = str(uuid.uuid4())
+        users = [str(uuid.uuid4()) for _ in range(3)]
+        
+        await views.track_view(course_id, user_id=users[0], source='email')
+        await views.track_view(course_id, user_id=users[0], source='ads')
+        await views.track_view(course_id, user_id=users[1], source='ads')
+        await views.track_view(course_id, user_id=users[2], source='ads')
+        await views.track_view(course_id)
+        
+        for event_type in ('course_enroll', 'course_complete', 'course_review'):
+            await activity.track_activity(users[0], event_type, {'course_id': course_id})
+        # Avis sans complétion : non compté
+        await activity.track_activity(users[1], 'course_enroll', {'course_id': course_id})
+        await activity.track_activity(users[1], 'course_review', {'course_id': course_id})
+        
+        funnel = await CourseFunnelService().get_funnel(
+            course_id, date.today(), date.today(), dimension='source'
+        )
+        
+        assert [step['users'] for step in funnel['total']['steps']] == [3, 2, 1, 1]
+        assert funnel['anonymous_views'] == 1
+        assert {row['value']: row['steps'][0]['users'] for row in funnel['breakdown']} == {
+            'ads': 2, 'email': 1
+        }
+
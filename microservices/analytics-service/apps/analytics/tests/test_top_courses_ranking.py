@@ -0,0 +1,94 @@
+import pytest
+from datetime import date, timedelta
+
+from apps.analytics.services.top_courses_ranking import TopCoursesRanking
+from apps.analytics.tests.fakes import FakeRedis
+
+
+class FakeCourseAnalyticsService:
+    """Totaux par jour en mémoire ; compte les requêtes SQL simulées"""
+
+    def __init__(self, daily):
+        self.daily = daily
+        self.window_queries = 0
+        self.top_queries = 0
+
+    async def get_window_totals(self, windows, end_date):
+        self.window_queries += 1
+        totals = {days: {} for days in windows}
+        for days in windows:
+            for day, courses in self.daily.items():
+                if end_date - timedelta(days=days) < day <= end_date:
+                    for course_id, views in courses.items():
+                        course = totals[days].setdefault(
+                            course_id, {'views': 0, 'enrollments': 0, 'completions': 0}
+                        )
+                        course['views'] += views
+        return totals
+
+    async def get_top_courses(self, metric='views', limit=10, days=30):
+        self.top_queries += 1
+        return []
+
+
+def make_ranking(daily):
+    ranking = TopCoursesRanking(
+        service=FakeCourseAnalyticsService(daily),
+        redis_url='redis://unused',
+        ranking_size=10
+    )
+    ranking._client = FakeRedis()
+    return ranking
+
+
+@pytest.mark.asyncio
+class TestTopCoursesRanking:
+    """Tests du classement précalculé"""
+
+    async def test_refresh_combines_closed_days_and_today(self):
+        today = date(2025, 11, 20)
+        ranking = make_ranking({
+            today - timedelta(days=10): {'old': 100},
+            today - timedelta(days=1): {'a': 5, 'b': 1},
+            today: {'b': 10},
+        })
+
+        await ranking.refresh(today=today)
+
+        top_week = await ranking.get(metric='views', limit=2, days=7)
+        top_month = await ranking.get(metric='views', limit=1, days=30)
+
+        assert [(c['course_id'], c['views']) for c in top_week] == [('b', 11), ('a', 5)]
+        assert top_month[0]['course_id'] == 'old'
+        assert ranking.service.top_queries == 0
+
+    async def test_late_writes_to_closed_days_are_ranked(self):
+        today = date(2025, 11, 20)
+        ranking = make_ranking({today: {'a': 1}})
+
+        await ranking.refresh(today=today)
+        ranking.service.daily[today - timedelta(days=2)] = {'b': 5}
+        await ranking.refresh(today=today)
+
+        top_week = await ranking.get(metric='views', limit=1, days=7)
+        assert top_week[0]['course_id'] == 'b'
+        assert ranking.service.window_queries == 2
+
+    async def test_ranking_read_and_sql_fallback(self):
+        ranking = make_ranking({date.today(): {'course-a': 3}})
+
+        await ranking.get(metric='views', limit=5, days=14)
+        await ranking.refresh()
+        courses = await ranking.get(metric='views', limit=5, days=7)
+
+        metrics = ranking.metrics()
+        assert courses[0]['course_id'] == 'course-a'
+        assert metrics['fallbacks'] == 1
+        assert metrics['ranking_reads'] == 1
+        assert ranking.service.top_queries == 1
+
+    async def test_unknown_metric_is_rejected(self):
+        ranking = make_ranking({})
+
+        with pytest.raises(ValueError):
+            await ranking.get(metric='revenue')
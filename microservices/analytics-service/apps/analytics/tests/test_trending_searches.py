@@ -0,0 +1,144 @@
+import pytest
+import json
+
+from apps.analytics.services.trending_searches import SpaceSaving, TrendingSearchTracker
+from apps.analytics.tests.fakes import FakeRedis
+
+
+def make_tracker(redis, worker_id):
+    tracker = TrendingSearchTracker(
+        redis_url='redis://unused',
+        capacity=3,
+        publish_interval=60,
+        cache_seconds=0
+    )
+    tracker._client = redis
+    tracker.worker_id = worker_id
+    return tracker
+
+
+class TestSpaceSaving:
+    """Tests du résumé Space-Saving"""
+
+    def test_exact_counts_below_capacity(self):
+        sketch = SpaceSaving(capacity=10)
+        for query in ['python', 'django', 'python', 'python']:
+            sketch.offer(query)
+
+        assert sketch.top(2) == [
+            {'query': 'python', 'count': 3, 'error': 0},
+            {'query': 'django', 'count': 1, 'error': 0},
+        ]
+        assert sketch.total == 4
+
+    def test_eviction_keeps_heavy_hitters(self):
+        sketch = SpaceSaving(capacity=3)
+        for i in range(200):
+            sketch.offer('python')
+            sketch.offer(f'rare {i}')
+
+        top = sketch.top(1)[0]
+        assert top['query'] == 'python'
+        assert top['count'] - top['error'] <= 200 <= top['count']
+        assert len(sketch.counts) == 3
+
+    def test_eviction_replaces_the_smallest_counter(self):
+        import random
+
+        rng = random.Random(7)
+        sketch = SpaceSaving(capacity=20)
+        reference = {}
+        for _ in range(5000):
+            query = f'q{int(rng.paretovariate(1.2))}'
+            if query not in reference and len(reference) == 20:
+                victim = min(reference, key=lambda item: (reference[item], item))
+                reference[query] = reference.pop(victim)
+            reference[query] = reference.get(query, 0) + 1
+            sketch.offer(query)
+
+            assert sketch.counts == reference
+
+        assert sketch.min_count() == min(reference.values())
+
+    def test_merge_is_bounded_and_sums_counts(self):
+        left, right = SpaceSaving(capacity=3), SpaceSaving(capacity=3)
+        for _ in range(5):
+            left.offer('python')
+            right.offer('python')
+        right.offer('react')
+
+        merged = left.merge(right)
+
+        assert merged.top(1) == [{'query': 'python', 'count': 10, 'error': 0}]
+        assert merged.total == 11
+
+    def test_serialization_round_trip(self):
+        sketch = SpaceSaving(capacity=3)
+        sketch.offer('python', 4)
+
+        restored = SpaceSaving.from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+        assert restored.top(1) == sketch.top(1)
+
+
+@pytest.mark.asyncio
+class TestTrendingSearchTracker:
+    """Tests de la fusion entre workers et tranches de temps"""
+
+    async def test_workers_are_merged_through_redis(self):
+        redis = FakeRedis()
+        first, second = make_tracker(redis, 'worker-1'), make_tracker(redis, 'worker-2')
+        now = 1_700_000_000
+
+        for _ in range(3):
+            first.record('python', now=now)
+        second.record('python', now=now)
+        second.record('django', now=now)
+        await first.publish(now=now)
+        await second.publish(now=now)
+
+        trending = await first.top(window='5m', limit=2, now=now)
+
+        assert trending['total_searches'] == 5
+        assert trending['searches'][0] == {'query': 'python', 'count': 4, 'error': 0}
+
+    async def test_limit_is_clamped_and_cached_once_per_window(self):
+        tracker = make_tracker(FakeRedis(), 'worker-1')
+        tracker.cache_seconds = 60
+        now = 1_700_000_000
+
+        for query in ('python', 'django', 'react'):
+            tracker.record(query, now=now)
+        await tracker.publish(now=now)
+
+        first = await tracker.top(window='5m', limit=1, now=now)
+        huge = await tracker.top(window='5m', limit=10**9, now=now)
+
+        assert len(first['searches']) == 1
+        assert len(huge['searches']) == 3
+        assert list(tracker._cache) == ['5m']
+
+    async def test_window_only_reads_its_buckets(self):
+        redis = FakeRedis()
+        tracker = make_tracker(redis, 'worker-1')
+        now = 1_700_000_000
+
+        tracker.record('old query', now=now - 3600)
+        tracker.record('fresh query', now=now)
+        await tracker.publish(now=now)
+
+        recent = await tracker.top(window='5m', now=now)
+        daily = await tracker.top(window='1d', now=now)
+
+        assert [row['query'] for row in recent['searches']] == ['fresh query']
+        assert daily['total_searches'] == 2
+
+    async def test_stale_buckets_are_dropped_after_publish(self):
+        tracker = make_tracker(FakeRedis(), 'worker-1')
+        now = 1_700_000_000
+
+        tracker.record('python', now=now - 120)
+        await tracker.publish(now=now)
+        await tracker.publish(now=now)
+
+        assert ('m', int((now - 120) // 60)) not in tracker._sketches
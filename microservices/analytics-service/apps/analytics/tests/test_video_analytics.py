@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
 import uuid
@@ -12,6 +12,7 @@ class VideoAnalyticsTestCase(TestCase):
         self.lesson_id = str(uuid.uuid4())
         self.student_id = str(uuid.uuid4())
     
+    @override_settings(VIDEO_EVENT_BUFFER_ENABLED=False)
     def test_update_watch_time(self):
         """Test de mise à jour du temps de visionnage"""
         data = {
@@ -27,6 +28,7 @@ class VideoAnalyticsTestCase(TestCase):
         self.assertIn('total_watch_time', response.data)
         self.assertGreaterEqual(response.data['total_watch_time'], 120)
     
+    @override_settings(VIDEO_EVENT_BUFFER_ENABLED=False)
     def test_update_completion_rate(self):
         """Test de mise à jour du taux de complétion"""
         data = {
@@ -41,6 +43,7 @@ class VideoAnalyticsTestCase(TestCase):
         self.assertIn('completion_rate', response.data)
         self.assertEqual(response.data['completion_rate'], 75.5)
     
+    @override_settings(VIDEO_EVENT_BUFFER_ENABLED=False)
     def test_video_pause_event(self):
         """Test d'événement pause"""
         data = {
@@ -54,6 +57,7 @@ class VideoAnalyticsTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreater(response.data['pause_count'], 0)
     
+    @override_settings(VIDEO_EVENT_BUFFER_ENABLED=False)
     def test_video_rewind_event(self):
         """Test d'événement rewind"""
         data = {
@@ -66,3 +70,61 @@ class VideoAnalyticsTestCase(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreater(response.data['rewind_count'], 0)
+    
+    def test_buffered_events_are_flushed(self):
+        """Les événements bufferisés sont acceptés puis écrits au flush"""
+        from shared.shared.utils.prisma_client import worker_async_to_sync
+        from apps.analytics.services import VideoAnalyticsService, video_event_buffer
+        
+        base = {'lesson_id': self.lesson_id, 'student_id': self.student_id}
+        
+        for event_type in ('pause', 'pause', 'rewind'):
+            response = self.client.post(
+                '/api/analytics/video/event/',
+                {**base, 'event_type': event_type},
+                format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        
+        response = self.client.post(
+            '/api/analytics/video/watch-time/',
+            {**base, 'watch_time': 30, 'position': 90},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        
+        worker_async_to_sync(video_event_buffer.flush)()
+        
+        analytics = worker_async_to_sync(VideoAnalyticsService().get_analytics)(
+            self.lesson_id, self.student_id
+        )
+        self.assertEqual(analytics.pauseCount, 2)
+        self.assertEqual(analytics.rewindCount, 1)
+        self.assertEqual(analytics.totalWatchTime, 30)
+        self.assertEqual(analytics.lastPosition, 90)
+    
+    def test_batch_events(self):
+        """Test d'un lot d'événements mixtes avec statut par élément"""
+        base = {'lesson_id': self.lesson_id, 'student_id': self.student_id}
+        data = {
+            'events': [
+                {**base, 'event_type': 'pause'},
+                {**base, 'event_type': 'pause'},
+                {**base, 'event_type': 'watch_time', 'watch_time': 45, 'position': 45},
+                {**base, 'event_type': 'completion', 'completion_rate': 30.0},
+                {**base, 'event_type': 'quality'},
+                {'lesson_id': 'not-a-uuid', 'student_id': self.student_id, 'event_type': 'rewind'},
+            ]
+        }
+        
+        response = self.client.post('/api/analytics/video/events/batch/', data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['accepted'], 4)
+        self.assertEqual(response.data['rejected'], 2)
+        self.assertEqual(response.data['rows_updated'], 1)
+        self.assertEqual(
+            [r['status'] for r in response.data['results']],
+            ['accepted', 'accepted', 'accepted', 'accepted', 'rejected', 'rejected']
+        )
+        self.assertIn('quality', response.data['results'][4]['errors'])
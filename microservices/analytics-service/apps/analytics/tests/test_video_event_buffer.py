@@ -0,0 +1,131 @@
+import pytest
+import uuid
+from contextlib import asynccontextmanager
+
+from apps.analytics.services.video_event_buffer import VideoEventBuffer, merge_video_delta
+
+
+class FakeVideoAnalyticsService:
+    """Remplace VideoAnalyticsService pour observer les flush"""
+    
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.during_apply = None
+    
+    async def apply_deltas(self, deltas):
+        if self.during_apply:
+            await self.during_apply()
+        if self.fail:
+            raise RuntimeError('database unavailable')
+        self.batches.append(deltas)
+        return len(deltas)
+
+
+@asynccontextmanager
+async def running_buffer(service, max_keys=100):
+    """Buffer dont le flush périodique est arrêté en fin de test"""
+    buffer = VideoEventBuffer(service=service, flush_interval=60, max_keys=max_keys)
+    try:
+        yield buffer
+    finally:
+        await buffer.close()
+
+
+class TestMergeVideoDelta:
+    """Tests de fusion des deltas"""
+    
+    def test_counters_are_summed(self):
+        target = {'pauseCount': 1, 'totalWatchTime': 10}
+        merge_video_delta(target, {'pauseCount': 2, 'totalWatchTime': 5, 'rewindCount': 1})
+        
+        assert target['pauseCount'] == 3
+        assert target['totalWatchTime'] == 15
+        assert target['rewindCount'] == 1
+    
+    def test_completion_keeps_max_and_position_keeps_latest(self):
+        target = {}
+        merge_video_delta(target, {'completionRate': 80.0, 'lastPosition': 300})
+        merge_video_delta(target, {'completionRate': 40.0, 'lastPosition': 120})
+        merge_video_delta(target, {'pauseCount': 1})
+        
+        assert target['completionRate'] == 80.0
+        assert target['lastPosition'] == 120
+    
+    def test_watched_seconds_are_or_merged(self):
+        target = {}
+        merge_video_delta(target, {'watchedSeconds': b'\x0f'})
+        merge_video_delta(target, {'watchedSeconds': b'\xf0\x01'})
+        
+        assert target['watchedSeconds'] == b'\xff\x01'
+
+
+@pytest.mark.asyncio
+class TestVideoEventBuffer:
+    """Tests du buffer write-behind"""
+    
+    async def test_events_are_coalesced_per_key(self):
+        service = FakeVideoAnalyticsService()
+        async with running_buffer(service) as buffer:
+            lesson_id, student_id = str(uuid.uuid4()), str(uuid.uuid4())
+            
+            for _ in range(5):
+                await buffer.add(lesson_id, student_id, pauseCount=1)
+            await buffer.add(lesson_id, student_id, totalWatchTime=30, lastPosition=90)
+            
+            assert buffer.metrics()['buffer_depth'] == 1
+            assert buffer.metrics()['pending_events'] == 6
+            
+            assert await buffer.flush() == 1
+            assert service.batches == [[{
+                'lessonId': lesson_id,
+                'studentId': student_id,
+                'pauseCount': 5,
+                'totalWatchTime': 30,
+                'lastPosition': 90,
+            }]]
+            assert buffer.metrics()['buffer_depth'] == 0
+            assert buffer.metrics()['flushes'] == 1
+    
+    async def test_failed_flush_keeps_deltas(self):
+        service = FakeVideoAnalyticsService(fail=True)
+        async with running_buffer(service) as buffer:
+            lesson_id, student_id = str(uuid.uuid4()), str(uuid.uuid4())
+            
+            await buffer.add(lesson_id, student_id, rewindCount=1)
+            assert await buffer.flush() == 0
+            await buffer.add(lesson_id, student_id, rewindCount=1)
+            
+            service.fail = False
+            await buffer.flush()
+            
+            assert service.batches[0][0]['rewindCount'] == 2
+            assert buffer.metrics()['flush_failures'] == 1
+    
+    async def test_failed_flush_keeps_newer_positions(self):
+        service = FakeVideoAnalyticsService(fail=True)
+        async with running_buffer(service) as buffer:
+            lesson_id, student_id = str(uuid.uuid4()), str(uuid.uuid4())
+            
+            await buffer.add(lesson_id, student_id, pauseCount=1, lastPosition=100)
+            service.during_apply = lambda: buffer.add(lesson_id, student_id, pauseCount=1, lastPosition=200)
+            await buffer.flush()
+            
+            service.fail = False
+            service.during_apply = None
+            await buffer.flush()
+            
+            assert service.batches[0][0]['pauseCount'] == 2
+            assert service.batches[0][0]['lastPosition'] == 200
+    
+    async def test_size_threshold_triggers_flush(self):
+        import asyncio
+        
+        service = FakeVideoAnalyticsService()
+        async with running_buffer(service, max_keys=3) as buffer:
+            for _ in range(3):
+                await buffer.add(str(uuid.uuid4()), str(uuid.uuid4()), speedChanges=1)
+            await asyncio.sleep(0)
+            
+            assert len(service.batches) == 1
+            assert len(service.batches[0]) == 3
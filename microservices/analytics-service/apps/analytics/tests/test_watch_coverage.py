@@ -0,0 +1,62 @@
+import numpy as np
+
+from apps.analytics.services.watch_coverage import (
+    segment_bitmap,
+    merge_bitmaps,
+    watched_seconds,
+    coverage_counts,
+    drop_off_curve,
+)
+from apps.analytics.services.video_analytics_service import watch_time_delta, serialize_deltas
+
+
+class TestWatchCoverage:
+    """Tests des bitmaps de secondes regardées"""
+
+    def test_segment_sets_watched_seconds(self):
+        bitmap = segment_bitmap(3, 10)
+
+        assert len(bitmap) == 2
+        assert watched_seconds(bitmap) == 7
+        assert segment_bitmap(10, 10) is None
+        assert segment_bitmap(-5, 2) == segment_bitmap(0, 2)
+
+    def test_merge_is_or(self):
+        merged = merge_bitmaps(segment_bitmap(0, 60), segment_bitmap(30, 1800), None)
+
+        assert merged == segment_bitmap(0, 1800)
+        assert len(merged) == 225
+        assert merge_bitmaps(None, None) is None
+
+    def test_counts_sum_bitmaps_across_chunks(self):
+        bitmaps = [segment_bitmap(0, 100)] * 5 + [segment_bitmap(50, 120)] * 3
+
+        counts = coverage_counts(bitmaps, chunk_size=2)
+
+        assert len(counts) == 120
+        assert counts[0] == 5
+        assert counts[60] == 8
+        assert counts[110] == 3
+
+    def test_counts_accumulate_pages(self):
+        counts = coverage_counts([segment_bitmap(0, 10)])
+        counts = coverage_counts([segment_bitmap(5, 20)], counts)
+
+        assert counts.tolist() == [1] * 5 + [2] * 5 + [1] * 10
+
+    def test_drop_off_curve(self):
+        counts = np.array([4] * 10 + [2] * 10 + [1] * 10)
+
+        curve = drop_off_curve(counts, students=4, resolution=10)
+
+        assert curve['duration'] == 30
+        assert curve['retention'] == [1.0, 0.5, 0.25]
+        assert curve['drop_offs'] == [{'second': 10, 'drop': 0.5}, {'second': 20, 'drop': 0.25}]
+        assert drop_off_curve(counts[:0], students=0)['viewers'] == []
+
+    def test_watch_time_delta(self):
+        delta = watch_time_delta(30, 90)
+
+        assert delta['watchedSeconds'] == segment_bitmap(60, 90)
+        assert '"watchedSeconds": "' + delta['watchedSeconds'].hex() in serialize_deltas([delta])
+        assert 'watchedSeconds' not in watch_time_delta(0, 90)
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import pytest
+
+from shared.shared.utils import prisma_client
+from shared.shared.utils.prisma_client import bind_worker_loop, run_on_worker_loop, worker_async_to_sync
+
+
+async def current_thread_name():
+    return threading.current_thread().name
+
+
+@pytest.fixture
+def worker_loop(monkeypatch):
+    monkeypatch.setattr(prisma_client, '_worker_loop', None)
+    monkeypatch.setattr(prisma_client, '_worker_thread', None)
+    monkeypatch.setattr(prisma_client, '_server_loop', False)
+    yield
+    prisma_client.shutdown_prisma()
+
+
+class TestWorkerLoop:
+    """Tests de la boucle du worker (vues async sous ASGI, repli sous WSGI)"""
+
+    def test_server_loop_runs_coroutines_inline(self, worker_loop):
+        async def main():
+            bind_worker_loop(asyncio.get_running_loop())
+            return await run_on_worker_loop(current_thread_name())
+
+        assert asyncio.run(main()) == threading.current_thread().name
+
+    def test_blocking_call_from_worker_loop_is_refused(self, worker_loop):
+        async def main():
+            bind_worker_loop(asyncio.get_running_loop())
+            worker_async_to_sync(current_thread_name)()
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(main())
+
+    def test_other_loops_hop_to_dedicated_thread(self, worker_loop):
+        async def main():
+            return await run_on_worker_loop(current_thread_name())
+
+        assert asyncio.run(main()) == 'prisma-worker-loop'
+        assert worker_async_to_sync(current_thread_name)() == 'prisma-worker-loop'
@@ -3,21 +3,29 @@ from apps.analytics.views import (
     # Course Views
     TrackCourseViewView,
     CourseViewStatsView,
+    CourseViewListView,
+    CourseViewExportView,
     # Video Analytics
     VideoAnalyticsView,
     UpdateWatchTimeView,
     UpdateCompletionView,
     VideoEventView,
+    VideoEventBatchView,
     LessonEngagementView,
+    LessonWatchHeatmapView,
+    VideoEventBufferMetricsView,
     # Search Logs
     LogSearchView,
     PopularSearchesView,
     ZeroResultSearchesView,
     SearchTrendsView,
+    TrendingSearchesView,
     # User Activity
     TrackUserActivityView,
     UserActivityHistoryView,
     UserActivityStatsView,
+    ActiveUsersView,
+    RetentionView,
     # Revenue
     RevenueReportView,
     DailyRevenueView,
@@ -25,7 +33,11 @@ from apps.analytics.views import (
     # Course Analytics
     CourseAnalyticsView,
     CourseStatsView,
+    CourseBatchStatsView,
+    CourseFunnelView,
     TopCoursesView,
+    TopCoursesCacheMetricsView,
+    AnalyticsCacheMetricsView,
 )
 
 app_name = 'analytics'
@@ -34,24 +46,32 @@ urlpatterns = [
     # Course Views
     path('course-views/track/', TrackCourseViewView.as_view(), name='track-course-view'),
     path('course-views/stats/<str:course_id>/', CourseViewStatsView.as_view(), name='course-view-stats'),
+    path('course-views/list/<str:course_id>/', CourseViewListView.as_view(), name='course-view-list'),
+    path('course-views/export/<str:course_id>/', CourseViewExportView.as_view(), name='course-view-export'),
     
     # Video Analytics
     path('video/analytics/', VideoAnalyticsView.as_view(), name='video-analytics'),
     path('video/watch-time/', UpdateWatchTimeView.as_view(), name='update-watch-time'),
     path('video/completion/', UpdateCompletionView.as_view(), name='update-completion'),
     path('video/event/', VideoEventView.as_view(), name='video-event'),
+    path('video/events/batch/', VideoEventBatchView.as_view(), name='video-event-batch'),
     path('video/engagement/<str:lesson_id>/', LessonEngagementView.as_view(), name='lesson-engagement'),
+    path('video/heatmap/<str:lesson_id>/', LessonWatchHeatmapView.as_view(), name='lesson-watch-heatmap'),
+    path('video/buffer/metrics/', VideoEventBufferMetricsView.as_view(), name='video-buffer-metrics'),
     
     # Search Logs
     path('search/log/', LogSearchView.as_view(), name='log-search'),
     path('search/popular/', PopularSearchesView.as_view(), name='popular-searches'),
     path('search/zero-results/', ZeroResultSearchesView.as_view(), name='zero-result-searches'),
     path('search/trends/', SearchTrendsView.as_view(), name='search-trends'),
+    path('search/trending/', TrendingSearchesView.as_view(), name='trending-searches'),
     
     # User Activity
     path('activity/track/', TrackUserActivityView.as_view(), name='track-activity'),
     path('activity/history/<str:user_id>/', UserActivityHistoryView.as_view(), name='activity-history'),
     path('activity/stats/<str:user_id>/', UserActivityStatsView.as_view(), name='activity-stats'),
+    path('activity/active-users/', ActiveUsersView.as_view(), name='active-users'),
+    path('activity/retention/', RetentionView.as_view(), name='activity-retention'),
     
     # Revenue
     path('revenue/report/', RevenueReportView.as_view(), name='revenue-report'),
@@ -60,6 +80,10 @@ urlpatterns = [
     
     # Course Analytics
     path('course/analytics/', CourseAnalyticsView.as_view(), name='course-analytics'),
+    path('course/stats/batch/', CourseBatchStatsView.as_view(), name='course-batch-stats'),
     path('course/stats/<str:course_id>/', CourseStatsView.as_view(), name='course-stats'),
+    path('course/funnel/<str:course_id>/', CourseFunnelView.as_view(), name='course-funnel'),
     path('course/top/', TopCoursesView.as_view(), name='top-courses'),
+    path('course/top/cache/metrics/', TopCoursesCacheMetricsView.as_view(), name='top-courses-cache-metrics'),
+    path('cache/metrics/', AnalyticsCacheMetricsView.as_view(), name='analytics-cache-metrics'),
 ]
\ No newline at end of file
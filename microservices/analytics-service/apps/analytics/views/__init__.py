@@ -1,21 +1,32 @@
-from .course_view_views import TrackCourseViewView, CourseViewStatsView
+from .course_view_views import (
+    TrackCourseViewView,
+    CourseViewStatsView,
+    CourseViewListView,
+    CourseViewExportView
+)
 from .video_analytics_views import (
     VideoAnalyticsView,
     UpdateWatchTimeView,
     UpdateCompletionView,
     VideoEventView,
-    LessonEngagementView
+    VideoEventBatchView,
+    LessonEngagementView,
+    LessonWatchHeatmapView,
+    VideoEventBufferMetricsView
 )
 from .search_log_views import (
     LogSearchView,
     PopularSearchesView,
     ZeroResultSearchesView,
-    SearchTrendsView
+    SearchTrendsView,
+    TrendingSearchesView
 )
 from .user_activity_views import (
     TrackUserActivityView,
     UserActivityHistoryView,
-    UserActivityStatsView
+    UserActivityStatsView,
+    ActiveUsersView,
+    RetentionView
 )
 from .revenue_views import (
     RevenueReportView,
@@ -25,28 +36,44 @@ from .revenue_views import (
 from .course_analytics_views import (
     CourseAnalyticsView,
     CourseStatsView,
-    TopCoursesView
+    CourseBatchStatsView,
+    CourseFunnelView,
+    TopCoursesView,
+    TopCoursesCacheMetricsView,
+    AnalyticsCacheMetricsView
 )
 
 __all__ = [
     'TrackCourseViewView',
     'CourseViewStatsView',
+    'CourseViewListView',
+    'CourseViewExportView',
     'VideoAnalyticsView',
     'UpdateWatchTimeView',
     'UpdateCompletionView',
     'VideoEventView',
+    'VideoEventBatchView',
     'LessonEngagementView',
+    'LessonWatchHeatmapView',
+    'VideoEventBufferMetricsView',
     'LogSearchView',
     'PopularSearchesView',
     'ZeroResultSearchesView',
     'SearchTrendsView',
+    'TrendingSearchesView',
     'TrackUserActivityView',
     'UserActivityHistoryView',
     'UserActivityStatsView',
+    'ActiveUsersView',
+    'RetentionView',
     'RevenueReportView',
     'DailyRevenueView',
     'MonthlyRevenueSummaryView',
     'CourseAnalyticsView',
     'CourseStatsView',
+    'CourseBatchStatsView',
+    'CourseFunnelView',
     'TopCoursesView',
+    'TopCoursesCacheMetricsView',
+    'AnalyticsCacheMetricsView',
 ]
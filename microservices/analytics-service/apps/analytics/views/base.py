@@ -0,0 +1,44 @@
+from rest_framework.views import APIView
+from asgiref.sync import sync_to_async
+from shared.shared.utils.prisma_client import run_on_worker_loop
+import asyncio
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView dont les handlers (get, post...) sont des coroutines.
+
+    Sous ASGI, Django appelle dispatch directement sur la boucle du worker
+    uvicorn, où vit le client Prisma partagé : les services sont attendus
+    sans passer par un thread ni par async_to_sync. L'authentification JWT
+    et les permissions restent synchrones (ORM Django) et passent par
+    sync_to_async. Sous WSGI ou avec le client de test, le handler est
+    confié à la boucle persistante du worker (run_on_worker_loop).
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if asyncio.iscoroutinefunction(handler):
+                response = await run_on_worker_loop(handler(request, *args, **kwargs))
+            else:
+                # options, http_method_not_allowed
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -1,18 +1,28 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from asgiref.sync import async_to_sync
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from datetime import date, timedelta
 import logging
 
-from apps.analytics.services import CourseAnalyticsService
-from apps.analytics.serializers import CourseAnalyticsSerializer, UpdateCourseAnalyticsSerializer
+from apps.analytics.views.base import AsyncAPIView
+from apps.analytics.services import (
+    CourseAnalyticsService,
+    CourseFunnelService,
+    analytics_cache,
+    top_courses_ranking
+)
+from apps.analytics.serializers import (
+    CourseAnalyticsSerializer,
+    CourseBatchStatsSerializer,
+    CourseFunnelQuerySerializer,
+    UpdateCourseAnalyticsSerializer
+)
 
 logger = logging.getLogger(__name__)
 
 
-class CourseAnalyticsView(APIView):
+class CourseAnalyticsView(AsyncAPIView):
     """Vue pour gérer les analytics de cours"""
     
     permission_classes = [IsAuthenticated]
@@ -21,7 +31,7 @@ class CourseAnalyticsView(APIView):
         super().__init__(**kwargs)
         self.service = CourseAnalyticsService()
     
-    def post(self, request):
+    async def post(self, request):
         """Mettre à jour les analytics"""
         try:
             serializer = UpdateCourseAnalyticsSerializer(data=request.data)
@@ -30,7 +40,7 @@ class CourseAnalyticsView(APIView):
             
             analytics_date = serializer.validated_data.get('date', date.today())
             
-            analytics = async_to_sync(self.service.create_or_update_analytics)(
+            analytics = await self.service.create_or_update_analytics(
                 course_id=str(serializer.validated_data['course_id']),
                 analytics_date=analytics_date,
                 views=serializer.validated_data.get('views', 0),
@@ -50,7 +60,7 @@ class CourseAnalyticsView(APIView):
             )
 
 
-class CourseStatsView(APIView):
+class CourseStatsView(AsyncAPIView):
     """Vue pour récupérer les statistiques d'un cours"""
     
     permission_classes = [IsAuthenticated]
@@ -59,41 +69,126 @@ class CourseStatsView(APIView):
         super().__init__(**kwargs)
         self.service = CourseAnalyticsService()
     
-    def get(self, request, course_id):
+    async def get(self, request, course_id):
         """Récupérer les statistiques"""
         try:
             days = int(request.query_params.get('days', 30))
             
-            end_date = date.today()
-            start_date = end_date - timedelta(days=days-1)
+            stats = await analytics_cache.get_or_compute(
+                'course_stats',
+                {'course_id': course_id, 'days': days},
+                lambda: self.compute_stats(course_id, days),
+                tags=[f'course:{course_id}']
+            )
+            
+            return Response(stats, status=status.HTTP_200_OK)
             
-            total_stats = async_to_sync(self.service.get_total_stats)(
-                course_id=course_id,
-                start_date=start_date,
-                end_date=end_date
+        except Exception as e:
+            logger.error(f"Error getting course stats: {str(e)}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    async def compute_stats(self, course_id, days):
+        """Totaux et détail quotidien de la période"""
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days-1)
+        
+        total_stats = await self.service.get_total_stats(
+            course_id=course_id,
+            start_date=start_date,
+            end_date=end_date
+        )
+        
+        daily_analytics = await self.service.get_daily_analytics(
+            course_id=course_id,
+            days=days
+        )
+        
+        return {
+            'course_id': course_id,
+            'period_days': days,
+            'total_stats': total_stats,
+            'daily_analytics': daily_analytics
+        }
+
+
+class CourseBatchStatsView(AsyncAPIView):
+    """Vue pour récupérer les statistiques de plusieurs cours en une requête"""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.service = CourseAnalyticsService()
+    
+    async def post(self, request):
+        """Totaux, taux et séries quotidiennes de chaque cours de la liste"""
+        try:
+            serializer = CourseBatchStatsSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            daily_analytics = async_to_sync(self.service.get_daily_analytics)(
-                course_id=course_id,
-                days=days
+            stats = await self.service.get_courses_stats(
+                course_ids=[str(course_id) for course_id in serializer.validated_data['course_ids']],
+                start_date=serializer.validated_data['start_date'],
+                end_date=serializer.validated_data['end_date']
             )
             
-            return Response({
-                'course_id': course_id,
-                'period_days': days,
-                'total_stats': total_stats,
-                'daily_analytics': daily_analytics
-            }, status=status.HTTP_200_OK)
+            return Response(stats, status=status.HTTP_200_OK)
             
         except Exception as e:
-            logger.error(f"Error getting course stats: {str(e)}")
+            logger.error(f"Error getting batch course stats: {str(e)}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class CourseFunnelView(AsyncAPIView):
+    """Vue pour le tunnel de conversion d'un cours (vue -> inscription -> complétion -> avis)"""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.service = CourseFunnelService()
+    
+    async def get(self, request, course_id):
+        """Tunnel global et ventilé par source, pays ou référent"""
+        try:
+            serializer = CourseFunnelQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            start_date = serializer.validated_data['start_date']
+            end_date = serializer.validated_data['end_date']
+            dimension = serializer.validated_data['dimension']
+            
+            funnel = await analytics_cache.get_or_compute(
+                'course_funnel',
+                {
+                    'course_id': course_id,
+                    'start': start_date.isoformat(),
+                    'end': end_date.isoformat(),
+                    'dimension': dimension,
+                },
+                lambda: self.service.get_funnel(course_id, start_date, end_date, dimension),
+                tags=[f'course:{course_id}']
+            )
+            
+            return Response(funnel, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            logger.error(f"Error getting course funnel: {str(e)}")
             return Response(
                 {'error': 'Internal server error'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
 
-class TopCoursesView(APIView):
+class TopCoursesView(AsyncAPIView):
     """Vue pour récupérer les meilleurs cours"""
     
     permission_classes = [IsAuthenticated]
@@ -102,24 +197,55 @@ class TopCoursesView(APIView):
         super().__init__(**kwargs)
         self.service = CourseAnalyticsService()
     
-    def get(self, request):
+    async def get(self, request):
         """Récupérer les meilleurs cours"""
         try:
             metric = request.query_params.get('metric', 'views')
             limit = int(request.query_params.get('limit', 10))
             days = int(request.query_params.get('days', 30))
+            if not 1 <= limit <= top_courses_ranking.ranking_size:
+                raise ValueError(f'limit must be between 1 and {top_courses_ranking.ranking_size}')
+            if days < 1:
+                raise ValueError('days must be positive')
             
-            top_courses = async_to_sync(self.service.get_top_courses)(
-                metric=metric,
-                limit=limit,
-                days=days
+            top_courses = await analytics_cache.get_or_compute(
+                'top_courses',
+                {'metric': metric, 'limit': limit, 'days': days},
+                lambda: top_courses_ranking.get(metric=metric, limit=limit, days=days),
+                tags=['top_courses']
             )
             
             return Response(top_courses, status=status.HTTP_200_OK)
             
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
         except Exception as e:
             logger.error(f"Error getting top courses: {str(e)}")
             return Response(
                 {'error': 'Internal server error'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class TopCoursesCacheMetricsView(APIView):
+    """Vue pour exposer les compteurs du cache des meilleurs cours"""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Lectures du classement et hits/misses du cache"""
+        return Response({
+            **top_courses_ranking.metrics(),
+            'cache': analytics_cache.metrics()['namespaces'].get('top_courses', {})
+        }, status=status.HTTP_200_OK)
+
+
+class AnalyticsCacheMetricsView(APIView):
+    """Vue pour exposer les compteurs du cache des endpoints analytics"""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Hits L1/Redis, calculs et requêtes regroupées par endpoint"""
+        return Response(analytics_cache.metrics(), status=status.HTTP_200_OK)
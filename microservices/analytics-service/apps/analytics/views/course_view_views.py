@@ -1,12 +1,19 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from shared.shared.utils.prisma_client import run_on_worker_loop
 from datetime import datetime, timedelta
+from typing import Optional
+import csv
+import json
 import logging
 
-from apps.analytics.services import CourseViewService
+from apps.analytics.views.base import AsyncAPIView
+from apps.analytics.services import CourseViewService, course_view_queue
+from apps.analytics.tasks import flush_course_views
 from apps.analytics.serializers import (
     CourseViewSerializer,
     TrackCourseViewSerializer
@@ -14,8 +21,37 @@ from apps.analytics.serializers import (
 
 logger = logging.getLogger(__name__)
 
+# Colonnes de l'export (nom exporté -> champ course_views)
+EXPORT_FIELDS = {
+    'id': 'id',
+    'course_id': 'courseId',
+    'user_id': 'userId',
+    'ip_address': 'ipAddress',
+    'user_agent': 'userAgent',
+    'country': 'country',
+    'city': 'city',
+    'device': 'device',
+    'browser': 'browser',
+    'os': 'os',
+    'referrer': 'referrer',
+    'source': 'source',
+    'viewed_at': 'viewedAt',
+}
 
-class TrackCourseViewView(APIView):
+
+def parse_datetime_param(value: Optional[str]) -> Optional[datetime]:
+    """Date ou date-heure ISO 8601 d'un paramètre de requête ; ValueError si invalide"""
+    return datetime.fromisoformat(value) if value else None
+
+
+class Echo:
+    """Pseudo-fichier pour csv.writer : renvoie la ligne au lieu de l'écrire"""
+    
+    def write(self, value):
+        return value
+
+
+class TrackCourseViewView(AsyncAPIView):
     """Vue pour tracker les vues de cours"""
     
     permission_classes = [AllowAny]  # Accessible publiquement
@@ -24,7 +60,7 @@ class TrackCourseViewView(APIView):
         super().__init__(**kwargs)
         self.service = CourseViewService()
     
-    def post(self, request):
+    async def post(self, request):
         """Enregistrer une vue de cours"""
         try:
             serializer = TrackCourseViewSerializer(data=request.data)
@@ -35,16 +71,31 @@ class TrackCourseViewView(APIView):
             ip_address = self.get_client_ip(request)
             user_agent = request.META.get('HTTP_USER_AGENT')
             
-            view = async_to_sync(self.service.track_view)(
-                course_id=str(serializer.validated_data['course_id']),
-                user_id=str(serializer.validated_data.get('user_id')) if serializer.validated_data.get('user_id') else None,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                country=serializer.validated_data.get('country'),
-                city=serializer.validated_data.get('city'),
-                referrer=serializer.validated_data.get('referrer'),
-                source=serializer.validated_data.get('source')
-            )
+            view_data = {
+                'course_id': str(serializer.validated_data['course_id']),
+                'user_id': str(serializer.validated_data.get('user_id')) if serializer.validated_data.get('user_id') else None,
+                'ip_address': ip_address,
+                'user_agent': user_agent,
+                'country': serializer.validated_data.get('country'),
+                'city': serializer.validated_data.get('city'),
+                'referrer': serializer.validated_data.get('referrer'),
+                'source': serializer.validated_data.get('source')
+            }
+            
+            if settings.COURSE_VIEW_QUEUE_ENABLED:
+                queued = await course_view_queue.enqueue(**view_data)
+                
+                # Lot complet : on n'attend pas le prochain passage de celery beat
+                # (publication sur le broker bloquante : hors de la boucle)
+                if queued['depth'] >= course_view_queue.batch_size:
+                    await sync_to_async(flush_course_views.delay)()
+                
+                return Response(
+                    {'status': 'queued', 'id': queued['record']['id']},
+                    status=status.HTTP_202_ACCEPTED
+                )
+            
+            view = await self.service.track_view(**view_data)
             
             response_serializer = CourseViewSerializer(view)
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -66,7 +117,7 @@ class TrackCourseViewView(APIView):
         return ip
 
 
-class CourseViewStatsView(APIView):
+class CourseViewStatsView(AsyncAPIView):
     """Vue pour récupérer les statistiques de vues"""
     
     permission_classes = [IsAuthenticated]
@@ -75,7 +126,7 @@ class CourseViewStatsView(APIView):
         super().__init__(**kwargs)
         self.service = CourseViewService()
     
-    def get(self, request, course_id):
+    async def get(self, request, course_id):
         """Récupérer les statistiques de vues d'un cours"""
         try:
             days = int(request.query_params.get('days', 30))
@@ -84,23 +135,23 @@ class CourseViewStatsView(APIView):
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
             
-            total_views = async_to_sync(self.service.get_total_views)(
+            total_views = await self.service.get_total_views(
                 course_id, start_date, end_date
             )
             
-            unique_viewers = async_to_sync(self.service.get_unique_viewers)(
+            unique_viewers = await self.service.get_unique_viewers(
                 course_id, start_date, end_date
             )
             
-            daily_views = async_to_sync(self.service.get_daily_views)(
+            daily_views = await self.service.get_daily_views(
                 course_id, days
             )
             
-            views_by_country = async_to_sync(self.service.get_views_by_country)(
+            views_by_country = await self.service.get_views_by_country(
                 course_id, limit=10
             )
             
-            views_by_source = async_to_sync(self.service.get_views_by_source)(
+            views_by_source = await self.service.get_views_by_source(
                 course_id
             )
             
@@ -119,4 +170,132 @@ class CourseViewStatsView(APIView):
             return Response(
                 {'error': 'Internal server error'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+class CourseViewListView(AsyncAPIView):
+    """Vue pour parcourir les vues brutes d'un cours, page par page"""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.service = CourseViewService()
+    
+    async def get(self, request, course_id):
+        """Page de vues ; passer `next_cursor` en `cursor` pour la suivante"""
+        try:
+            limit = min(
+                int(request.query_params.get('limit', 100)),
+                settings.COURSE_VIEWS_PAGE_MAX_SIZE
+            )
+            if limit < 1:
+                raise ValueError('limit must be positive')
+            
+            page = await self.service.get_course_views(
+                course_id,
+                start_date=parse_datetime_param(request.query_params.get('start_date')),
+                end_date=parse_datetime_param(request.query_params.get('end_date')),
+                limit=limit,
+                cursor=request.query_params.get('cursor')
+            )
+            
+            return Response({
+                'results': CourseViewSerializer(page['views'], many=True).data,
+                'next_cursor': page['next_cursor']
+            }, status=status.HTTP_200_OK)
+            
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+        except Exception as e:
+            logger.error(f"Error listing course views: {str(e)}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class CourseViewExportView(AsyncAPIView):
+    """
+    Vue pour exporter les vues brutes d'un cours en NDJSON ou CSV.
+
+    La réponse est produite en flux par un générateur asynchrone qui lit
+    les vues par pages keyset de COURSE_VIEWS_EXPORT_BATCH_SIZE lignes : la
+    mémoire utilisée ne dépend pas de la taille de la période exportée.
+    Sous WSGI, Django consomme le flux d'un bloc (sans borne mémoire).
+    """
+    
+    permission_classes = [IsAuthenticated]
+    
+    CONTENT_TYPES = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.service = CourseViewService()
+    
+    async def get(self, request, course_id):
+        """Exporter les vues (?output=ndjson|csv&start_date=&end_date=)"""
+        try:
+            output = request.query_params.get('output', 'ndjson')
+            if output not in self.CONTENT_TYPES:
+                raise ValueError(f"Unknown output format: {output}")
+            
+            start_date = parse_datetime_param(request.query_params.get('start_date'))
+            end_date = parse_datetime_param(request.query_params.get('end_date'))
+            
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        rows = self.iter_rows(course_id, start_date, end_date)
+        lines = self.as_csv(rows) if output == 'csv' else self.as_ndjson(rows)
+        
+        response = StreamingHttpResponse(lines, content_type=self.CONTENT_TYPES[output])
+        response['Content-Disposition'] = (
+            f'attachment; filename="course-views-{course_id}.{output}"'
+        )
+        return response
+    
+    async def iter_rows(self, course_id, start_date, end_date):
+        """Vues du cours, page keyset par page keyset"""
+        cursor = None
+        while True:
+            try:
+                # Le flux est consommé hors du dispatch : pas forcément sur la boucle du worker
+                page = await run_on_worker_loop(self.service.get_course_views(
+                    course_id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    limit=settings.COURSE_VIEWS_EXPORT_BATCH_SIZE,
+                    cursor=cursor
+                ))
+            except Exception as e:
+                # Les en-têtes (200) sont déjà partis : relancer interrompt la
+                # réponse chunked sans chunk final, le client voit un transfert
+                # incomplet au lieu d'un export tronqué qui paraît complet
+                logger.error(f"Error exporting course views: {str(e)}")
+                raise
+            
+            for view in page['views']:
+                row = {name: getattr(view, field) for name, field in EXPORT_FIELDS.items()}
+                row['viewed_at'] = row['viewed_at'].isoformat()
+                yield row
+            
+            cursor = page['next_cursor']
+            if cursor is None:
+                return
+    
+    async def as_ndjson(self, rows):
+        """Un objet JSON par ligne"""
+        async for row in rows:
+            yield json.dumps(row, default=str) + '\n'
+    
+    async def as_csv(self, rows):
+        """En-tête puis une ligne CSV par vue"""
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        async for row in rows:
+            yield writer.writerow(row.values())
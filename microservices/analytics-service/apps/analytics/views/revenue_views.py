@@ -1,18 +1,17 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from asgiref.sync import async_to_sync
 from datetime import date, timedelta
 import logging
 
-from apps.analytics.services import RevenueReportService
+from apps.analytics.views.base import AsyncAPIView
+from apps.analytics.services import RevenueReportService, analytics_cache
 from apps.analytics.serializers import RevenueReportSerializer, CreateRevenueReportSerializer
 
 logger = logging.getLogger(__name__)
 
 
-class RevenueReportView(APIView):
+class RevenueReportView(AsyncAPIView):
     """Vue pour gérer les rapports de revenus"""
     
     permission_classes = [IsAdminUser]
@@ -21,14 +20,14 @@ class RevenueReportView(APIView):
         super().__init__(**kwargs)
         self.service = RevenueReportService()
     
-    def post(self, request):
+    async def post(self, request):
         """Créer/Mettre à jour un rapport"""
         try:
             serializer = CreateRevenueReportSerializer(data=request.data)
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            report = async_to_sync(self.service.create_or_update_report)(
+            report = await self.service.create_or_update_report(
                 report_date=serializer.validated_data['date'],
                 revenue=serializer.validated_data['revenue'],
                 orders=serializer.validated_data['orders']
@@ -45,7 +44,7 @@ class RevenueReportView(APIView):
             )
 
 
-class DailyRevenueView(APIView):
+class DailyRevenueView(AsyncAPIView):
     """Vue pour récupérer les revenus quotidiens"""
     
     permission_classes = [IsAdminUser]
@@ -54,12 +53,17 @@ class DailyRevenueView(APIView):
         super().__init__(**kwargs)
         self.service = RevenueReportService()
     
-    def get(self, request):
+    async def get(self, request):
         """Récupérer les revenus quotidiens"""
         try:
             days = int(request.query_params.get('days', 30))
             
-            reports = async_to_sync(self.service.get_daily_reports)(days=days)
+            reports = await analytics_cache.get_or_compute(
+                'daily_revenue',
+                {'days': days},
+                lambda: self.service.get_daily_reports(days=days),
+                tags=['revenue:daily']
+            )
             
             return Response(reports, status=status.HTTP_200_OK)
             
@@ -71,7 +75,7 @@ class DailyRevenueView(APIView):
             )
 
 
-class MonthlyRevenueSummaryView(APIView):
+class MonthlyRevenueSummaryView(AsyncAPIView):
     """Vue pour récupérer le résumé mensuel"""
     
     permission_classes = [IsAdminUser]
@@ -80,15 +84,17 @@ class MonthlyRevenueSummaryView(APIView):
         super().__init__(**kwargs)
         self.service = RevenueReportService()
     
-    def get(self, request):
+    async def get(self, request):
         """Récupérer le résumé mensuel"""
         try:
             year = int(request.query_params.get('year', date.today().year))
             month = int(request.query_params.get('month', date.today().month))
             
-            summary = async_to_sync(self.service.get_monthly_summary)(
-                year=year,
-                month=month
+            summary = await analytics_cache.get_or_compute(
+                'monthly_revenue',
+                {'year': year, 'month': month},
+                lambda: self.service.get_monthly_summary(year=year, month=month),
+                tags=[f'revenue:{year:04d}-{month:02d}']
             )
             
             return Response(summary, status=status.HTTP_200_OK)
@@ -1,17 +1,16 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from asgiref.sync import async_to_sync
 import logging
 
-from apps.analytics.services import SearchLogService
+from apps.analytics.views.base import AsyncAPIView
+from apps.analytics.services import SearchLogService, analytics_cache, trending_searches
 from apps.analytics.serializers import SearchLogSerializer, LogSearchSerializer
 
 logger = logging.getLogger(__name__)
 
 
-class LogSearchView(APIView):
+class LogSearchView(AsyncAPIView):
     """Vue pour enregistrer les recherches"""
     
     permission_classes = [AllowAny]
@@ -20,7 +19,7 @@ class LogSearchView(APIView):
         super().__init__(**kwargs)
         self.service = SearchLogService()
     
-    def post(self, request):
+    async def post(self, request):
         """Enregistrer une recherche"""
         try:
             serializer = LogSearchSerializer(data=request.data)
@@ -29,7 +28,7 @@ class LogSearchView(APIView):
             
             ip_address = self.get_client_ip(request)
             
-            log = async_to_sync(self.service.log_search)(
+            log = await self.service.log_search(
                 query=serializer.validated_data['query'],
                 results_count=serializer.validated_data['results_count'],
                 user_id=str(serializer.validated_data.get('user_id')) if serializer.validated_data.get('user_id') else None,
@@ -56,7 +55,7 @@ class LogSearchView(APIView):
         return ip
 
 
-class PopularSearchesView(APIView):
+class PopularSearchesView(AsyncAPIView):
     """Vue pour récupérer les recherches populaires"""
     
     permission_classes = [IsAuthenticated]
@@ -65,15 +64,17 @@ class PopularSearchesView(APIView):
         super().__init__(**kwargs)
         self.service = SearchLogService()
     
-    def get(self, request):
+    async def get(self, request):
         """Récupérer les recherches populaires"""
         try:
             limit = int(request.query_params.get('limit', 10))
             days = int(request.query_params.get('days', 30))
             
-            searches = async_to_sync(self.service.get_popular_searches)(
-                limit=limit,
-                days=days
+            searches = await analytics_cache.get_or_compute(
+                'popular_searches',
+                {'limit': limit, 'days': days},
+                lambda: self.service.get_popular_searches(limit=limit, days=days),
+                tags=['searches']
             )
             
             return Response(searches, status=status.HTTP_200_OK)
@@ -86,7 +87,7 @@ class PopularSearchesView(APIView):
             )
 
 
-class ZeroResultSearchesView(APIView):
+class ZeroResultSearchesView(AsyncAPIView):
     """Vue pour récupérer les recherches sans résultats"""
     
     permission_classes = [IsAuthenticated]
@@ -95,13 +96,13 @@ class ZeroResultSearchesView(APIView):
         super().__init__(**kwargs)
         self.service = SearchLogService()
     
-    def get(self, request):
+    async def get(self, request):
         """Récupérer les recherches sans résultats"""
         try:
             limit = int(request.query_params.get('limit', 10))
             days = int(request.query_params.get('days', 30))
             
-            searches = async_to_sync(self.service.get_zero_result_searches)(
+            searches = await self.service.get_zero_result_searches(
                 limit=limit,
                 days=days
             )
@@ -116,7 +117,7 @@ class ZeroResultSearchesView(APIView):
             )
 
 
-class SearchTrendsView(APIView):
+class SearchTrendsView(AsyncAPIView):
     """Vue pour récupérer les tendances de recherche"""
     
     permission_classes = [IsAuthenticated]
@@ -125,12 +126,12 @@ class SearchTrendsView(APIView):
         super().__init__(**kwargs)
         self.service = SearchLogService()
     
-    def get(self, request):
+    async def get(self, request):
         """Récupérer les tendances"""
         try:
             days = int(request.query_params.get('days', 7))
             
-            trends = async_to_sync(self.service.get_search_trends)(days=days)
+            trends = await self.service.get_search_trends(days=days)
             
             return Response(trends, status=status.HTTP_200_OK)
             
@@ -139,4 +140,38 @@ class SearchTrendsView(APIView):
             return Response(
                 {'error': 'Internal server error'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+class TrendingSearchesView(AsyncAPIView):
+    """Vue pour récupérer les recherches tendance (sans lecture de search_logs)"""
+    
+    permission_classes = [IsAuthenticated]
+    
+    async def get(self, request):
+        """Récupérer les tendances en temps réel (window=5m, 1h ou 1d)"""
+        try:
+            window = request.query_params.get('window', '1h')
+            limit = int(request.query_params.get('limit', 10))
+            if limit < 1:
+                raise ValueError('limit must be positive')
+            
+            if window not in trending_searches.WINDOWS:
+                return Response(
+                    {'error': f"window must be one of {', '.join(trending_searches.WINDOWS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            trending = await trending_searches.top(window=window, limit=limit)
+            
+            return Response(trending, status=status.HTTP_200_OK)
+            
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+        except Exception as e:
+            logger.error(f"Error getting trending searches: {str(e)}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
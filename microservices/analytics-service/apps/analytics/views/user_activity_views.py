@@ -1,17 +1,18 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from asgiref.sync import async_to_sync
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from datetime import date, datetime, timedelta
 import logging
 
-from apps.analytics.services import UserActivityService
+from apps.analytics.views.base import AsyncAPIView
+from apps.analytics.services import UserActivityService, active_user_bitmaps, analytics_cache
+from apps.analytics.services.active_users import PERIOD_DAYS
 from apps.analytics.serializers import UserActivitySerializer, TrackActivitySerializer
 
 logger = logging.getLogger(__name__)
 
 
-class TrackUserActivityView(APIView):
+class TrackUserActivityView(AsyncAPIView):
     """Vue pour enregistrer l'activité utilisateur"""
     
     permission_classes = [IsAuthenticated]
@@ -20,14 +21,14 @@ class TrackUserActivityView(APIView):
         super().__init__(**kwargs)
         self.service = UserActivityService()
     
-    def post(self, request):
+    async def post(self, request):
         """Enregistrer une activité"""
         try:
             serializer = TrackActivitySerializer(data=request.data)
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            activity = async_to_sync(self.service.track_activity)(
+            activity = await self.service.track_activity(
                 user_id=str(serializer.validated_data['user_id']),
                 event_type=serializer.validated_data['event_type'],
                 metadata=serializer.validated_data.get('metadata')
@@ -44,7 +45,7 @@ class TrackUserActivityView(APIView):
             )
 
 
-class UserActivityHistoryView(APIView):
+class UserActivityHistoryView(AsyncAPIView):
     """Vue pour récupérer l'historique d'activité"""
     
     permission_classes = [IsAuthenticated]
@@ -53,13 +54,13 @@ class UserActivityHistoryView(APIView):
         super().__init__(**kwargs)
         self.service = UserActivityService()
     
-    def get(self, request, user_id):
+    async def get(self, request, user_id):
         """Récupérer l'historique"""
         try:
             event_type = request.query_params.get('event_type')
             limit = int(request.query_params.get('limit', 50))
             
-            activities = async_to_sync(self.service.get_user_activities)(
+            activities = await self.service.get_user_activities(
                 user_id=user_id,
                 event_type=event_type,
                 limit=limit
@@ -76,7 +77,7 @@ class UserActivityHistoryView(APIView):
             )
 
 
-class UserActivityStatsView(APIView):
+class UserActivityStatsView(AsyncAPIView):
     """Vue pour récupérer les statistiques d'activité"""
     
     permission_classes = [IsAuthenticated]
@@ -85,22 +86,22 @@ class UserActivityStatsView(APIView):
         super().__init__(**kwargs)
         self.service = UserActivityService()
     
-    def get(self, request, user_id):
+    async def get(self, request, user_id):
         """Récupérer les statistiques"""
         try:
             days = int(request.query_params.get('days', 30))
             
-            daily_activity = async_to_sync(self.service.get_daily_activity)(
+            daily_activity = await self.service.get_daily_activity(
                 user_id=user_id,
                 days=days
             )
             
-            activity_by_type = async_to_sync(self.service.get_activity_by_type)(
+            activity_by_type = await self.service.get_activity_by_type(
                 user_id=user_id,
                 days=days
             )
             
-            total_count = async_to_sync(self.service.get_activity_count)(
+            total_count = await self.service.get_activity_count(
                 user_id=user_id,
                 days=days
             )
@@ -119,3 +120,84 @@ class UserActivityStatsView(APIView):
                 {'error': 'Internal server error'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+def parse_date_param(value, default: date) -> date:
+    """Date ISO d'un paramètre de requête ; ValueError si invalide"""
+    return date.fromisoformat(value) if value else default
+
+
+class ActiveUsersView(AsyncAPIView):
+    """Vue pour les utilisateurs actifs quotidiens, hebdomadaires et mensuels"""
+    
+    permission_classes = [IsAdminUser]
+    
+    async def get(self, request):
+        """DAU/WAU/MAU des `days` jours finissant à `date`"""
+        try:
+            day = parse_date_param(request.query_params.get('date'), datetime.now().date())
+            days = int(request.query_params.get('days', 30))
+            if not 1 <= days <= 366:
+                raise ValueError('days must be between 1 and 366')
+            
+            async def compute():
+                return await active_user_bitmaps.active_counts(day, days)
+            
+            series = await analytics_cache.get_or_compute(
+                'active_users',
+                {'date': day.isoformat(), 'days': days},
+                compute
+            )
+            
+            return Response({'days': series}, status=status.HTTP_200_OK)
+            
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+        except Exception as e:
+            logger.error(f"Error getting active users: {str(e)}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class RetentionView(AsyncAPIView):
+    """Vue pour la matrice de rétention par cohorte"""
+    
+    permission_classes = [IsAdminUser]
+    
+    async def get(self, request):
+        """Rétention des cohortes de `periods` périodes à partir de `start`"""
+        try:
+            period = request.query_params.get('period', 'week')
+            cohort = request.query_params.get('cohort', 'active')
+            periods = int(request.query_params.get('periods', 8))
+            if not 1 <= periods <= 52:
+                raise ValueError('periods must be between 1 and 52')
+            
+            default_start = datetime.now().date() - timedelta(
+                days=PERIOD_DAYS.get(period, 7) * (periods - 1)
+            )
+            start = parse_date_param(request.query_params.get('start'), default_start)
+            
+            async def compute():
+                return await active_user_bitmaps.retention(start, periods, period, cohort)
+            
+            matrix = await analytics_cache.get_or_compute(
+                'retention',
+                {'start': start.isoformat(), 'periods': periods, 'period': period, 'cohort': cohort},
+                compute
+            )
+            
+            return Response(matrix, status=status.HTTP_200_OK)
+            
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+        except Exception as e:
+            logger.error(f"Error getting retention: {str(e)}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -1,22 +1,35 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from asgiref.sync import async_to_sync
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.conf import settings
 import logging
 
-from apps.analytics.services import VideoAnalyticsService
+from apps.analytics.views.base import AsyncAPIView
+from apps.analytics.services import VideoAnalyticsService, analytics_cache, video_event_buffer
+from apps.analytics.services.video_analytics_service import watch_time_delta
 from apps.analytics.serializers import (
     VideoAnalyticsSerializer,
     UpdateWatchTimeSerializer,
     UpdateCompletionSerializer,
-    VideoEventSerializer
+    VideoEventSerializer,
+    VideoEventBatchSerializer,
+    VideoEventBatchItemSerializer
 )
 
 logger = logging.getLogger(__name__)
 
 
-class VideoAnalyticsView(APIView):
+# Événements agrégés par le buffer write-behind -> compteur incrémenté
+BUFFERED_EVENT_FIELDS = {
+    'pause': 'pauseCount',
+    'rewind': 'rewindCount',
+    'speed_change': 'speedChanges',
+}
+
+
+class VideoAnalyticsView(AsyncAPIView):
     """Vue pour gérer les analytics vidéo"""
     
     permission_classes = [IsAuthenticated]
@@ -25,7 +38,7 @@ class VideoAnalyticsView(APIView):
         super().__init__(**kwargs)
         self.service = VideoAnalyticsService()
     
-    def get(self, request):
+    async def get(self, request):
         """Récupérer les analytics d'une vidéo"""
         try:
             lesson_id = request.query_params.get('lesson_id')
@@ -37,7 +50,7 @@ class VideoAnalyticsView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            analytics = async_to_sync(self.service.get_analytics)(
+            analytics = await self.service.get_analytics(
                 lesson_id, student_id
             )
             
@@ -58,7 +71,7 @@ class VideoAnalyticsView(APIView):
             )
 
 
-class UpdateWatchTimeView(APIView):
+class UpdateWatchTimeView(AsyncAPIView):
     """Vue pour mettre à jour le temps de visionnage"""
     
     permission_classes = [IsAuthenticated]
@@ -67,16 +80,30 @@ class UpdateWatchTimeView(APIView):
         super().__init__(**kwargs)
         self.service = VideoAnalyticsService()
     
-    def post(self, request):
+    async def post(self, request):
         """Mettre à jour le temps de visionnage"""
         try:
             serializer = UpdateWatchTimeSerializer(data=request.data)
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            analytics = async_to_sync(self.service.update_watch_time)(
-                str(serializer.validated_data['lesson_id']),
-                str(serializer.validated_data['student_id']),
+            lesson_id = str(serializer.validated_data['lesson_id'])
+            student_id = str(serializer.validated_data['student_id'])
+            
+            if settings.VIDEO_EVENT_BUFFER_ENABLED:
+                await video_event_buffer.add(
+                    lesson_id,
+                    student_id,
+                    **watch_time_delta(
+                        serializer.validated_data['watch_time'],
+                        serializer.validated_data['position']
+                    )
+                )
+                return Response({'status': 'accepted'}, status=status.HTTP_202_ACCEPTED)
+            
+            analytics = await self.service.update_watch_time(
+                lesson_id,
+                student_id,
                 serializer.validated_data['watch_time'],
                 serializer.validated_data['position']
             )
@@ -92,7 +119,7 @@ class UpdateWatchTimeView(APIView):
             )
 
 
-class UpdateCompletionView(APIView):
+class UpdateCompletionView(AsyncAPIView):
     """Vue pour mettre à jour le taux de complétion"""
     
     permission_classes = [IsAuthenticated]
@@ -101,16 +128,27 @@ class UpdateCompletionView(APIView):
         super().__init__(**kwargs)
         self.service = VideoAnalyticsService()
     
-    def post(self, request):
+    async def post(self, request):
         """Mettre à jour le taux de complétion"""
         try:
             serializer = UpdateCompletionSerializer(data=request.data)
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            analytics = async_to_sync(self.service.update_completion_rate)(
-                str(serializer.validated_data['lesson_id']),
-                str(serializer.validated_data['student_id']),
+            lesson_id = str(serializer.validated_data['lesson_id'])
+            student_id = str(serializer.validated_data['student_id'])
+            
+            if settings.VIDEO_EVENT_BUFFER_ENABLED:
+                await video_event_buffer.add(
+                    lesson_id,
+                    student_id,
+                    completionRate=serializer.validated_data['completion_rate']
+                )
+                return Response({'status': 'accepted'}, status=status.HTTP_202_ACCEPTED)
+            
+            analytics = await self.service.update_completion_rate(
+                lesson_id,
+                student_id,
                 serializer.validated_data['completion_rate']
             )
             
@@ -125,7 +163,7 @@ class UpdateCompletionView(APIView):
             )
 
 
-class VideoEventView(APIView):
+class VideoEventView(AsyncAPIView):
     """Vue pour enregistrer les événements vidéo"""
     
     permission_classes = [IsAuthenticated]
@@ -134,7 +172,7 @@ class VideoEventView(APIView):
         super().__init__(**kwargs)
         self.service = VideoAnalyticsService()
     
-    def post(self, request):
+    async def post(self, request):
         """Enregistrer un événement vidéo"""
         try:
             serializer = VideoEventSerializer(data=request.data)
@@ -145,16 +183,24 @@ class VideoEventView(APIView):
             student_id = str(serializer.validated_data['student_id'])
             event_type = serializer.validated_data['event_type']
             
+            if settings.VIDEO_EVENT_BUFFER_ENABLED and event_type in BUFFERED_EVENT_FIELDS:
+                await video_event_buffer.add(
+                    lesson_id,
+                    student_id,
+                    **{BUFFERED_EVENT_FIELDS[event_type]: 1}
+                )
+                return Response({'status': 'accepted'}, status=status.HTTP_202_ACCEPTED)
+            
             if event_type == 'pause':
-                analytics = async_to_sync(self.service.increment_pause_count)(
+                analytics = await self.service.increment_pause_count(
                     lesson_id, student_id
                 )
             elif event_type == 'rewind':
-                analytics = async_to_sync(self.service.increment_rewind_count)(
+                analytics = await self.service.increment_rewind_count(
                     lesson_id, student_id
                 )
             elif event_type == 'speed_change':
-                analytics = async_to_sync(self.service.increment_speed_changes)(
+                analytics = await self.service.increment_speed_changes(
                     lesson_id, student_id
                 )
             elif event_type == 'quality':
@@ -164,7 +210,7 @@ class VideoEventView(APIView):
                         {'error': 'quality is required for quality event'},
                         status=status.HTTP_400_BAD_REQUEST
                     )
-                analytics = async_to_sync(self.service.update_quality)(
+                analytics = await self.service.update_quality(
                     lesson_id, student_id, quality
                 )
             else:
@@ -184,7 +230,60 @@ class VideoEventView(APIView):
             )
 
 
-class LessonEngagementView(APIView):
+class VideoEventBatchView(AsyncAPIView):
+    """Vue pour enregistrer un lot d'événements vidéo en une requête"""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.service = VideoAnalyticsService()
+    
+    async def post(self, request):
+        """Valider, grouper par (leçon, étudiant) et appliquer un lot d'événements"""
+        try:
+            serializer = VideoEventBatchSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            item_serializer = VideoEventBatchItemSerializer()
+            accepted = []
+            results = []
+            
+            for index, item in enumerate(serializer.validated_data['events']):
+                try:
+                    accepted.append(item_serializer.run_validation(item))
+                    results.append({'index': index, 'status': 'accepted'})
+                except ValidationError as e:
+                    results.append({'index': index, 'status': 'rejected', 'errors': e.detail})
+            
+            if not accepted:
+                return Response({
+                    'received': len(results),
+                    'accepted': 0,
+                    'rejected': len(results),
+                    'results': results
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            summary = await self.service.apply_events(accepted)
+            
+            return Response({
+                'received': len(results),
+                'accepted': len(accepted),
+                'rejected': len(results) - len(accepted),
+                'rows_updated': summary['rows'],
+                'results': results
+            }, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            logger.error(f"Error recording video event batch: {str(e)}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class LessonEngagementView(AsyncAPIView):
     """Vue pour récupérer les statistiques d'engagement d'une leçon"""
     
     permission_classes = [IsAuthenticated]
@@ -193,10 +292,15 @@ class LessonEngagementView(APIView):
         super().__init__(**kwargs)
         self.service = VideoAnalyticsService()
     
-    def get(self, request, lesson_id):
+    async def get(self, request, lesson_id):
         """Récupérer les stats d'engagement"""
         try:
-            stats = async_to_sync(self.service.get_engagement_stats)(lesson_id)
+            stats = await analytics_cache.get_or_compute(
+                'lesson_engagement',
+                {'lesson_id': lesson_id},
+                lambda: self.service.get_engagement_stats(lesson_id),
+                tags=[f'lesson:{lesson_id}']
+            )
             
             return Response(stats, status=status.HTTP_200_OK)
             
@@ -205,4 +309,50 @@ class LessonEngagementView(APIView):
             return Response(
                 {'error': 'Internal server error'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+class LessonWatchHeatmapView(AsyncAPIView):
+    """Vue pour la carte de chaleur (rétention par seconde) d'une leçon"""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.service = VideoAnalyticsService()
+    
+    async def get(self, request, lesson_id):
+        """Courbe de rétention et points d'abandon"""
+        try:
+            resolution = int(request.query_params.get('resolution', 5))
+            if not 1 <= resolution <= 300:
+                raise ValueError('resolution must be between 1 and 300 seconds')
+            
+            heatmap = await analytics_cache.get_or_compute(
+                'lesson_heatmap',
+                {'lesson_id': lesson_id, 'resolution': resolution},
+                lambda: self.service.get_watch_heatmap(lesson_id, resolution),
+                tags=[f'lesson:{lesson_id}']
+            )
+            
+            return Response(heatmap, status=status.HTTP_200_OK)
+            
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+        except Exception as e:
+            logger.error(f"Error getting watch heatmap: {str(e)}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class VideoEventBufferMetricsView(APIView):
+    """Vue pour exposer les métriques du buffer d'événements vidéo"""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Profondeur du buffer et latence des flush"""
+        return Response(video_event_buffer.metrics(), status=status.HTTP_200_OK)
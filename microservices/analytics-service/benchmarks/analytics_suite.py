@@ -0,0 +1,376 @@
+"""
+Suite de benchmarks de charge : chaque méthode de lecture des services
+analytics et chaque endpoint GET, sur des données synthétiques à l'échelle
+voulue (benchmarks.synthetic_data).
+
+Pour chaque cas : latences (p50/p95/p99), lignes lues dans Postgres par
+appel (seq_tup_read + idx_tup_fetch de pg_stat_user_tables, partitions
+regroupées sous leur table) et pic mémoire Python. Le rapport JSON (clés
+triées, un cas par nom) se compare d'un commit à l'autre par un simple diff
+ou avec --baseline.
+
+Les statistiques Postgres ne sont publiées par un backend qu'après au plus
+10 s d'inactivité : --stats-wait attend ce délai après chaque cas (0 pour
+ne pas mesurer les lignes lues). Les endpoints sont mesurés sans le cache
+analytics, sauf avec --cache.
+
+Usage :
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.analytics_suite --rows 10000000 --output bench.json
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.analytics_suite --skip-seed --only service. --baseline main.json
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.analytics_suite --skip-seed --stats-wait 0 --runs 50
+"""
+import argparse
+import inspect
+import json
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import django
+from asgiref.sync import async_to_sync
+
+from benchmarks.prisma_client_bench import summarize
+from benchmarks.synthetic_data import add_arguments, data_from_args, generate, refresh_derived, SyntheticData
+from shared.shared.utils.prisma_client import get_prisma_client, worker_async_to_sync
+
+# Lignes lues et lignes vivantes par relation (partitions comprises)
+TABLE_STATS_SQL = """
+SELECT
+    relname AS "table",
+    (seq_tup_read + COALESCE(idx_tup_fetch, 0))::bigint AS "scanned",
+    n_live_tup::bigint AS "rows"
+FROM pg_stat_user_tables
+"""
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+class BenchUser:
+    """Administrateur minimal pour passer IsAuthenticated / IsAdminUser"""
+    is_authenticated = True
+    is_active = True
+    is_staff = True
+
+
+async def table_stats() -> Dict[str, Dict[str, int]]:
+    """Compteurs par table, partitions additionnées sous leur table parente"""
+    from apps.analytics.services.partition_maintenance import PARTITION_NAME
+
+    db = await get_prisma_client()
+    stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'scanned': 0, 'rows': 0})
+    for row in await db.query_raw(TABLE_STATS_SQL):
+        table = PARTITION_NAME.sub('', row['table'])
+        stats[table]['scanned'] += row['scanned']
+        stats[table]['rows'] += row['rows']
+    return dict(stats)
+
+
+def service_cases(data: SyntheticData) -> List[Case]:
+    """Méthodes de lecture des services, sur le cours / la leçon / l'utilisateur le plus actif"""
+    from apps.analytics.services import (
+        CourseViewService, VideoAnalyticsService, SearchLogService, UserActivityService,
+        RevenueReportService, CourseAnalyticsService, CourseFunnelService,
+        active_user_bitmaps, top_courses_ranking, trending_searches,
+    )
+
+    course_id = data.course_ids[0]
+    lesson_id = data.lesson_id(0, 0)
+    user_id = data.user_ids[0]
+    today = date.today()
+    month_ago = today - timedelta(days=29)
+    start = datetime.combine(month_ago, datetime.min.time())
+    end = datetime.now()
+
+    views = CourseViewService()
+    video = VideoAnalyticsService()
+    search = SearchLogService()
+    activity = UserActivityService()
+    revenue = RevenueReportService()
+    courses = CourseAnalyticsService()
+    funnel = CourseFunnelService()
+
+    def run(method, *args, **kwargs) -> Callable[[], Any]:
+        call = worker_async_to_sync(method)
+        return lambda: call(*args, **kwargs)
+
+    return [
+        ('service.course_views.get_course_views', run(views.get_course_views, course_id, limit=100)),
+        ('service.course_views.get_total_views', run(views.get_total_views, course_id)),
+        ('service.course_views.get_unique_viewers', run(views.get_unique_viewers, course_id, start, end)),
+        ('service.course_views.get_views_by_country', run(views.get_views_by_country, course_id)),
+        ('service.course_views.get_views_by_source', run(views.get_views_by_source, course_id)),
+        ('service.course_views.get_daily_views', run(views.get_daily_views, course_id, days=30)),
+        ('service.course_views.get_views_statistics', run(views.get_views_statistics, course_id, days=30)),
+        ('service.video.get_analytics', run(video.get_analytics, lesson_id, user_id)),
+        ('service.video.get_lesson_analytics', run(video.get_lesson_analytics, lesson_id)),
+        ('service.video.get_student_analytics', run(video.get_student_analytics, user_id)),
+        ('service.video.get_average_completion_rate', run(video.get_average_completion_rate, lesson_id)),
+        ('service.video.get_engagement_stats', run(video.get_engagement_stats, lesson_id)),
+        ('service.video.get_watch_heatmap', run(video.get_watch_heatmap, lesson_id)),
+        ('service.search.get_popular_searches', run(search.get_popular_searches, limit=10, days=30)),
+        ('service.search.get_zero_result_searches', run(search.get_zero_result_searches, limit=10, days=30)),
+        ('service.search.get_user_search_history', run(search.get_user_search_history, user_id)),
+        ('service.search.get_search_trends', run(search.get_search_trends, days=30)),
+        ('service.search.get_click_through_rate', run(search.get_click_through_rate, days=30)),
+        ('service.search.trending', run(trending_searches.top, '1d', 10)),
+        ('service.activity.get_user_activities', run(activity.get_user_activities, user_id)),
+        ('service.activity.get_activity_count', run(activity.get_activity_count, user_id, days=30)),
+        ('service.activity.get_daily_activity', run(activity.get_daily_activity, user_id, days=30)),
+        ('service.activity.get_activity_by_type', run(activity.get_activity_by_type, user_id, days=30)),
+        ('service.activity.get_most_active_users', run(activity.get_most_active_users, limit=10, days=30)),
+        ('service.activity.active_counts', run(active_user_bitmaps.active_counts, today, 30)),
+        ('service.activity.retention', run(active_user_bitmaps.retention, today - timedelta(weeks=8), 8)),
+        ('service.revenue.get_daily_reports', run(revenue.get_daily_reports, days=30)),
+        ('service.revenue.get_range_totals', run(revenue.get_range_totals, month_ago, today)),
+        ('service.revenue.get_monthly_summary', run(revenue.get_monthly_summary, today.year, today.month)),
+        ('service.course.get_analytics_range', run(courses.get_analytics_range, course_id, month_ago, today)),
+        ('service.course.get_total_stats', run(courses.get_total_stats, course_id, month_ago, today)),
+        ('service.course.get_daily_analytics', run(courses.get_daily_analytics, course_id, days=30)),
+        ('service.course.get_courses_stats', run(courses.get_courses_stats, data.course_ids[:50], month_ago, today)),
+        ('service.course.get_top_courses', run(courses.get_top_courses, metric='views', limit=10, days=30)),
+        ('service.course.get_course_totals', run(courses.get_course_totals, month_ago, today)),
+        ('service.course.top_courses_ranking', run(top_courses_ranking.get, metric='views', limit=10, days=30)),
+        ('service.course.get_funnel', run(funnel.get_funnel, course_id, month_ago, today, dimension='source')),
+    ]
+
+
+async def finish(pending: Awaitable[Any]) -> Any:
+    """Attendre la réponse d'une vue async, flux d'export compris"""
+    response = await pending
+    if getattr(response, 'streaming', False):
+        async for _ in response.streaming_content:
+            pass
+    else:
+        response.render()
+    return response
+
+
+def http_cases(data: SyntheticData) -> List[Case]:
+    """Endpoints de lecture, appelés dans le processus (résolution d'URL, vue DRF, rendu)"""
+    from django.urls import resolve
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    course_id = data.course_ids[0]
+    lesson_id = data.lesson_id(0, 0)
+    user_id = data.user_ids[0]
+    factory = APIRequestFactory()
+    user = BenchUser()
+
+    def request(method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Callable[[], Any]:
+        match = resolve(path.split('?')[0])
+
+        def call():
+            http_request = getattr(factory, method.lower())(path, body, format='json')
+            force_authenticate(http_request, user=user)
+            response = match.func(http_request, *match.args, **match.kwargs)
+            if inspect.isawaitable(response):
+                # Vue async : attendue comme le fait le handler WSGI de Django
+                response = async_to_sync(finish)(response)
+            elif getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            else:
+                response.render()
+            # 404 : couple absent des données générées, la mesure reste valable
+            if response.status_code >= 400 and response.status_code != 404:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            return response
+
+        return call
+
+    endpoints = [
+        ('GET', f'/api/analytics/course-views/stats/{course_id}/'),
+        ('GET', f'/api/analytics/course-views/list/{course_id}/?limit=100'),
+        ('GET', f'/api/analytics/course-views/export/{course_id}/?output=ndjson'),
+        ('GET', f'/api/analytics/video/analytics/?lesson_id={lesson_id}&student_id={user_id}'),
+        ('GET', f'/api/analytics/video/engagement/{lesson_id}/'),
+        ('GET', f'/api/analytics/video/heatmap/{lesson_id}/?resolution=5'),
+        ('GET', '/api/analytics/search/popular/?days=30'),
+        ('GET', '/api/analytics/search/zero-results/?days=30'),
+        ('GET', '/api/analytics/search/trends/?days=30'),
+        ('GET', '/api/analytics/search/trending/?window=1d'),
+        ('GET', f'/api/analytics/activity/history/{user_id}/'),
+        ('GET', f'/api/analytics/activity/stats/{user_id}/'),
+        ('GET', '/api/analytics/activity/active-users/?days=30'),
+        ('GET', '/api/analytics/activity/retention/?period=week&periods=8'),
+        ('GET', '/api/analytics/revenue/daily/?days=30'),
+        ('GET', '/api/analytics/revenue/monthly/'),
+        ('GET', f'/api/analytics/course/stats/{course_id}/?days=30'),
+        ('GET', f'/api/analytics/course/funnel/{course_id}/?dimension=source'),
+        ('GET', '/api/analytics/course/top/?days=30'),
+    ]
+    cases = [(f"http.{method} {path.split('?')[0]}", request(method, path)) for method, path in endpoints]
+    cases.append((
+        'http.POST /api/analytics/course/stats/batch/',
+        request('POST', '/api/analytics/course/stats/batch/', {'course_ids': data.course_ids[:50]})
+    ))
+
+    # Identifiants remplacés par leur rôle : noms de cas stables d'une génération à l'autre
+    replacements = {course_id: '{course_id}', lesson_id: '{lesson_id}', user_id: '{user_id}'}
+    stable = []
+    for name, call in cases:
+        for value, placeholder in replacements.items():
+            name = name.replace(value, placeholder)
+        stable.append((name, call))
+    return stable
+
+
+def measure_case(
+    call: Callable[[], Any],
+    runs: int,
+    warmup: int,
+    stats_wait: float,
+    before: Optional[Dict[str, Dict[str, int]]]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Dict[str, int]]]]:
+    """Résultat d'un cas et compteurs Postgres à sa fin (point de départ du cas suivant)"""
+    for _ in range(warmup):
+        call()
+
+    samples = []
+    tracemalloc.start()
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    report = summarize(samples)
+    report['peak_memory_mb'] = round(peak / (1024 * 1024), 2)
+
+    after = None
+    if before is not None:
+        time.sleep(stats_wait)
+        after = worker_async_to_sync(table_stats)()
+        calls = runs + warmup
+        scanned = {
+            table: (counters['scanned'] - before.get(table, {}).get('scanned', 0)) // calls
+            for table, counters in after.items()
+        }
+        report['rows_scanned'] = sum(scanned.values())
+        report['rows_scanned_by_table'] = {table: rows for table, rows in scanned.items() if rows > 0}
+
+    return report, after
+
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """Rapports p50/p95 courant / référence et cas plus lents que `threshold`"""
+    ratios = {}
+    for name, case in report['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous or 'p50_ms' not in previous or 'p50_ms' not in case:
+            continue
+        ratios[name] = {
+            f"{p}_ratio": round(case[f"{p}_ms"] / previous[f"{p}_ms"], 2) if previous[f"{p}_ms"] else None
+            for p in ('p50', 'p95')
+        }
+
+    return {
+        'baseline_commit': baseline.get('meta', {}).get('git_commit'),
+        'ratios': ratios,
+        'regressions': sorted(
+            name for name, ratio in ratios.items()
+            if (ratio['p50_ratio'] or 0) > threshold or (ratio['p95_ratio'] or 0) > threshold
+        ),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args) -> Dict[str, Any]:
+    from apps.analytics.services import analytics_cache
+
+    data = data_from_args(args)
+    report: Dict[str, Any] = {
+        'meta': {
+            'git_commit': git_commit(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'runs': args.runs,
+            'warmup': args.warmup,
+            'cache': args.cache,
+            'data': {
+                'rows': args.rows,
+                'days': args.days,
+                'courses': args.courses,
+                'users': args.users,
+                'queries': args.queries,
+                'zipf': args.zipf,
+                'seed': args.seed,
+            },
+        },
+    }
+
+    if not args.skip_seed:
+        report['seed'] = {
+            'tables': worker_async_to_sync(generate)(
+                data, args.rows, args.tables, args.batch_size, args.concurrency
+            ),
+            'derived': refresh_derived(args.days),
+        }
+
+    analytics_cache.enabled = args.cache
+    cases = [
+        (name, call) for name, call in service_cases(data) + http_cases(data)
+        if not args.only or any(name.startswith(prefix) for prefix in args.only)
+    ]
+
+    stats = worker_async_to_sync(table_stats)() if args.stats_wait > 0 else None
+    report['meta']['table_rows'] = {
+        table: counters['rows'] for table, counters in sorted((stats or {}).items())
+    }
+
+    report['cases'] = {}
+    for name, call in cases:
+        print(f"{name}...")
+        try:
+            report['cases'][name], stats = measure_case(call, args.runs, args.warmup, args.stats_wait, stats)
+        except Exception as e:
+            report['cases'][name] = {'error': str(e)}
+            # Compteurs faussés par l'appel interrompu : repartir d'une lecture fraîche
+            if stats is not None:
+                time.sleep(args.stats_wait)
+                stats = worker_async_to_sync(table_stats)()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['comparison'] = compare(json.load(f), report, args.regression_threshold)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument('--skip-seed', action='store_true', help='mesurer les données déjà présentes')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--stats-wait', type=float, default=11.0)
+    parser.add_argument('--cache', action='store_true', help='laisser le cache analytics actif')
+    parser.add_argument('--only', nargs='+', help='préfixes de noms de cas (ex. service.search http.GET)')
+    parser.add_argument('--output', default='analytics-benchmark.json')
+    parser.add_argument('--baseline', help='rapport de référence à comparer')
+    parser.add_argument('--regression-threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    django.setup()
+    report = run(args)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True, default=str)
+    print(f"Report written to {args.output}")
+    if 'comparison' in report:
+        print(json.dumps(report['comparison']['regressions'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark de concurrence : débit et latence des endpoints analytics de
+lecture sous N clients simultanés (500 par défaut), pour comparer un
+déploiement WSGI (gunicorn, workers sync + threads, vues enveloppées par
+worker_async_to_sync) et le déploiement ASGI (gunicorn + UvicornWorker,
+vues async).
+
+Les deux serveurs tournent avec le même nombre de workers, la même base
+(benchmarks.synthetic_data, mêmes options de génération qu'ici) et le cache
+analytics désactivé (ANALYTICS_CACHE_ENABLED=False) ou chauffé à
+l'identique. Le jeton doit appartenir à un utilisateur staff (endpoints
+revenue). Lancer le générateur de charge sur une autre machine que les
+serveurs pour ne pas leur prendre de CPU.
+
+Usage :
+    python -m benchmarks.asgi_concurrency_bench --token "$JWT" \\
+        --target wsgi=http://bench-wsgi:8011 --target asgi=http://bench-asgi:8011 \\
+        --clients 500 --duration 60 --output concurrency.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.prisma_client_bench import summarize
+from benchmarks.synthetic_data import add_arguments, data_from_args, SyntheticData
+
+
+def endpoints(data: SyntheticData, courses: int) -> List[str]:
+    """Chemins de lecture répartis sur les `courses` cours les plus vus"""
+    paths = [
+        '/api/analytics/search/popular/?days=30',
+        '/api/analytics/search/trending/?window=1h',
+        '/api/analytics/activity/active-users/?days=30',
+        '/api/analytics/revenue/daily/?days=30',
+        '/api/analytics/course/top/?days=30',
+    ]
+    for index, course_id in enumerate(data.course_ids[:courses]):
+        lesson_id = data.lesson_id(index, 0)
+        user_id = data.user_ids[index]
+        paths += [
+            f'/api/analytics/course-views/stats/{course_id}/',
+            f'/api/analytics/course-views/list/{course_id}/?limit=100',
+            f'/api/analytics/course/stats/{course_id}/?days=30',
+            f'/api/analytics/course/funnel/{course_id}/?dimension=source',
+            f'/api/analytics/video/engagement/{lesson_id}/',
+            f'/api/analytics/activity/history/{user_id}/',
+        ]
+    return paths
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    paths: 'itertools.cycle[str]',
+    deadline: float,
+    measure_from: float,
+    samples: List[float],
+    statuses: Counter
+):
+    """Un client : requêtes enchaînées jusqu'à l'échéance"""
+    while time.perf_counter() < deadline:
+        path = next(paths)
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            outcome = response.status_code
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        end = time.perf_counter()
+
+        # Échauffement : ni latence ni statut comptés
+        if start >= measure_from:
+            samples.append((end - start) * 1000)
+            statuses[outcome] += 1
+
+
+async def run_target(
+    base_url: str,
+    token: str,
+    paths: List[str],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    timeout: float
+) -> Dict[str, Any]:
+    samples: List[float] = []
+    statuses: Counter = Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={'Authorization': f'Bearer {token}'},
+        limits=limits,
+        timeout=timeout
+    ) as client:
+        measure_from = time.perf_counter() + warmup
+        deadline = measure_from + duration
+        cycle = itertools.cycle(paths)
+        await asyncio.gather(*(
+            client_loop(client, cycle, deadline, measure_from, samples, statuses)
+            for _ in range(concurrency)
+        ))
+
+    # 404 : couple absent des données générées, la requête a bien été servie
+    errors = sum(
+        count for outcome, count in statuses.items()
+        if not isinstance(outcome, int) or (outcome >= 400 and outcome != 404)
+    )
+
+    return {
+        'base_url': base_url,
+        'concurrency': concurrency,
+        'duration_s': duration,
+        'requests_per_second': round(len(samples) / duration, 1),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'statuses': {str(outcome): count for outcome, count in sorted(statuses.items(), key=str)},
+        'latency': summarize(samples) if samples else None,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Chaque cible rapportée à la première (débit et latences)"""
+    (baseline_name, baseline), *others = results.items()
+    comparison = {}
+
+    for name, result in others:
+        if not baseline['latency'] or not result['latency']:
+            continue
+        comparison[f'{name}_vs_{baseline_name}'] = {
+            'throughput_ratio': round(result['requests_per_second'] / baseline['requests_per_second'], 2),
+            'p50_ratio': round(result['latency']['p50_ms'] / baseline['latency']['p50_ms'], 2),
+            'p99_ratio': round(result['latency']['p99_ms'] / baseline['latency']['p99_ms'], 2),
+        }
+
+    return comparison
+
+
+def parse_target(value: str) -> Tuple[str, str]:
+    name, separator, url = value.partition('=')
+    if not separator or not name or not url:
+        raise argparse.ArgumentTypeError('expected name=url')
+    return name, url.rstrip('/')
+
+
+async def run(args) -> Dict[str, Any]:
+    paths = endpoints(data_from_args(args), args.hot_courses)
+    results = {}
+
+    # Cibles mesurées l'une après l'autre : elles ne se disputent pas la base
+    for name, url in args.target:
+        results[name] = await run_target(
+            url,
+            args.token,
+            paths,
+            concurrency=args.clients,
+            duration=args.duration,
+            warmup=args.warmup,
+            timeout=args.timeout
+        )
+
+    return {
+        'endpoints': len(paths),
+        'targets': results,
+        'comparison': compare(results) if len(results) > 1 else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument('--target', type=parse_target, action='append', required=True,
+                        help='nom=url, la première cible sert de référence')
+    parser.add_argument('--token', required=True, help='jeton JWT (utilisateur staff)')
+    parser.add_argument('--clients', type=int, default=500, help='clients simultanés')
+    parser.add_argument('--duration', type=float, default=30.0, help='secondes mesurées par cible')
+    parser.add_argument('--warmup', type=float, default=5.0)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--hot-courses', type=int, default=50)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    rendered = json.dumps(report, indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(rendered + '\n')
+    print(rendered)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark : latence par requête avec connect/disconnect par appel
+(ancien comportement des services) vs client Prisma partagé du worker.
+
+Usage :
+    python -m benchmarks.prisma_client_bench --requests 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from prisma import Prisma
+
+from shared.shared.utils.prisma_client import disconnect_prisma, get_prisma_client
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """Résumé des latences en millisecondes"""
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return round(ordered[index], 3)
+
+    return {
+        'requests': len(ordered),
+        'mean_ms': round(statistics.mean(ordered), 3),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+async def timed(call: Callable[[], Awaitable[Any]], requests: int) -> List[float]:
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def per_call_connection():
+    """Ancien schéma : un nouveau client connecté puis déconnecté par appel"""
+    db = Prisma()
+    await db.connect()
+    try:
+        await db.courseanalytics.find_first()
+    finally:
+        await db.disconnect()
+
+
+async def shared_connection():
+    """Nouveau schéma : client du worker connecté une seule fois"""
+    db = await get_prisma_client()
+    await db.courseanalytics.find_first()
+
+
+async def run(requests: int) -> Dict[str, Any]:
+    before = await timed(per_call_connection, requests)
+
+    # Connexion initiale hors mesure : payée une fois par worker
+    await get_prisma_client()
+    try:
+        after = await timed(shared_connection, requests)
+    finally:
+        await disconnect_prisma()
+
+    return {
+        'per_call_connection': summarize(before),
+        'shared_client': summarize(after),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.requests)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Benchmark de non-régression : recherches populaires / sans résultats sur une
+table search_logs peuplée de plusieurs millions de lignes.
+
+Compare l'ancienne agrégation Python (find_many + defaultdict) au GROUP BY
+exécuté par Postgres, vérifie que les deux renvoient le même top-k et affiche
+le plan d'exécution de la requête agrégée.
+
+Usage :
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.search_log_bench --rows 3000000 --runs 5
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.search_log_bench --skip-seed --skip-legacy
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.search_log_bench --cleanup
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import django
+
+from benchmarks.prisma_client_bench import summarize
+from shared.shared.utils.prisma_client import disconnect_prisma, get_prisma_client
+
+# Préfixe des requêtes générées : permet de les supprimer après le bench
+BENCH_PREFIX = 'bench:'
+
+# Distribution à longue traîne : random()^3 concentre les tirages sur les
+# premiers termes, comme une distribution de requêtes réelle
+SEED_SQL = """
+INSERT INTO "search_logs" ("id", "query", "resultsCount", "searchedAt")
+SELECT
+    gen_random_uuid()::text,
+    $1::text || floor(power(random(), 3) * $2::int)::int,
+    CASE WHEN random() < 0.1 THEN 0 ELSE (random() * 50)::int END,
+    NOW() - random() * $3::int * interval '1 day'
+FROM generate_series(1, $4::int)
+"""
+
+CLEANUP_SQL = """
+DELETE FROM "search_logs" WHERE "query" LIKE $1::text || '%'
+"""
+
+
+async def seed(rows: int, distinct_queries: int, days: int, batch_size: int):
+    db = await get_prisma_client()
+    inserted = 0
+    while inserted < rows:
+        size = min(batch_size, rows - inserted)
+        await db.execute_raw(SEED_SQL, BENCH_PREFIX, distinct_queries, days, size)
+        inserted += size
+        print(f"seeded {inserted}/{rows}")
+    await db.execute_raw('ANALYZE "search_logs"')
+
+
+async def legacy_popular_searches(limit: int, days: int) -> List[Dict[str, Any]]:
+    """Ancienne implémentation : toutes les lignes de la période en mémoire"""
+    db = await get_prisma_client()
+    start_date = datetime.now() - timedelta(days=days)
+
+    logs = await db.searchlog.find_many(
+        where={'searchedAt': {'gte': start_date}}
+    )
+
+    query_counts = defaultdict(int)
+    for log in logs:
+        query_counts[log.query] += 1
+
+    sorted_queries = sorted(
+        query_counts.items(),
+        key=lambda x: (-x[1], x[0])
+    )[:limit]
+
+    return [
+        {'query': query, 'count': count}
+        for query, count in sorted_queries
+    ]
+
+
+async def measure(
+    call: Callable[[], Awaitable[Any]],
+    runs: int
+) -> Tuple[Dict[str, Any], Any]:
+    """Latences et pic mémoire Python d'un appel répété `runs` fois"""
+    samples = []
+    result = None
+
+    tracemalloc.start()
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report = summarize(samples)
+    report['peak_memory_mb'] = round(peak / (1024 * 1024), 2)
+    return report, result
+
+
+async def explain(limit: int, days: int) -> List[str]:
+    from apps.analytics.services.rollups import rollup_window
+    from apps.analytics.services.search_log_service import SEARCH_ROLLUP_JOB, TOP_SEARCHES_SQL
+
+    db = await get_prisma_client()
+    start_date = datetime.now() - timedelta(days=days)
+    rows = await db.query_raw(
+        'EXPLAIN (ANALYZE, BUFFERS) ' + TOP_SEARCHES_SQL,
+        *await rollup_window(db, SEARCH_ROLLUP_JOB, start_date),
+        limit
+    )
+    return [row['QUERY PLAN'] for row in rows]
+
+
+async def run(args) -> Dict[str, Any]:
+    from apps.analytics.services import SearchLogService
+
+    db = await get_prisma_client()
+    try:
+        if args.cleanup:
+            deleted = await db.execute_raw(CLEANUP_SQL, BENCH_PREFIX)
+            return {'deleted_rows': deleted}
+
+        if not args.skip_seed:
+            await seed(args.rows, args.distinct_queries, args.days, args.batch_size)
+
+        service = SearchLogService()
+        if args.rollup:
+            refreshed = await service.refresh_daily_rollup(
+                lag_seconds=0,
+                max_span_hours=24 * (args.days + 1)
+            )
+            print(f"rollup refreshed: {refreshed['rows']} rows")
+
+        report: Dict[str, Any] = {
+            'table_rows': await db.searchlog.count(),
+            'limit': args.limit,
+            'days': args.days,
+        }
+
+        report['group_by_popular'], grouped = await measure(
+            lambda: service.get_popular_searches(limit=args.limit, days=args.days),
+            args.runs
+        )
+        report['group_by_zero_result'], _ = await measure(
+            lambda: service.get_zero_result_searches(limit=args.limit, days=args.days),
+            args.runs
+        )
+
+        if not args.skip_legacy:
+            report['legacy_popular'], legacy = await measure(
+                lambda: legacy_popular_searches(args.limit, args.days),
+                1
+            )
+            # Les ex æquo peuvent être départagés différemment (collation) ;
+            # avec --rollup le premier jour est compté en entier
+            if not args.rollup:
+                report['same_top_k'] = (
+                    [row['count'] for row in legacy] == [row['count'] for row in grouped]
+                )
+            report['speedup'] = round(
+                report['legacy_popular']['p50_ms'] / report['group_by_popular']['p50_ms'], 1
+            )
+
+        report['plan'] = await explain(args.limit, args.days)
+        return report
+    finally:
+        await disconnect_prisma()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--distinct-queries', type=int, default=20_000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=500_000)
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--skip-legacy', action='store_true')
+    parser.add_argument('--rollup', action='store_true', help='agréger search_daily_rollups avant les mesures')
+    parser.add_argument('--cleanup', action='store_true')
+    args = parser.parse_args()
+
+    django.setup()
+    print(json.dumps(asyncio.run(run(args)), indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,482 @@
+"""
+Générateur de données synthétiques pour les benchmarks analytics.
+
+Peuple course_views, user_activity, search_logs, video_analytics,
+course_analytics et revenue_reports à l'échelle voulue (10M+ lignes) :
+popularité des cours, des leçons, des requêtes et activité des utilisateurs
+suivent une loi de Zipf, les horodatages un profil journalier (creux vers
+4 h, pic vers 20 h). Les lots sont insérés par create_many, plusieurs en
+parallèle sur le pool du client Prisma.
+
+Les identifiants sont des UUID déterministes (uuid5) : deux générations de
+même graine produisent les mêmes cours / leçons / utilisateurs, et --cleanup
+retrouve les lignes générées. Les rapports de revenus (un par date) ne sont
+ajoutés que pour les dates absentes et ne sont pas supprimés.
+
+À lancer sur une base dédiée : les rollups (watermarks) et les structures
+Redis sont reconstruits à partir de toutes les lignes de la base.
+
+Usage :
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.synthetic_data --rows 10000000 --days 90
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.synthetic_data --rows 1000000 --tables course_views search_logs
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.synthetic_data --cleanup
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import django
+
+from benchmarks.search_log_bench import BENCH_PREFIX
+from shared.shared.utils.prisma_client import PRISMA_CONNECTION_LIMIT, get_prisma_client, worker_async_to_sync
+
+BENCH_NAMESPACE = uuid.UUID('6f1d3c8e-2b7a-4f0e-9c55-0d4a8e7b9a21')
+
+# Table -> modèle du client Prisma
+TABLE_MODELS = {
+    'course_views': 'courseview',
+    'user_activity': 'useractivity',
+    'search_logs': 'searchlog',
+    'video_analytics': 'videoanalytics',
+    'course_analytics': 'courseanalytics',
+    'revenue_reports': 'revenuereport',
+}
+
+# Répartition de --rows entre les tables d'événements
+TABLE_SHARES = {
+    'course_views': 0.5,
+    'user_activity': 0.25,
+    'search_logs': 0.15,
+    'video_analytics': 0.1,
+}
+
+# Profil journalier : poids relatif de chaque heure (pic à PEAK_HOUR)
+PEAK_HOUR = 20
+HOURLY_WEIGHTS = [1 + 0.8 * math.cos(2 * math.pi * (hour - PEAK_HOUR) / 24) for hour in range(24)]
+
+COUNTRIES = (('FR', 'Paris', 30), ('SN', 'Dakar', 15), ('CI', 'Abidjan', 12), ('CM', 'Douala', 10),
+             ('MA', 'Casablanca', 10), ('BE', 'Bruxelles', 8), ('CA', 'Montréal', 8), ('US', 'New York', 7))
+SOURCES = (('search', 40), ('direct', 25), ('email', 15), ('social', 12), ('ads', 8))
+REFERRERS = ('https://www.google.com/search', 'https://www.facebook.com/', 'https://t.co/x', None)
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
+    'Mozilla/5.0 (Linux; Android 13; SM-A515F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0',
+)
+# Types d'activité (les trois derniers alimentent le tunnel de conversion)
+ACTIVITY_TYPES = (('login', 35), ('page_view', 40), ('course_enroll', 15), ('course_complete', 7), ('course_review', 3))
+SEARCH_TOPICS = ('python', 'machine learning', 'excel', 'marketing', 'comptabilité', 'design', 'anglais', 'sql')
+
+DELETE_BY_IDS_SQL = """
+DELETE FROM "{table}"
+WHERE "{column}" IN (SELECT jsonb_array_elements_text($1::jsonb))
+"""
+
+DELETE_SEARCHES_SQL = """
+DELETE FROM "search_logs" WHERE "query" LIKE $1::text || '%'
+"""
+
+CREATE_PARTITION_SQL = """
+CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}"
+FOR VALUES FROM ('{start}') TO ('{end}')
+"""
+
+
+def bench_id(kind: str, rank: int) -> str:
+    """UUID déterministe du `rank`-ième cours / leçon / utilisateur généré"""
+    return str(uuid.uuid5(BENCH_NAMESPACE, f"{kind}:{rank}"))
+
+
+def zipf_weights(n: int, exponent: float) -> List[float]:
+    """Poids cumulés d'une loi de Zipf sur les rangs 0..n-1"""
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+
+
+class SyntheticData:
+    """Tirages reproductibles des lignes de chaque table"""
+
+    def __init__(
+        self,
+        days: int = 90,
+        courses: int = 2000,
+        lessons_per_course: int = 12,
+        users: int = 200_000,
+        queries: int = 20_000,
+        exponent: float = 1.1,
+        seed: int = 42,
+        end: Optional[datetime] = None
+    ):
+        self.days = days
+        self.courses = courses
+        self.lessons_per_course = lessons_per_course
+        self.users = users
+        self.queries = queries
+        self.end = (end or datetime.now()).replace(microsecond=0)
+        self.start = (self.end - timedelta(days=days)).replace(hour=0, minute=0, second=0)
+        self.rng = random.Random(seed)
+
+        self.course_ids = [bench_id('course', rank) for rank in range(courses)]
+        self.user_ids = [bench_id('user', rank) for rank in range(users)]
+        self.course_weights = zipf_weights(courses, exponent)
+        # L'activité des utilisateurs est moins concentrée que la popularité des cours
+        self.user_weights = zipf_weights(users, 0.8)
+        self.query_weights = zipf_weights(queries, exponent)
+
+    def lesson_id(self, course_rank: int, lesson: int) -> str:
+        return bench_id('lesson', course_rank * self.lessons_per_course + lesson)
+
+    def timestamps(self, k: int) -> List[datetime]:
+        """`k` instants de la période, répartis selon le profil journalier"""
+        hours = self.rng.choices(range(24), weights=HOURLY_WEIGHTS, k=k)
+        # Jours entiers avant `end` : aucun instant dans le futur
+        return [
+            self.start + timedelta(
+                days=self.rng.randrange(self.days),
+                hours=hour,
+                seconds=self.rng.randrange(3600)
+            )
+            for hour in hours
+        ]
+
+    def course_ranks(self, k: int) -> List[int]:
+        return self.rng.choices(range(self.courses), cum_weights=self.course_weights, k=k)
+
+    def user_ranks(self, k: int) -> List[int]:
+        return self.rng.choices(range(self.users), cum_weights=self.user_weights, k=k)
+
+    def course_views(self, k: int) -> List[Dict[str, Any]]:
+        """Vues enrichies comme à l'ingestion (device / browser / os)"""
+        from apps.analytics.services.course_view_service import enrich_view
+
+        rng = self.rng
+        locations = rng.choices(COUNTRIES, weights=[c[2] for c in COUNTRIES], k=k)
+        sources = rng.choices(SOURCES, weights=[s[1] for s in SOURCES], k=k)
+        rows = []
+        for course, user, viewed_at, (country, city, _), (source, _) in zip(
+            self.course_ranks(k), self.user_ranks(k), self.timestamps(k), locations, sources
+        ):
+            rows.append(enrich_view({
+                'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'courseId': self.course_ids[course],
+                # Environ 30 % de visiteurs anonymes
+                'userId': self.user_ids[user] if rng.random() < 0.7 else None,
+                'ipAddress': f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                'userAgent': rng.choice(USER_AGENTS),
+                'country': country,
+                'city': city,
+                'referrer': rng.choice(REFERRERS),
+                'source': source,
+                'viewedAt': viewed_at,
+            }))
+        return rows
+
+    def user_activity(self, k: int) -> List[Dict[str, Any]]:
+        rng = self.rng
+        rows = []
+        event_types = rng.choices(ACTIVITY_TYPES, weights=[t[1] for t in ACTIVITY_TYPES], k=k)
+        for (event_type, _), user, course, created_at in zip(
+            event_types, self.user_ranks(k), self.course_ranks(k), self.timestamps(k)
+        ):
+            metadata = {'bench': True}
+            if event_type.startswith('course_'):
+                metadata['course_id'] = self.course_ids[course]
+            rows.append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'userId': self.user_ids[user],
+                'eventType': event_type,
+                'metadata': metadata,
+                'createdAt': created_at,
+            })
+        return rows
+
+    def search_logs(self, k: int) -> List[Dict[str, Any]]:
+        rng = self.rng
+        queries = rng.choices(range(self.queries), cum_weights=self.query_weights, k=k)
+        rows = []
+        for query, user, searched_at in zip(queries, self.user_ranks(k), self.timestamps(k)):
+            zero = rng.random() < 0.1
+            rows.append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'query': f"{BENCH_PREFIX}{SEARCH_TOPICS[query % len(SEARCH_TOPICS)]} {query}",
+                'userId': self.user_ids[user] if rng.random() < 0.6 else None,
+                'resultsCount': 0 if zero else rng.randrange(1, 50),
+                'clickedResult': None if zero or rng.random() < 0.6 else self.course_ids[rng.randrange(self.courses)],
+                'searchedAt': searched_at,
+            })
+        return rows
+
+    def video_analytics(self, k: int) -> List[Dict[str, Any]]:
+        """Lignes (leçon, étudiant) ; les couples déjà tirés sont ignorés à l'insertion"""
+        from prisma import fields
+        from apps.analytics.services.watch_coverage import segment_bitmap
+
+        rng = self.rng
+        rows = []
+        for course, user, updated_at in zip(self.course_ranks(k), self.user_ranks(k), self.timestamps(k)):
+            duration = rng.randrange(300, 1800)
+            # Décrochage : beaucoup d'étudiants s'arrêtent tôt
+            watched = int(duration * min(1.0, rng.expovariate(2.0)))
+            bitmap = segment_bitmap(0, watched)
+            rows.append({
+                'lessonId': self.lesson_id(course, rng.randrange(self.lessons_per_course)),
+                'studentId': self.user_ids[user],
+                'totalWatchTime': watched + rng.randrange(0, max(watched // 4, 1)),
+                'completionRate': round(watched / duration * 100, 2),
+                'pauseCount': rng.randrange(0, 8),
+                'rewindCount': rng.randrange(0, 5),
+                'speedChanges': rng.randrange(0, 3),
+                'lastPosition': watched,
+                'watchedSeconds': fields.Base64.encode(bitmap) if bitmap else None,
+                'createdAt': updated_at,
+                'updatedAt': updated_at,
+            })
+        return rows
+
+    def course_analytics(self) -> Iterator[Dict[str, Any]]:
+        """Compteurs journaliers des cours (popularité de Zipf, bruit de ±20 %)"""
+        rng = self.rng
+        total = self.course_weights[-1]
+        previous = 0.0
+        for course_id, cumulative in zip(self.course_ids, self.course_weights):
+            share = (cumulative - previous) / total
+            previous = cumulative
+            for day in range(self.days):
+                views = int(50_000 * share * rng.uniform(0.8, 1.2))
+                if not views:
+                    continue
+                ratings = rng.randrange(0, max(views // 50, 1))
+                rating_sum = round(ratings * rng.uniform(3.5, 4.8), 2)
+                yield {
+                    'courseId': course_id,
+                    'date': datetime.combine(self.start.date() + timedelta(days=day), datetime.min.time()),
+                    'views': views,
+                    'enrollments': views // rng.randrange(5, 15),
+                    'completions': views // rng.randrange(20, 60),
+                    'avgRating': round(rating_sum / ratings, 2) if ratings else None,
+                    'ratingSum': rating_sum,
+                    'ratingCount': ratings,
+                }
+
+    def revenue_reports(self) -> List[Dict[str, Any]]:
+        rng = self.rng
+        rows = []
+        for day in range(self.days + 1):
+            orders = rng.randrange(50, 400)
+            rows.append({
+                'date': datetime.combine(self.start.date() + timedelta(days=day), datetime.min.time()),
+                'totalRevenue': round(orders * rng.uniform(15, 60), 2),
+                'totalOrders': orders,
+            })
+        return rows
+
+
+def batches(rows: int, batch_size: int) -> Iterator[int]:
+    while rows > 0:
+        yield min(batch_size, rows)
+        rows -= batch_size
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def insert_batches(
+    model: str,
+    make_batches: Iterator[List[Dict[str, Any]]],
+    concurrency: int
+) -> int:
+    """
+    Insérer des lots par create_many, `concurrency` à la fois : le lot
+    suivant est généré pendant que les précédents sont écrits
+    """
+    db = await get_prisma_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    inserted = 0
+    tasks = []
+
+    async def insert(batch: List[Dict[str, Any]]):
+        nonlocal inserted
+        try:
+            inserted += await getattr(db, model).create_many(data=batch, skip_duplicates=True)
+        finally:
+            semaphore.release()
+
+    for batch in make_batches:
+        await semaphore.acquire()
+        tasks.append(asyncio.ensure_future(insert(batch)))
+        # Laisser les insertions démarrer avant de générer le lot suivant
+        await asyncio.sleep(0)
+    # Remonte la première erreur d'insertion
+    await asyncio.gather(*tasks)
+
+    return inserted
+
+
+async def ensure_partitions(first_day: date):
+    """Partitions mensuelles couvrant la période générée (passé compris)"""
+    from apps.analytics.services.partition_maintenance import (
+        PARTITIONED_TABLES, PartitionMaintenance, add_months, partition_name
+    )
+
+    maintenance = PartitionMaintenance(drop_expired=False)
+    await maintenance.connect()
+    current = date.today().replace(day=1)
+    for table in PARTITIONED_TABLES:
+        month = first_day.replace(day=1)
+        while month < current:
+            await maintenance.db.execute_raw(CREATE_PARTITION_SQL.format(
+                name=partition_name(table, month),
+                table=table,
+                start=month.isoformat(),
+                end=add_months(month, 1).isoformat()
+            ))
+            month = add_months(month, 1)
+        await maintenance.ensure_partitions(table, date.today())
+
+
+async def generate(
+    data: SyntheticData,
+    rows: int,
+    tables: Sequence[str],
+    batch_size: int,
+    concurrency: int,
+    progress: Callable[[str], None] = print
+) -> Dict[str, Any]:
+    """Insérer les lignes synthétiques ; retourne le nombre de lignes et la durée par table"""
+    db = await get_prisma_client()
+    await ensure_partitions(data.start.date())
+    report: Dict[str, Any] = {}
+
+    for table in tables:
+        start = time.perf_counter()
+        if table in TABLE_SHARES:
+            generator = getattr(data, table)
+            row_batches = (generator(size) for size in batches(int(rows * TABLE_SHARES[table]), batch_size))
+        else:
+            row_batches = chunked(getattr(data, table)(), batch_size)
+        inserted = await insert_batches(TABLE_MODELS[table], row_batches, concurrency)
+
+        await db.execute_raw(f'ANALYZE "{table}"')
+        elapsed = time.perf_counter() - start
+        report[table] = {
+            'rows': inserted,
+            'elapsed_s': round(elapsed, 1),
+            'rows_per_second': round(inserted / elapsed) if elapsed else None,
+        }
+        progress(f"{table}: {inserted} rows in {elapsed:.1f}s")
+
+    return report
+
+
+def refresh_derived(days: int) -> Dict[str, Any]:
+    """Rollups, résumés et structures Redis reconstruits à partir des lignes générées"""
+    from apps.analytics import tasks
+
+    # Une passe de rollup couvre au plus 24 h
+    max_runs = days + 2
+    return {
+        'search_rollup_rows': tasks.refresh_search_rollup(max_runs=max_runs),
+        'user_activity_rollup_rows': tasks.refresh_user_activity_rollup(max_runs=max_runs),
+        'engagement_sketch_rows': tasks.refresh_engagement_sketches(max_runs=max_runs),
+        'course_viewers': tasks.backfill_course_viewers(days=days),
+        'active_users': tasks.backfill_active_users(days=days),
+        'top_courses': tasks.refresh_top_courses(),
+    }
+
+
+async def cleanup(data: SyntheticData) -> Dict[str, int]:
+    """Supprimer les lignes générées (identifiants déterministes, préfixe des requêtes)"""
+    db = await get_prisma_client()
+    lesson_ids = [
+        data.lesson_id(course, lesson)
+        for course in range(data.courses)
+        for lesson in range(data.lessons_per_course)
+    ]
+    deleted = {'search_logs': await db.execute_raw(DELETE_SEARCHES_SQL, BENCH_PREFIX)}
+
+    targets = (
+        ('course_views', 'courseId', data.course_ids),
+        ('course_analytics', 'courseId', data.course_ids),
+        ('user_activity', 'userId', data.user_ids),
+        ('video_analytics', 'lessonId', lesson_ids),
+        ('lesson_engagement_sketches', 'lessonId', lesson_ids),
+    )
+    for table, column, ids in targets:
+        deleted[table] = 0
+        for chunk in chunked(ids, 10_000):
+            deleted[table] += await db.execute_raw(
+                DELETE_BY_IDS_SQL.format(table=table, column=column),
+                json.dumps(chunk)
+            )
+    return deleted
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Options de génération, partagées avec la suite de benchmarks"""
+    parser.add_argument('--rows', type=int, default=1_000_000, help="lignes d'événements, réparties entre les tables")
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--lessons-per-course', type=int, default=12)
+    parser.add_argument('--users', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=20_000)
+    parser.add_argument('--zipf', type=float, default=1.1, help='exposant de la loi de Zipf')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=PRISMA_CONNECTION_LIMIT)
+    parser.add_argument(
+        '--tables', nargs='+',
+        default=list(TABLE_MODELS),
+        choices=list(TABLE_MODELS)
+    )
+
+
+def data_from_args(args) -> SyntheticData:
+    return SyntheticData(
+        days=args.days,
+        courses=args.courses,
+        lessons_per_course=args.lessons_per_course,
+        users=args.users,
+        queries=args.queries,
+        exponent=args.zipf,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument('--skip-derived', action='store_true', help='ne pas reconstruire rollups et structures Redis')
+    parser.add_argument('--cleanup', action='store_true')
+    args = parser.parse_args()
+
+    django.setup()
+    data = data_from_args(args)
+
+    if args.cleanup:
+        report = worker_async_to_sync(cleanup)(data)
+    else:
+        report = {'tables': worker_async_to_sync(generate)(
+            data, args.rows, args.tables, args.batch_size, args.concurrency
+        )}
+        if not args.skip_derived:
+            report['derived'] = refresh_derived(args.days)
+
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark : débit d'ingestion des événements vidéo, un POST par événement
+(video/event/, video/watch-time/) vs un seul POST video/events/batch/.
+
+Usage :
+    DJANGO_SETTINGS_MODULE=config.settings python -m benchmarks.video_event_batch_bench --events 500
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+
+import django
+from asgiref.sync import async_to_sync
+
+
+class BenchUser:
+    """Utilisateur minimal pour passer IsAuthenticated"""
+    is_authenticated = True
+    is_active = True
+    is_staff = True
+
+
+def make_events(count: int, students: int):
+    lesson_id = str(uuid.uuid4())
+    student_ids = [str(uuid.uuid4()) for _ in range(students)]
+    events = []
+    position = 0
+
+    for _ in range(count):
+        student_id = random.choice(student_ids)
+        event_type = random.choice(['pause', 'rewind', 'speed_change', 'watch_time'])
+        event = {'lesson_id': lesson_id, 'student_id': student_id, 'event_type': event_type}
+        if event_type == 'watch_time':
+            position += 10
+            event.update({'watch_time': 10, 'position': position})
+        events.append(event)
+
+    return events
+
+
+async def respond(pending):
+    response = await pending
+    return response.render()
+
+
+def run(count: int, students: int):
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from apps.analytics.views import VideoEventView, UpdateWatchTimeView, VideoEventBatchView
+
+    factory = APIRequestFactory()
+    user = BenchUser()
+
+    def post(view, path, data):
+        request = factory.post(path, data, format='json')
+        force_authenticate(request, user=user)
+        # Vues async : la coroutine est attendue comme par le handler WSGI de Django
+        return async_to_sync(respond)(view(request))
+
+    event_view = VideoEventView.as_view()
+    watch_view = UpdateWatchTimeView.as_view()
+    batch_view = VideoEventBatchView.as_view()
+
+    single_events = make_events(count, students)
+    batch_events = make_events(count, students)
+
+    with override_settings(VIDEO_EVENT_BUFFER_ENABLED=False):
+        start = time.perf_counter()
+        for event in single_events:
+            if event['event_type'] == 'watch_time':
+                post(watch_view, '/api/analytics/video/watch-time/', event)
+            else:
+                post(event_view, '/api/analytics/video/event/', event)
+        single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = post(batch_view, '/api/analytics/video/events/batch/', {'events': batch_events})
+    batch_elapsed = time.perf_counter() - start
+
+    return {
+        'events': count,
+        'students': students,
+        'single_event_requests': {
+            'requests': count,
+            'elapsed_s': round(single_elapsed, 3),
+            'events_per_second': round(count / single_elapsed, 1),
+        },
+        'batch_request': {
+            'requests': 1,
+            'status_code': response.status_code,
+            'elapsed_s': round(batch_elapsed, 3),
+            'events_per_second': round(count / batch_elapsed, 1),
+        },
+        'speedup': round(single_elapsed / batch_elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--students', type=int, default=20)
+    args = parser.parse_args()
+
+    django.setup()
+    print(json.dumps(run(args.events, args.students), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,53 @@
 import os
+import asyncio
+import logging
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Après get_asgi_application : les apps Django sont chargées
+from shared.shared.utils.prisma_client import bind_worker_loop, disconnect_prisma, get_prisma_client
+from apps.analytics.services import video_event_buffer
+
+logger = logging.getLogger(__name__)
+
+
+async def lifespan(receive, send):
+    """
+    Cycle de vie du worker uvicorn : la boucle du serveur devient la boucle
+    du worker et le client Prisma (un pool par worker) est connecté avant la
+    première requête ; à l'arrêt, le buffer vidéo est vidé puis le client
+    déconnecté.
+    """
+    while True:
+        message = await receive()
+
+        if message['type'] == 'lifespan.startup':
+            bind_worker_loop(asyncio.get_running_loop())
+            try:
+                await get_prisma_client()
+            except Exception as e:
+                # Le worker démarre quand même : /api/health/ signale la base indisponible
+                logger.error(f"Error connecting Prisma client: {str(e)}")
+            await send({'type': 'lifespan.startup.complete'})
+
+        elif message['type'] == 'lifespan.shutdown':
+            try:
+                await video_event_buffer.close()
+            except Exception as e:
+                logger.error(f"Error flushing video event buffer: {str(e)}")
+            await disconnect_prisma()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    # Serveur lancé sans lifespan : liaison à la première requête
+    bind_worker_loop(asyncio.get_running_loop())
+    await django_application(scope, receive, send)
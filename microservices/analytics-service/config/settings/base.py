@@ -57,6 +57,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database (Prisma handles this)
 DATABASE_URL = config('DATABASE_URL', default='')
@@ -150,6 +151,138 @@ REDIS_URL = config('REDIS_URL', default='redis://redis:6379')
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://redis:6379/1')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default=REDIS_URL)
 
+# Buffer write-behind des événements vidéo (pause/rewind/vitesse/temps de visionnage)
+VIDEO_EVENT_BUFFER_ENABLED = config('VIDEO_EVENT_BUFFER_ENABLED', default=True, cast=bool)
+VIDEO_EVENT_BUFFER_FLUSH_INTERVAL = config('VIDEO_EVENT_BUFFER_FLUSH_INTERVAL', default=5.0, cast=float)
+VIDEO_EVENT_BUFFER_MAX_KEYS = config('VIDEO_EVENT_BUFFER_MAX_KEYS', default=500, cast=int)
+
+# File des vues de cours (Redis -> Celery -> create_many)
+COURSE_VIEW_QUEUE_ENABLED = config('COURSE_VIEW_QUEUE_ENABLED', default=True, cast=bool)
+COURSE_VIEW_QUEUE_KEY = config('COURSE_VIEW_QUEUE_KEY', default='analytics:course_views:queue')
+COURSE_VIEW_BATCH_SIZE = config('COURSE_VIEW_BATCH_SIZE', default=500, cast=int)
+# Échecs d'insertion avant la dead letter (<key>:dead), délai avant reprise d'un lot réservé
+COURSE_VIEW_MAX_ATTEMPTS = config('COURSE_VIEW_MAX_ATTEMPTS', default=10, cast=int)
+COURSE_VIEW_QUEUE_VISIBILITY_TIMEOUT = config('COURSE_VIEW_QUEUE_VISIBILITY_TIMEOUT', default=300.0, cast=float)
+
+# Lecture des vues brutes (pagination keyset et export en flux)
+COURSE_VIEWS_PAGE_MAX_SIZE = config('COURSE_VIEWS_PAGE_MAX_SIZE', default=1000, cast=int)
+COURSE_VIEWS_EXPORT_BATCH_SIZE = config('COURSE_VIEWS_EXPORT_BATCH_SIZE', default=2000, cast=int)
+
+# Tâches planifiées (celery beat)
+# Agrégation incrémentale des logs de recherche (search_daily_rollups)
+SEARCH_ROLLUP_INTERVAL = config('SEARCH_ROLLUP_INTERVAL', default=300.0, cast=float)
+SEARCH_ROLLUP_LAG_SECONDS = config('SEARCH_ROLLUP_LAG_SECONDS', default=60, cast=int)
+SEARCH_ROLLUP_MAX_SPAN_HOURS = config('SEARCH_ROLLUP_MAX_SPAN_HOURS', default=24, cast=int)
+
+# Agrégation incrémentale de l'activité utilisateur (user_activity_daily)
+USER_ACTIVITY_ROLLUP_ENABLED = config('USER_ACTIVITY_ROLLUP_ENABLED', default=True, cast=bool)
+USER_ACTIVITY_ROLLUP_INTERVAL = config('USER_ACTIVITY_ROLLUP_INTERVAL', default=300.0, cast=float)
+USER_ACTIVITY_ROLLUP_LAG_SECONDS = config('USER_ACTIVITY_ROLLUP_LAG_SECONDS', default=60, cast=int)
+USER_ACTIVITY_ROLLUP_MAX_SPAN_HOURS = config('USER_ACTIVITY_ROLLUP_MAX_SPAN_HOURS', default=24, cast=int)
+
+# Résumés d'engagement par leçon (percentiles de visionnage, histogramme de complétion)
+ENGAGEMENT_SKETCH_INTERVAL = config('ENGAGEMENT_SKETCH_INTERVAL', default=60.0, cast=float)
+ENGAGEMENT_SKETCH_LAG_SECONDS = config('ENGAGEMENT_SKETCH_LAG_SECONDS', default=5, cast=int)
+ENGAGEMENT_SKETCH_MAX_SPAN_HOURS = config('ENGAGEMENT_SKETCH_MAX_SPAN_HOURS', default=24, cast=int)
+
+# Bitmaps des secondes regardées (au-delà, les positions sont ignorées)
+WATCH_COVERAGE_MAX_SECONDS = config('WATCH_COVERAGE_MAX_SECONDS', default=14400, cast=int)
+
+# Viewers uniques par cours et par jour (HyperLogLog Redis)
+COURSE_VIEWER_HLL_ENABLED = config('COURSE_VIEWER_HLL_ENABLED', default=True, cast=bool)
+COURSE_VIEWER_HLL_RETENTION_DAYS = config('COURSE_VIEWER_HLL_RETENTION_DAYS', default=400, cast=int)
+
+# Utilisateurs actifs par jour (bitmaps Redis : DAU/WAU/MAU, rétention par cohorte)
+# Suivi en direct inactif tant que la tâche backfill_active_users n'a pas tourné
+ACTIVE_USER_BITMAP_ENABLED = config('ACTIVE_USER_BITMAP_ENABLED', default=True, cast=bool)
+ACTIVE_USER_BITMAP_RETENTION_DAYS = config('ACTIVE_USER_BITMAP_RETENTION_DAYS', default=400, cast=int)
+
+# Recherches tendance (Space-Saving par worker, fusion via Redis)
+TRENDING_SEARCH_ENABLED = config('TRENDING_SEARCH_ENABLED', default=True, cast=bool)
+TRENDING_SEARCH_CAPACITY = config('TRENDING_SEARCH_CAPACITY', default=500, cast=int)
+TRENDING_SEARCH_PUBLISH_INTERVAL = config('TRENDING_SEARCH_PUBLISH_INTERVAL', default=10.0, cast=float)
+TRENDING_SEARCH_CACHE_SECONDS = config('TRENDING_SEARCH_CACHE_SECONDS', default=2.0, cast=float)
+
+# Classements précalculés des meilleurs cours (7/30/90 jours)
+TOP_COURSES_RANKING_SIZE = config('TOP_COURSES_RANKING_SIZE', default=100, cast=int)
+TOP_COURSES_REFRESH_INTERVAL = config('TOP_COURSES_REFRESH_INTERVAL', default=300.0, cast=float)
+
+# Statistiques groupées de plusieurs cours (tableau de bord formateur)
+COURSE_BATCH_STATS_MAX_COURSES = config('COURSE_BATCH_STATS_MAX_COURSES', default=50, cast=int)
+COURSE_BATCH_STATS_MAX_DAYS = config('COURSE_BATCH_STATS_MAX_DAYS', default=366, cast=int)
+
+# Tunnel de conversion par cours (vue -> inscription -> complétion -> avis)
+COURSE_FUNNEL_MAX_DAYS = config('COURSE_FUNNEL_MAX_DAYS', default=366, cast=int)
+
+# Cache de lecture des endpoints analytics (L1 par worker + Redis, TTL en secondes)
+ANALYTICS_CACHE_ENABLED = config('ANALYTICS_CACHE_ENABLED', default=True, cast=bool)
+ANALYTICS_CACHE_L1_SECONDS = config('ANALYTICS_CACHE_L1_SECONDS', default=5.0, cast=float)
+ANALYTICS_CACHE_L1_MAX_KEYS = config('ANALYTICS_CACHE_L1_MAX_KEYS', default=1000, cast=int)
+ANALYTICS_CACHE_INVALIDATION_DEBOUNCE = config('ANALYTICS_CACHE_INVALIDATION_DEBOUNCE', default=5.0, cast=float)
+ANALYTICS_CACHE_TTLS = {
+    'course_stats': config('CACHE_TTL_COURSE_STATS', default=30, cast=int),
+    'top_courses': config('CACHE_TTL_TOP_COURSES', default=60, cast=int),
+    'daily_revenue': config('CACHE_TTL_DAILY_REVENUE', default=300, cast=int),
+    'monthly_revenue': config('CACHE_TTL_MONTHLY_REVENUE', default=300, cast=int),
+    'popular_searches': config('CACHE_TTL_POPULAR_SEARCHES', default=60, cast=int),
+    'lesson_engagement': config('CACHE_TTL_LESSON_ENGAGEMENT', default=30, cast=int),
+    'lesson_heatmap': config('CACHE_TTL_LESSON_HEATMAP', default=300, cast=int),
+    'active_users': config('CACHE_TTL_ACTIVE_USERS', default=60, cast=int),
+    'retention': config('CACHE_TTL_RETENTION', default=300, cast=int),
+    'course_funnel': config('CACHE_TTL_COURSE_FUNNEL', default=300, cast=int),
+}
+
+# Partitions mensuelles et rétention des tables d'événements (en mois)
+PARTITION_PREMAKE_MONTHS = config('PARTITION_PREMAKE_MONTHS', default=3, cast=int)
+PARTITION_DROP_EXPIRED = config('PARTITION_DROP_EXPIRED', default=True, cast=bool)
+ANALYTICS_RETENTION_MONTHS = {
+    'course_views': config('RETENTION_COURSE_VIEWS_MONTHS', default=13, cast=int),
+    'search_logs': config('RETENTION_SEARCH_LOGS_MONTHS', default=6, cast=int),
+    'user_activity': config('RETENTION_USER_ACTIVITY_MONTHS', default=13, cast=int),
+    # Progression des étudiants : purge désactivée tant que la valeur est 0
+    'video_analytics': config('RETENTION_VIDEO_ANALYTICS_MONTHS', default=0, cast=int),
+}
+
+# Export Parquet incrémental pour la BI (manifeste + fichiers zstd par table)
+PARQUET_EXPORT_DIR = config('PARQUET_EXPORT_DIR', default=str(BASE_DIR / 'exports'))
+PARQUET_EXPORT_INTERVAL = config('PARQUET_EXPORT_INTERVAL', default=3600.0, cast=float)
+PARQUET_EXPORT_BATCH_SIZE = config('PARQUET_EXPORT_BATCH_SIZE', default=50000, cast=int)
+# Recul de la borne d'export ; porté pour course_views à
+# COURSE_VIEW_MAX_ATTEMPTS * COURSE_VIEW_QUEUE_VISIBILITY_TIMEOUT (délai maximal de la file)
+PARQUET_EXPORT_LAG_SECONDS = config('PARQUET_EXPORT_LAG_SECONDS', default=300, cast=int)
+PARQUET_EXPORT_ZSTD_LEVEL = config('PARQUET_EXPORT_ZSTD_LEVEL', default=3, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    'flush-course-views': {
+        'task': 'apps.analytics.tasks.flush_course_views',
+        'schedule': 5.0,
+    },
+    'refresh-search-rollup': {
+        'task': 'apps.analytics.tasks.refresh_search_rollup',
+        'schedule': SEARCH_ROLLUP_INTERVAL,
+    },
+    'refresh-user-activity-rollup': {
+        'task': 'apps.analytics.tasks.refresh_user_activity_rollup',
+        'schedule': USER_ACTIVITY_ROLLUP_INTERVAL,
+    },
+    'refresh-engagement-sketches': {
+        'task': 'apps.analytics.tasks.refresh_engagement_sketches',
+        'schedule': ENGAGEMENT_SKETCH_INTERVAL,
+    },
+    'refresh-top-courses': {
+        'task': 'apps.analytics.tasks.refresh_top_courses',
+        'schedule': TOP_COURSES_REFRESH_INTERVAL,
+    },
+    'maintain-partitions': {
+        'task': 'apps.analytics.tasks.maintain_partitions',
+        'schedule': 86400.0,
+    },
+    'export-parquet': {
+        'task': 'apps.analytics.tasks.export_parquet',
+        'schedule': PARQUET_EXPORT_INTERVAL,
+    },
+}
+
 # Logging
 LOGGING = {
     'version': 1,
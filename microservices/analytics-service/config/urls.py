@@ -4,9 +4,18 @@ from django.urls import path, include
 from django.http import JsonResponse
 from django.conf import settings
 from django.conf.urls.static import static
+from shared.shared.utils.prisma_client import check_prisma_health, run_on_worker_loop
 
-def health_check(request):
-    return JsonResponse({"status": "healthy", "service": "analytics"})
+async def health_check(request):
+    database_ok = await run_on_worker_loop(check_prisma_health())
+    return JsonResponse(
+        {
+            "status": "healthy" if database_ok else "unhealthy",
+            "service": "analytics",
+            "database": "up" if database_ok else "down",
+        },
+        status=200 if database_ok else 503
+    )
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -76,15 +76,22 @@ if [ "$RUN_SEED" = "true" ]; then
     python prisma/seed.py || echo "⚠️ Seeding failed (may already be done)"
 fi
 
+# Commande explicite (ex. celery worker / beat)
+if [ $# -gt 0 ]; then
+    echo "🎯 Running: $*"
+    exec "$@"
+fi
+
 # Démarrer le serveur
 echo "🎯 Starting Django server on 0.0.0.0:8011..."
+# ASGI : une boucle d'événements et un client Prisma par worker uvicorn
 if [ "$DEBUG" = "True" ]; then
-    exec python manage.py runserver 0.0.0.0:8011
+    exec uvicorn config.asgi:application --host 0.0.0.0 --port 8011 --reload
 else
-    exec gunicorn config.wsgi:application \
+    exec gunicorn config.asgi:application \
         --bind 0.0.0.0:8011 \
         --workers 4 \
-        --threads 2 \
+        --worker-class uvicorn.workers.UvicornWorker \
         --timeout 120 \
         --access-logfile /app/logs/access.log \
         --error-logfile /app/logs/error.log \
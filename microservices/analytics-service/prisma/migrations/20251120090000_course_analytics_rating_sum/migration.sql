@@ -0,0 +1,8 @@
+-- AlterTable
+ALTER TABLE "course_analytics" ADD COLUMN "ratingSum" DOUBLE PRECISION NOT NULL DEFAULT 0,
+ADD COLUMN "ratingCount" INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill : l'ancienne moyenne compte pour une note
+UPDATE "course_analytics"
+SET "ratingSum" = "avgRating", "ratingCount" = 1
+WHERE "avgRating" IS NOT NULL;
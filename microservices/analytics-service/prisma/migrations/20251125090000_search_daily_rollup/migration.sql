@@ -0,0 +1,24 @@
+-- CreateTable
+CREATE TABLE "search_daily_rollups" (
+    "id" TEXT NOT NULL,
+    "date" DATE NOT NULL,
+    "query" TEXT NOT NULL,
+    "count" INTEGER NOT NULL DEFAULT 0,
+    "zeroResultCount" INTEGER NOT NULL DEFAULT 0,
+    "clickCount" INTEGER NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "search_daily_rollups_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "rollup_watermarks" (
+    "name" TEXT NOT NULL,
+    "watermark" TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "rollup_watermarks_pkey" PRIMARY KEY ("name")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "search_daily_rollups_date_query_key" ON "search_daily_rollups"("date", "query");
@@ -0,0 +1,23 @@
+-- CreateTable
+CREATE TABLE "user_activity_daily" (
+    "id" TEXT NOT NULL,
+    "userId" TEXT NOT NULL,
+    "eventType" TEXT NOT NULL,
+    "date" DATE NOT NULL,
+    "count" INTEGER NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "user_activity_daily_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "user_activity_createdAt_userId_idx" ON "user_activity"("createdAt", "userId");
+
+-- CreateIndex
+CREATE INDEX "user_activity_daily_userId_date_eventType_count_idx" ON "user_activity_daily"("userId", "date", "eventType", "count");
+
+-- CreateIndex
+CREATE INDEX "user_activity_daily_date_userId_count_idx" ON "user_activity_daily"("date", "userId", "count");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "user_activity_daily_userId_eventType_date_key" ON "user_activity_daily"("userId", "eventType", "date");
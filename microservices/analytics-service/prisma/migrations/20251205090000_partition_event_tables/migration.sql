@@ -0,0 +1,171 @@
+-- Partitionnement mensuel (RANGE) des tables d'événements append-only.
+-- La clé primaire inclut la colonne de partitionnement (contrainte Postgres) ;
+-- les ids restent des UUID générés par l'application.
+-- Les partitions couvrent les données existantes et les 3 prochains mois ;
+-- la commande maintain_partitions crée ensuite les mois suivants.
+-- Une partition DEFAULT par table reçoit les lignes hors des mois créés
+-- (horloge décalée, maintenance en retard) au lieu de faire échouer l'INSERT ;
+-- maintain_partitions les déplace dans leur partition mensuelle.
+
+-- ==================== course_views ====================
+ALTER TABLE "course_views" RENAME TO "course_views_legacy";
+ALTER INDEX "course_views_pkey" RENAME TO "course_views_legacy_pkey";
+ALTER INDEX "course_views_courseId_viewedAt_idx" RENAME TO "course_views_legacy_courseId_viewedAt_idx";
+ALTER INDEX "course_views_userId_viewedAt_idx" RENAME TO "course_views_legacy_userId_viewedAt_idx";
+
+-- CreateTable
+CREATE TABLE "course_views" (
+    "id" TEXT NOT NULL,
+    "courseId" TEXT NOT NULL,
+    "userId" TEXT,
+    "ipAddress" TEXT,
+    "userAgent" TEXT,
+    "country" TEXT,
+    "city" TEXT,
+    "referrer" TEXT,
+    "source" TEXT,
+    "viewedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "course_views_pkey" PRIMARY KEY ("id", "viewedAt")
+) PARTITION BY RANGE ("viewedAt");
+
+-- CreateIndex
+CREATE INDEX "course_views_courseId_viewedAt_idx" ON "course_views"("courseId", "viewedAt");
+
+-- CreateIndex
+CREATE INDEX "course_views_userId_viewedAt_idx" ON "course_views"("userId", "viewedAt");
+
+-- CreatePartitions
+DO $$
+DECLARE
+    month_start DATE;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + INTERVAL '3 months')::date;
+BEGIN
+    SELECT date_trunc('month', COALESCE(MIN("viewedAt"), CURRENT_TIMESTAMP))::date
+    INTO month_start
+    FROM "course_views_legacy";
+
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF "course_views" FOR VALUES FROM (%L) TO (%L)',
+            'course_views_p' || to_char(month_start, 'YYYY_MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+-- CreateDefaultPartition
+CREATE TABLE "course_views_default" PARTITION OF "course_views" DEFAULT;
+
+-- CopyData
+INSERT INTO "course_views" SELECT * FROM "course_views_legacy";
+
+DROP TABLE "course_views_legacy";
+
+-- ==================== search_logs ====================
+ALTER TABLE "search_logs" RENAME TO "search_logs_legacy";
+ALTER INDEX "search_logs_pkey" RENAME TO "search_logs_legacy_pkey";
+ALTER INDEX "search_logs_query_searchedAt_idx" RENAME TO "search_logs_legacy_query_searchedAt_idx";
+ALTER INDEX "search_logs_userId_searchedAt_idx" RENAME TO "search_logs_legacy_userId_searchedAt_idx";
+
+-- CreateTable
+CREATE TABLE "search_logs" (
+    "id" TEXT NOT NULL,
+    "query" TEXT NOT NULL,
+    "userId" TEXT,
+    "ipAddress" TEXT,
+    "resultsCount" INTEGER NOT NULL DEFAULT 0,
+    "clickedResult" TEXT,
+    "searchedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "search_logs_pkey" PRIMARY KEY ("id", "searchedAt")
+) PARTITION BY RANGE ("searchedAt");
+
+-- CreateIndex
+CREATE INDEX "search_logs_query_searchedAt_idx" ON "search_logs"("query", "searchedAt");
+
+-- CreateIndex
+CREATE INDEX "search_logs_userId_searchedAt_idx" ON "search_logs"("userId", "searchedAt");
+
+-- CreatePartitions
+DO $$
+DECLARE
+    month_start DATE;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + INTERVAL '3 months')::date;
+BEGIN
+    SELECT date_trunc('month', COALESCE(MIN("searchedAt"), CURRENT_TIMESTAMP))::date
+    INTO month_start
+    FROM "search_logs_legacy";
+
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF "search_logs" FOR VALUES FROM (%L) TO (%L)',
+            'search_logs_p' || to_char(month_start, 'YYYY_MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+-- CreateDefaultPartition
+CREATE TABLE "search_logs_default" PARTITION OF "search_logs" DEFAULT;
+
+-- CopyData
+INSERT INTO "search_logs" SELECT * FROM "search_logs_legacy";
+
+DROP TABLE "search_logs_legacy";
+
+-- ==================== user_activity ====================
+ALTER TABLE "user_activity" RENAME TO "user_activity_legacy";
+ALTER INDEX "user_activity_pkey" RENAME TO "user_activity_legacy_pkey";
+ALTER INDEX "user_activity_userId_eventType_createdAt_idx" RENAME TO "user_activity_legacy_userId_eventType_createdAt_idx";
+ALTER INDEX "user_activity_createdAt_userId_idx" RENAME TO "user_activity_legacy_createdAt_userId_idx";
+
+-- CreateTable
+CREATE TABLE "user_activity" (
+    "id" TEXT NOT NULL,
+    "userId" TEXT NOT NULL,
+    "eventType" TEXT NOT NULL,
+    "metadata" JSONB,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "user_activity_pkey" PRIMARY KEY ("id", "createdAt")
+) PARTITION BY RANGE ("createdAt");
+
+-- CreateIndex
+CREATE INDEX "user_activity_userId_eventType_createdAt_idx" ON "user_activity"("userId", "eventType", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "user_activity_createdAt_userId_idx" ON "user_activity"("createdAt", "userId");
+
+-- CreatePartitions
+DO $$
+DECLARE
+    month_start DATE;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + INTERVAL '3 months')::date;
+BEGIN
+    SELECT date_trunc('month', COALESCE(MIN("createdAt"), CURRENT_TIMESTAMP))::date
+    INTO month_start
+    FROM "user_activity_legacy";
+
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF "user_activity" FOR VALUES FROM (%L) TO (%L)',
+            'user_activity_p' || to_char(month_start, 'YYYY_MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+-- CreateDefaultPartition
+CREATE TABLE "user_activity_default" PARTITION OF "user_activity" DEFAULT;
+
+-- CopyData
+INSERT INTO "user_activity" SELECT * FROM "user_activity_legacy";
+
+DROP TABLE "user_activity_legacy";
@@ -0,0 +1,5 @@
+-- DropIndex
+DROP INDEX "course_views_courseId_viewedAt_idx";
+
+-- CreateIndex
+CREATE INDEX "course_views_courseId_viewedAt_id_idx" ON "course_views"("courseId", "viewedAt", "id");
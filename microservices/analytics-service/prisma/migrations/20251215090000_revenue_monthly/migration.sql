@@ -0,0 +1,26 @@
+-- CreateTable
+CREATE TABLE "revenue_monthly" (
+    "id" TEXT NOT NULL,
+    "month" DATE NOT NULL,
+    "totalRevenue" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "totalOrders" INTEGER NOT NULL DEFAULT 0,
+    "daysWithSales" INTEGER NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "revenue_monthly_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "revenue_monthly_month_key" ON "revenue_monthly"("month");
+
+-- Backfill depuis les rapports quotidiens existants
+INSERT INTO "revenue_monthly" ("id", "month", "totalRevenue", "totalOrders", "daysWithSales", "updatedAt")
+SELECT
+    gen_random_uuid()::text,
+    date_trunc('month', "date")::date,
+    SUM("totalRevenue"),
+    SUM("totalOrders"),
+    COUNT(*),
+    CURRENT_TIMESTAMP
+FROM "revenue_reports"
+GROUP BY date_trunc('month', "date");
@@ -0,0 +1,19 @@
+-- CreateTable
+CREATE TABLE "lesson_engagement_sketches" (
+    "lessonId" TEXT NOT NULL,
+    "students" INTEGER NOT NULL DEFAULT 0,
+    "zeroWatchTime" INTEGER NOT NULL DEFAULT 0,
+    "watchTimeSum" BIGINT NOT NULL DEFAULT 0,
+    "completionSum" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "pauseSum" BIGINT NOT NULL DEFAULT 0,
+    "rewindSum" BIGINT NOT NULL DEFAULT 0,
+    "speedChangeSum" BIGINT NOT NULL DEFAULT 0,
+    "watchTimeBuckets" JSONB NOT NULL,
+    "completionHistogram" JSONB NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "lesson_engagement_sketches_pkey" PRIMARY KEY ("lessonId")
+);
+
+-- CreateIndex
+CREATE INDEX "video_analytics_updatedAt_lessonId_idx" ON "video_analytics"("updatedAt", "lessonId");
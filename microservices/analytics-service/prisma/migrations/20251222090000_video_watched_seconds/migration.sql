@@ -0,0 +1,18 @@
+-- AlterTable
+ALTER TABLE "video_analytics" ADD COLUMN "watchedSeconds" BYTEA;
+
+-- OU bit à bit de deux bitmaps de longueurs différentes (fusion des secondes regardées)
+CREATE OR REPLACE FUNCTION bytea_or(a BYTEA, b BYTEA) RETURNS BYTEA
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN a IS NULL THEN b
+        WHEN b IS NULL THEN a
+        ELSE (
+            SELECT decode(string_agg(lpad(to_hex(
+                CASE WHEN i < length(a) THEN get_byte(a, i) ELSE 0 END |
+                CASE WHEN i < length(b) THEN get_byte(b, i) ELSE 0 END
+            ), 2, '0'), '' ORDER BY i), 'hex')
+            FROM generate_series(0, GREATEST(length(a), length(b)) - 1) AS i
+        )
+    END
+$$;
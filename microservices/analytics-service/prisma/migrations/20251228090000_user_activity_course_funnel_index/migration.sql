@@ -0,0 +1,3 @@
+-- Événements du tunnel de conversion par cours (index d'expression, non géré par le schéma Prisma)
+CREATE INDEX "user_activity_course_funnel_idx" ON "user_activity" (("metadata"->>'course_id'), "eventType", "createdAt")
+WHERE "eventType" IN ('course_enroll', 'course_complete', 'course_review');
@@ -0,0 +1,4 @@
+-- AlterTable
+ALTER TABLE "course_views" ADD COLUMN "device" TEXT,
+ADD COLUMN "browser" TEXT,
+ADD COLUMN "os" TEXT;
@@ -0,0 +1,16 @@
+-- Identifiants denses des bitmaps d'utilisateurs actifs, auparavant dans un
+-- hash Redis. Les bitmaps existants utilisent les anciens identifiants :
+-- backfill_active_users les reconstruit (le suivi en direct reste inactif
+-- jusqu'à la fin de son premier passage).
+
+-- CreateTable
+CREATE TABLE "active_user_ids" (
+    "userId" TEXT NOT NULL,
+    "denseId" SERIAL NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "active_user_ids_pkey" PRIMARY KEY ("userId")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "active_user_ids_denseId_key" ON "active_user_ids"("denseId");
@@ -0,0 +1,42 @@
+"""
+Enrichissement des événements à l'ingestion (appareil, navigateur, OS, localisation)
+Fichier: shared/shared/utils/enrichment.py
+"""
+from typing import Optional, Dict
+
+from .ip_utils import parse_user_agent
+from .geoip import lookup_ip
+
+
+def enrich_client(
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    country: Optional[str] = None,
+    city: Optional[str] = None
+) -> Dict[str, Optional[str]]:
+    """
+    Colonnes normalisées d'un événement client
+    
+    Le user agent est parsé (cache LRU de ip_utils) ; pays et ville viennent
+    de la table GeoIP locale sauf s'ils sont fournis par l'appelant. Une
+    ville fournie sans pays est gardée telle quelle.
+    
+    Args:
+        ip_address: IP du client
+        user_agent: String user agent
+        country: Pays déjà connu (prioritaire)
+        city: Ville déjà connue (prioritaire)
+        
+    Returns:
+        Dictionnaire avec device, browser, os, country, city
+    """
+    fields = parse_user_agent(user_agent or '')
+    
+    if not country:
+        geo_country, geo_city = lookup_ip(ip_address)
+        country = geo_country
+        city = city or geo_city
+    
+    fields['country'] = country
+    fields['city'] = city
+    return fields
@@ -0,0 +1,121 @@
+"""
+Localisation des IPs à partir d'une table de plages locale
+Fichier: shared/shared/utils/geoip.py
+"""
+from typing import Optional, Tuple, List, Dict, Iterable
+from array import array
+from bisect import bisect_right
+import csv
+import ipaddress
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+Location = Tuple[Optional[str], Optional[str]]
+
+
+class GeoIPTable:
+    """
+    Plages d'IP (début, fin, pays, ville) triées par début, recherche par
+    bisect en O(log n) sans service externe.
+
+    Les bornes IPv4 sont stockées dans des `array` d'entiers 32 bits et les
+    localisations dédupliquées (une plage ne garde que l'indice de son
+    couple pays/ville) : une base de quelques millions de plages tient en
+    quelques dizaines de Mo. Les plages ne doivent pas se chevaucher, comme
+    dans les exports GeoIP/DB-IP habituels.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[str, str, Optional[str], Optional[str]]] = ()):
+        self.locations: List[Location] = []
+        location_ids: Dict[Location, int] = {}
+        rows: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+
+        for start, end, country, city in ranges:
+            first = ipaddress.ip_address(start)
+            last = ipaddress.ip_address(end)
+            if first.version != last.version or int(last) < int(first):
+                raise ValueError(f"Invalid IP range: {start} - {end}")
+
+            location = (country or None, city or None)
+            if location not in location_ids:
+                location_ids[location] = len(self.locations)
+                self.locations.append(location)
+            rows[first.version].append((int(first), int(last), location_ids[location]))
+
+        # Les entiers IPv6 (128 bits) ne tiennent pas dans un array : listes
+        self._tables = {}
+        for version, version_rows in rows.items():
+            version_rows.sort()
+            starts, ends, ids = zip(*version_rows) if version_rows else ((), (), ())
+            if version == 4:
+                self._tables[4] = (array('I', starts), array('I', ends), array('I', ids))
+            else:
+                self._tables[6] = (list(starts), list(ends), array('I', ids))
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'GeoIPTable':
+        """
+        Charger un CSV `début,fin,pays[,ville]` (IPs en notation texte, une
+        ligne d'en-tête éventuelle est ignorée)
+        """
+        def rows():
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    if len(row) < 3:
+                        continue
+                    try:
+                        ipaddress.ip_address(row[0])
+                    except ValueError:
+                        continue  # En-tête ou commentaire
+                    yield row[0], row[1], row[2], row[3] if len(row) > 3 else None
+
+        return cls(rows())
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts, _, _ in self._tables.values())
+
+    def lookup(self, ip: str) -> Optional[Location]:
+        """(pays, ville) de l'IP, None si elle n'est dans aucune plage"""
+        try:
+            address = ipaddress.ip_address(ip.strip())
+        except (ValueError, AttributeError):
+            return None
+
+        starts, ends, ids = self._tables[address.version]
+        value = int(address)
+        i = bisect_right(starts, value) - 1
+        if i >= 0 and value <= ends[i]:
+            return self.locations[ids[i]]
+        return None
+
+
+_table: Optional[GeoIPTable] = None
+
+
+def get_geoip_table() -> GeoIPTable:
+    """
+    Table chargée une fois par processus depuis GEOIP_CSV_PATH ; vide si le
+    fichier n'est pas configuré ou illisible (aucune localisation)
+    """
+    global _table
+    if _table is None:
+        path = os.getenv('GEOIP_CSV_PATH')
+        if not path:
+            _table = GeoIPTable()
+        else:
+            try:
+                _table = GeoIPTable.from_csv(path)
+                logger.info(f"Loaded {len(_table)} GeoIP ranges from {path}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading GeoIP ranges from {path}: {str(e)}")
+                _table = GeoIPTable()
+    return _table
+
+
+def lookup_ip(ip: Optional[str]) -> Location:
+    """(pays, ville) de l'IP, (None, None) si inconnue"""
+    if not ip:
+        return None, None
+    return get_geoip_table().lookup(ip) or (None, None)
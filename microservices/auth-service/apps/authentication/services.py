@@ -1,14 +1,16 @@
 from typing import List, Optional, Dict, Any
-from prisma import Prisma
+from shared.shared.utils.prisma_client import get_prisma_client
 
 class AuthenticationService:
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
     
     async def connect(self):
-        await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     # Add your service methods here
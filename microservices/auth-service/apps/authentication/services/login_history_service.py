@@ -1,9 +1,9 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from prisma import Prisma
+from shared.shared.utils.prisma_client import get_prisma_client
 from prisma.models import LoginHistory
 import logging
-from shared.shared.utils.ip_utils import parse_user_agent
+from shared.shared.utils.enrichment import enrich_client
 
 logger = logging.getLogger(__name__)
 
@@ -12,15 +12,15 @@ class LoginHistoryService:
     """Service de gestion de l'historique de connexion"""
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def log_login_attempt(
         self,
@@ -37,8 +37,8 @@ class LoginHistoryService:
         try:
             await self.connect()
             
-            # Parser le user agent
-            device_info = parse_user_agent(user_agent or '')
+            # Appareil / navigateur / OS et localisation GeoIP si non fournie
+            client = enrich_client(ip_address, user_agent, country, city)
             
             log = await self.db.loginhistory.create(
                 data={
@@ -48,11 +48,11 @@ class LoginHistoryService:
                     'ipAddress': ip_address,
                     'userAgent': user_agent,
                     'location': location,
-                    'country': country,
-                    'city': city,
-                    'device': device_info['device'],
-                    'browser': device_info['browser'],
-                    'os': device_info['os'],
+                    'country': client['country'],
+                    'city': client['city'],
+                    'device': client['device'],
+                    'browser': client['browser'],
+                    'os': client['os'],
                     'loginAt': datetime.now()
                 }
             )
@@ -1,6 +1,6 @@
 from typing import Optional, List, Tuple
 from datetime import datetime
-from prisma import Prisma
+from shared.shared.utils.prisma_client import get_prisma_client
 from prisma.models import User
 import logging
 from shared.shared.encryption import PasswordManager, TokenManager
@@ -16,17 +16,17 @@ class MFAService:
     """Service de gestion de l'authentification multi-facteurs"""
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
         self.password_manager = PasswordManager()
         self.token_manager = TokenManager()
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def enable_mfa(self, user_id: str) -> Tuple[str, str, List[str]]:
         """Activer le MFA pour un utilisateur"""
@@ -3,7 +3,7 @@ from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
 import httpx
 import logging
-from prisma import Prisma
+from shared.shared.utils.prisma_client import get_prisma_client
 from prisma.models import User
 from shared.shared.encryption import PasswordManager
 
@@ -23,16 +23,16 @@ class OAuthService:
     GITHUB_EMAIL_URL = "https://api.github.com/user/emails"
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
         self.password_manager = PasswordManager()
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def authenticate_google(
         self,
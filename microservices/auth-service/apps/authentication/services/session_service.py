@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from prisma import Prisma
+from shared.shared.utils.prisma_client import get_prisma_client
 from prisma.models import Session, RefreshToken
 import logging
 from shared.shared.encryption import TokenManager
@@ -15,16 +15,16 @@ class SessionService:
     REFRESH_TOKEN_DURATION_DAYS = 30
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
         self.token_manager = TokenManager()
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def create_session(
         self,
@@ -1,6 +1,6 @@
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
-from prisma import Prisma
+from shared.shared.utils.prisma_client import get_prisma_client
 from prisma.models import User
 import logging
 from shared.shared.encryption import PasswordManager, TokenManager
@@ -23,17 +23,17 @@ class UserService:
     LOCK_DURATION_MINUTES = 30
     
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
         self.password_manager = PasswordManager()
         self.token_manager = TokenManager()
     
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
     
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
     
     async def create_user(
         self,
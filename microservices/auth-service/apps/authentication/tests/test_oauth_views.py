@@ -20,7 +20,7 @@ class TestOAuthViews:
     
     def test_google_oauth_success_new_user(self):
         """Test d'authentification Google réussie pour un nouvel utilisateur"""
-        with patch('apps.authentication.views.async_to_sync') as mock_async, \
+        with patch('apps.authentication.views.worker_async_to_sync') as mock_async, \
              patch.dict(settings.__dict__, {
                  'GOOGLE_CLIENT_ID': 'test_client_id',
                  'GOOGLE_CLIENT_SECRET': 'test_client_secret'
@@ -93,7 +93,7 @@ class TestOAuthViews:
     
     def test_github_oauth_success_new_user(self):
         """Test d'authentification GitHub réussie pour un nouvel utilisateur"""
-        with patch('apps.authentication.views.async_to_sync') as mock_async, \
+        with patch('apps.authentication.views.worker_async_to_sync') as mock_async, \
              patch.dict(settings.__dict__, {
                  'GITHUB_CLIENT_ID': 'test_client_id',
                  'GITHUB_CLIENT_SECRET': 'test_client_secret'
@@ -150,7 +150,7 @@ class TestOAuthViews:
     
     def test_github_oauth_authentication_failed(self):
         """Test GitHub OAuth avec échec d'authentification"""
-        with patch('apps.authentication.views.async_to_sync') as mock_async, \
+        with patch('apps.authentication.views.worker_async_to_sync') as mock_async, \
              patch.dict(settings.__dict__, {
                  'GITHUB_CLIENT_ID': 'test_client_id',
                  'GITHUB_CLIENT_SECRET': 'test_client_secret'
@@ -171,12 +171,12 @@ class TestOAuthViews:
         """Test de liaison Google OAuth réussie"""
         # Créer un utilisateur et se connecter
         from apps.authentication.services import UserService, SessionService
-        from asgiref.sync import async_to_sync
+        from shared.shared.utils.prisma_client import worker_async_to_sync
         
         user_service = UserService()
         session_service = SessionService()
         
-        user = async_to_sync(user_service.create_user)(
+        user = worker_async_to_sync(user_service.create_user)(
             email='linktest@example.com',
             username='linktest',
             password='SecurePass123!',
@@ -184,18 +184,18 @@ class TestOAuthViews:
         )
         
         # Vérifier l'email
-        async_to_sync(user_service.db.user.update)(
+        worker_async_to_sync(user_service.db.user.update)(
             where={'id': user.id},
             data={'isEmailVerified': True}
         )
         
         # Créer une session
-        session = async_to_sync(session_service.create_session)(user_id=user.id)
+        session = worker_async_to_sync(session_service.create_session)(user_id=user.id)
         
         # Authentifier le client
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {session.token}')
         
-        with patch('apps.authentication.views.async_to_sync') as mock_async, \
+        with patch('apps.authentication.views.worker_async_to_sync') as mock_async, \
              patch.dict(settings.__dict__, {
                  'GOOGLE_CLIENT_ID': 'test_client_id',
                  'GOOGLE_CLIENT_SECRET': 'test_client_secret'
@@ -218,7 +218,7 @@ class TestOAuthViews:
             assert 'linked successfully' in response.data['message']
         
         # Cleanup
-        async_to_sync(user_service.db.user.delete)(where={'id': user.id})
+        worker_async_to_sync(user_service.db.user.delete)(where={'id': user.id})
     
     def test_link_oauth_unauthorized(self):
         """Test de liaison OAuth sans authentification"""
@@ -232,24 +232,24 @@ class TestOAuthViews:
     def test_link_oauth_invalid_provider(self):
         """Test de liaison avec provider invalide"""
         from apps.authentication.services import UserService, SessionService
-        from asgiref.sync import async_to_sync
+        from shared.shared.utils.prisma_client import worker_async_to_sync
         
         user_service = UserService()
         session_service = SessionService()
         
-        user = async_to_sync(user_service.create_user)(
+        user = worker_async_to_sync(user_service.create_user)(
             email='invalidprovider@example.com',
             username='invalidprovider',
             password='SecurePass123!',
             role='STUDENT'
         )
         
-        async_to_sync(user_service.db.user.update)(
+        worker_async_to_sync(user_service.db.user.update)(
             where={'id': user.id},
             data={'isEmailVerified': True}
         )
         
-        session = async_to_sync(session_service.create_session)(user_id=user.id)
+        session = worker_async_to_sync(session_service.create_session)(user_id=user.id)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {session.token}')
         
         response = self.client.post('/api/auth/oauth/link/', {
@@ -260,34 +260,34 @@ class TestOAuthViews:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         
         # Cleanup
-        async_to_sync(user_service.db.user.delete)(where={'id': user.id})
+        worker_async_to_sync(user_service.db.user.delete)(where={'id': user.id})
     
     # ========== Unlink OAuth Tests ==========
     
     def test_unlink_oauth_success(self):
         """Test de déliaison OAuth réussie"""
         from apps.authentication.services import UserService, SessionService
-        from asgiref.sync import async_to_sync
+        from shared.shared.utils.prisma_client import worker_async_to_sync
         
         user_service = UserService()
         session_service = SessionService()
         
-        user = async_to_sync(user_service.create_user)(
+        user = worker_async_to_sync(user_service.create_user)(
             email='unlinktest@example.com',
             username='unlinktest',
             password='SecurePass123!',
             role='STUDENT'
         )
         
-        async_to_sync(user_service.db.user.update)(
+        worker_async_to_sync(user_service.db.user.update)(
             where={'id': user.id},
             data={'isEmailVerified': True}
         )
         
-        session = async_to_sync(session_service.create_session)(user_id=user.id)
+        session = worker_async_to_sync(session_service.create_session)(user_id=user.id)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {session.token}')
         
-        with patch('apps.authentication.views.async_to_sync') as mock_async:
+        with patch('apps.authentication.views.worker_async_to_sync') as mock_async:
             mock_async.return_value = True
             
             response = self.client.post('/api/auth/oauth/unlink/', format='json')
@@ -296,7 +296,7 @@ class TestOAuthViews:
             assert 'unlinked successfully' in response.data['message']
         
         # Cleanup
-        async_to_sync(user_service.db.user.delete)(where={'id': user.id})
+        worker_async_to_sync(user_service.db.user.delete)(where={'id': user.id})
     
     def test_unlink_oauth_unauthorized(self):
         """Test de déliaison OAuth sans authentification"""
@@ -2,7 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from asgiref.sync import async_to_sync
+from shared.shared.utils.prisma_client import worker_async_to_sync
 from django.conf import settings
 import logging
 
@@ -72,7 +72,7 @@ class RegisterView(APIView):
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
             # Créer l'utilisateur
-            user = async_to_sync(self.user_service.create_user)(
+            user = worker_async_to_sync(self.user_service.create_user)(
                 email=serializer.validated_data['email'],
                 username=serializer.validated_data['username'],
                 password=serializer.validated_data['password'],
@@ -136,14 +136,14 @@ class LoginView(APIView):
             
             try:
                 # Authentifier l'utilisateur
-                user = async_to_sync(self.user_service.authenticate_user)(
+                user = worker_async_to_sync(self.user_service.authenticate_user)(
                     email, password
                 )
                 
                 # Vérifier si le MFA est activé
                 if user.mfaEnabled:
                     # Logger la tentative
-                    async_to_sync(self.login_history_service.log_login_attempt)(
+                    worker_async_to_sync(self.login_history_service.log_login_attempt)(
                         user_id=user.id,
                         success=False,
                         ip_address=ip_address,
@@ -158,25 +158,25 @@ class LoginView(APIView):
                     }, status=status.HTTP_428_PRECONDITION_REQUIRED)
                 
                 # Créer une session
-                session = async_to_sync(self.session_service.create_session)(
+                session = worker_async_to_sync(self.session_service.create_session)(
                     user_id=user.id,
                     ip_address=ip_address,
                     user_agent=user_agent
                 )
                 
                 # Créer un refresh token
-                refresh_token = async_to_sync(self.session_service.create_refresh_token)(
+                refresh_token = worker_async_to_sync(self.session_service.create_refresh_token)(
                     user_id=user.id,
                     ip_address=ip_address
                 )
                 
                 # Mettre à jour la dernière connexion
-                async_to_sync(self.user_service.update_last_login)(
+                worker_async_to_sync(self.user_service.update_last_login)(
                     user.id, ip_address
                 )
                 
                 # Logger la connexion réussie
-                async_to_sync(self.login_history_service.log_login_attempt)(
+                worker_async_to_sync(self.login_history_service.log_login_attempt)(
                     user_id=user.id,
                     success=True,
                     ip_address=ip_address,
@@ -195,9 +195,9 @@ class LoginView(APIView):
                 
             except InvalidCredentialsError:
                 # Logger la tentative échouée
-                user = async_to_sync(self.user_service.get_user_by_email)(email)
+                user = worker_async_to_sync(self.user_service.get_user_by_email)(email)
                 if user:
-                    async_to_sync(self.login_history_service.log_login_attempt)(
+                    worker_async_to_sync(self.login_history_service.log_login_attempt)(
                         user_id=user.id,
                         success=False,
                         ip_address=ip_address,
@@ -260,18 +260,18 @@ class MFALoginView(APIView):
             user_agent = get_user_agent(request)
             
             # Authentifier l'utilisateur (sans vérifier l'email)
-            user = async_to_sync(self.user_service.authenticate_user)(
+            user = worker_async_to_sync(self.user_service.authenticate_user)(
                 email, password, check_email_verified=False
             )
             
             # Vérifier le code MFA
-            is_valid = async_to_sync(self.mfa_service.verify_mfa_code)(
+            is_valid = worker_async_to_sync(self.mfa_service.verify_mfa_code)(
                 user.id, mfa_code
             )
             
             if not is_valid:
                 # Logger l'échec
-                async_to_sync(self.login_history_service.log_login_attempt)(
+                worker_async_to_sync(self.login_history_service.log_login_attempt)(
                     user_id=user.id,
                     success=False,
                     ip_address=ip_address,
@@ -285,22 +285,22 @@ class MFALoginView(APIView):
                 )
             
             # Créer une session
-            session = async_to_sync(self.session_service.create_session)(
+            session = worker_async_to_sync(self.session_service.create_session)(
                 user_id=user.id,
                 ip_address=ip_address,
                 user_agent=user_agent
             )
             
-            refresh_token = async_to_sync(self.session_service.create_refresh_token)(
+            refresh_token = worker_async_to_sync(self.session_service.create_refresh_token)(
                 user_id=user.id,
                 ip_address=ip_address
             )
             
             # Mettre à jour la dernière connexion
-            async_to_sync(self.user_service.update_last_login)(user.id, ip_address)
+            worker_async_to_sync(self.user_service.update_last_login)(user.id, ip_address)
             
             # Logger la connexion réussie
-            async_to_sync(self.login_history_service.log_login_attempt)(
+            worker_async_to_sync(self.login_history_service.log_login_attempt)(
                 user_id=user.id,
                 success=True,
                 ip_address=ip_address,
@@ -342,7 +342,7 @@ class LogoutView(APIView):
             
             if token:
                 # Invalider la session
-                async_to_sync(self.session_service.invalidate_session)(str(token))
+                worker_async_to_sync(self.session_service.invalidate_session)(str(token))
             
             return Response(
                 {'message': 'Logout successful'},
@@ -376,7 +376,7 @@ class RefreshTokenView(APIView):
             refresh_token = serializer.validated_data['refresh_token']
             
             # Rafraîchir la session
-            result = async_to_sync(self.session_service.refresh_session)(refresh_token)
+            result = worker_async_to_sync(self.session_service.refresh_session)(refresh_token)
             
             if not result:
                 return Response(
@@ -412,7 +412,7 @@ class VerifyEmailView(APIView):
             
             token = serializer.validated_data['token']
             
-            success = async_to_sync(self.user_service.verify_email)(token)
+            success = worker_async_to_sync(self.user_service.verify_email)(token)
             
             if not success:
                 return Response(
@@ -452,7 +452,7 @@ class RequestPasswordResetView(APIView):
             email = serializer.validated_data['email']
             
             # Générer un token de reset
-            token = async_to_sync(self.user_service.request_password_reset)(email)
+            token = worker_async_to_sync(self.user_service.request_password_reset)(email)
             
             # Envoyer l'email avec le token
             if token:
@@ -494,7 +494,7 @@ class ResetPasswordView(APIView):
             token = serializer.validated_data['token']
             new_password = serializer.validated_data['new_password']
             
-            success = async_to_sync(self.user_service.reset_password)(
+            success = worker_async_to_sync(self.user_service.reset_password)(
                 token, new_password
             )
             
@@ -542,7 +542,7 @@ class ChangePasswordView(APIView):
             current_password = serializer.validated_data['current_password']
             new_password = serializer.validated_data['new_password']
             
-            success = async_to_sync(self.user_service.change_password)(
+            success = worker_async_to_sync(self.user_service.change_password)(
                 user_id, current_password, new_password
             )
             
@@ -589,7 +589,7 @@ class MeView(APIView):
         try:
             user_id = str(request.user.id)
             
-            user = async_to_sync(self.user_service.get_user)(user_id)
+            user = worker_async_to_sync(self.user_service.get_user)(user_id)
             
             if not user:
                 return Response(
@@ -624,7 +624,7 @@ class EnableMFAView(APIView):
         try:
             user_id = str(request.user.id)
             
-            secret, totp_uri, backup_codes = async_to_sync(self.mfa_service.enable_mfa)(user_id)
+            secret, totp_uri, backup_codes = worker_async_to_sync(self.mfa_service.enable_mfa)(user_id)
             
             # Générer le QR code
             qr_code = self.mfa_service.generate_qr_code(totp_uri)
@@ -663,7 +663,7 @@ class VerifyMFAView(APIView):
             user_id = str(request.user.id)
             code = serializer.validated_data['code']
             
-            success = async_to_sync(self.mfa_service.verify_and_activate_mfa)(
+            success = worker_async_to_sync(self.mfa_service.verify_and_activate_mfa)(
                 user_id, code
             )
             
@@ -710,7 +710,7 @@ class DisableMFAView(APIView):
             user_id = str(request.user.id)
             password = serializer.validated_data['password']
             
-            success = async_to_sync(self.mfa_service.disable_mfa)(
+            success = worker_async_to_sync(self.mfa_service.disable_mfa)(
                 user_id, password
             )
             
@@ -752,7 +752,7 @@ class RegenerateBackupCodesView(APIView):
         try:
             user_id = str(request.user.id)
             
-            backup_codes = async_to_sync(self.mfa_service.regenerate_backup_codes)(user_id)
+            backup_codes = worker_async_to_sync(self.mfa_service.regenerate_backup_codes)(user_id)
             
             return Response({
                 'backup_codes': backup_codes,
@@ -783,7 +783,7 @@ class SessionsView(APIView):
         try:
             user_id = str(request.user.id)
             
-            sessions = async_to_sync(self.session_service.get_user_sessions)(user_id)
+            sessions = worker_async_to_sync(self.session_service.get_user_sessions)(user_id)
             
             serializer = SessionSerializer(sessions, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -801,7 +801,7 @@ class SessionsView(APIView):
             user_id = str(request.user.id)
             current_token = str(request.auth)
             
-            count = async_to_sync(self.session_service.revoke_all_sessions)(
+            count = worker_async_to_sync(self.session_service.revoke_all_sessions)(
                 user_id, except_token=current_token
             )
             
@@ -831,7 +831,7 @@ class RevokeSessionView(APIView):
         try:
             # TODO: Vérifier que la session appartient à l'utilisateur
             
-            success = async_to_sync(self.session_service.invalidate_session)(session_id)
+            success = worker_async_to_sync(self.session_service.invalidate_session)(session_id)
             
             if not success:
                 return Response(
@@ -870,7 +870,7 @@ class LoginHistoryView(APIView):
             limit = int(request.query_params.get('limit', 50))
             success_only = request.query_params.get('success_only', 'false').lower() == 'true'
             
-            history = async_to_sync(self.login_history_service.get_user_login_history)(
+            history = worker_async_to_sync(self.login_history_service.get_user_login_history)(
                 user_id, limit, success_only
             )
             
@@ -900,7 +900,7 @@ class LoginStatisticsView(APIView):
             user_id = str(request.user.id)
             days = int(request.query_params.get('days', 30))
             
-            stats = async_to_sync(self.login_history_service.get_login_statistics)(
+            stats = worker_async_to_sync(self.login_history_service.get_login_statistics)(
                 user_id, days
             )
             
@@ -955,7 +955,7 @@ class GoogleOAuthView(APIView):
             user_agent = get_user_agent(request)
             
             # Authentifier avec Google
-            user, is_new = async_to_sync(self.oauth_service.authenticate_google)(
+            user, is_new = worker_async_to_sync(self.oauth_service.authenticate_google)(
                 code=code,
                 client_id=client_id,
                 client_secret=client_secret,
@@ -963,20 +963,20 @@ class GoogleOAuthView(APIView):
             )
             
             # Créer une session
-            session = async_to_sync(self.session_service.create_session)(
+            session = worker_async_to_sync(self.session_service.create_session)(
                 user_id=user.id,
                 ip_address=ip_address,
                 user_agent=user_agent
             )
             
             # Créer un refresh token
-            refresh_token = async_to_sync(self.session_service.create_refresh_token)(
+            refresh_token = worker_async_to_sync(self.session_service.create_refresh_token)(
                 user_id=user.id,
                 ip_address=ip_address
             )
             
             # Logger la connexion
-            async_to_sync(self.login_history_service.log_login_attempt)(
+            worker_async_to_sync(self.login_history_service.log_login_attempt)(
                 user_id=user.id,
                 success=True,
                 ip_address=ip_address,
@@ -1042,27 +1042,27 @@ class GitHubOAuthView(APIView):
             user_agent = get_user_agent(request)
             
             # Authentifier avec GitHub
-            user, is_new = async_to_sync(self.oauth_service.authenticate_github)(
+            user, is_new = worker_async_to_sync(self.oauth_service.authenticate_github)(
                 code=code,
                 client_id=client_id,
                 client_secret=client_secret
             )
             
             # Créer une session
-            session = async_to_sync(self.session_service.create_session)(
+            session = worker_async_to_sync(self.session_service.create_session)(
                 user_id=user.id,
                 ip_address=ip_address,
                 user_agent=user_agent
             )
             
             # Créer un refresh token
-            refresh_token = async_to_sync(self.session_service.create_refresh_token)(
+            refresh_token = worker_async_to_sync(self.session_service.create_refresh_token)(
                 user_id=user.id,
                 ip_address=ip_address
             )
             
             # Logger la connexion
-            async_to_sync(self.login_history_service.log_login_attempt)(
+            worker_async_to_sync(self.login_history_service.log_login_attempt)(
                 user_id=user.id,
                 success=True,
                 ip_address=ip_address,
@@ -1127,7 +1127,7 @@ class LinkOAuthView(APIView):
                     )
                 
                 # Échanger le code et récupérer l'ID
-                token_data = async_to_sync(self.oauth_service._exchange_google_code)(
+                token_data = worker_async_to_sync(self.oauth_service._exchange_google_code)(
                     code, client_id, client_secret, redirect_uri
                 )
                 
@@ -1137,7 +1137,7 @@ class LinkOAuthView(APIView):
                         status=status.HTTP_400_BAD_REQUEST
                     )
                 
-                user_info = async_to_sync(self.oauth_service._get_google_user_info)(
+                user_info = worker_async_to_sync(self.oauth_service._get_google_user_info)(
                     token_data['access_token']
                 )
                 
@@ -1160,7 +1160,7 @@ class LinkOAuthView(APIView):
                     )
                 
                 # Échanger le code et récupérer l'ID
-                token_data = async_to_sync(self.oauth_service._exchange_github_code)(
+                token_data = worker_async_to_sync(self.oauth_service._exchange_github_code)(
                     code, client_id, client_secret
                 )
                 
@@ -1170,7 +1170,7 @@ class LinkOAuthView(APIView):
                         status=status.HTTP_400_BAD_REQUEST
                     )
                 
-                user_info = async_to_sync(self.oauth_service._get_github_user_info)(
+                user_info = worker_async_to_sync(self.oauth_service._get_github_user_info)(
                     token_data['access_token']
                 )
                 
@@ -1189,7 +1189,7 @@ class LinkOAuthView(APIView):
                 )
             
             # Lier le provider
-            success = async_to_sync(self.oauth_service.link_oauth_provider)(
+            success = worker_async_to_sync(self.oauth_service.link_oauth_provider)(
                 user_id, provider, provider_id
             )
             
@@ -1230,7 +1230,7 @@ class UnlinkOAuthView(APIView):
         try:
             user_id = str(request.user.id)
             
-            success = async_to_sync(self.oauth_service.unlink_oauth_provider)(user_id)
+            success = worker_async_to_sync(self.oauth_service.unlink_oauth_provider)(user_id)
             
             if not success:
                 return Response(
@@ -1,6 +1,6 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from asgiref.sync import async_to_sync
+from shared.shared.utils.prisma_client import worker_async_to_sync
 from apps.authentication.services import SessionService
 
 
@@ -32,7 +32,7 @@ class JWTAuthentication(BaseAuthentication):
             token = parts[1]
             
             # Valider la session
-            session = async_to_sync(self.session_service.validate_session)(token)
+            session = worker_async_to_sync(self.session_service.validate_session)(token)
             
             if not session:
                 raise AuthenticationFailed('Invalid or expired token')
@@ -3,7 +3,10 @@ Utilitaires pour la gestion des IPs et User Agents
 Fichier: shared/shared/utils/ip_utils.py
 """
 from typing import Optional
+from functools import lru_cache
 import logging
+import os
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +18,21 @@ except ImportError:
     HAS_USER_AGENTS = False
     logger.warning("user-agents library not installed. Using fallback parser.")
 
+# Nombre de user agents parsés gardés en mémoire
+USER_AGENT_CACHE_SIZE = int(os.getenv('USER_AGENT_CACHE_SIZE', '4096'))
+
+# Au-delà, le user agent est tronqué avant parsing (borne la taille du cache)
+MAX_USER_AGENT_LENGTH = 512
+
+# Versions extraites par le parser de fallback (user agent en minuscules)
+_MACOS_VERSION = re.compile(r'mac os x (\d+[._]\d+)')
+_ANDROID_VERSION = re.compile(r'android (\d+\.?\d*)')
+_IOS_VERSION = re.compile(r'os (\d+[._]\d+)')
+_EDGE_VERSION = re.compile(r'edg[e]?/(\d+\.?\d*)')
+_CHROME_VERSION = re.compile(r'chrome/(\d+\.?\d*)')
+_FIREFOX_VERSION = re.compile(r'firefox/(\d+\.?\d*)')
+_SAFARI_VERSION = re.compile(r'version/(\d+\.?\d*)')
+
 
 def get_client_ip(request) -> Optional[str]:
     """
@@ -60,6 +78,10 @@ def parse_user_agent(user_agent: str) -> dict:
     """
     Parser le user agent pour extraire device, browser, OS
     
+    Les résultats sont gardés dans un cache LRU borné (USER_AGENT_CACHE_SIZE
+    entrées) : quelques centaines de user agents distincts couvrent
+    l'essentiel du trafic, le parsing n'est fait qu'une fois pour chacun.
+    
     Args:
         user_agent: String user agent
         
@@ -73,6 +95,12 @@ def parse_user_agent(user_agent: str) -> dict:
             'os': 'Unknown'
         }
     
+    # Copie : l'appelant peut modifier le résultat sans toucher au cache
+    return dict(_parse_cached(user_agent[:MAX_USER_AGENT_LENGTH]))
+
+
+@lru_cache(maxsize=USER_AGENT_CACHE_SIZE)
+def _parse_cached(user_agent: str) -> dict:
     # Utiliser la bibliothèque user-agents si disponible
     if HAS_USER_AGENTS:
         return _parse_with_library(user_agent)
@@ -96,6 +124,14 @@ def _parse_with_library(user_agent: str) -> dict:
         return _parse_fallback(user_agent)
 
 
+def _versioned(name: str, pattern: re.Pattern, text: str) -> str:
+    """Nom suivi de la version capturée par `pattern` si elle est présente"""
+    match = pattern.search(text)
+    if match:
+        return f"{name} {match.group(1).replace('_', '.')}"
+    return name
+
+
 def _parse_fallback(user_agent: str) -> dict:
     """Parser de fallback simple sans dépendance externe"""
     result = {
@@ -118,63 +154,23 @@ def _parse_fallback(user_agent: str) -> dict:
     elif 'windows' in user_agent_lower:
         result['os'] = 'Windows'
     elif 'mac os x' in user_agent_lower:
-        # Extraire la version si possible
-        import re
-        match = re.search(r'mac os x (\d+[._]\d+)', user_agent_lower)
-        if match:
-            version = match.group(1).replace('_', '.')
-            result['os'] = f'macOS {version}'
-        else:
-            result['os'] = 'macOS'
+        result['os'] = _versioned('macOS', _MACOS_VERSION, user_agent_lower)
     elif 'linux' in user_agent_lower and 'android' not in user_agent_lower:
         result['os'] = 'Linux'
     elif 'android' in user_agent_lower:
-        # Extraire la version Android
-        import re
-        match = re.search(r'android (\d+\.?\d*)', user_agent_lower)
-        if match:
-            result['os'] = f'Android {match.group(1)}'
-        else:
-            result['os'] = 'Android'
+        result['os'] = _versioned('Android', _ANDROID_VERSION, user_agent_lower)
     elif 'iphone' in user_agent_lower or 'ipad' in user_agent_lower:
-        # Extraire la version iOS
-        import re
-        match = re.search(r'os (\d+[._]\d+)', user_agent_lower)
-        if match:
-            version = match.group(1).replace('_', '.')
-            result['os'] = f'iOS {version}'
-        else:
-            result['os'] = 'iOS'
+        result['os'] = _versioned('iOS', _IOS_VERSION, user_agent_lower)
     
     # Detect Browser
     if 'edg/' in user_agent_lower or 'edge/' in user_agent_lower:
-        import re
-        match = re.search(r'edg[e]?/(\d+\.?\d*)', user_agent_lower)
-        if match:
-            result['browser'] = f'Edge {match.group(1)}'
-        else:
-            result['browser'] = 'Edge'
+        result['browser'] = _versioned('Edge', _EDGE_VERSION, user_agent_lower)
     elif 'chrome/' in user_agent_lower and 'edg' not in user_agent_lower:
-        import re
-        match = re.search(r'chrome/(\d+\.?\d*)', user_agent_lower)
-        if match:
-            result['browser'] = f'Chrome {match.group(1)}'
-        else:
-            result['browser'] = 'Chrome'
+        result['browser'] = _versioned('Chrome', _CHROME_VERSION, user_agent_lower)
     elif 'firefox/' in user_agent_lower:
-        import re
-        match = re.search(r'firefox/(\d+\.?\d*)', user_agent_lower)
-        if match:
-            result['browser'] = f'Firefox {match.group(1)}'
-        else:
-            result['browser'] = 'Firefox'
+        result['browser'] = _versioned('Firefox', _FIREFOX_VERSION, user_agent_lower)
     elif 'safari/' in user_agent_lower and 'chrome' not in user_agent_lower:
-        import re
-        match = re.search(r'version/(\d+\.?\d*)', user_agent_lower)
-        if match:
-            result['browser'] = f'Safari {match.group(1)}'
-        else:
-            result['browser'] = 'Safari'
+        result['browser'] = _versioned('Safari', _SAFARI_VERSION, user_agent_lower)
     elif 'opera' in user_agent_lower or 'opr/' in user_agent_lower:
         result['browser'] = 'Opera'
     
@@ -1,6 +1,6 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from prisma import Prisma
+from shared.shared.utils.prisma_client import get_prisma_client
 import logging
 import random
 import string
@@ -12,15 +12,15 @@ class InstructorService:
     """Service pour gérer les instructeurs"""
 
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
 
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
 
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
 
     def generate_instructor_code(self) -> str:
         """Générer un code instructeur unique"""
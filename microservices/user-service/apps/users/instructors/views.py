@@ -2,7 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from asgiref.sync import async_to_sync
+from shared.shared.utils.prisma_client import worker_async_to_sync
 from .services import InstructorService
 from .serializers import (
     InstructorSerializer,
@@ -29,7 +29,7 @@ class InstructorView(APIView):
         """Récupérer le profil instructeur"""
         try:
             user_id = str(request.user.id)
-            instructor = async_to_sync(self.service.get_instructor)(user_id)
+            instructor = worker_async_to_sync(self.service.get_instructor)(user_id)
             
             if not instructor:
                 return Response(
@@ -53,7 +53,7 @@ class InstructorView(APIView):
             user_id = str(request.user.id)
             
             # Vérifier si existe déjà
-            existing = async_to_sync(self.service.get_instructor)(user_id)
+            existing = worker_async_to_sync(self.service.get_instructor)(user_id)
             if existing:
                 return Response(
                     {'error': 'Instructor profile already exists'},
@@ -64,7 +64,7 @@ class InstructorView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            instructor = async_to_sync(self.service.create_instructor)(
+            instructor = worker_async_to_sync(self.service.create_instructor)(
                 user_id,
                 serializer.validated_data
             )
@@ -88,7 +88,7 @@ class InstructorView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            instructor = async_to_sync(self.service.update_instructor)(
+            instructor = worker_async_to_sync(self.service.update_instructor)(
                 user_id,
                 serializer.validated_data
             )
@@ -122,7 +122,7 @@ class InstructorVerificationView(APIView):
     def post(self, request, user_id):
         """Vérifier un instructeur"""
         try:
-            instructor = async_to_sync(self.service.verify_instructor)(user_id)
+            instructor = worker_async_to_sync(self.service.verify_instructor)(user_id)
             
             if not instructor:
                 return Response(
@@ -145,7 +145,7 @@ class InstructorVerificationView(APIView):
     def delete(self, request, user_id):
         """Retirer la vérification"""
         try:
-            instructor = async_to_sync(self.service.unverify_instructor)(user_id)
+            instructor = worker_async_to_sync(self.service.unverify_instructor)(user_id)
             
             if not instructor:
                 return Response(
@@ -176,7 +176,7 @@ class PublicInstructorView(APIView):
     def get(self, request, user_id):
         """Récupérer le profil public"""
         try:
-            instructor = async_to_sync(self.service.get_instructor)(user_id)
+            instructor = worker_async_to_sync(self.service.get_instructor)(user_id)
             
             if not instructor:
                 return Response(
@@ -208,7 +208,7 @@ class TopInstructorsView(APIView):
             limit = int(request.query_params.get('limit', 10))
             limit = min(max(limit, 1), 50)
             
-            instructors = async_to_sync(self.service.get_top_instructors)(limit)
+            instructors = worker_async_to_sync(self.service.get_top_instructors)(limit)
             
             serializer = InstructorPublicSerializer(instructors, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -239,7 +239,7 @@ class InstructorSearchView(APIView):
             if min_rating:
                 min_rating = float(min_rating)
             
-            instructors = async_to_sync(self.service.search_instructors)(
+            instructors = worker_async_to_sync(self.service.search_instructors)(
                 specialization=specialization,
                 min_rating=min_rating,
                 verified_only=verified_only,
@@ -1,6 +1,6 @@
 from typing import Optional, Dict, Any
 from datetime import datetime
-from prisma import Prisma
+from shared.shared.utils.prisma_client import get_prisma_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,15 +10,15 @@ class ProfileService:
     """Service pour gérer les profils utilisateurs"""
 
     def __init__(self):
-        self.db = Prisma()
+        self.db = None
 
     async def connect(self):
-        if not self.db.is_connected():
-            await self.db.connect()
+        """Connexion via singleton"""
+        self.db = await get_prisma_client()
 
     async def disconnect(self):
-        if self.db.is_connected():
-            await self.db.disconnect()
+        """Ne plus déconnecter individuellement"""
+        pass  # Géré par le singleton
 
     async def create_profile(self, user_id: str, data: Dict[str, Any]) -> dict:
         try:
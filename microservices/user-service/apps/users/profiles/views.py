@@ -2,7 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from asgiref.sync import async_to_sync
+from shared.shared.utils.prisma_client import worker_async_to_sync
 from .services import ProfileService
 from .serializers import ProfileSerializer, ProfileCreateSerializer, ProfileUpdateSerializer
 import logging
@@ -23,7 +23,7 @@ class ProfileView(APIView):
         """Récupérer le profil de l'utilisateur connecté"""
         try:
             user_id = str(request.user.id)
-            profile = async_to_sync(self.service.get_profile)(user_id)
+            profile = worker_async_to_sync(self.service.get_profile)(user_id)
             
             if not profile:
                 return Response(
@@ -47,7 +47,7 @@ class ProfileView(APIView):
             user_id = str(request.user.id)
             
             # Vérifier si le profil existe déjà
-            existing_profile = async_to_sync(self.service.get_profile)(user_id)
+            existing_profile = worker_async_to_sync(self.service.get_profile)(user_id)
             if existing_profile:
                 return Response(
                     {'error': 'Profile already exists'},
@@ -58,7 +58,7 @@ class ProfileView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            profile = async_to_sync(self.service.create_profile)(
+            profile = worker_async_to_sync(self.service.create_profile)(
                 user_id,
                 serializer.validated_data
             )
@@ -85,7 +85,7 @@ class ProfileView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            profile = async_to_sync(self.service.update_profile)(
+            profile = worker_async_to_sync(self.service.update_profile)(
                 user_id,
                 serializer.validated_data
             )
@@ -111,7 +111,7 @@ class ProfileView(APIView):
         try:
             user_id = str(request.user.id)
             
-            success = async_to_sync(self.service.delete_profile)(user_id)
+            success = worker_async_to_sync(self.service.delete_profile)(user_id)
             
             if success:
                 return Response(
@@ -142,7 +142,7 @@ class PublicProfileView(APIView):
     def get(self, request, user_id):
         """Récupérer le profil public d'un utilisateur"""
         try:
-            profile = async_to_sync(self.service.get_profile)(user_id)
+            profile = worker_async_to_sync(self.service.get_profile)(user_id)
             
             if not profile:
                 return Response(
@@ -2,7 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from asgiref.sync import async_to_sync
+from shared.shared.utils.prisma_client import worker_async_to_sync
 from .services import StudentService
 from .serializers import (
     StudentSerializer,
@@ -28,7 +28,7 @@ class StudentView(APIView):
         """Récupérer le profil étudiant"""
         try:
             user_id = str(request.user.id)
-            student = async_to_sync(self.service.get_student)(user_id)
+            student = worker_async_to_sync(self.service.get_student)(user_id)
             
             if not student:
                 return Response(
@@ -52,7 +52,7 @@ class StudentView(APIView):
             user_id = str(request.user.id)
             
             # Vérifier si existe déjà
-            existing = async_to_sync(self.service.get_student)(user_id)
+            existing = worker_async_to_sync(self.service.get_student)(user_id)
             if existing:
                 return Response(
                     {'error': 'Student profile already exists'},
@@ -63,7 +63,7 @@ class StudentView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            student = async_to_sync(self.service.create_student)(
+            student = worker_async_to_sync(self.service.create_student)(
                 user_id,
                 serializer.validated_data
             )
@@ -87,7 +87,7 @@ class StudentView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            student = async_to_sync(self.service.update_student)(
+            student = worker_async_to_sync(self.service.update_student)(
                 user_id,
                 serializer.validated_data
             )
@@ -127,7 +127,7 @@ class StudentExperienceView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            student = async_to_sync(self.service.add_experience_points)(
+            student = worker_async_to_sync(self.service.add_experience_points)(
                 user_id,
                 serializer.validated_data['points']
             )
@@ -163,7 +163,7 @@ class StudentStreakView(APIView):
         try:
             user_id = str(request.user.id)
             
-            student = async_to_sync(self.service.update_streak)(user_id)
+            student = worker_async_to_sync(self.service.update_streak)(user_id)
             
             if not student:
                 return Response(
@@ -195,7 +195,7 @@ class LeaderboardView(APIView):
             limit = int(request.query_params.get('limit', 10))
             limit = min(max(limit, 1), 100)  # Entre 1 et 100
             
-            students = async_to_sync(self.service.get_leaderboard)(limit)
+            students = worker_async_to_sync(self.service.get_leaderboard)(limit)
             
             serializer = StudentSerializer(students, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
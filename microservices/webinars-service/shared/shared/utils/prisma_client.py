@@ -0,0 +1,223 @@
+
+from prisma import Prisma
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import asyncio
+import atexit
+import functools
+import logging
+import os
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Taille du pool de connexions du query engine (par worker)
+PRISMA_CONNECTION_LIMIT = int(os.getenv('PRISMA_CONNECTION_LIMIT', '10'))
+PRISMA_POOL_TIMEOUT = int(os.getenv('PRISMA_POOL_TIMEOUT', '10'))
+
+_prisma_client: Optional[Prisma] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_locks: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]' = weakref.WeakKeyDictionary()
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_thread: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+# Boucle fournie par le serveur ASGI (bind_worker_loop) : ni arrêtée ni fermée ici
+_server_loop = False
+
+
+def build_datasource_url(url: Optional[str] = None) -> Optional[str]:
+    """Ajouter les paramètres de pool (connection_limit, pool_timeout) à DATABASE_URL"""
+    url = url or os.getenv('DATABASE_URL')
+    if not url:
+        return None
+
+    parsed = urlparse(url)
+    params = dict(parse_qsl(parsed.query))
+    params.setdefault('connection_limit', str(PRISMA_CONNECTION_LIMIT))
+    params.setdefault('pool_timeout', str(PRISMA_POOL_TIMEOUT))
+
+    return urlunparse(parsed._replace(query=urlencode(params)))
+
+
+def _get_lock() -> asyncio.Lock:
+    """Un verrou par boucle d'événements (asyncio.Lock est lié à sa boucle)"""
+    loop = asyncio.get_running_loop()
+    lock = _locks.get(loop)
+    if lock is None:
+        lock = asyncio.Lock()
+        _locks[loop] = lock
+    return lock
+
+
+def _create_client() -> Prisma:
+    url = build_datasource_url()
+    if url:
+        return Prisma(datasource={'url': url})
+    return Prisma()
+
+
+async def get_prisma_client() -> Prisma:
+    """Get or create Prisma client singleton with proper locking"""
+    global _prisma_client, _client_loop
+
+    loop = asyncio.get_running_loop()
+
+    async with _get_lock():
+        # Le client est lié à la boucle qui l'a connecté : si cette boucle
+        # a été fermée (ex. async_to_sync), on repart d'un client neuf
+        if _prisma_client is not None and _client_loop is not loop:
+            if _client_loop is None or _client_loop.is_closed():
+                try:
+                    # Arrête le query engine de l'ancien client
+                    await _prisma_client.disconnect()
+                except Exception as e:
+                    logger.warning(f"Error releasing stale Prisma client: {str(e)}")
+                _prisma_client = None
+            else:
+                raise RuntimeError(
+                    "Prisma client is bound to another running event loop; "
+                    "use worker_async_to_sync() from synchronous code"
+                )
+
+        if _prisma_client is None:
+            _prisma_client = _create_client()
+            logger.info("Prisma client instance created")
+
+        if not _prisma_client.is_connected():
+            await _prisma_client.connect()
+            _client_loop = loop
+            logger.info(
+                f"Prisma client connected to database "
+                f"(connection_limit={PRISMA_CONNECTION_LIMIT})"
+            )
+
+    return _prisma_client
+
+
+async def check_prisma_health() -> bool:
+    """Vérifier que le client partagé répond (SELECT 1)"""
+    try:
+        client = await get_prisma_client()
+        await client.query_raw('SELECT 1')
+        return True
+    except Exception as e:
+        logger.error(f"Prisma health check failed: {str(e)}")
+        return False
+
+
+async def disconnect_prisma():
+    """Disconnect Prisma client"""
+    global _prisma_client, _client_loop
+
+    async with _get_lock():
+        if _prisma_client and _prisma_client.is_connected():
+            await _prisma_client.disconnect()
+            logger.info("Prisma client disconnected")
+        _prisma_client = None
+        _client_loop = None
+
+
+def bind_worker_loop(loop: asyncio.AbstractEventLoop):
+    """
+    Faire de la boucle du serveur ASGI (une par worker uvicorn) la boucle du
+    worker : les vues async y utilisent directement le client partagé, sans
+    thread dédié. Sans effet si une boucle est déjà en service.
+    """
+    global _worker_loop, _server_loop
+
+    with _worker_lock:
+        if _worker_loop is None or _worker_loop.is_closed():
+            _worker_loop = loop
+            _server_loop = True
+            logger.info("Prisma worker loop bound to the ASGI server loop")
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Boucle d'événements persistante du worker, exécutée dans un thread dédié"""
+    global _worker_loop, _worker_thread, _server_loop
+
+    with _worker_lock:
+        if _worker_loop is None or _worker_loop.is_closed():
+            _server_loop = False
+            _worker_loop = asyncio.new_event_loop()
+            _worker_thread = threading.Thread(
+                target=_worker_loop.run_forever,
+                name='prisma-worker-loop',
+                daemon=True
+            )
+            _worker_thread.start()
+        return _worker_loop
+
+
+def worker_async_to_sync(func: Callable[..., Awaitable[T]]) -> Callable[..., T]:
+    """
+    Équivalent de asgiref.async_to_sync qui exécute la coroutine sur la boucle
+    persistante du worker : le client Prisma partagé y reste connecté entre
+    les requêtes au lieu d'être recréé à chaque nouvelle boucle.
+    """
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        loop = _get_worker_loop()
+        if _running_loop() is loop:
+            # Attendre ici bloquerait la boucle qui doit exécuter la coroutine
+            raise RuntimeError(
+                "worker_async_to_sync() called from the worker event loop; "
+                "await the coroutine instead"
+            )
+        future = asyncio.run_coroutine_threadsafe(func(*args, **kwargs), loop)
+        return future.result()
+
+    return wrapper
+
+
+async def run_on_worker_loop(awaitable: Awaitable[T]) -> T:
+    """
+    Attendre une coroutine sur la boucle du worker : directement sous ASGI
+    (la boucle courante est celle du worker), sinon en la confiant à la
+    boucle persistante (boucle temporaire d'async_to_sync sous WSGI ou dans
+    le client de test).
+    """
+    loop = _get_worker_loop()
+    if asyncio.get_running_loop() is loop:
+        return await awaitable
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(awaitable, loop))
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def shutdown_prisma():
+    """Fermer proprement le client et la boucle du worker (arrêt du processus)"""
+    global _worker_loop, _worker_thread
+
+    with _worker_lock:
+        loop, thread, server_loop = _worker_loop, _worker_thread, _server_loop
+        _worker_loop, _worker_thread = None, None
+
+    if loop is None or loop.is_closed():
+        return
+
+    if server_loop:
+        # Le serveur ASGI déconnecte le client à l'arrêt (lifespan) et ferme sa boucle
+        return
+
+    try:
+        asyncio.run_coroutine_threadsafe(disconnect_prisma(), loop).result(timeout=10)
+    except Exception as e:
+        logger.error(f"Error disconnecting Prisma client: {str(e)}")
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+
+
+atexit.register(shutdown_prisma)